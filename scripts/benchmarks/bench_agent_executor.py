@@ -0,0 +1,127 @@
+"""
+Benchmark the memory and scheduling overhead per agent of running one task
+per agent versus the shared executor pool.
+
+Creates ``--agents`` GeneralAgent instances with a single cheap handler and
+measures, with tracemalloc, the memory the agents take once created and
+running but idle. Then ``--events`` events per agent are delivered through
+``add_event`` and the time until all are handled is reported, along with
+the peak memory while they are handled. Each handler awaits
+``--handler_ms`` milliseconds, standing in for a model call; with it set,
+the pool's throughput is bounded by ``--executors`` divided by that time.
+
+Usage:
+    python scripts/benchmarks/bench_agent_executor.py [--agents 10000] [--events 5] [--executors 64] [--handler_ms 0]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from loguru import logger  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+from onesim.agent import GeneralAgent  # noqa: E402
+from onesim.agent.executor import agent_executor  # noqa: E402
+from onesim.events import Event  # noqa: E402
+from onesim.relationship import RelationshipManager  # noqa: E402
+
+
+class TickEvent(Event):
+    def __init__(self, from_agent_id: str, to_agent_id: str, **kwargs):
+        super().__init__(from_agent_id=from_agent_id, to_agent_id=to_agent_id, **kwargs)
+
+
+class NullEnv:
+    """Swallows the events agents record for storage"""
+
+    async def queue_event(self, event_data):
+        pass
+
+
+class BenchAgent(GeneralAgent):
+    handled = 0
+    delay = 0.0
+
+    def __init__(self, agent_id: str):
+        self._bench_id = agent_id
+        super().__init__(relationship_manager=RelationshipManager(profile_id=agent_id))
+        self.env = NullEnv()
+        self.register_event("TickEvent", "handle_tick")
+
+    @property
+    def profile_id(self):
+        return self._bench_id
+
+    async def handle_tick(self, event):
+        await asyncio.sleep(BenchAgent.delay)
+        BenchAgent.handled += 1
+
+
+def measure() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def run_mode(label: str, args, executors: int):
+    agent_executor.configure(workers=executors, serialize=args.serialize)
+    BenchAgent.handled = 0
+    BenchAgent.delay = args.handler_ms / 1000.0
+
+    tracemalloc.start()
+    base = measure()
+    agents = [BenchAgent(f"agent_{i}") for i in range(args.agents)]
+    created = measure()
+
+    if executors:
+        tasks = [asyncio.create_task(agent_executor.run())]
+    else:
+        tasks = [asyncio.create_task(agent.run()) for agent in agents]
+    await asyncio.sleep(0)
+    running = measure()
+
+    tracemalloc.reset_peak()
+    total = args.agents * args.events
+    start = time.perf_counter()
+    for _ in range(args.events):
+        for agent in agents:
+            agent.add_event(TickEvent("bench", agent.profile_id))
+    while BenchAgent.handled < total:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"{label:<22} {(created - base) / args.agents:>10.0f} {(running - base) / args.agents:>12.0f} "
+          f"{(peak - base) / args.agents:>10.0f} {elapsed:>8.2f} {total / elapsed:>12.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=5, help="Events per agent")
+    parser.add_argument("--executors", type=int, default=64)
+    parser.add_argument("--handler_ms", type=float, default=0.0, help="Time each handler awaits")
+    parser.add_argument("--serialize", action="store_true", help="Run one agent's events one at a time in the pool")
+    args = parser.parse_args()
+
+    print(f"{args.agents} agents, {args.events} events each, handlers awaiting {args.handler_ms}ms")
+    print(f"{'mode':<22} {'B/agent':>10} {'B/agent run':>12} {'peak B':>10} {'time s':>8} {'events/s':>12}")
+    await run_mode("task per agent", args, 0)
+    await run_mode(f"pool ({args.executors} executors)", args, args.executors)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
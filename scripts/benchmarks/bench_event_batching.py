@@ -0,0 +1,213 @@
+"""
+Benchmark event throughput between nodes with one SendEvent RPC per event
+versus per-destination coalescing into SendEventBatch RPCs.
+
+Starts several local worker processes that each run a gRPC server which
+decodes and counts incoming events, then sends events from this process
+round-robin to all workers, first with one unary call per event and then
+through the EventBatcher. Per-destination ordering is checked on the
+receiving side. With ``--slow_ms`` the first worker handles every RPC that
+much slower, and the time until all other workers have received their
+events shows whether the slow worker holds them up.
+
+Usage:
+    python scripts/benchmarks/bench_event_batching.py [--workers 4] [--events 20000] [--batch_size 256]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from loguru import logger  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+from onesim.distribution.grpc_impl import agent_pb2, agent_pb2_grpc  # noqa: E402
+from onesim.distribution.connection_manager import connection_manager  # noqa: E402
+from onesim.distribution.event_batcher import EventBatcher  # noqa: E402
+from onesim.distribution.stream_transport import stream_transport  # noqa: E402
+
+BASE_PORT = 19300
+
+
+class CountingServicer(agent_pb2_grpc.AgentServiceServicer):
+    """Decodes events and counts them, checking that sequence numbers increase"""
+
+    def __init__(self, counter, violations, delay: float):
+        self.counter = counter
+        self.violations = violations
+        self.delay = delay
+        self.last_seq = -1
+
+    def _handle(self, proto_event):
+        payload = json.loads(proto_event.payload_json)
+        if payload["seq"] < self.last_seq:
+            self.violations.value += 1
+        self.last_seq = payload["seq"]
+
+    async def SendEvent(self, request, context):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self._handle(request)
+        self.counter.value += 1
+        return agent_pb2.EventResponse(received=True)
+
+    async def SendEventBatch(self, request, context):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        for proto_event in request.events:
+            self._handle(proto_event)
+        self.counter.value += len(request.events)
+        return agent_pb2.EventBatchResponse(received=True, processed_count=len(request.events))
+
+
+def run_worker(port: int, counter, violations, reset_flag, delay: float):
+    import grpc
+
+    async def serve():
+        server = grpc.aio.server()
+        servicer = CountingServicer(counter, violations, delay)
+        agent_pb2_grpc.add_AgentServiceServicer_to_server(servicer, server)
+        server.add_insecure_port(f"127.0.0.1:{port}")
+        await server.start()
+        while True:
+            await asyncio.sleep(0.05)
+            if reset_flag.value:
+                servicer.last_seq = -1
+                reset_flag.value = 0
+
+    asyncio.run(serve())
+
+
+def make_event(seq: int, target: str) -> agent_pb2.EventRequest:
+    payload = {"seq": seq, "message": "offer", "salary": 1000 + seq % 97, "skills": ["python", "sql"]}
+    return agent_pb2.EventRequest(
+        event_id=f"evt-{seq}",
+        event_kind="Event",
+        from_agent_id="sender",
+        to_agent_id=target,
+        timestamp=int(time.time() * 1000),
+        payload_json=json.dumps(payload),
+    )
+
+
+async def send_unary(destinations: List[Tuple[str, int]], events, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i, event):
+        address, port = destinations[i % len(destinations)]
+        async with semaphore:
+            await connection_manager.with_stub(address, port, agent_pb2_grpc.AgentServiceStub, "SendEvent", event)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, event) for i, event in enumerate(events)))
+    return time.perf_counter() - start
+
+
+async def send_batched(destinations: List[Tuple[str, int]], events, batch_size: int, wait_ms: float) -> float:
+    batcher = EventBatcher(batch_size=batch_size, max_wait_time=wait_ms / 1000)
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        address, port = destinations[i % len(destinations)]
+        await batcher.send(address, port, event)
+    await batcher.flush()
+    elapsed = time.perf_counter() - start
+    await batcher.stop()
+    return elapsed
+
+
+async def wait_for_count(counters, expected: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while sum(c.value for c in counters) < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def time_until_count(counters, expected: int, start: float) -> float:
+    while sum(c.value for c in counters) < expected:
+        await asyncio.sleep(0.005)
+    return time.perf_counter() - start
+
+
+async def bench(args, destinations, counters, violations, reset_flags):
+    # Compare against plain unary RPCs, not the multiplexed stream
+    stream_transport.configure(enabled=False)
+    events = [make_event(i, f"agent_{i % 1000}") for i in range(args.events)]
+    await connection_manager.preconnect(destinations)
+
+    # Warm up channels
+    await send_unary(destinations, events[:len(destinations) * 4], args.concurrency)
+    await wait_for_count(counters, len(destinations) * 4)
+
+    results = {}
+    for mode in ["unary", "batched"]:
+        for c in counters:
+            c.value = 0
+        for v in violations:
+            v.value = 0
+        for flag in reset_flags:
+            flag.value = 1
+        await asyncio.sleep(0.2)
+
+        # Events to the first worker are every len(destinations)-th one
+        others_expected = len(events) - len(events[::len(destinations)])
+        others = asyncio.create_task(time_until_count(counters[1:], others_expected, time.perf_counter()))
+        if mode == "unary":
+            elapsed = await send_unary(destinations, events, args.concurrency)
+        else:
+            elapsed = await send_batched(destinations, events, args.batch_size, args.wait_ms)
+        others_elapsed = await others
+        await wait_for_count(counters, len(events))
+        received = sum(c.value for c in counters)
+        results[mode] = (elapsed, others_elapsed, received, sum(v.value for v in violations))
+
+    await connection_manager.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch_size", type=int, default=256)
+    parser.add_argument("--wait_ms", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight unary RPCs")
+    parser.add_argument("--slow_ms", type=float, default=0.0, help="Extra handling time per RPC on the first worker")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    counters = [ctx.Value("l", 0, lock=False) for _ in range(args.workers)]
+    violations = [ctx.Value("l", 0, lock=False) for _ in range(args.workers)]
+    reset_flags = [ctx.Value("i", 0, lock=False) for _ in range(args.workers)]
+    destinations = [("127.0.0.1", BASE_PORT + i) for i in range(args.workers)]
+    processes = [
+        ctx.Process(target=run_worker, daemon=True,
+                    args=(port, counters[i], violations[i], reset_flags[i], args.slow_ms / 1000 if i == 0 else 0.0))
+        for i, (_, port) in enumerate(destinations)
+    ]
+    for p in processes:
+        p.start()
+    time.sleep(1.0)
+
+    try:
+        results = asyncio.run(bench(args, destinations, counters, violations, reset_flags))
+    finally:
+        for p in processes:
+            p.terminate()
+
+    print(f"{args.events} events to {args.workers} workers")
+    print(f"{'mode':<8} {'time':>8} {'events/s':>10} {'others done':>12} {'received':>9} {'out of order':>13}")
+    for mode, (elapsed, others_elapsed, received, disorder) in results.items():
+        print(f"{mode:<8} {elapsed:>7.2f}s {args.events / elapsed:>10.0f} {others_elapsed:>11.2f}s "
+              f"{received:>9} {disorder:>13}")
+
+
+if __name__ == "__main__":
+    main()
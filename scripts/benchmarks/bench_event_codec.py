@@ -0,0 +1,110 @@
+"""
+Microbenchmark event encoding and decoding for inter-node transport.
+
+Builds one sample instance of every event class in a scenario's events.py,
+filling declared fields with values of their annotated type, plus a variant
+of each that carries a numpy embedding. Each event is converted with
+``event_to_proto``/``proto_to_event`` and serialized to bytes, as it travels
+between nodes, using the JSON payload and the msgpack codec. Reports time
+per event and wire size.
+
+Usage:
+    python scripts/benchmarks/bench_event_codec.py [--env scientific_management_theory] [--embedding_dim 1536]
+"""
+
+import argparse
+import importlib
+import inspect
+import os
+import sys
+import time
+import typing
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+import numpy as np  # noqa: E402
+from loguru import logger  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+from onesim.events import Event  # noqa: E402
+from onesim.distribution.grpc_impl import agent_pb2, event_to_proto, proto_to_event  # noqa: E402
+from onesim.distribution.event_codec import HEADER_FIELDS, event_codec  # noqa: E402
+
+
+def sample_value(annotation: Any, rng: np.random.Generator) -> Any:
+    origin = typing.get_origin(annotation) or annotation
+    if origin in (list, List):
+        return [f"item_{i}" for i in range(8)]
+    if origin in (dict, Dict):
+        return {f"key_{i}": float(rng.random()) for i in range(8)}
+    if origin is int:
+        return int(rng.integers(0, 10000))
+    if origin is float:
+        return float(rng.random())
+    if origin is bool:
+        return True
+    return "a sample value of moderate length for a text field " * 2
+
+
+def build_events(module, embedding_dim: int) -> List[Tuple[str, Event]]:
+    rng = np.random.default_rng(0)
+    events = []
+    for name, cls in inspect.getmembers(module, inspect.isclass):
+        if not issubclass(cls, Event) or cls.__module__ != module.__name__:
+            continue
+        kwargs = {
+            p.name: sample_value(p.annotation, rng)
+            for p in inspect.signature(cls.__init__).parameters.values()
+            if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+            and p.name not in HEADER_FIELDS and p.name != "self"
+        }
+        events.append((name, cls(from_agent_id="agent_1", to_agent_id="agent_2", **kwargs)))
+        with_embedding = cls(from_agent_id="agent_1", to_agent_id="agent_2", **kwargs)
+        with_embedding.embedding = rng.random(embedding_dim, dtype=np.float32)
+        events.append((f"{name}+emb", with_embedding))
+    return events
+
+
+def time_per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def measure(event: Event, repeat: int) -> Tuple[float, float, int]:
+    wire = event_to_proto(event).SerializeToString()
+    encode = time_per_call(lambda: event_to_proto(event).SerializeToString(), repeat)
+    decode = time_per_call(lambda: proto_to_event(agent_pb2.EventRequest.FromString(wire)), repeat)
+    return encode, decode, len(wire)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", default="scientific_management_theory")
+    parser.add_argument("--embedding_dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    module = importlib.import_module(f"envs.{args.env}.code.events")
+    events = build_events(module, args.embedding_dim)
+
+    results: Dict[str, Dict[str, Tuple[float, float, int]]] = {}
+    for codec in ["json", "msgpack"]:
+        event_codec.configure(codec)
+        results[codec] = {name: measure(event, args.repeat) for name, event in events}
+
+    print(f"{'event':<40} {'json enc':>9} {'json dec':>9} {'bytes':>7} "
+          f"{'mp enc':>9} {'mp dec':>9} {'bytes':>7}")
+    for name, _ in events:
+        je, jd, jb = results["json"][name]
+        me, md, mb = results["msgpack"][name]
+        print(f"{name:<40} {je * 1e6:>7.1f}us {jd * 1e6:>7.1f}us {jb:>7} "
+              f"{me * 1e6:>7.1f}us {md * 1e6:>7.1f}us {mb:>7}")
+
+
+if __name__ == "__main__":
+    main()
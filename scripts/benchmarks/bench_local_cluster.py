@@ -0,0 +1,182 @@
+"""
+Benchmark how event throughput scales with the number of worker processes
+of a local cluster.
+
+Each worker process runs a gRPC server that handles incoming events with a
+fixed amount of pure-Python work per event (decoding the payload and scoring
+it against stored memories), standing in for the CPU-bound part of an
+agent's handler. This process sends events round-robin to the workers over
+Unix domain sockets, as ``--mode local_cluster`` does, and measures the time
+until all of them are handled. The first row handles the same events in this
+process on one event loop, as single mode does. With ``--tcp`` the workers
+listen on loopback TCP instead, for comparison.
+
+Usage:
+    python scripts/benchmarks/bench_local_cluster.py [--processes 1,2,4] [--events 20000] [--work 300]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from loguru import logger  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+from onesim.distribution.grpc_impl import agent_pb2, agent_pb2_grpc  # noqa: E402
+from onesim.distribution.connection_manager import connection_manager  # noqa: E402
+from onesim.distribution.event_batcher import EventBatcher  # noqa: E402
+from onesim.distribution.stream_transport import stream_transport  # noqa: E402
+
+BASE_PORT = 19400
+
+
+def handle_event(payload_json: str, work: int) -> float:
+    """Decode an event and score it against ``work`` stored memories"""
+    payload = json.loads(payload_json)
+    query = payload["embedding"]
+    best = 0.0
+    for i in range(work):
+        score = 0.0
+        for j, value in enumerate(query):
+            score += value * ((i * 31 + j) % 17 - 8)
+        best = max(best, score)
+    return best
+
+
+class WorkServicer(agent_pb2_grpc.AgentServiceServicer):
+    def __init__(self, counter, work: int):
+        self.counter = counter
+        self.work = work
+
+    async def SendEventBatch(self, request, context):
+        for proto_event in request.events:
+            handle_event(proto_event.payload_json, self.work)
+        self.counter.value += len(request.events)
+        return agent_pb2.EventBatchResponse(received=True, processed_count=len(request.events))
+
+
+def run_worker(target: str, counter, work: int):
+    import grpc
+
+    async def serve():
+        server = grpc.aio.server()
+        agent_pb2_grpc.add_AgentServiceServicer_to_server(WorkServicer(counter, work), server)
+        server.add_insecure_port(target)
+        await server.start()
+        await server.wait_for_termination()
+
+    asyncio.run(serve())
+
+
+def make_event(seq: int) -> agent_pb2.EventRequest:
+    payload = {"seq": seq, "message": "offer", "embedding": [((seq + j) % 13) / 13 for j in range(16)]}
+    return agent_pb2.EventRequest(
+        event_id=f"evt-{seq}",
+        event_kind="Event",
+        from_agent_id="sender",
+        to_agent_id=f"agent_{seq % 1000}",
+        timestamp=int(time.time() * 1000),
+        payload_json=json.dumps(payload),
+    )
+
+
+async def run_single(events, work: int) -> float:
+    """Handle all events on this process's event loop"""
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        handle_event(event.payload_json, work)
+        if i % 64 == 0:
+            await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+async def run_cluster(destinations: List[Tuple[str, int]], counters, events) -> float:
+    stream_transport.configure(enabled=False)
+    batcher = EventBatcher(batch_size=64, max_wait_time=0.002)
+    # Warm up channels
+    for address, port in destinations:
+        await batcher.send(address, port, events[0])
+    await batcher.flush()
+    while sum(c.value for c in counters) < len(destinations):
+        await asyncio.sleep(0.01)
+    for c in counters:
+        c.value = 0
+
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        address, port = destinations[i % len(destinations)]
+        await batcher.send(address, port, event)
+    await batcher.flush()
+    while sum(c.value for c in counters) < len(events):
+        await asyncio.sleep(0.002)
+    elapsed = time.perf_counter() - start
+    await batcher.stop()
+    await connection_manager.stop()
+    return elapsed
+
+
+def bench_processes(n: int, events, args, socket_dir: str) -> float:
+    ctx = mp.get_context("spawn")
+    counters = [ctx.Value("l", 0, lock=False) for _ in range(n)]
+    if args.tcp:
+        destinations = [("127.0.0.1", BASE_PORT + i) for i in range(n)]
+        targets = [f"127.0.0.1:{port}" for _, port in destinations]
+    else:
+        destinations = [(f"unix:{os.path.join(socket_dir, f'worker-{i}.sock')}", BASE_PORT + i) for i in range(n)]
+        targets = [address for address, _ in destinations]
+    processes = [ctx.Process(target=run_worker, daemon=True, args=(targets[i], counters[i], args.work))
+                 for i in range(n)]
+    for p in processes:
+        p.start()
+    if args.tcp:
+        time.sleep(1.0)
+    else:
+        deadline = time.monotonic() + 30
+        while not all(os.path.exists(t[len("unix:"):]) for t in targets) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    try:
+        return asyncio.run(run_cluster(destinations, counters, events))
+    finally:
+        for p in processes:
+            p.terminate()
+            p.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=str, default="1,2,4", help="Comma-separated worker process counts")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--work", type=int, default=300, help="Stored memories scored per event")
+    parser.add_argument("--tcp", action="store_true", help="Use loopback TCP instead of Unix domain sockets")
+    args = parser.parse_args()
+
+    events = [make_event(i) for i in range(args.events)]
+    socket_dir = tempfile.mkdtemp(prefix="onesim-bench-")
+    try:
+        baseline = asyncio.run(run_single(events, args.work))
+        results = [("single", baseline)]
+        for n in [int(value) for value in args.processes.split(",")]:
+            results.append((f"{n} workers", bench_processes(n, events, args, socket_dir)))
+    finally:
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+    print(f"{args.events} events, {args.work} memories scored per event, "
+          f"{'TCP' if args.tcp else 'Unix domain sockets'}, {os.cpu_count()} CPUs")
+    print(f"{'mode':<12} {'time':>8} {'events/s':>10} {'speedup':>8}")
+    for mode, elapsed in results:
+        print(f"{mode:<12} {elapsed:>7.2f}s {args.events / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
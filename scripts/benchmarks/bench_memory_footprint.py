@@ -0,0 +1,171 @@
+"""
+Benchmark the memory taken per agent and per memory item by the core
+objects, slot-based as they are now versus dict-backed as they were.
+
+Builds ``--agents`` agents the way a worker does from decoded configs: an
+``AgentProfile``, a ``RelationshipManager`` with ``--relationships``
+relationships whose target info is the target's public profile, and
+``--memories`` ``MemoryItem`` instances with ``--dim`` dimensional
+embeddings as returned by an embedding model. The "dict-backed" columns use
+local copies of the previous classes: a schema per agent, a
+``__dict__`` per object, a copy of the target info per relationship and
+embeddings kept as the model's lists of floats. Memory is measured with
+tracemalloc.
+
+Usage:
+    python scripts/benchmarks/bench_memory_footprint.py [--agents 2000] [--relationships 10] [--memories 20] [--dim 256]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from onesim.memory.memory_item import MemoryItem  # noqa: E402
+from onesim.profile import AgentProfile, AgentSchema  # noqa: E402
+from onesim.relationship import RelationshipManager  # noqa: E402
+from onesim.relationship.manager import target_info_pool  # noqa: E402
+
+SCHEMA = {
+    "name": {"type": "str", "default": ""},
+    "age": {"type": "int", "default": 0},
+    "occupation": {"type": "str", "default": ""},
+    "wealth": {"type": "float", "default": 0.0, "private": True},
+}
+
+
+class DictProfile:
+    def __init__(self, agent_type, schema, profile_data):
+        self.schema = schema
+        self._public_fields = {}
+        self._private_fields = {}
+        for key, value in schema.schema.items():
+            fields = self._private_fields if value.get("private", False) else self._public_fields
+            fields[key] = profile_data.get(key, value.get("default"))
+        self._public_fields["agent_type"] = agent_type
+
+
+class DictSchema:
+    def __init__(self, schema):
+        self.schema = schema
+
+
+class DictRelationship:
+    def __init__(self, source_id, target_id, description, target_info=None):
+        self.source_id = source_id
+        self.target_id = target_id
+        self.description = description
+        self.target_info = target_info
+
+
+class DictMemoryItem:
+    def __init__(self, agent_id, content, attributes=None, embedding=None):
+        self.agent_id = agent_id
+        self.id = uuid.uuid4()
+        self.content = content
+        self.timestamp = time.time()
+        self.attributes = attributes if attributes is not None else {}
+        self.embedding = embedding
+
+
+def make_configs(args):
+    """Agent configs as a worker receives them, decoded from JSON one agent at a time"""
+    rng = random.Random(0)
+    profiles = [{"name": f"agent {i}", "age": rng.randint(18, 80), "occupation": rng.choice(["farmer", "trader"]),
+                 "wealth": rng.random() * 100} for i in range(args.agents)]
+    configs = []
+    for i in range(args.agents):
+        relationships = []
+        for target in rng.sample(range(args.agents), min(args.relationships, args.agents)):
+            info = {k: v for k, v in profiles[target].items() if not SCHEMA[k].get("private")}
+            info["agent_type"] = "Person"
+            relationships.append({"target_id": f"agent_{target}", "description": "knows", "target_info": info})
+        configs.append(json.dumps({"type": "Person", "id": f"agent_{i}", "schema": SCHEMA,
+                                   "profile_data": profiles[i], "relationships": relationships}))
+    return configs
+
+
+def embeddings(args):
+    rng = random.Random(1)
+    return [[rng.random() for _ in range(args.dim)] for _ in range(args.memories)]
+
+
+def build_slotted(configs, args):
+    agents, schemas = [], {}
+    for raw in configs:
+        config = json.loads(raw)
+        agent_type = config["type"]
+        schema = schemas.get(agent_type)
+        if schema is None:
+            schema = schemas[agent_type] = AgentSchema(config["schema"])
+        profile = AgentProfile(agent_type, schema, profile_data=config["profile_data"])
+        rm = RelationshipManager(profile_id=config["id"])
+        for rel in config["relationships"]:
+            rm.add_relationship(rel["target_id"], rel["description"], rel["target_info"])
+        agents.append((profile, rm, []))
+    return agents
+
+
+def build_dict(configs, args):
+    agents = []
+    for raw in configs:
+        config = json.loads(raw)
+        profile = DictProfile(config["type"], DictSchema(config["schema"]), config["profile_data"])
+        relationships = {rel["target_id"]: DictRelationship(config["id"], rel["target_id"], rel["description"],
+                                                            rel["target_info"])
+                         for rel in config["relationships"]}
+        agents.append((profile, relationships, []))
+    return agents
+
+
+def measure() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def run_mode(label, build, item_cls, configs, args):
+    vectors = [json.dumps(vector) for vector in embeddings(args)]
+    tracemalloc.start()
+    base = measure()
+    agents = build(configs, args)
+    built = measure()
+    for i, (_, _, memories) in enumerate(agents):
+        for j in range(args.memories):
+            # 每条记忆一个新解码的embedding列表，如同模型接口返回的结果
+            memories.append(item_cls(f"agent_{i}", f"memory {j} of agent {i}", {"step": j}, json.loads(vectors[j])))
+    filled = measure()
+    tracemalloc.stop()
+
+    items = args.agents * args.memories
+    print(f"{label:<14} {(built - base) / args.agents:>12.0f} {(filled - built) / max(items, 1):>12.0f} "
+          f"{(filled - base) / args.agents:>14.0f}")
+    return agents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--relationships", type=int, default=10, help="Relationships per agent")
+    parser.add_argument("--memories", type=int, default=20, help="Memory items per agent")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimension")
+    args = parser.parse_args()
+
+    configs = make_configs(args)
+    print(f"{args.agents} agents, {args.relationships} relationships and {args.memories} memories "
+          f"of dimension {args.dim} each")
+    print(f"{'mode':<14} {'B/agent':>12} {'B/memory':>12} {'B/agent total':>14}")
+    run_mode("dict-backed", build_dict, DictMemoryItem, configs, args)
+    agents = run_mode("slots", build_slotted, MemoryItem, configs, args)
+    # 目标信息池弱引用持有，需在Agent仍存在时统计
+    print(f"shared target infos: {len(target_info_pool)} for {len(agents)} agents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark time-to-first-token (TTFT) for agent prompts against stub backends
+that simulate vLLM-style automatic prefix caching.
+
+Compares the legacy prompt layout (profile, memory, relationships, observation
+and instruction mixed in one user message) with the prefix-stable layout
+(system prompt, profile and guidelines first; relationships, which vary with
+the action, in the suffix), under the round_robin and consistent_hash load
+balancing strategies.
+
+Usage:
+    python scripts/benchmarks/bench_prefix_cache.py [--agents 64] [--steps 8] [--backends 4]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from onesim.models import LoadBalancer, ModelAdapterBase, ModelResponse  # noqa: E402
+
+BLOCK_SIZE = 16  # Tokens per KV cache block, as in vLLM
+
+
+class PrefixCacheStubModel(ModelAdapterBase):
+    """
+    Stub chat backend with an LRU prefix cache over fixed-size token blocks.
+
+    Prefill time is proportional to the number of prompt tokens that are not
+    covered by cached blocks; the response is returned after that delay, so the
+    measured latency is the time to first token.
+    """
+
+    def __init__(self, config_name: str, capacity_blocks: int, base_latency: float, per_token_latency: float):
+        super().__init__(config_name=config_name)
+        self.capacity_blocks = capacity_blocks
+        self.base_latency = base_latency
+        self.per_token_latency = per_token_latency
+        self._blocks: "OrderedDict[str, None]" = OrderedDict()
+        self.hit_tokens = 0
+        self.prompt_tokens = 0
+
+    def format(self, *args):
+        return self.format_for_common_chat_models(*args)
+
+    def _prefill(self, messages: List[Dict[str, Any]]) -> int:
+        """Return the number of uncached tokens and update the cache."""
+        tokens = " ".join(f"<{m['role']}> {m['content']}" for m in messages).split()
+        digest = hashlib.sha1()
+        cached = 0
+        prefix_hit = True
+        for start in range(0, len(tokens) - BLOCK_SIZE + 1, BLOCK_SIZE):
+            digest.update(" ".join(tokens[start:start + BLOCK_SIZE]).encode("utf-8"))
+            key = digest.hexdigest()
+            if prefix_hit and key in self._blocks:
+                self._blocks.move_to_end(key)
+                cached += BLOCK_SIZE
+                continue
+            prefix_hit = False
+            self._blocks[key] = None
+            if len(self._blocks) > self.capacity_blocks:
+                self._blocks.popitem(last=False)
+        self.hit_tokens += cached
+        self.prompt_tokens += len(tokens)
+        return len(tokens) - cached
+
+    def _response(self) -> ModelResponse:
+        return ModelResponse(text="{}", model_info={"model_name": self.config_name})
+
+    def __call__(self, messages, **kwargs) -> ModelResponse:
+        uncached = self._prefill(messages)
+        time.sleep(self.base_latency + uncached * self.per_token_latency)
+        return self._response()
+
+    def list_models(self) -> List[str]:
+        return [self.model_name]
+
+    async def alist_models(self) -> List[str]:
+        return self.list_models()
+
+    async def acall(self, messages, **kwargs) -> ModelResponse:
+        uncached = self._prefill(messages)
+        await asyncio.sleep(self.base_latency + uncached * self.per_token_latency)
+        return self._response()
+
+
+def _words(rng: random.Random, count: int) -> str:
+    vocabulary = ["market", "salary", "skill", "offer", "interview", "channel", "company",
+                  "position", "experience", "region", "contract", "budget", "training", "demand"]
+    return " ".join(rng.choice(vocabulary) for _ in range(count))
+
+
+def build_agents(count: int, seed: int) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"agent_{i}",
+            "profile": _words(rng, 400),
+            "relationships": _words(rng, 150),
+        }
+        for i in range(count)
+    ]
+
+
+SYS_PROMPT = "You are an intelligent agent. " + "Respond according to your profile. " * 20
+GUIDELINES = "Use only Target IDs from the Relationships data and respond in JSON. " * 10
+
+
+def legacy_messages(agent: Dict[str, str], memory: str, observation: str, instruction: str):
+    text = (f"### Agent Profile:\n{agent['profile']}\n\n### Memory:\n{memory}\n\n"
+            f"### Relationship:\n{agent['relationships']}\n\n### Observation:\n{observation}\n\n"
+            f"### Instruction:\n{instruction}\n\n{GUIDELINES}")
+    return [{"role": "system", "content": SYS_PROMPT}, {"role": "user", "content": text}]
+
+
+def prefix_messages(agent: Dict[str, str], memory: str, observation: str, instruction: str):
+    prefix = f"{SYS_PROMPT}\n\n### Agent Profile:\n{agent['profile']}\n\n### Guidelines:\n{GUIDELINES}"
+    text = (f"### Relationship:\n{agent['relationships']}\n\n### Memory:\n{memory}\n\n"
+            f"### Observation:\n{observation}\n\n### Instruction:\n{instruction}")
+    return [{"role": "system", "content": prefix}, {"role": "user", "content": text}]
+
+
+async def run_case(layout, strategy: str, args) -> Dict[str, float]:
+    backends = [
+        PrefixCacheStubModel(f"stub-{i}", args.capacity_blocks, args.base_latency, args.per_token_latency)
+        for i in range(args.backends)
+    ]
+    balancer = LoadBalancer(config_name="bench", models=backends, strategy=strategy)
+    balancer.initialize_models()
+    agents = build_agents(args.agents, args.seed)
+    rng = random.Random(args.seed + 1)
+    latencies = []
+
+    for _ in range(args.steps):
+        # Agents act in a different order every step, as in a real simulation
+        rng.shuffle(agents)
+
+        async def one(agent):
+            messages = layout(agent, _words(rng, 120), _words(rng, 60), _words(rng, 40))
+            start = time.perf_counter()
+            await balancer.acall(messages, routing_key=agent["id"])
+            latencies.append(time.perf_counter() - start)
+        await asyncio.gather(*(one(agent) for agent in agents))
+
+    hit = sum(b.hit_tokens for b in backends)
+    total = sum(b.prompt_tokens for b in backends)
+    latencies.sort()
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "hit_rate": hit / total if total else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--backends", type=int, default=4)
+    parser.add_argument("--capacity_blocks", type=int, default=2048, help="KV cache blocks per backend")
+    parser.add_argument("--base_latency", type=float, default=0.005, help="Fixed TTFT overhead (s)")
+    parser.add_argument("--per_token_latency", type=float, default=0.00005, help="Prefill time per token (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'layout':<8} {'strategy':<16} {'mean TTFT':>10} {'p50':>8} {'p95':>8} {'cache hit':>10}")
+    for layout_name, layout in [("legacy", legacy_messages), ("prefix", prefix_messages)]:
+        for strategy in ["round_robin", "consistent_hash"]:
+            result = await run_case(layout, strategy, args)
+            print(f"{layout_name:<8} {strategy:<16} {result['mean'] * 1000:>8.1f}ms "
+                  f"{result['p50'] * 1000:>6.1f}ms {result['p95'] * 1000:>6.1f}ms {result['hit_rate']:>10.1%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
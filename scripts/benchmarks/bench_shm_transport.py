@@ -0,0 +1,181 @@
+"""
+Benchmark node-to-node calls between processes on one host over gRPC
+(unary RPCs and the Channel stream) versus shared memory ring buffers.
+
+Starts local worker processes that each run a gRPC server on a Unix domain
+socket, as ``--mode local_cluster`` does, with a minimal servicer
+(GetEnvData echoes the key, SendEventBatch decodes and counts msgpack event
+payloads) that also serves the Channel stream and shared memory sessions.
+Calls go through ``connection_manager.with_stub`` as in the simulator, once
+per transport. Reports per-call latency of sequential GetEnvData calls and
+events per second of concurrent SendEventBatch calls. With ``--tcp`` the
+workers listen on loopback TCP instead.
+
+Usage:
+    python scripts/benchmarks/bench_shm_transport.py [--workers 2] [--calls 2000] [--batch 16] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import msgpack
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from loguru import logger  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+from onesim.distribution.grpc_impl import agent_pb2, agent_pb2_grpc  # noqa: E402
+from onesim.distribution.connection_manager import connection_manager  # noqa: E402
+from onesim.distribution.shm_transport import shm_transport  # noqa: E402
+from onesim.distribution.stream_transport import serve_channel, stream_transport  # noqa: E402
+
+BASE_PORT = 19400
+
+
+class EchoServicer(agent_pb2_grpc.AgentServiceServicer):
+    async def SendEventBatch(self, request, context):
+        for proto_event in request.events:
+            msgpack.unpackb(proto_event.payload)
+        return agent_pb2.EventBatchResponse(received=True, processed_count=len(request.events))
+
+    async def GetEnvData(self, request, context):
+        return agent_pb2.EnvDataResponse(success=True, value_json=json.dumps(request.key))
+
+    async def OpenSharedMemory(self, request, context):
+        return await shm_transport.accept(self, request)
+
+    async def Channel(self, request_iterator, context):
+        async for reply in serve_channel(self, request_iterator, context):
+            yield reply
+
+
+def run_worker(target: str):
+    import grpc
+
+    async def serve():
+        shm_transport.configure(enabled=True)
+        server = grpc.aio.server()
+        agent_pb2_grpc.add_AgentServiceServicer_to_server(EchoServicer(), server)
+        server.add_insecure_port(target)
+        await server.start()
+        await server.wait_for_termination()
+
+    asyncio.run(serve())
+
+
+def make_event(seq: int) -> agent_pb2.EventRequest:
+    # Same layout as the event codec: [fingerprint, values, extras]
+    payload = [0, [], {"seq": seq, "message": "offer", "salary": 1000 + seq % 97, "skills": ["python", "sql"]}]
+    return agent_pb2.EventRequest(
+        event_id=f"evt-{seq}",
+        event_kind="Event",
+        from_agent_id="sender",
+        to_agent_id=f"agent_{seq % 1000}",
+        timestamp=int(time.time() * 1000),
+        payload=msgpack.packb(payload, use_bin_type=True),
+    )
+
+
+async def measure_latency(destinations, calls: int):
+    latencies = []
+    for i in range(calls):
+        address, port = destinations[i % len(destinations)]
+        start = time.perf_counter()
+        await connection_manager.with_stub(address, port, agent_pb2_grpc.AgentServiceStub, "GetEnvData",
+                                           agent_pb2.EnvDataRequest(key=f"key_{i}"))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def measure_throughput(destinations, batches, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i, batch):
+        address, port = destinations[i % len(destinations)]
+        async with semaphore:
+            await connection_manager.with_stub(address, port, agent_pb2_grpc.AgentServiceStub, "SendEventBatch",
+                                               batch)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, batch) for i, batch in enumerate(batches)))
+    return sum(len(batch.events) for batch in batches) / (time.perf_counter() - start)
+
+
+async def bench(args, destinations):
+    batches = [agent_pb2.EventBatchRequest(events=[make_event(i * args.batch + j) for j in range(args.batch)])
+               for i in range(args.calls * 4)]
+    results = {}
+    for mode in ["unary", "stream", "shm"]:
+        stream_transport.configure(enabled=(mode == "stream"))
+        shm_transport.configure(enabled=(mode == "shm"))
+        # Warm up channels, streams and shared memory sessions
+        await measure_latency(destinations, len(destinations) * 20)
+        mean, p50, p99 = await measure_latency(destinations, args.calls)
+        throughput = await measure_throughput(destinations, batches, args.concurrency)
+        results[mode] = (mean, p50, p99, throughput)
+    await shm_transport.close()
+    await stream_transport.close()
+    await connection_manager.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=16, help="Events per SendEventBatch call")
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight calls in the throughput test")
+    parser.add_argument("--tcp", action="store_true", help="Use loopback TCP instead of Unix domain sockets")
+    parser.add_argument("--serve", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        run_worker(args.serve)
+        return
+
+    socket_dir = tempfile.mkdtemp(prefix="onesim-bench-")
+    if args.tcp:
+        destinations = [("127.0.0.1", BASE_PORT + i) for i in range(args.workers)]
+        targets = [f"127.0.0.1:{port}" for _, port in destinations]
+    else:
+        destinations = [(f"unix:{os.path.join(socket_dir, f'worker-{i}.sock')}", BASE_PORT + i)
+                        for i in range(args.workers)]
+        targets = [address for address, _ in destinations]
+    # Separate interpreters, like the node processes of a local cluster
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", target])
+                 for target in targets]
+    if args.tcp:
+        time.sleep(1.0)
+    else:
+        deadline = time.monotonic() + 30
+        while not all(os.path.exists(t[len("unix:"):]) for t in targets) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    try:
+        results = asyncio.run(bench(args, destinations))
+    finally:
+        for p in processes:
+            p.terminate()
+            p.wait()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+    print(f"{args.workers} workers, {'TCP' if args.tcp else 'Unix domain sockets'}, "
+          f"{args.batch} events per batch, {os.cpu_count()} CPUs")
+    print(f"{'transport':<10} {'mean':>9} {'p50':>9} {'p99':>9} {'events/s':>10}")
+    for mode, (mean, p50, p99, throughput) in results.items():
+        print(f"{mode:<10} {mean * 1000:>7.3f}ms {p50 * 1000:>7.3f}ms {p99 * 1000:>7.3f}ms {throughput:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark node-to-node calls over unary RPCs versus the multiplexed
+bidirectional Channel stream.
+
+Starts several local worker processes that each run a gRPC server with a
+minimal servicer (SendEvent counts events, GetEnvData echoes the key) that
+also serves the Channel stream. Calls go through
+``connection_manager.with_stub`` as in the simulator, once with the stream
+transport disabled and once with it enabled. Reports per-call latency of
+sequential GetEnvData calls and throughput of concurrent SendEvent calls.
+
+Usage:
+    python scripts/benchmarks/bench_stream_transport.py [--workers 2] [--calls 2000] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from loguru import logger  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+from onesim.distribution.grpc_impl import agent_pb2, agent_pb2_grpc  # noqa: E402
+from onesim.distribution.connection_manager import connection_manager  # noqa: E402
+from onesim.distribution.stream_transport import serve_channel, stream_transport  # noqa: E402
+
+BASE_PORT = 19400
+
+
+class EchoServicer(agent_pb2_grpc.AgentServiceServicer):
+    def __init__(self, counter):
+        self.counter = counter
+
+    async def SendEvent(self, request, context):
+        json.loads(request.payload_json)
+        self.counter.value += 1
+        return agent_pb2.EventResponse(received=True)
+
+    async def GetEnvData(self, request, context):
+        return agent_pb2.EnvDataResponse(success=True, value_json=json.dumps(request.key))
+
+    async def Channel(self, request_iterator, context):
+        async for reply in serve_channel(self, request_iterator, context):
+            yield reply
+
+
+def run_worker(port: int, counter):
+    import grpc
+
+    async def serve():
+        server = grpc.aio.server()
+        agent_pb2_grpc.add_AgentServiceServicer_to_server(EchoServicer(counter), server)
+        server.add_insecure_port(f"127.0.0.1:{port}")
+        await server.start()
+        await server.wait_for_termination()
+
+    asyncio.run(serve())
+
+
+def make_event(seq: int) -> agent_pb2.EventRequest:
+    payload = {"seq": seq, "message": "offer", "salary": 1000 + seq % 97, "skills": ["python", "sql"]}
+    return agent_pb2.EventRequest(
+        event_id=f"evt-{seq}",
+        event_kind="Event",
+        from_agent_id="sender",
+        to_agent_id=f"agent_{seq % 1000}",
+        timestamp=int(time.time() * 1000),
+        payload_json=json.dumps(payload),
+    )
+
+
+async def measure_latency(destinations, calls: int):
+    latencies = []
+    for i in range(calls):
+        address, port = destinations[i % len(destinations)]
+        start = time.perf_counter()
+        await connection_manager.with_stub(address, port, agent_pb2_grpc.AgentServiceStub, "GetEnvData",
+                                           agent_pb2.EnvDataRequest(key=f"key_{i}"))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def measure_throughput(destinations, calls: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        address, port = destinations[i % len(destinations)]
+        async with semaphore:
+            await connection_manager.with_stub(address, port, agent_pb2_grpc.AgentServiceStub, "SendEvent",
+                                               make_event(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+async def bench(args, destinations):
+    results = {}
+    for mode in ["unary", "stream"]:
+        stream_transport.configure(enabled=(mode == "stream"))
+        # Warm up channels and streams
+        await measure_latency(destinations, len(destinations) * 20)
+        mean, p50, p99 = await measure_latency(destinations, args.calls)
+        throughput = await measure_throughput(destinations, args.calls * 4, args.concurrency)
+        results[mode] = (mean, p50, p99, throughput)
+    await stream_transport.close()
+    await connection_manager.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64, help="In-flight calls in the throughput test")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    counters = [ctx.Value("l", 0, lock=False) for _ in range(args.workers)]
+    destinations = [("127.0.0.1", BASE_PORT + i) for i in range(args.workers)]
+    processes = [ctx.Process(target=run_worker, args=(port, counters[i]), daemon=True)
+                 for i, (_, port) in enumerate(destinations)]
+    for p in processes:
+        p.start()
+    time.sleep(1.0)
+
+    try:
+        results = asyncio.run(bench(args, destinations))
+    finally:
+        for p in processes:
+            p.terminate()
+
+    print(f"{'transport':<10} {'mean':>9} {'p50':>9} {'p99':>9} {'calls/s':>10}")
+    for mode, (mean, p50, p99, throughput) in results.items():
+        print(f"{mode:<10} {mean * 1000:>7.3f}ms {p50 * 1000:>7.3f}ms {p99 * 1000:>7.3f}ms {throughput:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ required_packages = [
     "grpcio>=1.70.0",
     "httpx>=0.28.1",
     "loguru>=0.6.0",
+    "msgpack>=1.0.0",
     "matplotlib>=3.10.3",
     "networkx>=3.4.2",
     "numpy>=2.2.5",
@@ -31,7 +31,10 @@ import onesim
 from onesim.simulator import AgentFactory
 from onesim.config import get_config,get_component_registry
 from onesim.utils.work_graph import WorkGraph
-from onesim.events.eventbus import get_event_bus,reset_event_bus
+from onesim.events.eventbus import reset_event_bus
+from onesim.simulator.sharded_event_bus import (enable_event_bus_sharding, get_dispatching_event_bus,
+                                                reset_event_bus_sharding)
+from onesim.utils.event_priority import event_priorities
 from onesim.monitor import MonitorManager
 from onesim.simulator.sim_env import SimulationState
 
@@ -144,6 +147,14 @@ async def initialize_simulation(env_name: str, model_name: str = None) -> dict:
             logger.error(f"加载环境类错误: {e}")
             raise Exception(f"无法加载环境类: {str(e)}")
 
+        # 事件优先级和分片分发，需在创建代理之前配置
+        env_settings = config.simulator_config.environment
+        event_priorities.configure(
+            enabled=env_settings.get("event_priorities", False),
+            aging=env_settings.get("event_priority_aging", 10.0)
+        )
+        enable_event_bus_sharding(env_settings.get("event_bus_shards", 1))
+
         # 创建代理工厂
         agent_factory = AgentFactory(
             simulator_config=config.simulator_config,
@@ -180,8 +191,8 @@ async def initialize_simulation(env_name: str, model_name: str = None) -> dict:
             for agent_id in ids:
                 agent_factory.add_env_relationship(agent_id)
 
-        # 获取事件总线
-        event_bus = get_event_bus()
+        # 获取事件总线，启用分片时为分片事件总线
+        event_bus = get_dispatching_event_bus()
 
         # 为分布式场景做检查
         is_distributed = False
@@ -423,6 +434,7 @@ async def start_simulation(data: StartSimulationRequest):
         try:
             # 重置事件总线
             reset_event_bus()
+            reset_event_bus_sharding()
             logger.info(f"已重置全局事件总线")
             AGENT_CHAT_HISTORY.clear()
             # 获取模型名称
@@ -708,6 +720,7 @@ async def stop_simulation(data: StopSimulationRequest):
         # 清除事件总线上的代理注册
         if event_bus:
             reset_event_bus()
+            reset_event_bus_sharding()
 
         # component_registry = get_component_registry()
         # component_registry.clear()
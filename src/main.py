@@ -18,6 +18,10 @@ from onesim.config import (
     OneSimConfig
 )
 from onesim.simulator import AgentFactory, BasicSimEnv
+from onesim.simulator.sharded_event_bus import enable_event_bus_sharding, get_dispatching_event_bus
+from onesim.utils.event_priority import event_priorities
+from onesim.agent.executor import agent_executor
+from onesim.agent.hibernation import agent_hibernation
 from onesim.models import ModelManager
 from onesim.events import get_event_bus, EventBus, Scheduler
 from onesim.agent import GeneralAgent
@@ -44,8 +48,9 @@ def parse_args():
                         help="Simulation environment.")
     
     # Add distributed mode arguments
-    parser.add_argument("--mode", type=str, choices=["single", "master", "worker"],
-                       default="single", help="Operating mode: single, master, or worker")
+    parser.add_argument("--mode", type=str, choices=["single", "master", "worker", "local_cluster"],
+                       default="single",
+                       help="Operating mode: single, master, worker, or local_cluster (master and workers as local processes)")
     parser.add_argument("--master_address", type=str, default="localhost",
                        help="Master node address (for worker mode)")
     parser.add_argument("--master_port", type=int, default=50051,
@@ -59,6 +64,8 @@ def parse_args():
     
     parser.add_argument("--expected_workers", type=int, default=1,
                        help="Number of worker nodes to wait for (for master mode)")
+    parser.add_argument("--processes", type=int, default=2,
+                       help="Number of worker processes (for local_cluster mode)")
                        
     # Component selection arguments
     parser.add_argument("--enable_db", action="store_true",
@@ -88,6 +95,8 @@ def load_sim_env_from_file(env_path, env_name) -> Type[BasicSimEnv]:
 
 async def run_agents(agents_dict: Dict[str, List[GeneralAgent]]) -> List[asyncio.Task]:
     """Create tasks for all agents from the agent dictionary."""
+    if agent_executor.enabled:
+        return [agent_executor.run()]
     tasks = []
     for agent_type in agents_dict:
         for agent in agents_dict[agent_type]:
@@ -142,7 +151,7 @@ async def initialize_distributed_environment(config: OneSimConfig, args):
         logger.error("Distribution component not initialized")
         raise RuntimeError("Distribution component must be initialized first")
     
-    event_bus = get_event_bus()
+    event_bus = get_dispatching_event_bus()
     event_bus.setup_distributed(node)
     
     if node.role == NodeRole.MASTER:
@@ -192,7 +201,7 @@ async def initialize_environment(config: OneSimConfig, args) -> Optional[BasicSi
     node_role = node.role if node else NodeRole.SINGLE
 
     # Create or get event bus
-    event_bus = get_event_bus()
+    event_bus = get_dispatching_event_bus()
 
     # Create Agent Factory and Agents
     logger.info("Creating agents for environment")
@@ -302,6 +311,10 @@ async def initialize_environment(config: OneSimConfig, args) -> Optional[BasicSi
             for agent_id, agent in agents[agent_type].items():
                 event_bus.register_agent(agent_id, agent)
 
+        if node_role == NodeRole.SINGLE and agent_hibernation.enabled:
+            agent_hibernation.attach(agents, agent_factory.rebuild_agent, sim_env, event_bus,
+                                     index=agent_factory.profile_id2agent)
+
     logger.info(f"Environment '{config.env_name}' initialized successfully")
 
     return sim_env
@@ -320,7 +333,7 @@ async def run_simulation(
         node_role = node.role if node else NodeRole.SINGLE
 
         # Get event bus
-        event_bus = get_event_bus()
+        event_bus = get_dispatching_event_bus()
 
         # Create a termination event
         termination_event = asyncio.Event()
@@ -342,6 +355,9 @@ async def run_simulation(
                     loop = asyncio.get_running_loop()
                     loop.add_signal_handler(signal.SIGINT, signal_handler)
                     loop.add_signal_handler(signal.SIGTERM, signal_handler)
+                    if node_role == NodeRole.WORKER:
+                        # SIGUSR1: scale in, the master moves this worker's agents away and then stops it
+                        loop.add_signal_handler(signal.SIGUSR1, lambda: asyncio.create_task(node.leave()))
                 except (NotImplementedError, RuntimeError):
                     signal.signal(signal.SIGINT, signal_handler)
                     signal.signal(signal.SIGTERM, signal_handler)
@@ -368,10 +384,13 @@ async def run_simulation(
             agent_tasks = []
             if node_role == NodeRole.SINGLE:
                 agents = sim_env.agents
-                # Create agent tasks
-                for agent_type in agents:
-                    for agent_id, agent in agents[agent_type].items():
-                        agent_tasks.append(agent.run())
+                # Create agent tasks, or the executors shared by all agents
+                if agent_executor.enabled:
+                    agent_tasks.append(asyncio.create_task(agent_executor.run()))
+                else:
+                    for agent_type in agents:
+                        for agent_id, agent in agents[agent_type].items():
+                            agent_tasks.append(agent.run())
 
                 # Run all tasks with termination handling
                 event_bus_task = asyncio.create_task(event_bus.run())
@@ -435,10 +454,9 @@ async def run_simulation(
                     for agent_id, agent in agents[agent_type].items():
                         agent.set_env(node.proxy_env)
 
-            # Create agent tasks
-            for agent_type in agents:
-                for agent_id, agent in agents[agent_type].items():
-                    agent_tasks.append(agent.run())
+            # Run agents through the node, so agents migrated in or out are started and stopped
+            if agents:
+                agent_tasks.append(asyncio.create_task(node.run_agents()))
 
             # Get proxy environment tasks
             env_tasks = []
@@ -484,11 +502,116 @@ async def run_simulation(
         traceback.print_exc()
         raise
 
+def _node_command(args, extra: List[str]) -> List[str]:
+    """Command line that runs this script as one node of a local cluster"""
+    command = [sys.executable, os.path.abspath(__file__), "--config", args.config]
+    if args.model_config:
+        command += ["--model_config", args.model_config]
+    if args.env:
+        command += ["--env", args.env]
+    if args.enable_db:
+        command.append("--enable_db")
+    if args.enable_observation:
+        command.append("--enable_observation")
+    return command + extra
+
+async def run_local_cluster(args) -> int:
+    """
+    Run the master and ``args.processes`` workers as child processes on this machine.
+
+    The nodes talk over Unix domain sockets in a temporary directory and are
+    wired up by the usual master/worker startup. SIGINT/SIGTERM are passed to
+    the master, which stops the workers; workers still running shortly after
+    the master exits are terminated.
+
+    Returns:
+        int: Exit code of the master process
+    """
+    import shutil
+    import signal
+    import tempfile
+
+    if args.processes < 1:
+        raise ValueError(f"--processes must be at least 1, got {args.processes}")
+
+    socket_dir = tempfile.mkdtemp(prefix="onesim-")
+    master_socket = os.path.join(socket_dir, "master.sock")
+    master_address = f"unix:{master_socket}"
+    master_port = args.master_port
+    children: List[asyncio.subprocess.Process] = []
+
+    def stop_cluster():
+        logger.info("Stopping local cluster")
+        if children and children[0].returncode is None:
+            children[0].send_signal(signal.SIGTERM)
+
+    loop = asyncio.get_running_loop()
+    try:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_cluster)
+    except NotImplementedError:
+        pass
+
+    try:
+        master = await asyncio.create_subprocess_exec(*_node_command(args, [
+            "--mode", "master", "--node_id", "master",
+            "--master_address", master_address, "--master_port", str(master_port),
+            "--expected_workers", str(args.processes)
+        ]))
+        children.append(master)
+
+        # Workers register as soon as they start, so wait for the master to listen
+        deadline = time.monotonic() + 120
+        while not os.path.exists(master_socket):
+            if master.returncode is not None or time.monotonic() > deadline:
+                raise RuntimeError("Master process did not start listening")
+            await asyncio.sleep(0.1)
+
+        for i in range(args.processes):
+            children.append(await asyncio.create_subprocess_exec(*_node_command(args, [
+                "--mode", "worker", "--node_id", f"worker-{i}",
+                "--master_address", master_address, "--master_port", str(master_port),
+                "--worker_address", f"unix:{os.path.join(socket_dir, f'worker-{i}.sock')}",
+                "--worker_port", str(master_port + 1 + i)
+            ])))
+        logger.info(f"Started local cluster: master and {args.processes} workers, sockets in {socket_dir}")
+
+        return_code = await master.wait()
+        workers = [child for child in children[1:] if child.returncode is None]
+        if workers:
+            _, pending = await asyncio.wait([asyncio.create_task(child.wait()) for child in workers], timeout=30)
+            if pending:
+                logger.warning(f"{len(pending)} worker processes still running after the master exited, terminating them")
+        return return_code
+    finally:
+        for child in children:
+            if child.returncode is None:
+                child.terminate()
+        for child in children:
+            if child.returncode is None:
+                try:
+                    await asyncio.wait_for(child.wait(), timeout=10)
+                except asyncio.TimeoutError:
+                    child.kill()
+                    await child.wait()
+        try:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+        except NotImplementedError:
+            pass
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
 async def async_main():
     """Asynchronous main entry function"""
     # Parse command line arguments
     args = parse_args()
 
+    if args.mode == "local_cluster":
+        return_code = await run_local_cluster(args)
+        if return_code:
+            sys.exit(return_code)
+        return
+
     # Determine which components to initialize
     components_to_init = [COMPONENT_MODEL]
     components_to_init.append(COMPONENT_MONITOR)
@@ -534,6 +657,22 @@ async def async_main():
         args.env
     )
     setup_logging(sim_config.env_name)
+    # Event priorities, dispatch lanes and agent executors, before any agent or queue is created
+    env_settings = sim_config.simulator_config.environment
+    event_priorities.configure(
+        enabled=env_settings.get("event_priorities", False),
+        aging=env_settings.get("event_priority_aging", 10.0)
+    )
+    agent_executor.configure(
+        workers=env_settings.get("agent_executors", 0),
+        serialize=env_settings.get("agent_serialize", False)
+    )
+    agent_hibernation.configure(
+        enabled=env_settings.get("agent_hibernation", False),
+        idle_steps=env_settings.get("hibernation_idle_steps", 3),
+        directory=env_settings.get("hibernation_dir")
+    )
+    enable_event_bus_sharding(env_settings.get("event_bus_shards", 1))
     # Determine if we're in distributed mode
     registry = get_component_registry()
     is_distributed = registry.is_initialized(COMPONENT_DISTRIBUTION)
@@ -542,7 +681,10 @@ async def async_main():
     if not is_distributed:
         # Single mode
         env = await initialize_environment(sim_config, args)
-        await run_simulation(env, sim_config, args)
+        try:
+            await run_simulation(env, sim_config, args)
+        finally:
+            agent_hibernation.close()
     else:
         # Distributed mode (master/worker)
         node = registry.get_instance(COMPONENT_DISTRIBUTION)
@@ -553,7 +695,13 @@ async def async_main():
         if node.role == NodeRole.WORKER:
             # For worker, wait for agent creation
             logger.info(f"Worker node {node.node_id} waiting for agent creation...")
-            await node.agents_created.wait()
+            # A worker joining a running simulation gets its agents at the next step, or is stopped first
+            await asyncio.wait(
+                [asyncio.create_task(node.agents_created.wait()), asyncio.create_task(node.stopped_event.wait())],
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if node.stopped_event.is_set():
+                return
             logger.info(f"Worker node {node.node_id} agents created: {sum(len(node.agents[t]) for t in node.agents)} agents")
 
         await run_simulation(env, sim_config, args)
@@ -161,7 +161,7 @@ async def init_model_component(model_config: ModelConfig):
             if model_config.chat_configs:
                 model_manager.configure_load_balancer(
                     model_configs=None,  # Auto-detect all chat models
-                    strategy="round_robin",
+                    strategy=model_config.load_balancer.get("strategy", "round_robin"),
                     config_name="chat_load_balancer",
                     model_type="chat"
                 )
@@ -406,7 +406,35 @@ async def init_distribution_component(dist_config: DistributionConfig):
             if mode == "master":
                 node_config = {
                     "listen_port": dist_config.master_port,
-                    "expected_workers": dist_config.expected_workers
+                    "listen_address": dist_config.master_address,
+                    "expected_workers": dist_config.expected_workers,
+                    "event_batch_size": dist_config.event_batch_size,
+                    "event_batch_wait": dist_config.event_batch_wait_ms / 1000,
+                    "event_max_in_flight": dist_config.event_max_in_flight,
+                    "event_max_pending": dist_config.event_max_pending,
+                    "event_max_retries": dist_config.event_max_retries,
+                    "stream_transport": dist_config.stream_transport,
+                    "stream_max_in_flight": dist_config.stream_max_in_flight,
+                    "shm_transport": dist_config.shm_transport,
+                    "shm_ring_size": dist_config.shm_ring_size,
+                    "event_codec": dist_config.event_codec,
+                    "rebalance_enabled": dist_config.rebalance_enabled,
+                    "rebalance_interval": dist_config.rebalance_interval,
+                    "rebalance_max_migrations": dist_config.rebalance_max_migrations,
+                    "rebalance_min_gain": dist_config.rebalance_min_gain,
+                    "rebalance_imbalance": dist_config.rebalance_imbalance,
+                    "env_cache_max_staleness": dist_config.env_cache_max_staleness,
+                    "env_cache_strong_keys": dist_config.env_cache_strong_keys,
+                    "storage_max_pending": dist_config.storage_max_pending,
+                    "storage_overflow": dist_config.storage_overflow,
+                    "storage_sample_rate": dist_config.storage_sample_rate,
+                    "storage_spill_dir": dist_config.storage_spill_dir,
+                    "storage_compression": dist_config.storage_compression,
+                    "storage_event_sampling": dist_config.storage_event_sampling,
+                    "storage_max_retries": dist_config.storage_max_retries,
+                    "stats_push_interval": dist_config.stats_push_interval,
+                    "agent_chunk_size": dist_config.agent_chunk_size,
+                    "agent_compression": dist_config.agent_compression
                 }
                 node = await initialize_node(node_id, "master", node_config)
                 logger.info(f"Initialized master node {node_id} on port {node_config['listen_port']}")
@@ -415,7 +443,32 @@ async def init_distribution_component(dist_config: DistributionConfig):
                 node_config = {
                     "master_address": dist_config.master_address,
                     "master_port": dist_config.master_port,
-                    "listen_port": dist_config.worker_port
+                    "listen_port": dist_config.worker_port,
+                    "event_batch_size": dist_config.event_batch_size,
+                    "event_batch_wait": dist_config.event_batch_wait_ms / 1000,
+                    "event_max_in_flight": dist_config.event_max_in_flight,
+                    "event_max_pending": dist_config.event_max_pending,
+                    "event_max_retries": dist_config.event_max_retries,
+                    "stream_transport": dist_config.stream_transport,
+                    "stream_max_in_flight": dist_config.stream_max_in_flight,
+                    "shm_transport": dist_config.shm_transport,
+                    "shm_ring_size": dist_config.shm_ring_size,
+                    "event_codec": dist_config.event_codec,
+                    "rebalance_enabled": dist_config.rebalance_enabled,
+                    "rebalance_interval": dist_config.rebalance_interval,
+                    "rebalance_max_migrations": dist_config.rebalance_max_migrations,
+                    "rebalance_min_gain": dist_config.rebalance_min_gain,
+                    "rebalance_imbalance": dist_config.rebalance_imbalance,
+                    "env_cache_max_staleness": dist_config.env_cache_max_staleness,
+                    "env_cache_strong_keys": dist_config.env_cache_strong_keys,
+                    "storage_max_pending": dist_config.storage_max_pending,
+                    "storage_overflow": dist_config.storage_overflow,
+                    "storage_sample_rate": dist_config.storage_sample_rate,
+                    "storage_spill_dir": dist_config.storage_spill_dir,
+                    "storage_compression": dist_config.storage_compression,
+                    "storage_event_sampling": dist_config.storage_event_sampling,
+                    "storage_max_retries": dist_config.storage_max_retries,
+                    "stats_push_interval": dist_config.stats_push_interval
                 }
                 node = await initialize_node(node_id, "worker", node_config)
                 logger.info(f"Initialized worker node {node_id} {dist_config.worker_address}:{dist_config.worker_port} connecting to {node_config['master_address']}:{node_config['master_port']}")
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Set, Tuple
+from loguru import logger
+
+from onesim.utils.event_priority import PRIORITY_CLASSES, priority_class
+from onesim.utils.runtime_stats import runtime_stats
+
+# 动作以外的事件（控制、数据请求与响应）不进入执行池，避免执行任务都在等待数据响应时死锁
+_POOLED_CLASS = len(PRIORITY_CLASSES) - 1
+
+
+class AgentExecutorPool:
+    """
+    Agent事件的共享执行池：固定数量的执行任务处理所有Agent的事件，
+    取代每个Agent一个常驻任务加每个事件一个任务的运行方式。
+
+    Agents hand their events to ``submit`` instead of their own queue. Action
+    events wait in one shared ready queue and are handled to completion by
+    one of ``workers`` executor tasks through ``GeneralAgent.process_event``,
+    which runs the same hooks as ``GeneralAgent.run``. With ``serialize``,
+    at most one action of an agent runs at a time and its other actions wait
+    in order. Control events and data requests and responses are handled
+    right away in their own task, as before, since executors blocked on a
+    data response must not keep that response from being handled.
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self.serialize = False
+        self._ready: Deque[Tuple[Any, Any]] = deque()
+        self._ready_count = asyncio.Semaphore(0)
+        # serialize时，正在执行的Agent -> 其等待中的事件
+        self._waiting: Dict[Any, Deque[Any]] = {}
+        # Agent -> 执行中的事件数，迁移前等待其归零
+        self._running: Dict[Any, int] = {}
+        self._direct_tasks: Set[asyncio.Task] = set()
+        self._agent_stopped = asyncio.Event()
+        self.stats = {"handled": 0, "direct": 0, "dropped": 0, "errors": 0, "busy_time": 0.0, "max_queued": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def configure(self, workers: int = None, serialize: bool = None):
+        """
+        Args:
+            workers: Number of executor tasks, 0 to run one task per agent instead.
+            serialize: Whether the actions of one agent run one at a time.
+        """
+        if workers is not None:
+            if workers < 0:
+                raise ValueError(f"workers must not be negative, got {workers}")
+            self.workers = int(workers)
+        if serialize is not None:
+            self.serialize = bool(serialize)
+
+    @property
+    def queued(self) -> int:
+        """Actions waiting for an executor, including those held back by ``serialize``"""
+        return len(self._ready) + sum(len(events) for events in self._waiting.values())
+
+    def submit(self, agent, event) -> None:
+        """Queue an event for an agent"""
+        if priority_class(event) < _POOLED_CLASS:
+            self.stats["direct"] += 1
+            task = asyncio.create_task(self._handle(agent, event))
+            self._direct_tasks.add(task)
+            task.add_done_callback(self._direct_tasks.discard)
+            return
+        if self.serialize:
+            waiting = self._waiting.get(agent)
+            if waiting is not None:
+                waiting.append(event)
+                self._track_backlog()
+                return
+            self._waiting[agent] = deque()
+        self._ready.append((agent, event))
+        self._ready_count.release()
+        self._track_backlog()
+
+    def _track_backlog(self):
+        queued = self.queued
+        if queued > self.stats["max_queued"]:
+            self.stats["max_queued"] = queued
+
+    async def run(self):
+        """Run the executors until an agent stops on its own, e.g. after an EndEvent"""
+        self._agent_stopped.clear()
+        tasks = [asyncio.create_task(self._execute()) for _ in range(self.workers)]
+        logger.info(f"Running agents on {self.workers} executors")
+        try:
+            await self._agent_stopped.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _execute(self):
+        while True:
+            await self._ready_count.acquire()
+            if not self._ready:
+                continue  # 已被drain_agent取走
+            agent, event = self._ready.popleft()
+            try:
+                if agent.is_stopped():
+                    self.stats["dropped"] += 1
+                    continue
+                await self._handle(agent, event)
+            finally:
+                if self.serialize:
+                    self._release(agent)
+
+    def _release(self, agent):
+        """Queue the next waiting action of a serialized agent"""
+        waiting = self._waiting.get(agent)
+        if waiting is None:
+            return
+        if waiting:
+            self._ready.append((agent, waiting.popleft()))
+            self._ready_count.release()
+        else:
+            del self._waiting[agent]
+
+    async def _handle(self, agent, event):
+        self._running[agent] = self._running.get(agent, 0) + 1
+        start = time.perf_counter()
+        try:
+            await agent.process_event(event)
+            self.stats["handled"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error handling {getattr(event, 'event_kind', '')} in agent {getattr(agent, 'profile_id', '')}: {e}")
+        finally:
+            self.stats["busy_time"] += time.perf_counter() - start
+            remaining = self._running[agent] - 1
+            if remaining:
+                self._running[agent] = remaining
+            else:
+                del self._running[agent]
+        if agent.is_stopped():
+            self._agent_stopped.set()
+
+    def has_work(self, agent) -> bool:
+        """Whether the agent has events running or queued"""
+        return (agent in self._running or agent in self._waiting
+                or any(owner is agent for owner, _ in self._ready))
+
+    async def drain_agent(self, agent, timeout: float) -> List[Any]:
+        """
+        Wait for the running events of an agent and take its queued ones, before it is migrated.
+
+        Args:
+            agent: The agent, no longer receiving events
+            timeout: Seconds to wait for running events
+
+        Returns:
+            List[Any]: The events that were still queued, in order
+        """
+        deadline = time.monotonic() + timeout
+        while self._running.get(agent):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{self._running[agent]} handlers still running after {timeout}s")
+            await asyncio.sleep(0.01)
+        queued = [event for owner, event in self._ready if owner is agent]
+        if queued:
+            self._ready = deque(item for item in self._ready if item[0] is not agent)
+        queued.extend(self._waiting.pop(agent, ()))
+        return queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Executors, handled and directly handled events, queued actions and executor busy time"""
+        stats = dict(self.stats)
+        stats["executors"] = self.workers
+        stats["queued"] = self.queued
+        stats["running"] = sum(self._running.values())
+        return stats
+
+
+# 全局Agent执行池实例，workers为0时不启用
+agent_executor = AgentExecutorPool()
+
+runtime_stats.register("agent_executor", lambda: agent_executor.get_stats() if agent_executor.enabled else None,
+                       gauges=("executors", "queued", "running"))
@@ -1,7 +1,7 @@
 import asyncio
 from .base import AgentBase
 from onesim.events import Event, DataEvent, DataResponseEvent, DataUpdateEvent, DataUpdateResponseEvent
-from typing import Dict, List, Callable, Optional, Any
+from typing import Dict, List, Callable, Optional, Any, Set
 import json
 import uuid
 import time
@@ -9,6 +9,9 @@ from asyncio import Future
 from loguru import logger
 from onesim.models.core.message import Message
 from onesim.models import JsonBlockParser
+from onesim.models.utils.structured_output import acall_structured
+from onesim.models.core.model_router import get_routed_model
+from onesim.models.utils.prompt_budget import PromptBudgeter
 from onesim.profile import AgentProfile
 from onesim.memory import *
 from onesim.events import *
@@ -19,10 +22,32 @@ from onesim.distribution.node import get_node
 from onesim.distribution import grpc_impl
 from onesim.distribution.node import NodeRole
 from onesim.distribution.distributed_lock import  get_lock
+from onesim.distribution.migration import agent_load_monitor
+from onesim.distribution.env_cache import env_data_replica
 from onesim.utils.work_graph import WorkGraph
+from onesim.utils.event_priority import event_priorities
+from onesim.agent.executor import agent_executor
 from datetime import datetime
 
 
+MEMORY_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {"memory": {"type": "string"}},
+    "required": ["memory"]
+}
+
+
+REACTION_GUIDELINES = """Please analyze the Agent's profile, memory, observation and planning. Based on these, generate a response that aligns with the Agent's identity and instruction.
+When identifying or referring to other agents, you must ONLY use their **Target ID** from the Relationships data. Ignore any other IDs (such as Enterprise ID, Student ID) that might appear in the data.
+
+Important: You can always send events to yourself if needed.
+
+Structure the response in JSON format, specifying a detailed action or reaction based on the instruction. You should respond a json object in a json fenced code block as follows:
+```json
+Your JSON response here
+```"""
+
+
 class GeneralAgent(AgentBase):
     def __init__(self,
                  sys_prompt: str | None = None,
@@ -34,9 +59,9 @@ class GeneralAgent(AgentBase):
                  relationship_manager: RelationshipManager=None) -> None:
         super().__init__(sys_prompt, model_config_name)
 
-        self._queue = asyncio.Queue()
+        self._queue = None if agent_executor.enabled else event_priorities.new_queue("agents")
         '''
-        The queue where the agent will store the events.
+        The queue where the agent will store the events, None when its events are handled by the shared executor pool.
         '''
 
         self._event_schema: Dict[str, List[str]] = {}
@@ -80,17 +105,116 @@ class GeneralAgent(AgentBase):
         self._data_futures: Dict[str, Future] = {}
         # Data update futures dictionary
         self._data_update_futures: Dict[str, Future] = {}
+        # Call sites routed to a model other than self.model
+        self._model_routes: Dict[str, str] = {}
+        self._routed_models: Dict[str, Any] = {}
+        # Token budget for prompt sections, and budgeters per model
+        self._prompt_budget: Dict[str, Any] = {}
+        self._budgeters: Dict[str, PromptBudgeter] = {}
+        # Event handlers still running, waited on before the agent is migrated
+        self._active_tasks: Set[asyncio.Task] = set()
+        # Events received so far, compared across steps to find idle agents
+        self.events_received = 0
 
     def is_stopped(self) -> bool:
         return self.stopped
 
+    def set_model_routes(self, model_routes: Optional[Dict[str, str]]) -> None:
+        """
+        Set the model config names used for individual call sites.
+
+        Args:
+            model_routes: Mapping of call site (e.g. "reaction", "memory") to
+                model config or load balancer name.
+        """
+        self._model_routes = dict(model_routes or {})
+        self._routed_models.clear()
+
+    def build_prompt_prefix(self, relationships: Optional[str] = None, guidelines: Optional[str] = None,
+                            profile_str: Optional[str] = None) -> str:
+        """
+        Build the stable part of a prompt: system prompt, profile, guidelines
+        and relationships, always in this order.
+
+        Keeping these first and byte-identical between calls lets backends
+        with prefix caching (e.g. vLLM) reuse the KV cache of the prefix, so
+        only the variable suffix (memory, observation, instruction) is
+        prefilled on each call.
+
+        Args:
+            relationships: Relationship description to include, if any; only
+                when it is the same between calls, e.g. all relationships.
+            guidelines: Static task instructions placed before the relationships.
+            profile_str: Pre-rendered profile; rendered from ``self.profile`` if None.
+
+        Returns:
+            str: The prefix text, used as the system message.
+        """
+        if profile_str is None:
+            profile_str = self.profile.get_profile_str() if self.profile else "No profile information provided."
+        sections = [self.sys_prompt or "", f"### Agent Profile:\n{profile_str}"]
+        if guidelines:
+            sections.append(f"### Guidelines:\n{guidelines}")
+        if relationships is not None:
+            sections.append(f"### Relationship:\n{relationships}")
+        return "\n\n".join(sections)
+
+    def set_prompt_budget(self, prompt_budget: Optional[Dict[str, Any]]) -> None:
+        """
+        Set the token budget used to assemble prompts.
+
+        Args:
+            prompt_budget: Dictionary with ``max_tokens`` and per-section
+                ``sections`` settings, see ``PromptBudgeter``.
+        """
+        self._prompt_budget = dict(prompt_budget or {})
+        self._budgeters.clear()
+
+    def get_prompt_budgeter(self, model) -> PromptBudgeter:
+        """
+        Get the prompt budgeter for a model, counting tokens with its tokenizer.
+
+        Args:
+            model: The model the prompt will be sent to.
+
+        Returns:
+            PromptBudgeter: The budgeter, cached per model config.
+        """
+        key = model.config_name
+        if key not in self._budgeters:
+            self._budgeters[key] = PromptBudgeter.from_config(
+                self._prompt_budget,
+                tokenizer=model.get_tokenizer(),
+                default_max_tokens=model.max_length
+            )
+        return self._budgeters[key]
+
+    def get_model(self, call_site: str):
+        """
+        Get the model serving a call site, falling back to ``self.model``.
+
+        Args:
+            call_site: Logical origin of the call.
+
+        Returns:
+            ModelAdapterBase: The routed model, or the agent's default model.
+        """
+        config_name = self._model_routes.get(call_site)
+        if config_name is None:
+            return self.model
+        return get_routed_model(config_name, self._routed_models)
+
     def register_event(self, event_kind: str, ability_name: str) -> None:
         if event_kind not in self._event_schema:
             self._event_schema[event_kind] = []
         self._event_schema[event_kind].append(ability_name)
 
     def add_event(self, event: Event) -> None:
-        self._queue.put_nowait(event)
+        self.events_received += 1
+        if self._queue is None:
+            agent_executor.submit(self, event)
+        else:
+            self._queue.put_nowait(event)
 
     async def get_event(self) -> Event:
         pass
@@ -114,7 +238,9 @@ class GeneralAgent(AgentBase):
     async def run_task(self, method: Callable, event: Event):
         # Record the incoming event
         await self.record_event(event)
+        start = time.perf_counter()
         reses = await method(event)
+        agent_load_monitor.record(event.from_agent_id, self.profile_id, time.perf_counter() - start)
         if not isinstance(reses, list):
             reses = [reses]
 
@@ -124,7 +250,35 @@ class GeneralAgent(AgentBase):
             res.parent_event_id = event.event_id
             await self._event_bus_queue.put(res)
 
+    async def process_event(self, event: Event) -> None:
+        """
+        Handle one event to completion, with the same hooks as ``run``.
+
+        Used by the shared executor pool: the abilities registered for the
+        event are awaited one after another instead of each in its own task.
+
+        Args:
+            event (Event): The event to handle
+        """
+        await self._execute_hooks('before_event_handling', event=event)
+        if event.event_kind not in self._event_schema:
+            logger.error(f"Event type {event.event_kind} not registered in {self.profile.agent_type}(ID:{self.profile_id}).")
+            return
+
+        for ability_name in self._event_schema[event.event_kind]:
+            method: Optional[Callable] = getattr(self, ability_name, None)
+            if not callable(method):
+                logger.error(f"Method {ability_name} not found in {self.__class__.__name__}.")
+                continue
+            await self._execute_hooks('before_action', ability_name=ability_name, event=event)
+            await self.run_task(method, event)
+            await self._execute_hooks('after_action', ability_name=ability_name, event=event)
+        await self._execute_hooks('after_event_handling', event=event)
+
     async def run(self):
+        if self._queue is None:
+            logger.warning(f"Agent {self.profile_id} events are handled by the executor pool, run agent_executor.run() instead")
+            return
         while not self.is_stopped():
             try:
                 event = await self._queue.get()
@@ -143,7 +297,9 @@ class GeneralAgent(AgentBase):
                         logger.error(f"Method {ability_name} not found in {self.__class__.__name__}.")
                         continue
                     await self._execute_hooks('before_action', ability_name=ability_name, event=event)
-                    asyncio.create_task(self.run_task(method, event))
+                    task = asyncio.create_task(self.run_task(method, event))
+                    self._active_tasks.add(task)
+                    task.add_done_callback(self._active_tasks.discard)
                     await self._execute_hooks('after_action', ability_name=ability_name, event=event)
                 await self._execute_hooks('after_event_handling', event=event)
                 self._queue.task_done()
@@ -177,19 +333,34 @@ class GeneralAgent(AgentBase):
     async def generate_memory(self, instruction: str, observation: str, reaction: dict) -> str:
         if not self.memory:
             return ""
-        profile_str = self.profile.get_profile_str() if self.profile else "No profile information provided."
-        # Build prompt for memory generation
-        prompt_text = f"""
-        ### Agent Profile:
-        {profile_str}
-
-        ### Relationship with other agents:
-        {self.relationship_manager.get_all_relationships_str()}
+        model = self.get_model("memory")
+        budgeted = self.get_prompt_budgeter(model).fit(
+            {
+                "profile": self.profile.get_profile_str(compact=True) if self.profile else "No profile information provided.",
+                "relationships": self.relationship_manager.get_all_relationships_compact_str(),
+                "observation": observation if observation else "No specific observation provided.",
+                "instruction": instruction,
+                "reaction": json.dumps(reaction, ensure_ascii=False, separators=(",", ":")),
+            },
+            call_site="memory",
+            baseline=lambda: {
+                "profile": self.profile.get_profile_str() if self.profile else "",
+                "relationships": str(self.relationship_manager.get_all_relationships_str()),
+                "reaction": json.dumps(reaction, indent=2),
+            }
+        ).sections
 
+        # The profile and relationships form a stable prefix shared with
+        # earlier calls; only the event details vary
+        prefix_text = self.build_prompt_prefix(
+            relationships=budgeted["relationships"],
+            profile_str=budgeted["profile"]
+        )
+        prompt_text = f"""
         ### Event Details:
-        Observation: {observation if observation else "No specific observation provided."}
-        Instruction: {instruction}
-        Reaction: {json.dumps(reaction, indent=2)}
+        Observation: {budgeted["observation"]}
+        Instruction: {budgeted["instruction"]}
+        Reaction: {budgeted["reaction"]}
 
         Based on the agent's profile and the complete event that occurred (the instruction received, what was observed, and how the agent reacted), generate a single sentence memory that captures this experience from the agent's perspective. The memory should be personal and reflect the complete interaction including what the agent was asked to do, what they perceived, and how they responded.
 
@@ -199,16 +370,21 @@ class GeneralAgent(AgentBase):
         ```
         """
         ### the returned json format should comes from the memory manager
-        prompt = self.model.format(
-            Message("system", self.sys_prompt, role="system"),
+        prompt = model.format(
+            Message("system", prefix_text, role="system"),
             Message("user", prompt_text, role="user")
         )
 
         # Parse LLM JSON response
         try:
-            response = await self.model.acall(prompt)
-            parser = JsonBlockParser()
-            res = parser.parse(response)
+            res = await acall_structured(
+                model,
+                prompt,
+                call_site="memory",
+                response_schema=MEMORY_RESPONSE_SCHEMA,
+                validator=lambda parsed: parsed['memory'],
+                routing_key=self.profile_id
+            )
             memory=res.parsed['memory']
             # memory_msg=Message(self.name, memory, role="assistant")
             if self.memory:
@@ -218,16 +394,27 @@ class GeneralAgent(AgentBase):
             logger.error(f"LLM response is not valid JSON. {prompt}")
             raise ValueError("LLM response is not valid JSON.")
 
-    async def generate_reaction(self, instruction: str, observation: str = None) -> json:
-        # 获取Agent的Profile和Memory信息
-        profile_str = self.profile.get_profile_str(include_private=True) if self.profile else "No profile information provided."
+    async def generate_reaction(self, instruction: str, observation: str = None, response_schema: Optional[Dict[str, Any]] = None) -> json:
+        """
+        Generate the agent's reaction to an instruction and observation.
+        
+        Args:
+            instruction (str): What the agent is asked to do
+            observation (str, optional): What the agent currently observes
+            response_schema (Dict[str, Any], optional): JSON schema of the expected
+                reaction, used for constrained decoding when the model supports it
+                
+        Returns:
+            dict: The parsed reaction
+        """
+        # 获取Agent的Profile和Memory信息（紧凑序列化，之后按token预算裁剪）
+        profile_str = self.profile.get_profile_str(include_private=True, compact=True) if self.profile else "No profile information provided."
         if self.memory:     
             memory_msgs = (await self.memory.retrieve(observation))
-            memory=""
-            for msg in memory_msgs:
-                memory+=msg.content
+            memory_items = [msg.content for msg in memory_msgs]
         else:
-            memory=""
+            memory_items = []
+        memory = "\n".join(memory_items)
 
         caller_frame = inspect.currentframe().f_back
         # 获取调用者的函数名
@@ -258,54 +445,72 @@ class GeneralAgent(AgentBase):
         else:
             planning=""
 
-        # 构建Prompt，包含Profile、Memory、Observation和Instruction部分
+        # 按token预算分配各部分，优先裁剪低优先级的部分（memory、planning）
+        model = self.get_model("reaction")
+        budgeted = self.get_prompt_budgeter(model).fit(
+            {
+                "profile": profile_str,
+                "relationships": [relation.to_compact_str() for relation in available_relations],
+                "memory": memory_items,
+                "observation": observation if observation else "No specific observation provided.",
+                "instruction": instruction,
+                "planning": planning,
+            },
+            call_site="reaction",
+            baseline=lambda: {
+                "profile": self.profile.get_profile_str(include_private=True) if self.profile else profile_str,
+                "relationships": str(available_relations),
+            }
+        ).sections
+
+        # 构建Prompt：系统提示、Profile和规则构成稳定前缀；可用的Relationship随动作变化，
+        # 与Memory、Observation、Instruction和Planning一起作为可变后缀
+        prefix_text = self.build_prompt_prefix(
+            guidelines=REACTION_GUIDELINES,
+            profile_str=budgeted["profile"]
+        )
         prompt_text = f"""
-        ### Agent Profile:
-        {profile_str}
+        ### Relationship:
+        {budgeted["relationships"]}
 
         ### Memory:
-        {memory}
-
-        ### Relationship:
-        {available_relations}
+        {budgeted["memory"]}
 
         ### Observation:
-        {observation if observation else "No specific observation provided."}
+        {budgeted["observation"]}
 
         ### Instruction:
-        {instruction}
+        {budgeted["instruction"]}
 
-        {planning}
+        {budgeted["planning"]}
 
-        Please analyze the Agent's profile, memory, observation and planning. Based on these, generate a response that aligns with the Agent's identity and instruction. 
-        When identifying or referring to other agents, you must ONLY use their **Target ID** from the Relationships data. Ignore any other IDs (such as Enterprise ID, Student ID) that might appear in the data.
-        
-        Important: You can always send events to yourself if needed. {relationship_guidance}
-        
-        Structure the response in JSON format, specifying a detailed action or reaction based on the instruction. You should respond a json object in a json fenced code block as follows:
-        ```json
-        Your JSON response here
-        ```
+        {relationship_guidance}
         """
         start_time = time.time()
-        prompt = self.model.format(
-            Message("system", self.sys_prompt, role="system"),
+        prompt = model.format(
+            Message("system", prefix_text, role="system"),
             Message("user", prompt_text, role="user")
         )
-        response = await self.model.acall(prompt)
+        res = await acall_structured(
+            model,
+            prompt,
+            call_site="reaction",
+            response_schema=response_schema,
+            routing_key=self.profile_id,
+            agent_type=self.profile.agent_type,
+            action=action_name
+        )
         processing_time = time.time() - start_time
 
         try:
-            parser = JsonBlockParser()
-            res = parser.parse(response)
             reaction=res.parsed
 
             # Record decision for data storage - supports both local and distributed modes
             decision_data = {
                 'agent_id': self.profile_id,
                 'agent_type': self.profile.agent_type,
-                'prompt': prompt_text,
-                'output': response.text,
+                'prompt': f"{prefix_text}\n\n{prompt_text}",
+                'output': res.text,
                 'processing_time': processing_time,
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                 'decision_id': str(uuid.uuid4()),
@@ -357,6 +562,9 @@ class GeneralAgent(AgentBase):
     def get_all_relationships(self) -> List[Relationship]:
         return self.relationship_manager.get_all_relationships()
 
+    def get_relationships(self) -> List[Dict[str, Any]]:
+        return self.relationship_manager.to_list()
+
     def create_context(self):
         return AgentContext(self.profile_id,self.profile,self.relationship_manager)
 
@@ -415,8 +623,8 @@ Respond in JSON format with a single 'message' field containing your response. F
     def profile_id(self):
         return self.profile.get_agent_profile_id() 
 
-    def get_profile_str(self,include_private: bool = None):
-        return self.profile.get_profile_str(include_private)
+    def get_profile_str(self,include_private: bool = None, compact: bool = False):
+        return self.profile.get_profile_str(include_private, compact=compact)
 
     def get_profile(self, include_private: bool = None):
         return self.profile.get_profile(include_private)
@@ -568,7 +776,8 @@ Respond in JSON format with a single 'message' field containing your response. F
                 # Reset for next operation
                 self._sync_event.clear()
 
-    async def get_env_data(self, key: str, default: Optional[Any] = None, parent_event_id: Optional[str] = None) -> Any:
+    async def get_env_data(self, key: str, default: Optional[Any] = None, parent_event_id: Optional[str] = None,
+                           strong: bool = False) -> Any:
         """
         Get data from the environment
         
@@ -576,10 +785,17 @@ Respond in JSON format with a single 'message' field containing your response. F
             key (str): Data key to access
             default (Any, optional): Default value if key not found
             parent_event_id (str, optional): ID of parent event that triggered this request
+            strong (bool, optional): On a worker, bypass the env data replica and read from the master
             
         Returns:
             Any: The requested data or default value
         """
+        # Serve from the worker's env data replica when possible
+        found, value = env_data_replica.lookup(key, strong)
+        if found:
+            return value
+        token = env_data_replica.begin_read(key, strong)
+
         # Create a unique request ID
         request_id = f"agent_env_req_{time.time()}_{id(self)}"
 
@@ -607,10 +823,12 @@ Respond in JSON format with a single 'message' field containing your response. F
             if hasattr(self, '_sync_event'):
                 # If we have a sync event, wait for it
                 await asyncio.wait_for(self._sync_event.wait(), timeout=30.0)
-                return await future
+                value = await future
             else:
                 # Otherwise just wait for the future directly
-                return await asyncio.wait_for(future, timeout=30.0)
+                value = await asyncio.wait_for(future, timeout=30.0)
+            env_data_replica.fill(key, value, token, default)
+            return value
         except asyncio.TimeoutError:
             logger.warning(f"Timeout waiting for environment data: {key}")
             self._data_futures.pop(request_id, None)
@@ -695,8 +913,10 @@ Respond in JSON format with a single 'message' field containing your response. F
         """
 
         try:
-            # Update data in profile - Added await here
-            success = await self.update_data(event.key, event.value)
+            # The lock is owned by this agent's node, so it is granted without an RPC
+            lock = await get_lock(f"agent_data_lock_{self.profile_id}_{event.key}", owner_agent_id=self.profile_id)
+            async with lock:
+                success = await self.update_data(event.key, event.value)
 
             # Create response event
             response = DataUpdateResponseEvent(
@@ -777,36 +997,30 @@ Respond in JSON format with a single 'message' field containing your response. F
             parent_event_id=parent_event_id
         )
 
-        # Get distributed lock for this key
-        lock_id = f"env_data_lock_{key}"
-        lock = await get_lock(lock_id)
-
+        # The environment takes the lock for this key while it applies the update
         try:
-            # Acquire lock before sending update
-            async with lock:
-                # Send the request
-                await self._event_bus_queue.put(data_update_event)
-
-                # Wait for response with timeout
-                try:
-                    if hasattr(self, '_sync_event'):
-                        # If we have a sync event, wait for it
-                        await asyncio.wait_for(self._sync_event.wait(), timeout=30.0)
-                        return await future
-                    else:
-                        # Otherwise just wait for the future directly
-                        return await asyncio.wait_for(future, timeout=30.0)
-                except asyncio.TimeoutError:
-                    logger.warning(f"Timeout waiting for environment data update: {key}")
-                    self._data_update_futures.pop(request_id, None)
-                    return False
-                except Exception as e:
-                    logger.error(f"Error updating environment data: {e}")
-                    self._data_update_futures.pop(request_id, None)
-                    return False
+            # Send the request
+            await self._event_bus_queue.put(data_update_event)
+
+            # Wait for response with timeout
+            if hasattr(self, '_sync_event'):
+                # If we have a sync event, wait for it
+                await asyncio.wait_for(self._sync_event.wait(), timeout=30.0)
+                return await future
+            else:
+                # Otherwise just wait for the future directly
+                return await asyncio.wait_for(future, timeout=30.0)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout waiting for environment data update: {key}")
+            self._data_update_futures.pop(request_id, None)
+            return False
         except Exception as e:
-            logger.error(f"Error acquiring lock for environment data update: {e}")
+            logger.error(f"Error updating environment data: {e}")
+            self._data_update_futures.pop(request_id, None)
             return False
+        finally:
+            # Read this agent's own write from the master
+            env_data_replica.invalidate([key])
 
     async def update_agent_data(self, agent_id: str, key: str, value: Any, parent_event_id: Optional[str] = None) -> bool:
         """
@@ -844,35 +1058,26 @@ Respond in JSON format with a single 'message' field containing your response. F
             parent_event_id=parent_event_id
         )
 
-        # Get distributed lock for this agent and key
-        lock_id = f"agent_data_lock_{agent_id}_{key}"
-        lock = await get_lock(lock_id)
-
+        # The target agent takes the lock for this key on its own node while it applies the update
         try:
-            # Acquire lock before sending update
-            async with lock:
-                # Send the request
-                await self._event_bus_queue.put(data_update_event)
-
-                # Wait for response with timeout
-                try:
-                    if hasattr(self, '_sync_event'):
-                        # If we have a sync event, wait for it
-                        await asyncio.wait_for(self._sync_event.wait(), timeout=30.0)
-                        return await future
-                    else:
-                        # Otherwise just wait for the future directly
-                        return await asyncio.wait_for(future, timeout=30.0)
-                except asyncio.TimeoutError:
-                    logger.warning(f"Timeout waiting for data update in agent {agent_id}")
-                    self._data_update_futures.pop(request_id, None)
-                    return False
-                except Exception as e:
-                    logger.error(f"Error updating data in agent {agent_id}: {e}")
-                    self._data_update_futures.pop(request_id, None)
-                    return False
+            # Send the request
+            await self._event_bus_queue.put(data_update_event)
+
+            # Wait for response with timeout
+            if hasattr(self, '_sync_event'):
+                # If we have a sync event, wait for it
+                await asyncio.wait_for(self._sync_event.wait(), timeout=30.0)
+                return await future
+            else:
+                # Otherwise just wait for the future directly
+                return await asyncio.wait_for(future, timeout=30.0)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout waiting for data update in agent {agent_id}")
+            self._data_update_futures.pop(request_id, None)
+            return False
         except Exception as e:
-            logger.error(f"Error acquiring lock for agent data update: {e}")
+            logger.error(f"Error updating data in agent {agent_id}: {e}")
+            self._data_update_futures.pop(request_id, None)
             return False
 
     async def add_memory(self, memory: str):
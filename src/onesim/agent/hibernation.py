@@ -0,0 +1,338 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from onesim.agent.executor import agent_executor
+from onesim.distribution.migration import export_agent_state
+
+
+class AgentStateStore:
+    """
+    本地Agent状态存储：单个追加写入的数据文件，加上内存中的偏移索引。
+
+    Each record is zlib-compressed JSON. Records are read back with
+    ``os.pread``, so nothing but the index stays in memory. Deleted and
+    overwritten records leave garbage behind; the file is rewritten once
+    the garbage outgrows the live records.
+    """
+
+    def __init__(self, directory: Optional[str] = None, min_compact_bytes: int = 64 * 1024 * 1024):
+        self._own_directory = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix="onesim_hibernation_")
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "agents.dat")
+        self.min_compact_bytes = min_compact_bytes
+        self._file = open(self.path, "w+b")
+        # agent_id -> (偏移, 长度)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._end = 0
+        self.live_bytes = 0
+        self.garbage_bytes = 0
+        self.stats = {"writes": 0, "reads": 0, "raw_bytes": 0, "written_bytes": 0, "compactions": 0}
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def put(self, agent_id: str, state: Dict[str, Any]) -> int:
+        """Store an agent's state, replacing any earlier one, and return its size on disk"""
+        raw = json.dumps(state).encode("utf-8")
+        data = zlib.compress(raw)
+        self.delete(agent_id)
+        self._file.seek(self._end)
+        self._file.write(data)
+        self._file.flush()
+        self._index[agent_id] = (self._end, len(data))
+        self._end += len(data)
+        self.live_bytes += len(data)
+        self.stats["writes"] += 1
+        self.stats["raw_bytes"] += len(raw)
+        self.stats["written_bytes"] += len(data)
+        return len(data)
+
+    def get(self, agent_id: str) -> Dict[str, Any]:
+        offset, length = self._index[agent_id]
+        self.stats["reads"] += 1
+        return json.loads(zlib.decompress(os.pread(self._file.fileno(), length, offset)))
+
+    def delete(self, agent_id: str) -> None:
+        entry = self._index.pop(agent_id, None)
+        if entry is None:
+            return
+        self.live_bytes -= entry[1]
+        self.garbage_bytes += entry[1]
+        if self.garbage_bytes > max(self.live_bytes, self.min_compact_bytes):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the file with only the live records"""
+        compact_path = self.path + ".compact"
+        index = {}
+        end = 0
+        with open(compact_path, "wb") as out:
+            for agent_id, (offset, length) in self._index.items():
+                out.write(os.pread(self._file.fileno(), length, offset))
+                index[agent_id] = (end, length)
+                end += length
+        self._file.close()
+        os.replace(compact_path, self.path)
+        self._file = open(self.path, "r+b")
+        self._index, self._end, self.garbage_bytes = index, end, 0
+        self.stats["compactions"] += 1
+
+    def close(self) -> None:
+        self._file.close()
+        if self._own_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, records=len(self._index), live_bytes=self.live_bytes,
+                    garbage_bytes=self.garbage_bytes)
+
+
+class HibernatedAgent:
+    """
+    休眠Agent的占位对象，代替Agent留在Agent字典和事件总线中。
+
+    The agent's profile and relationships stay in memory, so profile reads
+    and updates (``get_data``, ``update_data``, ``get_profile``), and with
+    them ``get_agent_data_by_type`` and the monitor, are answered without
+    waking the agent. The memory snapshot taken at hibernation is kept too,
+    so saving the agent's state each step matches a resident agent's without
+    reading the store. Any other event wakes it and is delivered once it is
+    rebuilt; an ``EndEvent`` just stops the stub.
+    """
+
+    def __init__(self, agent_type: str, profile, relationship_manager, memory_state: Dict[str, Any],
+                 events_received: int, hibernation: "AgentHibernation"):
+        self.agent_type = agent_type
+        self.profile = profile
+        self.relationship_manager = relationship_manager
+        self.memory_state = memory_state
+        self.events_received = events_received
+        self.pending: List[Any] = []
+        self.stopped = False
+        self._hibernation = hibernation
+
+    @property
+    def profile_id(self):
+        return self.profile.get_agent_profile_id()
+
+    def is_stopped(self) -> bool:
+        return self.stopped
+
+    def add_event(self, event) -> None:
+        self.events_received += 1
+        if event.event_kind == "EndEvent":
+            # 让执行池照常记录Agent结束
+            agent_executor.submit(self, event)
+            return
+        self.pending.append(event)
+        self._hibernation.wake(self.agent_type, self.profile_id)
+
+    async def process_event(self, event) -> None:
+        if event.event_kind == "EndEvent":
+            self.stopped = True
+
+    def set_env(self, env) -> None:
+        pass
+
+    async def get_data(self, key: str, default: Optional[Any] = None):
+        if not key:
+            return default
+        if "profile" in key:
+            key = key.replace("profile.", "")
+        return self.profile.get_data(key, default)
+
+    async def update_data(self, key: str, value: Any) -> bool:
+        if not key:
+            return False
+        return self.profile.update_data(key, value)
+
+    def get_profile(self, include_private: bool = None):
+        return self.profile.get_profile(include_private)
+
+    def get_profile_str(self, include_private: bool = None, compact: bool = False):
+        return self.profile.get_profile_str(include_private, compact=compact)
+
+    async def get_memory(self):
+        return (self.memory_state or {}).get("storages", {})
+
+    def get_all_relationships(self):
+        return self.relationship_manager.get_all_relationships()
+
+    def get_relationships(self) -> List[Dict[str, Any]]:
+        return self.relationship_manager.to_list()
+
+
+class AgentHibernation:
+    """
+    Agent休眠管理：把连续多个step没有收到事件的Agent写入本地存储，只保留占位对象。
+
+    At the end of every step, agents that received no event for
+    ``idle_steps`` steps and have nothing running or queued in the executor
+    pool are exported like a migrating agent, relationships and memories to
+    the ``AgentStateStore`` and the profile to a ``HibernatedAgent`` stub,
+    which replaces the agent in the agent dictionary and on the event bus.
+    The first event that reaches a stub rebuilds the agent through
+    ``rebuild`` and puts it back. Agents must run on the executor pool, so
+    that no per-agent task needs to be cancelled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.idle_steps = 3
+        self.directory: Optional[str] = None
+        self.store: Optional[AgentStateStore] = None
+        self._agents: Dict[str, Dict[str, Any]] = {}
+        self._index: Optional[Dict[str, Any]] = None
+        self._rebuild: Optional[Callable] = None
+        self._env = None
+        self._event_bus = None
+        # agent_id -> (上次统计的事件数, 连续空闲的step数)
+        self._activity: Dict[str, Tuple[int, int]] = {}
+        self._waking: Dict[str, asyncio.Task] = {}
+        self.stats = {"hibernated": 0, "woken": 0, "wake_failures": 0, "wake_time": 0.0}
+        self._woken_reported = 0
+
+    def configure(self, enabled: bool = None, idle_steps: int = None, directory: str = None):
+        """
+        Args:
+            enabled: Whether to hibernate idle agents.
+            idle_steps: Steps without events after which an agent hibernates.
+            directory: Where to store hibernated agents, a temporary directory if not set.
+        """
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if idle_steps is not None:
+            if idle_steps < 1:
+                raise ValueError(f"idle_steps must be at least 1, got {idle_steps}")
+            self.idle_steps = int(idle_steps)
+        if directory is not None:
+            self.directory = directory
+
+    def attach(self, agents: Dict[str, Dict[str, Any]], rebuild: Callable, env, event_bus,
+               index: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Start managing the local agents.
+
+        Args:
+            agents: Agents by type and ID, updated in place as agents hibernate and wake
+            rebuild: ``rebuild(agent_type, agent_id, profile_data, relationships)`` creating an agent
+            env: The environment agents are attached to
+            event_bus: The event bus agents are registered on
+            index: Another agent_id to agent mapping to keep up to date
+        """
+        if not agent_executor.enabled:
+            logger.warning("Agent hibernation needs agents running on the executor pool (agent_executors), disabled")
+            self.enabled = False
+            return
+        self._agents, self._rebuild, self._env, self._event_bus, self._index = agents, rebuild, env, event_bus, index
+        self.store = AgentStateStore(self.directory)
+        logger.info(f"Hibernating agents idle for {self.idle_steps} steps to {self.store.directory}")
+
+    def _replace(self, agent_type: str, agent_id: str, agent) -> None:
+        self._agents[agent_type][agent_id] = agent
+        if self._index is not None:
+            self._index[agent_id] = agent
+        self._event_bus.register_agent(agent_id, agent)
+
+    async def end_step(self) -> Dict[str, Any]:
+        """
+        Hibernate the agents that have been idle long enough, at a step boundary.
+
+        Returns:
+            Dict[str, Any]: Agents hibernated and woken during the step, and resident and hibernating agents
+        """
+        if not self.enabled or self.store is None:
+            return {}
+        hibernated = 0
+        for agent_type, agents in self._agents.items():
+            for agent_id, agent in list(agents.items()):
+                if isinstance(agent, HibernatedAgent) or not hasattr(agent, "events_received"):
+                    continue
+                seen, idle = self._activity.get(agent_id, (0, 0))
+                idle = idle + 1 if agent.events_received == seen else 0
+                self._activity[agent_id] = (agent.events_received, idle)
+                if idle < self.idle_steps or agent.is_stopped() or agent_executor.has_work(agent):
+                    continue
+                try:
+                    await self._hibernate(agent_type, agent_id, agent)
+                    hibernated += 1
+                except Exception as e:
+                    logger.error(f"Failed to hibernate agent {agent_id}: {e}")
+        woken, self._woken_reported = self.stats["woken"] - self._woken_reported, self.stats["woken"]
+        return {"hibernated": hibernated, "woken": woken, "resident": self.resident_count(),
+                "hibernating": len(self.store)}
+
+    async def _hibernate(self, agent_type: str, agent_id: str, agent) -> None:
+        state = await export_agent_state(agent, {})
+        state.pop("profile_data", None)
+        self.store.put(agent_id, state)
+        self._replace(agent_type, agent_id, HibernatedAgent(agent_type, agent.profile, agent.relationship_manager,
+                                                            state.get("memory_state"), agent.events_received, self))
+        self._activity.pop(agent_id, None)
+        self.stats["hibernated"] += 1
+
+    def wake(self, agent_type: str, agent_id: str) -> None:
+        """Start rebuilding a hibernated agent, if not already under way"""
+        if agent_id not in self._waking:
+            task = asyncio.create_task(self._wake(agent_type, agent_id))
+            self._waking[agent_id] = task
+            task.add_done_callback(lambda _: self._waking.pop(agent_id, None))
+
+    async def _wake(self, agent_type: str, agent_id: str) -> None:
+        stub = self._agents[agent_type][agent_id]
+        if not isinstance(stub, HibernatedAgent):
+            return
+        start = time.perf_counter()
+        try:
+            state = self.store.get(agent_id)
+            agent = self._rebuild(agent_type, agent_id, stub.profile.get_profile(include_private=True),
+                                  state.get("relationships", []))
+            if agent.memory and state.get("memory_state"):
+                await agent.memory.import_state(state["memory_state"])
+        except Exception as e:
+            # 唤醒失败时保留占位对象，下一个事件再次尝试
+            self.stats["wake_failures"] += 1
+            logger.error(f"Failed to wake agent {agent_id}: {e}")
+            return
+
+        agent.set_env(self._env)
+        agent.events_received = stub.events_received - len(stub.pending)
+        self._replace(agent_type, agent_id, agent)
+        self.store.delete(agent_id)
+        for event in stub.pending:
+            agent.add_event(event)
+        stub.pending = []
+        self.stats["woken"] += 1
+        self.stats["wake_time"] += time.perf_counter() - start
+
+    def resident_count(self) -> int:
+        return sum(1 for agents in self._agents.values() for agent in agents.values()
+                   if not isinstance(agent, HibernatedAgent))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hibernated and woken agents, time spent waking them and store size"""
+        stats = dict(self.stats)
+        if self.store is not None:
+            stats["hibernating"] = len(self.store)
+            stats["store"] = self.store.get_stats()
+        return stats
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+
+# 全局Agent休眠管理实例
+agent_hibernation = AgentHibernation()
@@ -17,6 +17,7 @@ class ModelConfig:
     config_path: Optional[str] = None
     chat_configs: List[Dict] = field(default_factory=list)
     embedding_configs: List[Dict] = field(default_factory=list)
+    load_balancer: Dict[str, Any] = field(default_factory=dict)  # e.g. {"strategy": "consistent_hash"}
 
     def __post_init__(self):
         if self.config_path and os.path.exists(self.config_path):
@@ -38,6 +39,9 @@ class ModelConfig:
             for config in self.embedding_configs:
                 config["category"] = "embedding"
 
+            if "load_balancer" in model_config:
+                self.load_balancer = model_config["load_balancer"] or {}
+
             self.enabled = True
             return True
         except Exception as e:
@@ -66,6 +70,9 @@ class ModelConfig:
             for config in self.embedding_configs:
                 config["category"] = "embedding"
 
+            if "load_balancer" in config_dict:
+                self.load_balancer = config_dict["load_balancer"] or {}
+
             self.enabled = True
             return True
         except Exception as e:
@@ -78,7 +85,8 @@ class ModelConfig:
             "enabled": self.enabled,
             "config_path": self.config_path,
             "chat": self.chat_configs,
-            "embedding": self.embedding_configs
+            "embedding": self.embedding_configs,
+            "load_balancer": self.load_balancer
         }
 
 @dataclass_json
@@ -120,6 +128,33 @@ class DistributionConfig:
     worker_address: Optional[str] = None
     worker_port: int = 0  # 0 means auto-assign
     expected_workers: int = 1
+    event_batch_size: int = 256  # Max events per SendEventBatch RPC, 1 disables coalescing
+    event_batch_wait_ms: float = 5.0  # Max time an event waits for its batch to fill
+    event_max_in_flight: int = 64  # Max concurrent event batch RPCs across all destinations
+    event_max_pending: int = 100000  # Max events waiting for one destination before its oldest are dropped
+    event_max_retries: int = 5  # Retries of a failed event batch before its events are re-routed
+    stream_transport: bool = True  # Multiplex node-to-node calls over one bidirectional stream per peer
+    stream_max_in_flight: int = 256  # Max outstanding requests per stream
+    shm_transport: bool = False  # Send calls to nodes on the same host over shared memory ring buffers
+    shm_ring_size: int = 8 * 1024 * 1024  # Bytes per ring buffer; a message may use at most half of it
+    event_codec: str = "msgpack"  # Event payload encoding between nodes: "msgpack" or "json"
+    rebalance_enabled: bool = False  # Migrate agents between workers at step boundaries by measured traffic
+    rebalance_interval: int = 1  # Rebalance every this many steps
+    rebalance_max_migrations: int = 100  # Max agents moved per rebalance
+    rebalance_min_gain: float = 5.0  # Min co-located messages an agent must gain to move for traffic
+    rebalance_imbalance: float = 0.1  # Allowed worker load above the average before agents are moved off
+    env_cache_max_staleness: float = 0.0  # Max age in seconds of env data served from a worker's replica, 0 disables it
+    env_cache_strong_keys: List[str] = field(default_factory=list)  # Env data keys always read from the master
+    storage_max_pending: int = 100000  # Max storage events and decisions a worker holds in memory for the master
+    storage_overflow: str = "drop"  # When the storage backlog is full: "drop", "sample" or "spill" to disk
+    storage_sample_rate: float = 0.1  # Share of new records kept by the "sample" policy once the backlog is half full
+    storage_spill_dir: Optional[str] = None  # Directory of the "spill" file, None for the system temp directory
+    storage_compression: bool = True  # Compress storage batches of 1 KB or more with zlib
+    storage_event_sampling: Dict[str, float] = field(default_factory=dict)  # Share of storage events kept per event type
+    storage_max_retries: int = 5  # Retries of a failed storage batch before its records are given up
+    stats_push_interval: float = 1.0  # Seconds between stats pushes from workers, 0 to disable
+    agent_chunk_size: int = 500  # Agents per chunk when streaming agent configs to workers, 0 sends them in one batch
+    agent_compression: str = "zlib"  # Compression of streamed agent configs: "zlib", "zstd" or "none"
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert instance to a dictionary for JSON serialization"""
@@ -131,7 +166,34 @@ class DistributionConfig:
             "master_port": self.master_port,
             "worker_address": self.worker_address,
             "worker_port": self.worker_port,
-            "expected_workers": self.expected_workers
+            "expected_workers": self.expected_workers,
+            "event_batch_size": self.event_batch_size,
+            "event_batch_wait_ms": self.event_batch_wait_ms,
+            "event_max_in_flight": self.event_max_in_flight,
+            "event_max_pending": self.event_max_pending,
+            "event_max_retries": self.event_max_retries,
+            "stream_transport": self.stream_transport,
+            "stream_max_in_flight": self.stream_max_in_flight,
+            "shm_transport": self.shm_transport,
+            "shm_ring_size": self.shm_ring_size,
+            "event_codec": self.event_codec,
+            "rebalance_enabled": self.rebalance_enabled,
+            "rebalance_interval": self.rebalance_interval,
+            "rebalance_max_migrations": self.rebalance_max_migrations,
+            "rebalance_min_gain": self.rebalance_min_gain,
+            "rebalance_imbalance": self.rebalance_imbalance,
+            "env_cache_max_staleness": self.env_cache_max_staleness,
+            "env_cache_strong_keys": self.env_cache_strong_keys,
+            "storage_max_pending": self.storage_max_pending,
+            "storage_overflow": self.storage_overflow,
+            "storage_sample_rate": self.storage_sample_rate,
+            "storage_spill_dir": self.storage_spill_dir,
+            "storage_compression": self.storage_compression,
+            "storage_event_sampling": self.storage_event_sampling,
+            "storage_max_retries": self.storage_max_retries,
+            "stats_push_interval": self.stats_push_interval,
+            "agent_chunk_size": self.agent_chunk_size,
+            "agent_compression": self.agent_compression
         }
 
 @dataclass_json
@@ -201,13 +263,17 @@ class AgentConfig:
     profile: Dict[str, Dict[str, Any]] = field(default_factory=dict)
     planning: Optional[str] = None
     memory: AgentMemoryConfig = field(default_factory=AgentMemoryConfig)
+    model_routing: Dict[str, Any] = field(default_factory=dict)  # Call site -> model config name
+    prompt_budget: Dict[str, Any] = field(default_factory=dict)  # Token budget per prompt section
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert instance to a dictionary for JSON serialization"""
         return {
             "profile": self.profile,
             "planning": self.planning,
-            "memory": self.memory.to_dict()
+            "memory": self.memory.to_dict(),
+            "model_routing": self.model_routing,
+            "prompt_budget": self.prompt_budget
         }
 
 @dataclass_json
@@ -356,6 +422,14 @@ class OneSimConfig:
                 if "planning" in agent_config:
                     self.agent_config.planning = agent_config["planning"]
 
+                # Handle per-call-site model routing
+                if "model_routing" in agent_config:
+                    self.agent_config.model_routing = agent_config["model_routing"] or {}
+
+                # Handle prompt token budget
+                if "prompt_budget" in agent_config:
+                    self.agent_config.prompt_budget = agent_config["prompt_budget"] or {}
+
                 # Handle agent memory configuration
                 if "memory" in agent_config:
                     memory_config = agent_config["memory"]
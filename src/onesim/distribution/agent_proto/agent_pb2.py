@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17\x61gent_proto/agent.proto\x12\x05\x61gent\"I\n\x15RegisterWorkerRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x0f\n\x07\x61\x64\x64ress\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\":\n\x16RegisterWorkerResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"8\n\x10HeartbeatRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\x03\")\n\x11HeartbeatResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\"O\n\x12\x43reateAgentRequest\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x10\n\x08\x61gent_id\x18\x02 \x01(\t\x12\x13\n\x0b\x63onfig_json\x18\x03 \x01(\t\"I\n\x13\x43reateAgentResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08\x61gent_id\x18\x03 \x01(\t\"\xc8\x01\n\x0c\x45ventRequest\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\x12\n\nevent_kind\x18\x02 \x01(\t\x12\x15\n\rfrom_agent_id\x18\x03 \x01(\t\x12\x13\n\x0bto_agent_id\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\x12\x14\n\x0cpayload_json\x18\x06 \x01(\t\x12\x1f\n\x17reply_to_worker_address\x18\x07 \x01(\t\x12\x1c\n\x14reply_to_worker_port\x18\x08 \x01(\x05\"!\n\rEventResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\"8\n\x11\x45ventBatchRequest\x12#\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x13.agent.EventRequest\"N\n\x12\x45ventBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"\x8f\x01\n\x13StorageEventRequest\x12\x12\n\nevent_type\x18\x01 \x01(\t\x12\x13\n\x0bsource_type\x18\x02 \x01(\t\x12\x11\n\tsource_id\x18\x03 \x01(\t\x12\x13\n\x0btarget_type\x18\x04 \x01(\t\x12\x11\n\ttarget_id\x18\x05 \x01(\t\x12\x14\n\x0cpayload_json\x18\x06 \x01(\t\"(\n\x14StorageEventResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\"F\n\x18StorageEventBatchRequest\x12*\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x1a.agent.StorageEventRequest\"U\n\x19StorageEventBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"x\n\x15\x44\x65\x63isionRecordRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\x12\x0e\n\x06prompt\x18\x02 \x01(\t\x12\x0e\n\x06output\x18\x03 \x01(\t\x12\x17\n\x0fprocessing_time\x18\x04 \x01(\x01\x12\x14\n\x0c\x63ontext_json\x18\x05 \x01(\t\"*\n\x16\x44\x65\x63isionRecordResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\"M\n\x1a\x44\x65\x63isionRecordBatchRequest\x12/\n\tdecisions\x18\x01 \x03(\x0b\x32\x1c.agent.DecisionRecordRequest\"W\n\x1b\x44\x65\x63isionRecordBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"0\n\x18\x43reateAgentsBatchRequest\x12\x14\n\x0c\x63onfigs_json\x18\x01 \x03(\t\"P\n\x19\x43reateAgentsBatchResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x11\n\tagent_ids\x18\x03 \x03(\t\"9\n\x0e\x45nvDataRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x02 \x01(\t\"E\n\x0f\x45nvDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x12\n\nvalue_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"7\n\x14\x45nvDataUpdateRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x12\n\nvalue_json\x18\x02 \x01(\t\"7\n\x15\x45nvDataUpdateResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"M\n\x15SimulationStopRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x0e\n\x06reason\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\"?\n\x16SimulationStopResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"M\n\x10\x41gentDataRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x03 \x01(\t\"G\n\x11\x41gentDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x12\n\nvalue_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"U\n\x16\x41gentDataByTypeRequest\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x03 \x01(\t\"N\n\x17\x41gentDataByTypeResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x13\n\x0bvalues_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"&\n\x12LocateAgentRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\"j\n\x13LocateAgentResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x16\n\x0eworker_address\x18\x02 \x01(\t\x12\x13\n\x0bworker_port\x18\x03 \x01(\x05\x12\x15\n\rerror_message\x18\x04 \x01(\t\"&\n\x11TokenUsageRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\"N\n\x12TokenUsageResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x18\n\x10token_stats_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"T\n\x10\x42\x61tchDataRequest\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x10\n\x08\x64\x61ta_key\x18\x02 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x03 \x01(\t\"X\n\x11\x42\x61tchDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x1b\n\x13\x63ollected_data_json\x18\x02 \x01(\t\x12\x15\n\rerror_message\x18\x03 \x01(\t2\xb6\n\n\x0c\x41gentService\x12O\n\x0eRegisterWorker\x12\x1c.agent.RegisterWorkerRequest\x1a\x1d.agent.RegisterWorkerResponse\"\x00\x12@\n\tHeartbeat\x12\x17.agent.HeartbeatRequest\x1a\x18.agent.HeartbeatResponse\"\x00\x12\x46\n\x0b\x43reateAgent\x12\x19.agent.CreateAgentRequest\x1a\x1a.agent.CreateAgentResponse\"\x00\x12\x38\n\tSendEvent\x12\x13.agent.EventRequest\x1a\x14.agent.EventResponse\"\x00\x12X\n\x11\x43reateAgentsBatch\x12\x1f.agent.CreateAgentsBatchRequest\x1a .agent.CreateAgentsBatchResponse\"\x00\x12M\n\x10SendStorageEvent\x12\x1a.agent.StorageEventRequest\x1a\x1b.agent.StorageEventResponse\"\x00\x12\\\n\x15SendStorageEventBatch\x12\x1f.agent.StorageEventBatchRequest\x1a .agent.StorageEventBatchResponse\"\x00\x12S\n\x12SendDecisionRecord\x12\x1c.agent.DecisionRecordRequest\x1a\x1d.agent.DecisionRecordResponse\"\x00\x12\x62\n\x17SendDecisionRecordBatch\x12!.agent.DecisionRecordBatchRequest\x1a\".agent.DecisionRecordBatchResponse\"\x00\x12=\n\nGetEnvData\x12\x15.agent.EnvDataRequest\x1a\x16.agent.EnvDataResponse\"\x00\x12L\n\rUpdateEnvData\x12\x1b.agent.EnvDataUpdateRequest\x1a\x1c.agent.EnvDataUpdateResponse\"\x00\x12O\n\x0eStopSimulation\x12\x1c.agent.SimulationStopRequest\x1a\x1d.agent.SimulationStopResponse\"\x00\x12\x43\n\x0cGetAgentData\x12\x17.agent.AgentDataRequest\x1a\x18.agent.AgentDataResponse\"\x00\x12U\n\x12GetAgentDataByType\x12\x1d.agent.AgentDataByTypeRequest\x1a\x1e.agent.AgentDataByTypeResponse\"\x00\x12\x46\n\rGetTokenUsage\x12\x18.agent.TokenUsageRequest\x1a\x19.agent.TokenUsageResponse\"\x00\x12\x46\n\x0bLocateAgent\x12\x19.agent.LocateAgentRequest\x1a\x1a.agent.LocateAgentResponse\"\x00\x12G\n\x10\x43ollectDataBatch\x12\x17.agent.BatchDataRequest\x1a\x18.agent.BatchDataResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17\x61gent_proto/agent.proto\x12\x05\x61gent\"I\n\x15RegisterWorkerRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x0f\n\x07\x61\x64\x64ress\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\":\n\x16RegisterWorkerResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x88\x01\n\x10HeartbeatRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\x03\x12\x11\n\tstats_seq\x18\x03 \x01(\x04\x12\x12\n\nstats_base\x18\x04 \x01(\x04\x12\x12\n\nstats_full\x18\x05 \x01(\x08\x12\x13\n\x0bstats_delta\x18\x06 \x01(\x0c\"?\n\x11HeartbeatResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x14\n\x0cstats_resync\x18\x02 \x01(\x08\"O\n\x12\x43reateAgentRequest\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x10\n\x08\x61gent_id\x18\x02 \x01(\t\x12\x13\n\x0b\x63onfig_json\x18\x03 \x01(\t\"I\n\x13\x43reateAgentResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08\x61gent_id\x18\x03 \x01(\t\"\xd9\x01\n\x0c\x45ventRequest\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\x12\n\nevent_kind\x18\x02 \x01(\t\x12\x15\n\rfrom_agent_id\x18\x03 \x01(\t\x12\x13\n\x0bto_agent_id\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\x12\x14\n\x0cpayload_json\x18\x06 \x01(\t\x12\x1f\n\x17reply_to_worker_address\x18\x07 \x01(\t\x12\x1c\n\x14reply_to_worker_port\x18\x08 \x01(\x05\x12\x0f\n\x07payload\x18\t \x01(\x0c\"!\n\rEventResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\"8\n\x11\x45ventBatchRequest\x12#\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x13.agent.EventRequest\"h\n\x12\x45ventBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x18\n\x10\x66\x61iled_event_ids\x18\x04 \x03(\t\"\x8f\x01\n\x13StorageEventRequest\x12\x12\n\nevent_type\x18\x01 \x01(\t\x12\x13\n\x0bsource_type\x18\x02 \x01(\t\x12\x11\n\tsource_id\x18\x03 \x01(\t\x12\x13\n\x0btarget_type\x18\x04 \x01(\t\x12\x11\n\ttarget_id\x18\x05 \x01(\t\x12\x14\n\x0cpayload_json\x18\x06 \x01(\t\"(\n\x14StorageEventResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\"F\n\x18StorageEventBatchRequest\x12*\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x1a.agent.StorageEventRequest\"U\n\x19StorageEventBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"x\n\x15\x44\x65\x63isionRecordRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\x12\x0e\n\x06prompt\x18\x02 \x01(\t\x12\x0e\n\x06output\x18\x03 \x01(\t\x12\x17\n\x0fprocessing_time\x18\x04 \x01(\x01\x12\x14\n\x0c\x63ontext_json\x18\x05 \x01(\t\"*\n\x16\x44\x65\x63isionRecordResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\"M\n\x1a\x44\x65\x63isionRecordBatchRequest\x12/\n\tdecisions\x18\x01 \x03(\x0b\x32\x1c.agent.DecisionRecordRequest\"W\n\x1b\x44\x65\x63isionRecordBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"\x97\x01\n\x13StorageBatchRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12*\n\x06\x65vents\x18\x02 \x03(\x0b\x32\x1a.agent.StorageEventRequest\x12/\n\tdecisions\x18\x03 \x03(\x0b\x32\x1c.agent.DecisionRecordRequest\x12\x12\n\ncompressed\x18\x04 \x01(\x0c\"P\n\x14StorageBatchResponse\x12\x10\n\x08received\x18\x01 \x01(\x08\x12\x17\n\x0fprocessed_count\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"0\n\x18\x43reateAgentsBatchRequest\x12\x14\n\x0c\x63onfigs_json\x18\x01 \x03(\t\"P\n\x19\x43reateAgentsBatchResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x11\n\tagent_ids\x18\x03 \x03(\t\"`\n\nAgentChunk\x12\x0b\n\x03seq\x18\x01 \x01(\x05\x12\r\n\x05total\x18\x02 \x01(\x05\x12\x13\n\x0b\x63ompression\x18\x03 \x01(\t\x12\x11\n\ttemplates\x18\x04 \x01(\x0c\x12\x0e\n\x06\x61gents\x18\x05 \x01(\x0c\"y\n\x15\x41gentCreationProgress\x12\x0b\n\x03seq\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07\x63reated\x18\x03 \x01(\x05\x12\r\n\x05total\x18\x04 \x01(\x05\x12\x11\n\tagent_ids\x18\x05 \x03(\t\x12\x0f\n\x07message\x18\x06 \x01(\t\"9\n\x0e\x45nvDataRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x02 \x01(\t\"E\n\x0f\x45nvDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x12\n\nvalue_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"7\n\x14\x45nvDataUpdateRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x12\n\nvalue_json\x18\x02 \x01(\t\"7\n\x15\x45nvDataUpdateResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"M\n\x15SimulationStopRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x0e\n\x06reason\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\"?\n\x16SimulationStopResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"M\n\x10\x41gentDataRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x03 \x01(\t\"G\n\x11\x41gentDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x12\n\nvalue_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"U\n\x16\x41gentDataByTypeRequest\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x03 \x01(\t\"N\n\x17\x41gentDataByTypeResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x13\n\x0bvalues_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"&\n\x12LocateAgentRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\"j\n\x13LocateAgentResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x16\n\x0eworker_address\x18\x02 \x01(\t\x12\x13\n\x0bworker_port\x18\x03 \x01(\x05\x12\x15\n\rerror_message\x18\x04 \x01(\t\"&\n\x11TokenUsageRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\"N\n\x12TokenUsageResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x18\n\x10token_stats_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"T\n\x10\x42\x61tchDataRequest\x12\x12\n\nagent_type\x18\x01 \x01(\t\x12\x10\n\x08\x64\x61ta_key\x18\x02 \x01(\t\x12\x1a\n\x12\x64\x65\x66\x61ult_value_json\x18\x03 \x01(\t\"X\n\x11\x42\x61tchDataResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x1b\n\x13\x63ollected_data_json\x18\x02 \x01(\t\x12\x15\n\rerror_message\x18\x03 \x01(\t\"g\n\x08\x45nvelope\x12\x16\n\x0e\x63orrelation_id\x18\x01 \x01(\x04\x12\x0e\n\x06method\x18\x02 \x01(\t\x12\x0f\n\x07payload\x18\x03 \x01(\x0c\x12\x13\n\x0bstatus_code\x18\x04 \x01(\x05\x12\r\n\x05\x65rror\x18\x05 \x01(\t\"\xbd\x01\n\x12RoutingTableUpdate\x12\x0f\n\x07version\x18\x01 \x01(\x04\x12\x14\n\x0c\x62\x61se_version\x18\x02 \x01(\x04\x12\x0c\n\x04\x66ull\x18\x03 \x01(\x08\x12\x18\n\x10worker_addresses\x18\x04 \x03(\t\x12\x14\n\x0cworker_ports\x18\x05 \x03(\r\x12\x11\n\tagent_ids\x18\x06 \x03(\t\x12\x14\n\x0cworker_index\x18\x07 \x03(\r\x12\x19\n\x11removed_agent_ids\x18\x08 \x03(\t\"B\n\x0fRoutingTableAck\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07version\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"!\n\x10\x41gentLoadRequest\x12\r\n\x05reset\x18\x01 \x01(\x08\"F\n\x11\x41gentLoadResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x11\n\tload_json\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"k\n\x13MigrateAgentRequest\x12\x10\n\x08\x61gent_id\x18\x01 \x01(\t\x12\x16\n\x0etarget_address\x18\x02 \x01(\t\x12\x13\n\x0btarget_port\x18\x03 \x01(\x05\x12\x15\n\rdrain_timeout\x18\x04 \x01(\x02\"6\n\x14MigrateAgentResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"U\n\x12ImportAgentRequest\x12\x12\n\nstate_json\x18\x01 \x01(\t\x12+\n\x0epending_events\x18\x02 \x03(\x0b\x32\x13.agent.EventRequest\"5\n\x13ImportAgentResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"\'\n\x12\x44rainWorkerRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\"5\n\x13\x44rainWorkerResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"W\n\x13\x45nvDataInvalidation\x12\x0f\n\x07version\x18\x01 \x01(\x04\x12\x14\n\x0c\x62\x61se_version\x18\x02 \x01(\x04\x12\x0b\n\x03\x61ll\x18\x03 \x01(\x08\x12\x0c\n\x04keys\x18\x04 \x03(\t\"I\n\x16\x45nvDataInvalidationAck\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07version\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"m\n\x0cLeaseRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x10\n\x08lock_ids\x18\x02 \x03(\t\x12\x0f\n\x07holders\x18\x03 \x03(\t\x12\x0e\n\x06tokens\x18\x04 \x03(\x04\x12\x0b\n\x03ttl\x18\x05 \x01(\x01\x12\x0c\n\x04wait\x18\x06 \x01(\x01\"P\n\rLeaseResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07granted\x18\x02 \x03(\x08\x12\x0e\n\x06tokens\x18\x03 \x03(\x04\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"\x8c\x01\n\x0eShmOpenRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x14\n\x0crequest_ring\x18\x02 \x01(\t\x12\x15\n\rresponse_ring\x18\x03 \x01(\t\x12\x16\n\x0erequest_wakeup\x18\x04 \x01(\t\x12\x17\n\x0fresponse_wakeup\x18\x05 \x01(\t\x12\x0b\n\x03pid\x18\x06 \x01(\x05\">\n\x0fShmOpenResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0b\n\x03pid\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t2\x88\x12\n\x0c\x41gentService\x12O\n\x0eRegisterWorker\x12\x1c.agent.RegisterWorkerRequest\x1a\x1d.agent.RegisterWorkerResponse\"\x00\x12@\n\tHeartbeat\x12\x17.agent.HeartbeatRequest\x1a\x18.agent.HeartbeatResponse\"\x00\x12\x46\n\x0b\x43reateAgent\x12\x19.agent.CreateAgentRequest\x1a\x1a.agent.CreateAgentResponse\"\x00\x12\x38\n\tSendEvent\x12\x13.agent.EventRequest\x1a\x14.agent.EventResponse\"\x00\x12G\n\x0eSendEventBatch\x12\x18.agent.EventBatchRequest\x1a\x19.agent.EventBatchResponse\"\x00\x12X\n\x11\x43reateAgentsBatch\x12\x1f.agent.CreateAgentsBatchRequest\x1a .agent.CreateAgentsBatchResponse\"\x00\x12K\n\x12\x43reateAgentsStream\x12\x11.agent.AgentChunk\x1a\x1c.agent.AgentCreationProgress\"\x00(\x01\x30\x01\x12M\n\x10SendStorageEvent\x12\x1a.agent.StorageEventRequest\x1a\x1b.agent.StorageEventResponse\"\x00\x12\\\n\x15SendStorageEventBatch\x12\x1f.agent.StorageEventBatchRequest\x1a .agent.StorageEventBatchResponse\"\x00\x12S\n\x12SendDecisionRecord\x12\x1c.agent.DecisionRecordRequest\x1a\x1d.agent.DecisionRecordResponse\"\x00\x12\x62\n\x17SendDecisionRecordBatch\x12!.agent.DecisionRecordBatchRequest\x1a\".agent.DecisionRecordBatchResponse\"\x00\x12M\n\x10SendStorageBatch\x12\x1a.agent.StorageBatchRequest\x1a\x1b.agent.StorageBatchResponse\"\x00\x12=\n\nGetEnvData\x12\x15.agent.EnvDataRequest\x1a\x16.agent.EnvDataResponse\"\x00\x12L\n\rUpdateEnvData\x12\x1b.agent.EnvDataUpdateRequest\x1a\x1c.agent.EnvDataUpdateResponse\"\x00\x12O\n\x0eStopSimulation\x12\x1c.agent.SimulationStopRequest\x1a\x1d.agent.SimulationStopResponse\"\x00\x12\x43\n\x0cGetAgentData\x12\x17.agent.AgentDataRequest\x1a\x18.agent.AgentDataResponse\"\x00\x12U\n\x12GetAgentDataByType\x12\x1d.agent.AgentDataByTypeRequest\x1a\x1e.agent.AgentDataByTypeResponse\"\x00\x12\x46\n\rGetTokenUsage\x12\x18.agent.TokenUsageRequest\x1a\x19.agent.TokenUsageResponse\"\x00\x12\x46\n\x0bLocateAgent\x12\x19.agent.LocateAgentRequest\x1a\x1a.agent.LocateAgentResponse\"\x00\x12G\n\x10\x43ollectDataBatch\x12\x17.agent.BatchDataRequest\x1a\x18.agent.BatchDataResponse\"\x00\x12I\n\x12UpdateRoutingTable\x12\x19.agent.RoutingTableUpdate\x1a\x16.agent.RoutingTableAck\"\x00\x12\x43\n\x0cGetAgentLoad\x12\x17.agent.AgentLoadRequest\x1a\x18.agent.AgentLoadResponse\"\x00\x12I\n\x0cMigrateAgent\x12\x1a.agent.MigrateAgentRequest\x1a\x1b.agent.MigrateAgentResponse\"\x00\x12\x46\n\x0bImportAgent\x12\x19.agent.ImportAgentRequest\x1a\x1a.agent.ImportAgentResponse\"\x00\x12\x46\n\x0b\x44rainWorker\x12\x19.agent.DrainWorkerRequest\x1a\x1a.agent.DrainWorkerResponse\"\x00\x12P\n\x11InvalidateEnvData\x12\x1a.agent.EnvDataInvalidation\x1a\x1d.agent.EnvDataInvalidationAck\"\x00\x12<\n\rAcquireLeases\x12\x13.agent.LeaseRequest\x1a\x14.agent.LeaseResponse\"\x00\x12:\n\x0bRenewLeases\x12\x13.agent.LeaseRequest\x1a\x14.agent.LeaseResponse\"\x00\x12<\n\rReleaseLeases\x12\x13.agent.LeaseRequest\x1a\x14.agent.LeaseResponse\"\x00\x12\x43\n\x10OpenSharedMemory\x12\x15.agent.ShmOpenRequest\x1a\x16.agent.ShmOpenResponse\"\x00\x12\x31\n\x07\x43hannel\x12\x0f.agent.Envelope\x1a\x0f.agent.Envelope\"\x00(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -35,74 +35,116 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_REGISTERWORKERREQUEST']._serialized_end=107
   _globals['_REGISTERWORKERRESPONSE']._serialized_start=109
   _globals['_REGISTERWORKERRESPONSE']._serialized_end=167
-  _globals['_HEARTBEATREQUEST']._serialized_start=169
-  _globals['_HEARTBEATREQUEST']._serialized_end=225
-  _globals['_HEARTBEATRESPONSE']._serialized_start=227
-  _globals['_HEARTBEATRESPONSE']._serialized_end=268
-  _globals['_CREATEAGENTREQUEST']._serialized_start=270
-  _globals['_CREATEAGENTREQUEST']._serialized_end=349
-  _globals['_CREATEAGENTRESPONSE']._serialized_start=351
-  _globals['_CREATEAGENTRESPONSE']._serialized_end=424
-  _globals['_EVENTREQUEST']._serialized_start=427
-  _globals['_EVENTREQUEST']._serialized_end=627
-  _globals['_EVENTRESPONSE']._serialized_start=629
-  _globals['_EVENTRESPONSE']._serialized_end=662
-  _globals['_EVENTBATCHREQUEST']._serialized_start=664
-  _globals['_EVENTBATCHREQUEST']._serialized_end=720
-  _globals['_EVENTBATCHRESPONSE']._serialized_start=722
-  _globals['_EVENTBATCHRESPONSE']._serialized_end=800
-  _globals['_STORAGEEVENTREQUEST']._serialized_start=803
-  _globals['_STORAGEEVENTREQUEST']._serialized_end=946
-  _globals['_STORAGEEVENTRESPONSE']._serialized_start=948
-  _globals['_STORAGEEVENTRESPONSE']._serialized_end=988
-  _globals['_STORAGEEVENTBATCHREQUEST']._serialized_start=990
-  _globals['_STORAGEEVENTBATCHREQUEST']._serialized_end=1060
-  _globals['_STORAGEEVENTBATCHRESPONSE']._serialized_start=1062
-  _globals['_STORAGEEVENTBATCHRESPONSE']._serialized_end=1147
-  _globals['_DECISIONRECORDREQUEST']._serialized_start=1149
-  _globals['_DECISIONRECORDREQUEST']._serialized_end=1269
-  _globals['_DECISIONRECORDRESPONSE']._serialized_start=1271
-  _globals['_DECISIONRECORDRESPONSE']._serialized_end=1313
-  _globals['_DECISIONRECORDBATCHREQUEST']._serialized_start=1315
-  _globals['_DECISIONRECORDBATCHREQUEST']._serialized_end=1392
-  _globals['_DECISIONRECORDBATCHRESPONSE']._serialized_start=1394
-  _globals['_DECISIONRECORDBATCHRESPONSE']._serialized_end=1481
-  _globals['_CREATEAGENTSBATCHREQUEST']._serialized_start=1483
-  _globals['_CREATEAGENTSBATCHREQUEST']._serialized_end=1531
-  _globals['_CREATEAGENTSBATCHRESPONSE']._serialized_start=1533
-  _globals['_CREATEAGENTSBATCHRESPONSE']._serialized_end=1613
-  _globals['_ENVDATAREQUEST']._serialized_start=1615
-  _globals['_ENVDATAREQUEST']._serialized_end=1672
-  _globals['_ENVDATARESPONSE']._serialized_start=1674
-  _globals['_ENVDATARESPONSE']._serialized_end=1743
-  _globals['_ENVDATAUPDATEREQUEST']._serialized_start=1745
-  _globals['_ENVDATAUPDATEREQUEST']._serialized_end=1800
-  _globals['_ENVDATAUPDATERESPONSE']._serialized_start=1802
-  _globals['_ENVDATAUPDATERESPONSE']._serialized_end=1857
-  _globals['_SIMULATIONSTOPREQUEST']._serialized_start=1859
-  _globals['_SIMULATIONSTOPREQUEST']._serialized_end=1936
-  _globals['_SIMULATIONSTOPRESPONSE']._serialized_start=1938
-  _globals['_SIMULATIONSTOPRESPONSE']._serialized_end=2001
-  _globals['_AGENTDATAREQUEST']._serialized_start=2003
-  _globals['_AGENTDATAREQUEST']._serialized_end=2080
-  _globals['_AGENTDATARESPONSE']._serialized_start=2082
-  _globals['_AGENTDATARESPONSE']._serialized_end=2153
-  _globals['_AGENTDATABYTYPEREQUEST']._serialized_start=2155
-  _globals['_AGENTDATABYTYPEREQUEST']._serialized_end=2240
-  _globals['_AGENTDATABYTYPERESPONSE']._serialized_start=2242
-  _globals['_AGENTDATABYTYPERESPONSE']._serialized_end=2320
-  _globals['_LOCATEAGENTREQUEST']._serialized_start=2322
-  _globals['_LOCATEAGENTREQUEST']._serialized_end=2360
-  _globals['_LOCATEAGENTRESPONSE']._serialized_start=2362
-  _globals['_LOCATEAGENTRESPONSE']._serialized_end=2468
-  _globals['_TOKENUSAGEREQUEST']._serialized_start=2470
-  _globals['_TOKENUSAGEREQUEST']._serialized_end=2508
-  _globals['_TOKENUSAGERESPONSE']._serialized_start=2510
-  _globals['_TOKENUSAGERESPONSE']._serialized_end=2588
-  _globals['_BATCHDATAREQUEST']._serialized_start=2590
-  _globals['_BATCHDATAREQUEST']._serialized_end=2674
-  _globals['_BATCHDATARESPONSE']._serialized_start=2676
-  _globals['_BATCHDATARESPONSE']._serialized_end=2764
-  _globals['_AGENTSERVICE']._serialized_start=2767
-  _globals['_AGENTSERVICE']._serialized_end=4101
+  _globals['_HEARTBEATREQUEST']._serialized_start=170
+  _globals['_HEARTBEATREQUEST']._serialized_end=306
+  _globals['_HEARTBEATRESPONSE']._serialized_start=308
+  _globals['_HEARTBEATRESPONSE']._serialized_end=371
+  _globals['_CREATEAGENTREQUEST']._serialized_start=373
+  _globals['_CREATEAGENTREQUEST']._serialized_end=452
+  _globals['_CREATEAGENTRESPONSE']._serialized_start=454
+  _globals['_CREATEAGENTRESPONSE']._serialized_end=527
+  _globals['_EVENTREQUEST']._serialized_start=530
+  _globals['_EVENTREQUEST']._serialized_end=747
+  _globals['_EVENTRESPONSE']._serialized_start=749
+  _globals['_EVENTRESPONSE']._serialized_end=782
+  _globals['_EVENTBATCHREQUEST']._serialized_start=784
+  _globals['_EVENTBATCHREQUEST']._serialized_end=840
+  _globals['_EVENTBATCHRESPONSE']._serialized_start=842
+  _globals['_EVENTBATCHRESPONSE']._serialized_end=946
+  _globals['_STORAGEEVENTREQUEST']._serialized_start=949
+  _globals['_STORAGEEVENTREQUEST']._serialized_end=1092
+  _globals['_STORAGEEVENTRESPONSE']._serialized_start=1094
+  _globals['_STORAGEEVENTRESPONSE']._serialized_end=1134
+  _globals['_STORAGEEVENTBATCHREQUEST']._serialized_start=1136
+  _globals['_STORAGEEVENTBATCHREQUEST']._serialized_end=1206
+  _globals['_STORAGEEVENTBATCHRESPONSE']._serialized_start=1208
+  _globals['_STORAGEEVENTBATCHRESPONSE']._serialized_end=1293
+  _globals['_DECISIONRECORDREQUEST']._serialized_start=1295
+  _globals['_DECISIONRECORDREQUEST']._serialized_end=1415
+  _globals['_DECISIONRECORDRESPONSE']._serialized_start=1417
+  _globals['_DECISIONRECORDRESPONSE']._serialized_end=1459
+  _globals['_DECISIONRECORDBATCHREQUEST']._serialized_start=1461
+  _globals['_DECISIONRECORDBATCHREQUEST']._serialized_end=1538
+  _globals['_DECISIONRECORDBATCHRESPONSE']._serialized_start=1540
+  _globals['_DECISIONRECORDBATCHRESPONSE']._serialized_end=1627
+  _globals['_STORAGEBATCHREQUEST']._serialized_start=1630
+  _globals['_STORAGEBATCHREQUEST']._serialized_end=1781
+  _globals['_STORAGEBATCHRESPONSE']._serialized_start=1783
+  _globals['_STORAGEBATCHRESPONSE']._serialized_end=1863
+  _globals['_CREATEAGENTSBATCHREQUEST']._serialized_start=1865
+  _globals['_CREATEAGENTSBATCHREQUEST']._serialized_end=1913
+  _globals['_CREATEAGENTSBATCHRESPONSE']._serialized_start=1915
+  _globals['_CREATEAGENTSBATCHRESPONSE']._serialized_end=1995
+  _globals['_AGENTCHUNK']._serialized_start=1997
+  _globals['_AGENTCHUNK']._serialized_end=2093
+  _globals['_AGENTCREATIONPROGRESS']._serialized_start=2095
+  _globals['_AGENTCREATIONPROGRESS']._serialized_end=2216
+  _globals['_ENVDATAREQUEST']._serialized_start=2218
+  _globals['_ENVDATAREQUEST']._serialized_end=2275
+  _globals['_ENVDATARESPONSE']._serialized_start=2277
+  _globals['_ENVDATARESPONSE']._serialized_end=2346
+  _globals['_ENVDATAUPDATEREQUEST']._serialized_start=2348
+  _globals['_ENVDATAUPDATEREQUEST']._serialized_end=2403
+  _globals['_ENVDATAUPDATERESPONSE']._serialized_start=2405
+  _globals['_ENVDATAUPDATERESPONSE']._serialized_end=2460
+  _globals['_SIMULATIONSTOPREQUEST']._serialized_start=2462
+  _globals['_SIMULATIONSTOPREQUEST']._serialized_end=2539
+  _globals['_SIMULATIONSTOPRESPONSE']._serialized_start=2541
+  _globals['_SIMULATIONSTOPRESPONSE']._serialized_end=2604
+  _globals['_AGENTDATAREQUEST']._serialized_start=2606
+  _globals['_AGENTDATAREQUEST']._serialized_end=2683
+  _globals['_AGENTDATARESPONSE']._serialized_start=2685
+  _globals['_AGENTDATARESPONSE']._serialized_end=2756
+  _globals['_AGENTDATABYTYPEREQUEST']._serialized_start=2758
+  _globals['_AGENTDATABYTYPEREQUEST']._serialized_end=2843
+  _globals['_AGENTDATABYTYPERESPONSE']._serialized_start=2845
+  _globals['_AGENTDATABYTYPERESPONSE']._serialized_end=2923
+  _globals['_LOCATEAGENTREQUEST']._serialized_start=2925
+  _globals['_LOCATEAGENTREQUEST']._serialized_end=2963
+  _globals['_LOCATEAGENTRESPONSE']._serialized_start=2965
+  _globals['_LOCATEAGENTRESPONSE']._serialized_end=3071
+  _globals['_TOKENUSAGEREQUEST']._serialized_start=3073
+  _globals['_TOKENUSAGEREQUEST']._serialized_end=3111
+  _globals['_TOKENUSAGERESPONSE']._serialized_start=3113
+  _globals['_TOKENUSAGERESPONSE']._serialized_end=3191
+  _globals['_BATCHDATAREQUEST']._serialized_start=3193
+  _globals['_BATCHDATAREQUEST']._serialized_end=3277
+  _globals['_BATCHDATARESPONSE']._serialized_start=3279
+  _globals['_BATCHDATARESPONSE']._serialized_end=3367
+  _globals['_ENVELOPE']._serialized_start=3369
+  _globals['_ENVELOPE']._serialized_end=3472
+  _globals['_ROUTINGTABLEUPDATE']._serialized_start=3475
+  _globals['_ROUTINGTABLEUPDATE']._serialized_end=3664
+  _globals['_ROUTINGTABLEACK']._serialized_start=3666
+  _globals['_ROUTINGTABLEACK']._serialized_end=3732
+  _globals['_AGENTLOADREQUEST']._serialized_start=3734
+  _globals['_AGENTLOADREQUEST']._serialized_end=3767
+  _globals['_AGENTLOADRESPONSE']._serialized_start=3769
+  _globals['_AGENTLOADRESPONSE']._serialized_end=3839
+  _globals['_MIGRATEAGENTREQUEST']._serialized_start=3841
+  _globals['_MIGRATEAGENTREQUEST']._serialized_end=3948
+  _globals['_MIGRATEAGENTRESPONSE']._serialized_start=3950
+  _globals['_MIGRATEAGENTRESPONSE']._serialized_end=4004
+  _globals['_IMPORTAGENTREQUEST']._serialized_start=4006
+  _globals['_IMPORTAGENTREQUEST']._serialized_end=4091
+  _globals['_IMPORTAGENTRESPONSE']._serialized_start=4093
+  _globals['_IMPORTAGENTRESPONSE']._serialized_end=4146
+  _globals['_DRAINWORKERREQUEST']._serialized_start=4148
+  _globals['_DRAINWORKERREQUEST']._serialized_end=4187
+  _globals['_DRAINWORKERRESPONSE']._serialized_start=4189
+  _globals['_DRAINWORKERRESPONSE']._serialized_end=4242
+  _globals['_ENVDATAINVALIDATION']._serialized_start=4244
+  _globals['_ENVDATAINVALIDATION']._serialized_end=4331
+  _globals['_ENVDATAINVALIDATIONACK']._serialized_start=4333
+  _globals['_ENVDATAINVALIDATIONACK']._serialized_end=4406
+  _globals['_LEASEREQUEST']._serialized_start=4408
+  _globals['_LEASEREQUEST']._serialized_end=4517
+  _globals['_LEASERESPONSE']._serialized_start=4519
+  _globals['_LEASERESPONSE']._serialized_end=4599
+  _globals['_SHMOPENREQUEST']._serialized_start=4602
+  _globals['_SHMOPENREQUEST']._serialized_end=4742
+  _globals['_SHMOPENRESPONSE']._serialized_start=4744
+  _globals['_SHMOPENRESPONSE']._serialized_end=4806
+  _globals['_AGENTSERVICE']._serialized_start=4809
+  _globals['_AGENTSERVICE']._serialized_end=7121
 # @@protoc_insertion_point(module_scope)
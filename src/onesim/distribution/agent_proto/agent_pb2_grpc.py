@@ -55,11 +55,21 @@ class AgentServiceStub(object):
                 request_serializer=agent__proto_dot_agent__pb2.EventRequest.SerializeToString,
                 response_deserializer=agent__proto_dot_agent__pb2.EventResponse.FromString,
                 _registered_method=True)
+        self.SendEventBatch = channel.unary_unary(
+                '/agent.AgentService/SendEventBatch',
+                request_serializer=agent__proto_dot_agent__pb2.EventBatchRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.EventBatchResponse.FromString,
+                _registered_method=True)
         self.CreateAgentsBatch = channel.unary_unary(
                 '/agent.AgentService/CreateAgentsBatch',
                 request_serializer=agent__proto_dot_agent__pb2.CreateAgentsBatchRequest.SerializeToString,
                 response_deserializer=agent__proto_dot_agent__pb2.CreateAgentsBatchResponse.FromString,
                 _registered_method=True)
+        self.CreateAgentsStream = channel.stream_stream(
+                '/agent.AgentService/CreateAgentsStream',
+                request_serializer=agent__proto_dot_agent__pb2.AgentChunk.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.AgentCreationProgress.FromString,
+                _registered_method=True)
         self.SendStorageEvent = channel.unary_unary(
                 '/agent.AgentService/SendStorageEvent',
                 request_serializer=agent__proto_dot_agent__pb2.StorageEventRequest.SerializeToString,
@@ -80,6 +90,11 @@ class AgentServiceStub(object):
                 request_serializer=agent__proto_dot_agent__pb2.DecisionRecordBatchRequest.SerializeToString,
                 response_deserializer=agent__proto_dot_agent__pb2.DecisionRecordBatchResponse.FromString,
                 _registered_method=True)
+        self.SendStorageBatch = channel.unary_unary(
+                '/agent.AgentService/SendStorageBatch',
+                request_serializer=agent__proto_dot_agent__pb2.StorageBatchRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.StorageBatchResponse.FromString,
+                _registered_method=True)
         self.GetEnvData = channel.unary_unary(
                 '/agent.AgentService/GetEnvData',
                 request_serializer=agent__proto_dot_agent__pb2.EnvDataRequest.SerializeToString,
@@ -120,6 +135,61 @@ class AgentServiceStub(object):
                 request_serializer=agent__proto_dot_agent__pb2.BatchDataRequest.SerializeToString,
                 response_deserializer=agent__proto_dot_agent__pb2.BatchDataResponse.FromString,
                 _registered_method=True)
+        self.UpdateRoutingTable = channel.unary_unary(
+                '/agent.AgentService/UpdateRoutingTable',
+                request_serializer=agent__proto_dot_agent__pb2.RoutingTableUpdate.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.RoutingTableAck.FromString,
+                _registered_method=True)
+        self.GetAgentLoad = channel.unary_unary(
+                '/agent.AgentService/GetAgentLoad',
+                request_serializer=agent__proto_dot_agent__pb2.AgentLoadRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.AgentLoadResponse.FromString,
+                _registered_method=True)
+        self.MigrateAgent = channel.unary_unary(
+                '/agent.AgentService/MigrateAgent',
+                request_serializer=agent__proto_dot_agent__pb2.MigrateAgentRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.MigrateAgentResponse.FromString,
+                _registered_method=True)
+        self.ImportAgent = channel.unary_unary(
+                '/agent.AgentService/ImportAgent',
+                request_serializer=agent__proto_dot_agent__pb2.ImportAgentRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.ImportAgentResponse.FromString,
+                _registered_method=True)
+        self.DrainWorker = channel.unary_unary(
+                '/agent.AgentService/DrainWorker',
+                request_serializer=agent__proto_dot_agent__pb2.DrainWorkerRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.DrainWorkerResponse.FromString,
+                _registered_method=True)
+        self.InvalidateEnvData = channel.unary_unary(
+                '/agent.AgentService/InvalidateEnvData',
+                request_serializer=agent__proto_dot_agent__pb2.EnvDataInvalidation.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.EnvDataInvalidationAck.FromString,
+                _registered_method=True)
+        self.AcquireLeases = channel.unary_unary(
+                '/agent.AgentService/AcquireLeases',
+                request_serializer=agent__proto_dot_agent__pb2.LeaseRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.LeaseResponse.FromString,
+                _registered_method=True)
+        self.RenewLeases = channel.unary_unary(
+                '/agent.AgentService/RenewLeases',
+                request_serializer=agent__proto_dot_agent__pb2.LeaseRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.LeaseResponse.FromString,
+                _registered_method=True)
+        self.ReleaseLeases = channel.unary_unary(
+                '/agent.AgentService/ReleaseLeases',
+                request_serializer=agent__proto_dot_agent__pb2.LeaseRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.LeaseResponse.FromString,
+                _registered_method=True)
+        self.OpenSharedMemory = channel.unary_unary(
+                '/agent.AgentService/OpenSharedMemory',
+                request_serializer=agent__proto_dot_agent__pb2.ShmOpenRequest.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.ShmOpenResponse.FromString,
+                _registered_method=True)
+        self.Channel = channel.stream_stream(
+                '/agent.AgentService/Channel',
+                request_serializer=agent__proto_dot_agent__pb2.Envelope.SerializeToString,
+                response_deserializer=agent__proto_dot_agent__pb2.Envelope.FromString,
+                _registered_method=True)
 
 
 class AgentServiceServicer(object):
@@ -154,6 +224,13 @@ class AgentServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SendEventBatch(self, request, context):
+        """批量发送事件（按目标节点合并）
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def CreateAgentsBatch(self, request, context):
         """批量创建agents
         """
@@ -161,6 +238,13 @@ class AgentServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CreateAgentsStream(self, request_iterator, context):
+        """流式创建agents：分块压缩发送配置，worker边接收边创建并逐块回报进度
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SendStorageEvent(self, request, context):
         """发送数据存储事件
         """
@@ -189,6 +273,13 @@ class AgentServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SendStorageBatch(self, request, context):
+        """在一条消息中发送存储事件和决策记录，可压缩
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetEnvData(self, request, context):
         """获取环境数据
         """
@@ -245,6 +336,81 @@ class AgentServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def UpdateRoutingTable(self, request, context):
+        """Master向Worker推送Agent路由表（全量或增量）
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetAgentLoad(self, request, context):
+        """Master收集Worker上各Agent的消息量和事件处理耗时
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def MigrateAgent(self, request, context):
+        """Master要求源Worker将Agent迁移到目标Worker
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportAgent(self, request, context):
+        """源Worker将Agent状态和待处理事件发送到目标Worker
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DrainWorker(self, request, context):
+        """Worker请求退出集群，其Agent在下一个step边界迁移到其他Worker
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def InvalidateEnvData(self, request, context):
+        """Master通知Worker环境数据已被修改，Worker丢弃对应的本地副本
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AcquireLeases(self, request, context):
+        """向锁的所属节点批量获取、续约和释放租约锁
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RenewLeases(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReleaseLeases(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def OpenSharedMemory(self, request, context):
+        """同机节点间建立共享内存环形缓冲区传输
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Channel(self, request_iterator, context):
+        """双向流：在一条长连接上复用上述所有一元调用
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AgentServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -268,11 +434,21 @@ def add_AgentServiceServicer_to_server(servicer, server):
                     request_deserializer=agent__proto_dot_agent__pb2.EventRequest.FromString,
                     response_serializer=agent__proto_dot_agent__pb2.EventResponse.SerializeToString,
             ),
+            'SendEventBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.SendEventBatch,
+                    request_deserializer=agent__proto_dot_agent__pb2.EventBatchRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.EventBatchResponse.SerializeToString,
+            ),
             'CreateAgentsBatch': grpc.unary_unary_rpc_method_handler(
                     servicer.CreateAgentsBatch,
                     request_deserializer=agent__proto_dot_agent__pb2.CreateAgentsBatchRequest.FromString,
                     response_serializer=agent__proto_dot_agent__pb2.CreateAgentsBatchResponse.SerializeToString,
             ),
+            'CreateAgentsStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.CreateAgentsStream,
+                    request_deserializer=agent__proto_dot_agent__pb2.AgentChunk.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.AgentCreationProgress.SerializeToString,
+            ),
             'SendStorageEvent': grpc.unary_unary_rpc_method_handler(
                     servicer.SendStorageEvent,
                     request_deserializer=agent__proto_dot_agent__pb2.StorageEventRequest.FromString,
@@ -293,6 +469,11 @@ def add_AgentServiceServicer_to_server(servicer, server):
                     request_deserializer=agent__proto_dot_agent__pb2.DecisionRecordBatchRequest.FromString,
                     response_serializer=agent__proto_dot_agent__pb2.DecisionRecordBatchResponse.SerializeToString,
             ),
+            'SendStorageBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.SendStorageBatch,
+                    request_deserializer=agent__proto_dot_agent__pb2.StorageBatchRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.StorageBatchResponse.SerializeToString,
+            ),
             'GetEnvData': grpc.unary_unary_rpc_method_handler(
                     servicer.GetEnvData,
                     request_deserializer=agent__proto_dot_agent__pb2.EnvDataRequest.FromString,
@@ -333,6 +514,61 @@ def add_AgentServiceServicer_to_server(servicer, server):
                     request_deserializer=agent__proto_dot_agent__pb2.BatchDataRequest.FromString,
                     response_serializer=agent__proto_dot_agent__pb2.BatchDataResponse.SerializeToString,
             ),
+            'UpdateRoutingTable': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateRoutingTable,
+                    request_deserializer=agent__proto_dot_agent__pb2.RoutingTableUpdate.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.RoutingTableAck.SerializeToString,
+            ),
+            'GetAgentLoad': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetAgentLoad,
+                    request_deserializer=agent__proto_dot_agent__pb2.AgentLoadRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.AgentLoadResponse.SerializeToString,
+            ),
+            'MigrateAgent': grpc.unary_unary_rpc_method_handler(
+                    servicer.MigrateAgent,
+                    request_deserializer=agent__proto_dot_agent__pb2.MigrateAgentRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.MigrateAgentResponse.SerializeToString,
+            ),
+            'ImportAgent': grpc.unary_unary_rpc_method_handler(
+                    servicer.ImportAgent,
+                    request_deserializer=agent__proto_dot_agent__pb2.ImportAgentRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.ImportAgentResponse.SerializeToString,
+            ),
+            'DrainWorker': grpc.unary_unary_rpc_method_handler(
+                    servicer.DrainWorker,
+                    request_deserializer=agent__proto_dot_agent__pb2.DrainWorkerRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.DrainWorkerResponse.SerializeToString,
+            ),
+            'InvalidateEnvData': grpc.unary_unary_rpc_method_handler(
+                    servicer.InvalidateEnvData,
+                    request_deserializer=agent__proto_dot_agent__pb2.EnvDataInvalidation.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.EnvDataInvalidationAck.SerializeToString,
+            ),
+            'AcquireLeases': grpc.unary_unary_rpc_method_handler(
+                    servicer.AcquireLeases,
+                    request_deserializer=agent__proto_dot_agent__pb2.LeaseRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.LeaseResponse.SerializeToString,
+            ),
+            'RenewLeases': grpc.unary_unary_rpc_method_handler(
+                    servicer.RenewLeases,
+                    request_deserializer=agent__proto_dot_agent__pb2.LeaseRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.LeaseResponse.SerializeToString,
+            ),
+            'ReleaseLeases': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReleaseLeases,
+                    request_deserializer=agent__proto_dot_agent__pb2.LeaseRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.LeaseResponse.SerializeToString,
+            ),
+            'OpenSharedMemory': grpc.unary_unary_rpc_method_handler(
+                    servicer.OpenSharedMemory,
+                    request_deserializer=agent__proto_dot_agent__pb2.ShmOpenRequest.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.ShmOpenResponse.SerializeToString,
+            ),
+            'Channel': grpc.stream_stream_rpc_method_handler(
+                    servicer.Channel,
+                    request_deserializer=agent__proto_dot_agent__pb2.Envelope.FromString,
+                    response_serializer=agent__proto_dot_agent__pb2.Envelope.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'agent.AgentService', rpc_method_handlers)
@@ -453,6 +689,33 @@ class AgentService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def SendEventBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/SendEventBatch',
+            agent__proto_dot_agent__pb2.EventBatchRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.EventBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def CreateAgentsBatch(request,
             target,
@@ -480,6 +743,33 @@ class AgentService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def CreateAgentsStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/agent.AgentService/CreateAgentsStream',
+            agent__proto_dot_agent__pb2.AgentChunk.SerializeToString,
+            agent__proto_dot_agent__pb2.AgentCreationProgress.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def SendStorageEvent(request,
             target,
@@ -588,6 +878,33 @@ class AgentService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def SendStorageBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/SendStorageBatch',
+            agent__proto_dot_agent__pb2.StorageBatchRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.StorageBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetEnvData(request,
             target,
@@ -803,3 +1120,300 @@ class AgentService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def UpdateRoutingTable(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/UpdateRoutingTable',
+            agent__proto_dot_agent__pb2.RoutingTableUpdate.SerializeToString,
+            agent__proto_dot_agent__pb2.RoutingTableAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetAgentLoad(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/GetAgentLoad',
+            agent__proto_dot_agent__pb2.AgentLoadRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.AgentLoadResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def MigrateAgent(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/MigrateAgent',
+            agent__proto_dot_agent__pb2.MigrateAgentRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.MigrateAgentResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ImportAgent(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/ImportAgent',
+            agent__proto_dot_agent__pb2.ImportAgentRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.ImportAgentResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DrainWorker(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/DrainWorker',
+            agent__proto_dot_agent__pb2.DrainWorkerRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.DrainWorkerResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def InvalidateEnvData(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/InvalidateEnvData',
+            agent__proto_dot_agent__pb2.EnvDataInvalidation.SerializeToString,
+            agent__proto_dot_agent__pb2.EnvDataInvalidationAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AcquireLeases(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/AcquireLeases',
+            agent__proto_dot_agent__pb2.LeaseRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.LeaseResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RenewLeases(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/RenewLeases',
+            agent__proto_dot_agent__pb2.LeaseRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.LeaseResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReleaseLeases(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/ReleaseLeases',
+            agent__proto_dot_agent__pb2.LeaseRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.LeaseResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def OpenSharedMemory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agent.AgentService/OpenSharedMemory',
+            agent__proto_dot_agent__pb2.ShmOpenRequest.SerializeToString,
+            agent__proto_dot_agent__pb2.ShmOpenResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Channel(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/agent.AgentService/Channel',
+            agent__proto_dot_agent__pb2.Envelope.SerializeToString,
+            agent__proto_dot_agent__pb2.Envelope.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
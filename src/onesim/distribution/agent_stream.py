@@ -0,0 +1,120 @@
+import json
+import zlib
+from typing import Any, Dict, Iterator, List, Tuple
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 每个Agent独有的配置项；其余配置项（schema、系统提示词、记忆与规划配置等）同类型共享
+PER_AGENT_FIELDS = frozenset(["id", "type", "profile_data", "relationships"])
+
+COMPRESSIONS = ("zlib", "zstd", "none")
+
+# Template fields an agent's config does not have
+_UNSET_KEY = "__unset__"
+
+
+def resolve_compression(compression: str) -> str:
+    """Validate a compression name, falling back to zlib when zstandard is not installed"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown agent creation compression '{compression}', expected one of {COMPRESSIONS}")
+    if compression == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, compressing agent configs with zlib")
+        return "zlib"
+    return compression
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    if compression == "zlib":
+        return zlib.compress(data)
+    return data
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("Received zstd-compressed agent configs but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+class AgentChunkEncoder:
+    """
+    将Agent配置切分为压缩的数据块，供 ``CreateAgentsStream`` 逐块发送。
+
+    The shared fields of the first config of each type form the type's
+    template, sent once with the first chunk holding that type. Every agent
+    then carries its own fields and only those template fields whose value
+    differs, so configs that do not share everything still arrive intact.
+    """
+
+    def __init__(self, chunk_size: int = 500, compression: str = "zlib"):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        self.chunk_size = chunk_size
+        self.compression = resolve_compression(compression)
+        self.stats = {"chunks": 0, "agents": 0, "raw_bytes": 0, "sent_bytes": 0}
+
+    def encode(self, agent_configs: List[Dict[str, Any]]) -> Iterator[Tuple[bytes, bytes, int]]:
+        """
+        Encode the configs chunk by chunk, lazily.
+
+        Yields:
+            Tuple[bytes, bytes, int]: Compressed JSON of the templates new in this chunk
+            (empty if none), compressed JSON of the agent records, and the number of agents
+        """
+        templates: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(agent_configs), self.chunk_size):
+            new_templates = {}
+            records = []
+            for config in agent_configs[start:start + self.chunk_size]:
+                agent_type = config["type"]
+                template = templates.get(agent_type)
+                if template is None:
+                    template = {key: value for key, value in config.items() if key not in PER_AGENT_FIELDS}
+                    templates[agent_type] = new_templates[agent_type] = template
+                record = {key: value for key, value in config.items()
+                          if key in PER_AGENT_FIELDS or key not in template or template[key] != value}
+                unset = [key for key in template if key not in config]
+                if unset:
+                    record[_UNSET_KEY] = unset
+                records.append(record)
+
+            templates_json = json.dumps(new_templates).encode("utf-8") if new_templates else b""
+            agents_json = json.dumps(records).encode("utf-8")
+            templates_blob = compress(templates_json, self.compression) if templates_json else b""
+            agents_blob = compress(agents_json, self.compression)
+            self.stats["chunks"] += 1
+            self.stats["agents"] += len(records)
+            self.stats["raw_bytes"] += len(templates_json) + len(agents_json)
+            self.stats["sent_bytes"] += len(templates_blob) + len(agents_blob)
+            yield templates_blob, agents_blob, len(records)
+
+
+class AgentChunkDecoder:
+    """Rebuild full agent configs from the chunks of one ``CreateAgentsStream`` call"""
+
+    def __init__(self):
+        self.templates: Dict[str, Dict[str, Any]] = {}
+
+    def decode(self, templates: bytes, agents: bytes, compression: str) -> List[Dict[str, Any]]:
+        if templates:
+            self.templates.update(json.loads(decompress(templates, compression)))
+        configs = []
+        for record in json.loads(decompress(agents, compression)):
+            template = self.templates.get(record["type"])
+            if template is None:
+                raise ValueError(f"No template received for agent type {record['type']}")
+            config = dict(template)
+            for key in record.pop(_UNSET_KEY, ()):
+                config.pop(key, None)
+            config.update(record)
+            configs.append(config)
+        return configs
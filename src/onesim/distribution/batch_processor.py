@@ -1,155 +1,385 @@
 import asyncio
+import json
+import os
+import random
+import tempfile
 import time
-from typing import List, Dict, Any
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 from loguru import logger
 
+from onesim.utils.runtime_stats import runtime_stats
+
+# 批次序列化后达到该大小时压缩
+COMPRESS_MIN_BYTES = 1024
+
+OVERFLOW_POLICIES = ("drop", "sample", "spill")
+
+
+class _SpillFile:
+    """Append-only JSON lines file holding records that did not fit in memory, read back in order"""
+
+    def __init__(self, directory: Optional[str]):
+        fd, self.path = tempfile.mkstemp(prefix="onesim-storage-", suffix=".jsonl", dir=directory)
+        self._writer = os.fdopen(fd, "a", encoding="utf-8")
+        self._reader = open(self.path, "r", encoding="utf-8")
+        self.pending = 0
+
+    def append(self, kind: str, data: Dict[str, Any]):
+        self._writer.write(json.dumps([kind, data], default=str) + "\n")
+        self.pending += 1
+
+    def read(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        self._writer.flush()
+        records = []
+        while len(records) < limit and self.pending:
+            kind, data = json.loads(self._reader.readline())
+            records.append((kind, data))
+            self.pending -= 1
+        if not self.pending:
+            # 全部读回后清空文件
+            self._writer.truncate(0)
+            self._writer.seek(0)
+            self._reader.seek(0)
+        return records
+
+    def close(self):
+        self._writer.close()
+        self._reader.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
 class BatchProcessor:
     """
     批处理工具类，用于减少网络开销，提高吞吐量。
     在高并发多Agent模拟中特别有用，可以合并事件和决策记录的发送请求。
+
+    Storage events and decision records wait in one queue and are sent to
+    the master together in a single ``SendStorageBatch`` call, compressed
+    with zlib once they reach ``COMPRESS_MIN_BYTES``. A background task
+    sleeps on a condition until the first record arrives, then sends when
+    ``batch_size`` records are queued or the oldest has waited
+    ``max_wait_time``; one batch is in flight at a time and records queued
+    meanwhile go into the next one.
+
+    At most ``max_pending`` records are held in memory. Beyond that new
+    records are dropped (``"drop"``), or written to a file and sent once the
+    queue has drained (``"spill"``). With ``"sample"``, only a
+    ``sample_rate`` share of new records is kept once the queue is half
+    full, and records are dropped when it is full. ``event_sampling`` keeps
+    only a share of the storage events of given event types at all times.
+
+    A batch whose RPC fails is sent again up to ``max_retries`` times with
+    exponential backoff before the next one, so records keep their order;
+    a batch that still fails is logged and counted as failed, and ``flush``
+    returns False.
     """
-    def __init__(self, batch_size=50, max_wait_time=0.1):
+
+    def __init__(self, batch_size=50, max_wait_time=0.1, max_pending: int = 100000,
+                 overflow: str = "drop", sample_rate: float = 0.1, spill_dir: Optional[str] = None,
+                 compression: bool = True, event_sampling: Optional[Dict[str, float]] = None,
+                 max_retries: int = 5, retry_backoff: float = 0.1, max_retry_backoff: float = 5.0):
         self.batch_size = batch_size
         self.max_wait_time = max_wait_time
-        self.storage_events = []
-        self.decision_records = []
-        self.last_flush_time = time.time()
-        self.flush_lock = asyncio.Lock()
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.sample_rate = sample_rate
+        self.spill_dir = spill_dir
+        self.compression = compression
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.event_sampling: Dict[str, float] = {}
+        self.node_id = ""
         self.master_address = None
         self.master_port = None
+        # (kind, data)，kind为"event"或"decision"
+        self._pending: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._first_queued_at = 0.0
+        self._spill: Optional[_SpillFile] = None
+        self._sampled: Dict[str, int] = {}
+        self._condition = asyncio.Condition()
+        # 后台任务和flush()都经此发送，一次只发送一批，保持记录顺序
+        self._send_lock = asyncio.Lock()
         self._task = None
         self._stopped = False
-    
+        self._failures = 0  # 重试后仍发送失败的批次数，flush据此判断是否全部送达
+        self.stats = {"queued": 0, "sent": 0, "batches": 0, "failed": 0, "retries": 0, "dropped": 0, "sampled_out": 0,
+                      "filtered": 0, "spilled": 0, "raw_bytes": 0, "sent_bytes": 0, "max_backlog": 0}
+        self.configure(event_sampling=event_sampling)
+
+    def configure(self, batch_size: Optional[int] = None, max_wait_time: Optional[float] = None,
+                  max_pending: Optional[int] = None, overflow: Optional[str] = None,
+                  sample_rate: Optional[float] = None, spill_dir: Optional[str] = None,
+                  compression: Optional[bool] = None, event_sampling: Optional[Dict[str, float]] = None,
+                  node_id: Optional[str] = None, max_retries: Optional[int] = None):
+        """
+        Update the batching settings; None keeps the current value.
+
+        Args:
+            batch_size: Records that trigger a send.
+            max_wait_time: Seconds the oldest record waits before a send.
+            max_pending: Records held in memory.
+            overflow: What to do with new records when the queue is full: "drop", "sample" or "spill".
+            sample_rate: Share of new records kept by the "sample" policy.
+            spill_dir: Directory of the spill file, None for the system temp directory.
+            compression: Whether to compress large batches.
+            event_sampling: Share of storage events kept per event type, 0 drops the type.
+            node_id: ID of this worker, sent with each batch.
+            max_retries: Times a failed batch is sent again before it is given up.
+        """
+        if batch_size is not None and batch_size > 0:
+            self.batch_size = int(batch_size)
+        if max_wait_time is not None and max_wait_time > 0:
+            self.max_wait_time = float(max_wait_time)
+        if max_pending is not None:
+            if max_pending < 1:
+                raise ValueError(f"max_pending must be at least 1, got {max_pending}")
+            self.max_pending = int(max_pending)
+        if overflow is not None:
+            if overflow not in OVERFLOW_POLICIES:
+                raise ValueError(f"Unknown storage overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
+            self.overflow = overflow
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+            self.sample_rate = float(sample_rate)
+        if spill_dir is not None:
+            self.spill_dir = spill_dir
+        if compression is not None:
+            self.compression = bool(compression)
+        if event_sampling is not None:
+            for event_type, rate in event_sampling.items():
+                if not 0.0 <= rate <= 1.0:
+                    raise ValueError(f"Sampling rate of {event_type} must be between 0 and 1, got {rate}")
+            self.event_sampling = dict(event_sampling)
+        if node_id is not None:
+            self.node_id = node_id
+        if max_retries is not None:
+            if max_retries < 0:
+                raise ValueError(f"max_retries must not be negative, got {max_retries}")
+            self.max_retries = int(max_retries)
+
     def start(self, master_address, master_port):
-        """启动批处理器，开始后台刷新任务"""
+        """启动批处理器，开始后台发送任务"""
         if self._task is not None:
             return
-            
+
         self.master_address = master_address
         self.master_port = master_port
         self._stopped = False
-        self._task = asyncio.create_task(self._periodic_flush())
+        self._task = asyncio.create_task(self._run())
         logger.info(f"Started batch processor for {master_address}:{master_port}")
-    
+
     def stop(self):
-        """停止批处理器并刷新所有剩余项目"""
+        """停止批处理器，后台任务发送完剩余记录后退出"""
         self._stopped = True
-        if self._task:
-            self._task.cancel()
+        if self._task is not None:
+            asyncio.create_task(self._wake())
             self._task = None
-        
-        # 最终刷新
-        asyncio.create_task(self.flush())
-    
-    async def _periodic_flush(self):
-        """定期刷新批处理的后台任务"""
+
+    async def _wake(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def backlog(self) -> int:
+        """Records waiting to be sent, in memory and spilled"""
+        return len(self._pending) + (self._spill.pending if self._spill else 0)
+
+    def _keep_event(self, event_type: str) -> bool:
+        """Deterministic per-type sampling: keeps every 1/rate-th event of the type"""
+        rate = self.event_sampling.get(event_type)
+        if rate is None or rate >= 1.0:
+            return True
+        seen = self._sampled.get(event_type, 0)
+        self._sampled[event_type] = seen + 1
+        return int((seen + 1) * rate) > int(seen * rate)
+
+    async def _add(self, kind: str, data: Dict[str, Any]) -> bool:
+        if self._spill is not None and self._spill.pending:
+            # 已有记录落盘时新记录也落盘，保持发送顺序
+            self._spill.append(kind, data)
+            self.stats["spilled"] += 1
+            return True
+        if len(self._pending) >= self.max_pending:
+            if self.overflow == "spill":
+                if self._spill is None:
+                    self._spill = _SpillFile(self.spill_dir)
+                    logger.warning(f"Storage backlog reached {self.max_pending} records, spilling to {self._spill.path}")
+                self._spill.append(kind, data)
+                self.stats["spilled"] += 1
+                return True
+            self.stats["dropped"] += 1
+            if self.stats["dropped"] == 1 or self.stats["dropped"] % 10000 == 0:
+                logger.warning(f"Storage backlog full ({self.max_pending} records), "
+                               f"{self.stats['dropped']} records dropped so far")
+            return False
+        if (self.overflow == "sample" and len(self._pending) >= self.max_pending // 2
+                and random.random() >= self.sample_rate):
+            self.stats["sampled_out"] += 1
+            return False
+
+        if not self._pending:
+            self._first_queued_at = time.monotonic()
+        self._pending.append((kind, data))
+        self.stats["queued"] += 1
+        self.stats["max_backlog"] = max(self.stats["max_backlog"], self.backlog)
+        # 只在需要改变等待状态时唤醒发送任务：队列由空变非空，或批次已满
+        if len(self._pending) == 1 or len(self._pending) == self.batch_size:
+            async with self._condition:
+                self._condition.notify_all()
+        return True
+
+    def _batch_ready(self) -> bool:
+        return (self._stopped or len(self._pending) >= self.batch_size
+                or bool(self._pending) and time.monotonic() - self._first_queued_at >= self.max_wait_time)
+
+    async def _run(self):
+        """等待记录到达，批满或最早记录超时后发送"""
         try:
-            while not self._stopped:
-                now = time.time()
-                if now - self.last_flush_time >= self.max_wait_time:
-                    await self.flush()
-                await asyncio.sleep(0.05)  # 小睡眠避免忙等
+            while True:
+                async with self._condition:
+                    await self._condition.wait_for(lambda: self._pending or self._stopped
+                                                   or (self._spill is not None and self._spill.pending))
+                    while not self._batch_ready() and self._pending:
+                        remaining = self._first_queued_at + self.max_wait_time - time.monotonic()
+                        try:
+                            await asyncio.wait_for(self._condition.wait(), timeout=max(remaining, 0.0))
+                        except asyncio.TimeoutError:
+                            break
+                async with self._send_lock:
+                    records = self._take_batch()
+                    if records:
+                        await self._deliver(records)
+                    elif self._stopped:
+                        break
         except asyncio.CancelledError:
             logger.debug("Batch processor task cancelled")
         except Exception as e:
             logger.error(f"Error in batch processor: {e}")
-    
+        finally:
+            if self._spill is not None and not self._spill.pending:
+                self._spill.close()
+                self._spill = None
+
+    def _take_batch(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Take the next batch, from memory first and then from the spill file"""
+        if self._pending:
+            records = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if self._pending:
+                self._first_queued_at = time.monotonic()
+            return records
+        if self._spill is not None and self._spill.pending:
+            return self._spill.read(self.batch_size)
+        return []
+
+    async def _deliver(self, records: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """Send a batch, retrying with exponential backoff, and count it as failed if it still fails"""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(min(self.retry_backoff * 2 ** (attempt - 1), self.max_retry_backoff))
+            if await self._send(records):
+                return True
+            logger.warning(f"Sending {len(records)} storage records to the master failed "
+                           f"(attempt {attempt + 1}/{self.max_retries + 1})")
+        self._failures += 1
+        self.stats["failed"] += len(records)
+        logger.error(f"Giving up on {len(records)} storage records after {self.max_retries + 1} attempts, "
+                     f"{self.stats['failed']} records lost so far")
+        return False
+
+    async def _send(self, records: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        # Avoid circular import by importing here
+        from onesim.distribution.grpc_impl import send_storage_batch_to_master
+
+        events = [data for kind, data in records if kind == "event"]
+        decisions = [data for kind, data in records if kind == "decision"]
+        success, raw_bytes, sent_bytes = await send_storage_batch_to_master(
+            self.master_address,
+            self.master_port,
+            self.node_id,
+            events,
+            decisions,
+            COMPRESS_MIN_BYTES if self.compression else None
+        )
+        if success:
+            self.stats["sent"] += len(records)
+            self.stats["batches"] += 1
+            self.stats["raw_bytes"] += raw_bytes
+            self.stats["sent_bytes"] += sent_bytes
+        return success
+
     async def add_storage_event(self, event_data):
         """添加存储事件到批处理"""
-        # Avoid circular import by importing here
-        from onesim.distribution.grpc_impl import send_storage_event_to_master
-        
+        if not self._keep_event(event_data.get('event_type', '')):
+            self.stats["filtered"] += 1
+            return True
+
         if not self.master_address:
             logger.warning("Batch processor not started yet")
+            # Avoid circular import by importing here
+            from onesim.distribution.grpc_impl import send_storage_event_to_master
             # 如果未启动，立即发送
             return await send_storage_event_to_master(
-                self.master_address, 
-                self.master_port, 
+                self.master_address,
+                self.master_port,
                 event_data
             )
-        
-        async with self.flush_lock:
-            self.storage_events.append(event_data)
-        
-        # 达到批处理大小时刷新
-        if len(self.storage_events) >= self.batch_size:
-            await self.flush_storage_events()
-            
-        return True
-    
+
+        return await self._add("event", event_data)
+
     async def add_decision_record(self, decision_data):
         """添加决策记录到批处理"""
-        # Avoid circular import by importing here
-        from onesim.distribution.grpc_impl import send_decision_record_to_master
-        
         if not self.master_address:
             logger.warning("Batch processor not started yet")
+            # Avoid circular import by importing here
+            from onesim.distribution.grpc_impl import send_decision_record_to_master
             # 如果未启动，立即发送
             return await send_decision_record_to_master(
-                self.master_address, 
-                self.master_port, 
+                self.master_address,
+                self.master_port,
                 decision_data
             )
-        
-        async with self.flush_lock:
-            self.decision_records.append(decision_data)
-        
-        # 达到批处理大小时刷新
-        if len(self.decision_records) >= self.batch_size:
-            await self.flush_decision_records()
-            
+
+        return await self._add("decision", decision_data)
+
+    async def flush(self) -> bool:
+        """
+        立即发送所有待处理记录，包括落盘的记录
+
+        Returns:
+            bool: False if a batch failed for good in the meantime
+        """
+        failures = self._failures
+        async with self._send_lock:
+            records = self._take_batch()
+            while records:
+                await self._deliver(records)
+                records = self._take_batch()
+        if self._failures != failures:
+            logger.warning(f"{self._failures - failures} storage batches could not be delivered during flush")
+            return False
         return True
-    
-    async def flush_storage_events(self):
-        """刷新所有待处理的存储事件"""
-        # Avoid circular import by importing here
-        from onesim.distribution.grpc_impl import send_storage_event_batch_to_master
-        
-        async with self.flush_lock:
-            if not self.storage_events:
-                return True
-                
-            events_to_send = self.storage_events
-            self.storage_events = []
-        
-        success = await send_storage_event_batch_to_master(
-            self.master_address,
-            self.master_port,
-            events_to_send
-        )
-        
-        return success
-    
-    async def flush_decision_records(self):
-        """刷新所有待处理的决策记录"""
-        # Avoid circular import by importing here
-        from onesim.distribution.grpc_impl import send_decision_record_batch_to_master
-        
-        async with self.flush_lock:
-            if not self.decision_records:
-                return True
-                
-            records_to_send = self.decision_records
-            self.decision_records = []
-        
-        success = await send_decision_record_batch_to_master(
-            self.master_address,
-            self.master_port,
-            records_to_send
-        )
-        
-        return success
-    
-    async def flush(self):
-        """刷新所有待处理项目"""
-        results = []
-        if self.storage_events:
-            results.append(await self.flush_storage_events())
-        if self.decision_records:
-            results.append(await self.flush_decision_records())
-        
-        self.last_flush_time = time.time()
-        return all(results) if results else True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching counters, with the current backlog of this worker"""
+        stats = dict(self.stats)
+        stats["backlog"] = self.backlog
+        stats["spill_backlog"] = self._spill.pending if self._spill else 0
+        return stats
 
 # 创建全局批处理器实例
-batch_processor = BatchProcessor() 
\ No newline at end of file
+batch_processor = BatchProcessor()
+
+
+def _derive_storage(stats: Dict[str, Any]):
+    stats["compression_ratio"] = stats.get("raw_bytes", 0) / (stats.get("sent_bytes") or 1)
+
+
+runtime_stats.register("storage", lambda: batch_processor.get_stats() if batch_processor._task is not None else None,
+                       gauges=("backlog", "spill_backlog"), derive=_derive_storage)
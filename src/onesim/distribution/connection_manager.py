@@ -6,6 +6,20 @@ import weakref
 import random
 from typing import Dict, Any, Optional, Tuple, List, Set
 from loguru import logger
+from onesim.distribution.stream_transport import stream_transport, StreamUnavailable
+from onesim.distribution.shm_transport import shm_transport, ShmUnavailable
+
+
+def grpc_target(address: str, port: int) -> str:
+    """
+    gRPC target for a node address.
+
+    A ``unix:`` address is a Unix domain socket path and used as is; the port
+    then only identifies the node. Any other address is combined with the port.
+    """
+    if address.startswith("unix:"):
+        return address
+    return f"{address}:{port}"
 
 class CircuitBreaker:
     """熔断器实现，用于防止对故障服务的持续请求"""
@@ -289,7 +303,7 @@ class ConnectionShard:
             }))
         ]
         
-        return grpc.aio.insecure_channel(f"{address}:{port}", options=options)
+        return grpc.aio.insecure_channel(grpc_target(address, port), options=options)
                 
     async def _wait_for_ready_state(self, channel, timeout=10.0):
         """
@@ -432,6 +446,22 @@ class ConnectionShard:
             temp_channel = self._create_channel(address, port, cache=False)
             return stub_type(temp_channel)
     
+    async def _invoke(self, address: str, port: int, stub_type, func, *args, **kwargs):
+        """依次尝试共享内存（同机节点）和双向流发送调用，都不可用时使用一元RPC"""
+        if not kwargs and len(args) == 1:
+            if shm_transport.can_use(address, port, stub_type, func):
+                try:
+                    return await shm_transport.call(address, port, func, args[0])
+                except ShmUnavailable:
+                    pass
+            if stream_transport.can_stream(address, port, stub_type, func):
+                try:
+                    return await stream_transport.call(address, port, func, args[0])
+                except StreamUnavailable:
+                    pass
+        stub = await self.get_stub(address, port, stub_type)
+        return await getattr(stub, func)(*args, **kwargs)
+
     async def with_stub(self, address: str, port: int, stub_type, func, *args, **kwargs):
         """
         使用存根执行函数调用，处理重试逻辑
@@ -457,17 +487,13 @@ class ConnectionShard:
         
         while retry_count < max_retries:
             try:
-                # 获取存根
-                stub = await self.get_stub(address, port, stub_type)
-                method = getattr(stub, func)
-                
                 # 设置超时，避免长时间阻塞
                 timeout = 600.0  # 减少默认超时
                 
-                # 执行RPC调用
+                # 执行RPC调用（经双向流或一元RPC）
                 try:
                     result = await asyncio.wait_for(
-                        method(*args, **kwargs),
+                        self._invoke(address, port, stub_type, func, *args, **kwargs),
                         timeout=timeout
                     )
                     
@@ -1,145 +1,417 @@
 import asyncio
 import time
-from typing import Optional, Dict, Protocol
+import uuid
+from collections import deque
+from typing import Optional, Dict, List, Protocol, Tuple
 from loguru import logger
 from onesim.distribution import grpc_impl
 from onesim.distribution.node import NodeRole
 from onesim.distribution.node import get_node
+from onesim.utils.runtime_stats import runtime_stats
 
 # Define a common Lock Protocol
 class LockProtocol(Protocol):
     async def acquire(self) -> bool: ...
     async def release(self) -> bool: ...
+    async def try_acquire(self) -> bool: ...
     async def __aenter__(self): ...
     async def __aexit__(self, exc_type, exc_val, exc_tb): ...
 
-# Keep the original DistributedLock implementation (implements LockProtocol)
-class DistributedLock: # No need to explicitly inherit Protocol if methods match
-    def __init__(self, lock_id: str, timeout: float = 30.0):
+
+# (token, expiry) of a granted lock
+Grant = Tuple[int, float]
+
+
+class _LeaseState:
+    __slots__ = ("holder", "token", "expiry", "waiters")
+
+    def __init__(self):
+        self.holder: Optional[str] = None
+        self.token = 0
+        self.expiry = 0.0
+        self.waiters: deque = deque()
+
+
+class LeaseTable:
+    """
+    本节点拥有的锁的授权表。
+
+    A lock is granted to one holder at a time together with a fencing token
+    that increases with every grant. Holders on this node keep the lock until
+    they release it; holders on other nodes get a lease that must be renewed,
+    so a lock held by a failed node is taken over once its lease runs out.
+    """
+
+    def __init__(self, stats: Dict[str, float]):
+        self._locks: Dict[str, _LeaseState] = {}
+        self._next_token = 0
+        self.stats = stats
+
+    def __len__(self) -> int:
+        return sum(1 for state in self._locks.values() if state.holder is not None)
+
+    def try_acquire(self, lock_id: str, holder: str, ttl: Optional[float] = None) -> Optional[Grant]:
+        """
+        Grant a lock if it is free.
+
+        Args:
+            lock_id: Lock to acquire
+            holder: Unique ID of the requester
+            ttl: Lease duration in seconds, None for a lock held until released
+
+        Returns:
+            Optional[Grant]: (fencing token, expiry), or None if the lock is held
+        """
+        state = self._locks.get(lock_id)
+        if state is None:
+            state = self._locks[lock_id] = _LeaseState()
+        now = time.monotonic()
+        if state.holder is not None:
+            if state.expiry > now:
+                return None
+            logger.warning(f"Lease on lock {lock_id} held by {state.holder} expired, taking it over")
+            self.stats["expired"] += 1
+        self._next_token += 1
+        state.holder, state.token = holder, self._next_token
+        state.expiry = now + ttl if ttl else float("inf")
+        return state.token, state.expiry
+
+    async def acquire(self, lock_id: str, holder: str, ttl: Optional[float] = None,
+                      wait: float = 30.0) -> Optional[Grant]:
+        """Grant a lock, waiting up to ``wait`` seconds for the current holder to release it or lose its lease"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + wait
+        while True:
+            grant = self.try_acquire(lock_id, holder, ttl)
+            if grant is not None:
+                return grant
+            now = time.monotonic()
+            if now >= deadline:
+                return None
+            state = self._locks[lock_id]
+            waiter = loop.create_future()
+            state.waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=min(deadline, state.expiry) - now)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                try:
+                    state.waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, lock_id: str, holder: str, token: int) -> bool:
+        """Release a lock; False if the holder no longer holds this grant"""
+        state = self._locks.get(lock_id)
+        if state is None or state.holder != holder or state.token != token:
+            return False
+        state.holder = None
+        while state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return True
+        del self._locks[lock_id]
+        return True
+
+    def renew(self, lock_id: str, holder: str, token: int, ttl: float) -> bool:
+        """Extend a lease; False if it was lost"""
+        state = self._locks.get(lock_id)
+        now = time.monotonic()
+        if state is None or state.holder != holder or state.token != token or state.expiry <= now:
+            return False
+        state.expiry = now + ttl
+        return True
+
+    def validate(self, lock_id: str, token: int) -> bool:
+        """Fencing check: whether ``token`` belongs to the current, unexpired grant of the lock"""
+        state = self._locks.get(lock_id)
+        return (state is not None and state.holder is not None
+                and state.token == token and state.expiry > time.monotonic())
+
+
+class _LeaseClient:
+    """
+    Lease calls to one remote owner node.
+
+    Non-blocking acquires and releases issued in the same event loop
+    iteration go out in one RPC. Held leases are renewed together in one
+    RPC per renewal interval.
+    """
+
+    def __init__(self, service: "LockService", address: str, port: int):
+        self.service = service
+        self.address = address
+        self.port = port
+        self._acquires: List[Tuple[str, str, float, asyncio.Future]] = []
+        self._releases: List[Tuple[str, str, int, asyncio.Future]] = []
+        self._flush_scheduled = False
+        # (lock_id, holder) -> (token, ttl)
+        self._held: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._renew_task: Optional[asyncio.Task] = None
+
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            # 在本轮事件循环中排队的请求之后发送，合并同一时刻的请求
+            asyncio.get_running_loop().call_soon(lambda: asyncio.ensure_future(self._flush()))
+
+    async def try_acquire(self, lock_id: str, holder: str, ttl: float) -> Optional[Grant]:
+        future = asyncio.get_running_loop().create_future()
+        self._acquires.append((lock_id, holder, ttl, future))
+        self._schedule_flush()
+        return await future
+
+    async def release(self, lock_id: str, holder: str, token: int) -> bool:
+        self._held.pop((lock_id, holder), None)
+        future = asyncio.get_running_loop().create_future()
+        self._releases.append((lock_id, holder, token, future))
+        self._schedule_flush()
+        return await future
+
+    async def acquire(self, lock_id: str, holder: str, ttl: float, wait: float) -> Optional[Grant]:
+        """Acquire one lock, waiting on the owner node for up to ``wait`` seconds"""
+        response = await self._call('AcquireLeases', [lock_id], [holder], [], ttl, wait)
+        grants = self._grants([lock_id], [holder], ttl, response)
+        return grants[0]
+
+    async def _flush(self) -> None:
+        self._flush_scheduled = False
+        acquires, self._acquires = self._acquires, []
+        releases, self._releases = self._releases, []
+        calls = []
+        by_ttl: Dict[float, List] = {}
+        for entry in acquires:
+            by_ttl.setdefault(entry[2], []).append(entry)
+        for ttl, entries in by_ttl.items():
+            calls.append(self._flush_acquires(ttl, entries))
+        if releases:
+            calls.append(self._flush_releases(releases))
+        await asyncio.gather(*calls)
+
+    async def _flush_acquires(self, ttl: float, entries) -> None:
+        lock_ids = [entry[0] for entry in entries]
+        holders = [entry[1] for entry in entries]
+        try:
+            response = await self._call('AcquireLeases', lock_ids, holders, [], ttl, 0.0)
+            grants = self._grants(lock_ids, holders, ttl, response)
+        except Exception as e:
+            grants = [e] * len(entries)
+        for entry, grant in zip(entries, grants):
+            future = entry[3]
+            if future.done():
+                continue
+            if isinstance(grant, Exception):
+                future.set_exception(grant)
+            else:
+                future.set_result(grant)
+
+    async def _flush_releases(self, entries) -> None:
+        try:
+            response = await self._call('ReleaseLeases', [e[0] for e in entries], [e[1] for e in entries],
+                                        [e[2] for e in entries], 0.0, 0.0)
+            released = list(response.granted) if response is not None else [False] * len(entries)
+        except Exception as e:
+            logger.error(f"Error releasing leases on {self.address}:{self.port}: {e}")
+            released = [False] * len(entries)
+        for entry, success in zip(entries, released):
+            if not entry[3].done():
+                entry[3].set_result(success)
+
+    def _grants(self, lock_ids: List[str], holders: List[str], ttl: float, response) -> List[Optional[Grant]]:
+        if response is None:
+            raise RuntimeError(f"Lock owner {self.address}:{self.port} is unreachable")
+        grants: List[Optional[Grant]] = []
+        expiry = time.monotonic() + ttl
+        for lock_id, holder, granted, token in zip(lock_ids, holders, response.granted, response.tokens):
+            if granted:
+                self._held[(lock_id, holder)] = (token, ttl)
+                grants.append((token, expiry))
+            else:
+                grants.append(None)
+        if self._held and (self._renew_task is None or self._renew_task.done()):
+            self._renew_task = asyncio.create_task(self._renew_loop())
+        return grants
+
+    async def _call(self, method: str, lock_ids, holders, tokens, ttl: float, wait: float):
+        self.service.stats["rpcs"] += 1
+        request = grpc_impl.agent_pb2.LeaseRequest(
+            node_id=self.service.node_id, lock_ids=lock_ids, holders=holders,
+            tokens=tokens, ttl=ttl, wait=wait
+        )
+        return await grpc_impl.send_lease_request(self.address, self.port, method, request)
+
+    async def _renew_loop(self) -> None:
+        """Renew all held leases at a third of their duration until none are held"""
+        while self._held:
+            await asyncio.sleep(min(ttl for _, ttl in self._held.values()) / 3)
+            by_ttl: Dict[float, List] = {}
+            for (lock_id, holder), (token, ttl) in list(self._held.items()):
+                by_ttl.setdefault(ttl, []).append((lock_id, holder, token))
+            for ttl, entries in by_ttl.items():
+                try:
+                    response = await self._call('RenewLeases', [e[0] for e in entries], [e[1] for e in entries],
+                                                [e[2] for e in entries], ttl, 0.0)
+                except Exception as e:
+                    logger.warning(f"Error renewing leases on {self.address}:{self.port}: {e}")
+                    continue
+                if response is None:
+                    continue
+                self.service.stats["renewals"] += len(entries)
+                for (lock_id, holder, token), renewed in zip(entries, response.granted):
+                    if not renewed and self._held.get((lock_id, holder), (None,))[0] == token:
+                        del self._held[(lock_id, holder)]
+                        self.service.stats["lost"] += 1
+                        logger.warning(f"Lost lease on lock {lock_id} (token {token})")
+
+
+class LockService:
+    """
+    节点的锁服务：授权本节点拥有的锁，并向其他节点申请租约。
+    """
+
+    def __init__(self):
+        self.node_id = ""
+        self.stats: Dict[str, float] = {
+            "acquires": 0, "local_grants": 0, "remote_grants": 0, "contended": 0,
+            "wait_time": 0.0, "timeouts": 0, "expired": 0, "renewals": 0, "lost": 0, "rpcs": 0
+        }
+        self.table = LeaseTable(self.stats)
+        self._clients: Dict[Tuple[str, int], _LeaseClient] = {}
+
+    def client(self, address: str, port: int) -> _LeaseClient:
+        client = self._clients.get((address, port))
+        if client is None:
+            client = self._clients[(address, port)] = _LeaseClient(self, address, port)
+        return client
+
+    async def handle(self, method: str, request):
+        """Serve a lease request from another node"""
+        response = grpc_impl.agent_pb2.LeaseResponse(success=True)
+        entries = list(zip(request.lock_ids, request.holders))
+        if method == 'AcquireLeases':
+            if request.wait > 0:
+                grants = await asyncio.gather(*(
+                    self.table.acquire(lock_id, holder, request.ttl, request.wait) for lock_id, holder in entries
+                ))
+            else:
+                grants = [self.table.try_acquire(lock_id, holder, request.ttl) for lock_id, holder in entries]
+            response.granted.extend(grant is not None for grant in grants)
+            response.tokens.extend(grant[0] if grant else 0 for grant in grants)
+        elif method == 'RenewLeases':
+            response.granted.extend(self.table.renew(lock_id, holder, token, request.ttl)
+                                    for (lock_id, holder), token in zip(entries, request.tokens))
+        elif method == 'ReleaseLeases':
+            response.granted.extend(self.table.release(lock_id, holder, token)
+                                    for (lock_id, holder), token in zip(entries, request.tokens))
+        else:
+            raise ValueError(f"Unknown lease method: {method}")
+        return response
+
+    def get_stats(self) -> Dict[str, float]:
+        """Lock counters; ``wait_time`` is the total time contended acquires waited"""
+        stats = dict(self.stats)
+        stats["held"] = len(self.table)
+        return stats
+
+
+# 全局锁服务实例
+lock_service = LockService()
+
+
+def _derive_locks(stats: Dict[str, float]):
+    stats["avg_wait"] = stats.get("wait_time", 0.0) / (stats.get("contended") or 1)
+
+
+runtime_stats.register("locks", lambda: lock_service.get_stats() if get_node() else None,
+                       gauges=("held",), derive=_derive_locks)
+
+
+class DistributedLock:
+    """
+    Lease-based lock granted by the node that owns it.
+
+    Locks owned by this node are granted from the local lease table without
+    any RPC. Locks owned by another node are leased from it and renewed in
+    the background while held. Each grant carries a fencing token in
+    ``token``, which the owner can check with ``LeaseTable.validate``.
+    """
+
+    def __init__(self, lock_id: str, timeout: float = 30.0, owner: Optional[Tuple[str, int]] = None):
+        """
+        Args:
+            lock_id: Unique identifier for the lock
+            timeout: Lease duration, and how long acquiring waits for the current holder
+            owner: (address, port) of the node that grants the lock, None if this node does
+        """
         self.lock_id = lock_id
         self.timeout = timeout
+        self.owner = owner
         self.node = get_node()
-        self._lock_holder: Optional[str] = None
-        self._lock_expiry: Optional[float] = None
-        # This local lock protects internal state, not the distributed resource itself
-        self._internal_state_lock = asyncio.Lock()
-
-    async def acquire(self) -> bool:
-        # Use internal lock to protect access to _lock_holder/_lock_expiry
-        async with self._internal_state_lock:
-            current_time = time.time()
-
-            # Check if this node already holds the lock locally
-            if self._lock_holder == self.node.node_id:
-                if self._lock_expiry and current_time < self._lock_expiry:
-                    # Already hold a valid lock
-                    return True
-                else:
-                    # Our lock expired, clear local state
-                    self._lock_holder = None
-                    self._lock_expiry = None
-                    # Note: We might still hold the lock on the master if timeout logic differs
-                    # Consider attempting release here if expired? Or rely on master cleanup.
+        self.holder = f"{self.node.node_id}/{uuid.uuid4().hex[:12]}"
+        self.token: Optional[int] = None
 
-            # Attempt to acquire lock via master if master address exists
-            if not self.node.master_address or not self.node.master_port:
-                 logger.error(f"Cannot acquire distributed lock {self.lock_id}: Master address/port not configured.")
-                 return False
+    async def _try_grant(self) -> Optional[Grant]:
+        if self.owner is None:
+            return lock_service.table.try_acquire(self.lock_id, self.holder)
+        return await lock_service.client(*self.owner).try_acquire(self.lock_id, self.holder, self.timeout)
 
-            try:
-                success = await grpc_impl.acquire_lock(
-                    self.node.master_address,
-                    self.node.master_port,
-                    self.lock_id,
-                    self.node.node_id,
-                    self.timeout
-                )
-
-                if success:
-                    self._lock_holder = self.node.node_id
-                    self._lock_expiry = current_time + self.timeout
-                    logger.debug(f"Node {self.node.node_id} acquired lock {self.lock_id}")
-                    return True
-                else:
-                    logger.debug(f"Node {self.node.node_id} failed to acquire lock {self.lock_id}")
-                    return False
+    def _granted(self, grant: Grant) -> bool:
+        self.token = grant[0]
+        lock_service.stats["local_grants" if self.owner is None else "remote_grants"] += 1
+        return True
 
-            except Exception as e:
-                logger.error(f"Error acquiring lock {self.lock_id} via gRPC: {e}")
-                return False
+    async def try_acquire(self) -> bool:
+        """Acquire the lock only if it is free"""
+        lock_service.stats["acquires"] += 1
+        try:
+            grant = await self._try_grant()
+        except Exception as e:
+            logger.error(f"Error acquiring lock {self.lock_id}: {e}")
+            return False
+        return self._granted(grant) if grant else False
 
-    async def release(self) -> bool:
-        # Use internal lock to protect access to _lock_holder/_lock_expiry
-        async with self._internal_state_lock:
-            if self._lock_holder != self.node.node_id:
-                # Trying to release a lock we don't hold locally
-                logger.warning(f"Node {self.node.node_id} attempted to release lock {self.lock_id} it doesn't appear to hold locally")
-                # Should we still attempt release on master? Maybe.
-                # Let's return False for now, assuming local state is source of truth.
-                # Or potentially just proceed to attempt release anyway. For safety, let's try release:
-                # pass # Fall through to attempt release on master
-
-            # Attempt to release lock via master if master address exists
-            if not self.node.master_address or not self.node.master_port:
-                 logger.error(f"Cannot release distributed lock {self.lock_id}: Master address/port not configured.")
-                 # Clear local state anyway?
-                 self._lock_holder = None
-                 self._lock_expiry = None
-                 return False # Indicate failure due to config
-
-            release_attempted = False
-            try:
-                # Only release if we think we hold it or attempt cleanup
-                if self._lock_holder == self.node.node_id:
-                     release_attempted = True
-                     success = await grpc_impl.release_lock(
-                        self.node.master_address,
-                        self.node.master_port,
-                        self.lock_id,
-                        self.node.node_id
-                     )
-                     if success:
-                         logger.debug(f"Node {self.node.node_id} released lock {self.lock_id}")
-                         # Clear local state ONLY on successful release confirmation
-                         self._lock_holder = None
-                         self._lock_expiry = None
-                         return True
-                     else:
-                         logger.debug(f"Node {self.node.node_id} failed to release lock {self.lock_id} on master")
-                         # Don't clear local state? Or clear anyway? Let's clear for now.
-                         self._lock_holder = None
-                         self._lock_expiry = None
-                         return False
+    async def acquire(self) -> bool:
+        stats = lock_service.stats
+        stats["acquires"] += 1
+        start = time.monotonic()
+        try:
+            grant = await self._try_grant()
+            if grant is None:
+                stats["contended"] += 1
+                if self.owner is None:
+                    grant = await lock_service.table.acquire(self.lock_id, self.holder, None, self.timeout)
                 else:
-                     # We don't think we hold it locally, maybe don't try releasing?
-                     # Or maybe try anyway for cleanup? Let's skip for now.
-                     logger.warning(f"Node {self.node.node_id} skipped releasing lock {self.lock_id} as it wasn't held locally.")
-                     return False
-
-
-            except Exception as e:
-                logger.error(f"Error releasing lock {self.lock_id} via gRPC: {e}")
-                # Clear local state on error?
-                if release_attempted:
-                     self._lock_holder = None
-                     self._lock_expiry = None
-                return False
+                    grant = await lock_service.client(*self.owner).acquire(
+                        self.lock_id, self.holder, self.timeout, self.timeout)
+                stats["wait_time"] += time.monotonic() - start
+        except Exception as e:
+            logger.error(f"Error acquiring lock {self.lock_id}: {e}")
+            return False
+        if grant is None:
+            stats["timeouts"] += 1
+            logger.debug(f"Node {self.node.node_id} timed out acquiring lock {self.lock_id}")
+            return False
+        return self._granted(grant)
 
+    async def release(self) -> bool:
+        if self.token is None:
+            logger.warning(f"Node {self.node.node_id} attempted to release lock {self.lock_id} it doesn't hold")
+            return False
+        token, self.token = self.token, None
+        if self.owner is None:
+            return lock_service.table.release(self.lock_id, self.holder, token)
+        try:
+            return await lock_service.client(*self.owner).release(self.lock_id, self.holder, token)
+        except Exception as e:
+            logger.error(f"Error releasing lock {self.lock_id}: {e}")
+            return False
 
     async def __aenter__(self):
-        # Keep trying to acquire the lock (could add retry logic/timeout here)
-        retry_delay = 0.1
-        max_attempts = 50 # ~5 seconds total wait
-        attempts = 0
-        while attempts < max_attempts:
-            if await self.acquire():
-                return self
-            attempts += 1
-            await asyncio.sleep(retry_delay)
-            # Optional: Implement exponential backoff
-            # retry_delay *= 1.5
-        raise RuntimeError(f"Failed to acquire lock {self.lock_id} after multiple attempts")
-
+        if await self.acquire():
+            return self
+        raise RuntimeError(f"Failed to acquire lock {self.lock_id} within {self.timeout}s")
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.release()
@@ -158,6 +430,11 @@ class LocalLock: # Implements LockProtocol implicitly
         # logger.debug(f"Acquired local lock: {self.lock_id}")
         return True # asyncio.Lock.acquire() blocks until acquired
 
+    async def try_acquire(self) -> bool:
+        if self._lock.locked():
+            return False
+        return await self.acquire()
+
     async def release(self) -> bool:
         # logger.debug(f"Releasing local lock: {self.lock_id}")
         try:
@@ -178,33 +455,99 @@ class LocalLock: # Implements LockProtocol implicitly
         await self.release()
 
 
-# Global lock registries
-_distributed_lock_registry: Dict[str, DistributedLock] = {}
+class LockGroup:
+    """
+    Several locks acquired and released together.
+
+    All locks are first tried at once, which costs one RPC per owner node.
+    If some are held, the granted locks after the first busy one (in lock ID
+    order) are given back and the rest are acquired one by one in lock ID
+    order, so two groups never wait on each other.
+    """
+
+    def __init__(self, locks: List[LockProtocol]):
+        self.locks = sorted(locks, key=lambda lock: lock.lock_id)
+        self._held: List[LockProtocol] = []
+
+    async def acquire(self) -> bool:
+        granted = await asyncio.gather(*(lock.try_acquire() for lock in self.locks))
+        prefix = next((i for i, ok in enumerate(granted) if not ok), len(self.locks))
+        await asyncio.gather(*(lock.release() for lock, ok in zip(self.locks[prefix:], granted[prefix:]) if ok))
+        self._held = list(self.locks[:prefix])
+        for lock in self.locks[prefix:]:
+            if not await lock.acquire():
+                await self.release()
+                return False
+            self._held.append(lock)
+        return True
+
+    async def release(self) -> bool:
+        held, self._held = self._held, []
+        results = await asyncio.gather(*(lock.release() for lock in held))
+        return all(results)
+
+    async def __aenter__(self):
+        if await self.acquire():
+            return self
+        raise RuntimeError(f"Failed to acquire locks {[lock.lock_id for lock in self.locks]}")
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+
+# Global lock registry for single-node mode
 _local_lock_registry: Dict[str, LocalLock] = {}
 _registry_lock = asyncio.Lock() # Lock for accessing registries
 
-async def get_lock(lock_id: str, timeout: float = 30.0) -> LockProtocol:
+
+async def _lock_owner(node, owner_agent_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Address of the node that grants a lock, None if this node does"""
+    if owner_agent_id is None:
+        # 未指定Agent的锁（如环境数据锁）由master授权
+        return None if node.role == NodeRole.MASTER else (node.master_address, node.master_port)
+    if node.role == NodeRole.WORKER:
+        if owner_agent_id in node.profile_id2agent:
+            return None
+        location = await node._get_agent_location(owner_agent_id)
+        return location or (node.master_address, node.master_port)
+    route = node._routes.get(owner_agent_id)
+    return (route[1], route[2]) if route else None
+
+
+async def get_lock(lock_id: str, timeout: float = 30.0, owner_agent_id: Optional[str] = None) -> LockProtocol:
     """
     Get or create a lock instance appropriate for the current execution mode.
 
     Args:
         lock_id: Unique identifier for the lock
-        timeout: Lock timeout in seconds (only relevant for DistributedLock)
+        timeout: Lease duration and acquire wait in seconds (only relevant for DistributedLock)
+        owner_agent_id: Agent whose node grants the lock; None for locks granted by the master
 
     Returns:
         LockProtocol instance (either DistributedLock or LocalLock)
     """
     node = get_node()
-    # Determine mode: Check if master address is configured (simplest check)
-
     is_distributed_mode = bool(node.role != NodeRole.SINGLE)
 
+    if is_distributed_mode:
+        return DistributedLock(lock_id, timeout, await _lock_owner(node, owner_agent_id))
+
     async with _registry_lock:
-        if is_distributed_mode:
-            if lock_id not in _distributed_lock_registry:
-                _distributed_lock_registry[lock_id] = DistributedLock(lock_id, timeout)
-            return _distributed_lock_registry[lock_id]
-        else:
-            if lock_id not in _local_lock_registry:
-                _local_lock_registry[lock_id] = LocalLock(lock_id)
-            return _local_lock_registry[lock_id]
+        if lock_id not in _local_lock_registry:
+            _local_lock_registry[lock_id] = LocalLock(lock_id)
+        return _local_lock_registry[lock_id]
+
+
+async def get_locks(lock_ids: List[str], timeout: float = 30.0, owner_agent_id: Optional[str] = None) -> LockGroup:
+    """
+    Get a group of locks that are acquired and released together.
+
+    Args:
+        lock_ids: Unique identifiers of the locks
+        timeout: Lease duration and acquire wait in seconds
+        owner_agent_id: Agent whose node grants the locks; None for locks granted by the master
+
+    Returns:
+        LockGroup: Usable with ``async with``
+    """
+    return LockGroup([await get_lock(lock_id, timeout, owner_agent_id) for lock_id in dict.fromkeys(lock_ids)])
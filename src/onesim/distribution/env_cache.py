@@ -0,0 +1,218 @@
+import copy
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Tuple
+from loguru import logger
+
+from onesim.utils.runtime_stats import runtime_stats
+
+
+def _root(key: str) -> str:
+    """Top-level env data key a (possibly dotted) key lives under"""
+    return str(key).split('.', 1)[0]
+
+
+def _is_default(value: Any, default: Any) -> bool:
+    try:
+        return bool(value == default)
+    except Exception:
+        return False
+
+
+class EnvDataReplica:
+    """
+    Worker上的环境数据只读副本，由master推送失效通知。
+
+    Values read from the master are kept per key and served locally for at
+    most ``max_staleness`` seconds. The master sends the keys it writes as
+    versioned invalidations; an invalidation that does not follow the local
+    version drops the whole replica. Keys in ``strong_keys`` are always read
+    from the master.
+    """
+
+    def __init__(self, max_staleness: float = 0.0, strong_keys: Optional[Iterable[str]] = None):
+        self.max_staleness = 0.0
+        self.strong_keys = set()
+        self.version = 0
+        # root key -> {key: (value, fetched_at)}
+        self._entries: Dict[str, Dict[str, Tuple[Any, float]]] = {}
+        # Local epoch, bumped on every invalidation; fills carry the epoch their read started in
+        self._epoch = 0
+        self._invalidated_at: Dict[str, int] = {}
+        self._cleared_at = 0
+        self.stats = {"hits": 0, "misses": 0, "strong_reads": 0, "expired": 0,
+                      "invalidations": 0, "clears": 0, "rejected_fills": 0}
+        self.configure(max_staleness, strong_keys)
+
+    def configure(self, max_staleness: float = 0.0, strong_keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Args:
+            max_staleness: Max age in seconds of a served value, 0 disables the replica
+            strong_keys: Keys (or top-level keys) that are always read from the master
+        """
+        if max_staleness < 0:
+            raise ValueError(f"max_staleness must be >= 0, got {max_staleness}")
+        self.max_staleness = float(max_staleness)
+        self.strong_keys = set(strong_keys or [])
+        if not self.enabled:
+            self._entries.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_staleness > 0
+
+    def _cacheable(self, key: Any, strong: bool) -> bool:
+        return (self.enabled and not strong and key is not None
+                and key not in self.strong_keys and _root(key) not in self.strong_keys)
+
+    def lookup(self, key: Any, strong: bool = False) -> Tuple[bool, Any]:
+        """
+        Look a key up in the replica.
+
+        Returns:
+            Tuple[bool, Any]: (found, value); the value is a copy the caller may modify
+        """
+        if not self.enabled:
+            return False, None
+        if not self._cacheable(key, strong):
+            self.stats["strong_reads"] += 1
+            return False, None
+        entry = self._entries.get(_root(key), {}).get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return False, None
+        value, fetched_at = entry
+        if time.monotonic() - fetched_at > self.max_staleness:
+            del self._entries[_root(key)][key]
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return False, None
+        self.stats["hits"] += 1
+        return True, copy.deepcopy(value)
+
+    def begin_read(self, key: Any, strong: bool = False) -> Optional[int]:
+        """
+        Start a read that goes to the master.
+
+        Returns:
+            Optional[int]: Token to pass to fill, None if the result must not be cached
+        """
+        return self._epoch if self._cacheable(key, strong) else None
+
+    def fill(self, key: Any, value: Any, token: Optional[int], default: Any = None) -> bool:
+        """
+        Store a value read from the master.
+
+        The value is dropped if its key was invalidated after the read started,
+        since the response may predate the write. Missing keys (the default was
+        returned) are not cached.
+        """
+        if token is None or value is None or (default is not None and _is_default(value, default)):
+            return False
+        root = _root(key)
+        if token < self._cleared_at or token < self._invalidated_at.get(root, 0):
+            self.stats["rejected_fills"] += 1
+            return False
+        self._entries.setdefault(root, {})[key] = (copy.deepcopy(value), time.monotonic())
+        return True
+
+    def invalidate(self, keys: Iterable[Any]) -> None:
+        """Drop the given keys and every key under the same top-level key"""
+        if not self.enabled:
+            return
+        self._epoch += 1
+        for key in keys:
+            root = _root(key)
+            self._entries.pop(root, None)
+            self._invalidated_at[root] = self._epoch
+            self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Drop the whole replica"""
+        self._epoch += 1
+        self._cleared_at = self._epoch
+        self._entries.clear()
+        self._invalidated_at.clear()
+        self.stats["clears"] += 1
+
+    def apply(self, update) -> int:
+        """
+        Apply an invalidation pushed by the master.
+
+        Returns:
+            int: Version of the replica after the update
+        """
+        if update.all or update.base_version != self.version:
+            if not update.all:
+                logger.debug(f"Env data invalidation {update.base_version}->{update.version} does not follow "
+                             f"local version {self.version}, dropping the replica")
+            self.clear()
+        else:
+            self.invalidate(update.keys)
+        self.version = update.version
+        return self.version
+
+    def get_stats(self) -> Dict[str, int]:
+        """Replica counters; every hit is a GetEnvData round trip to the master that was saved"""
+        stats = dict(self.stats)
+        stats["saved_rpcs"] = stats["hits"]
+        stats["entries"] = sum(len(entries) for entries in self._entries.values())
+        return stats
+
+
+class EnvDataPublisher:
+    """
+    Master上的环境数据失效日志，为worker副本生成增量失效通知。
+
+    Each write bumps the version. A worker that acked version ``v`` is sent the
+    union of keys written after ``v``; a worker too far behind the bounded log
+    is told to drop everything.
+    """
+
+    def __init__(self, enabled: bool = False, history: int = 1024):
+        self.enabled = enabled
+        self.version = 0
+        # (version, keys), keys is None when everything was invalidated
+        self._log: deque = deque(maxlen=history)
+
+    def configure(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+
+    def invalidate(self, keys: Optional[Iterable[Any]] = None) -> int:
+        """Record a write to the given keys, or to all keys if None"""
+        self.version += 1
+        self._log.append((self.version, None if keys is None else {_root(key) for key in keys}))
+        return self.version
+
+    def build_update(self, base_version: Optional[int]):
+        """Build the invalidation that brings a worker at ``base_version`` up to date"""
+        from onesim.distribution.grpc_impl import agent_pb2
+        update = agent_pb2.EnvDataInvalidation(version=self.version, base_version=base_version or 0)
+        if base_version is None or not self._log or self._log[0][0] > base_version + 1:
+            update.all = True
+            return update
+        keys: set = set()
+        for version, written in self._log:
+            if version <= base_version:
+                continue
+            if written is None:
+                update.all = True
+                return update
+            keys.update(written)
+        update.keys.extend(sorted(keys))
+        return update
+
+
+# 全局环境数据副本实例（worker）
+env_data_replica = EnvDataReplica()
+
+
+def _derive_env_cache(stats: Dict[str, Any]):
+    stats["hit_rate"] = stats.get("hits", 0) / ((stats.get("hits", 0) + stats.get("misses", 0)) or 1)
+
+
+runtime_stats.register("env_cache", lambda: env_data_replica.get_stats() if env_data_replica.enabled else None,
+                       gauges=("entries",), derive=_derive_env_cache)
+
+# 全局环境数据失效日志实例（master）
+env_data_publisher = EnvDataPublisher()
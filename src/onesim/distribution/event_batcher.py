@@ -0,0 +1,360 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+
+@dataclass
+class _Destination:
+    """Outgoing event buffer and sender task of one destination node"""
+    address: str
+    port: int
+    buffer: List = field(default_factory=list)
+    oldest: float = 0.0  # Enqueue time of the oldest buffered event
+    flushing: bool = False
+    has_events: asyncio.Event = field(default_factory=asyncio.Event)
+    batch_full: asyncio.Event = field(default_factory=asyncio.Event)
+    drained: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    supports_batch: bool = True
+    overflowing: bool = False
+    closed: bool = False
+    sent: int = 0
+    dropped: int = 0
+    failed_batches: int = 0
+    retries: int = 0
+    overflowed: int = 0  # Oldest events dropped to make room for new ones
+
+
+class EventBatcher:
+    """
+    按目标节点合并事件，通过SendEventBatch批量发送，减少RPC数量。
+
+    Events for the same destination are buffered and sent when the buffer
+    reaches ``batch_size`` or when the oldest buffered event has waited
+    ``max_wait_time`` seconds. Each destination has a single sender task that
+    sends one batch at a time, so events arrive in the order they were queued.
+    Destinations that do not implement SendEventBatch fall back to one
+    SendEvent call per event.
+
+    Slow or unreachable destinations are isolated: at most ``max_in_flight``
+    batches are sent concurrently across all destinations, one per
+    destination, and ``send`` only appends to the destination's buffer, so
+    the callers, e.g. the event bus dispatcher, never wait for one node.
+    A destination that has ``max_pending`` events waiting drops its oldest
+    event for each new one, counted as ``overflowed``.
+
+    A batch whose RPC fails, or some of whose events the destination did
+    not process, is sent again, without the events already processed, up to
+    ``max_retries`` times with exponential backoff before the next batch of
+    the destination is sent, so delivery order is kept. Batches that still fail are handed to the
+    failure handler (see ``set_failure_handler``), and ``flush`` reports
+    them by returning False.
+    """
+
+    def __init__(self, batch_size: int = 256, max_wait_time: float = 0.005,
+                 max_in_flight: int = 64, max_pending: int = 100000,
+                 max_retries: int = 5, retry_backoff: float = 0.05, max_retry_backoff: float = 2.0):
+        self.batch_size = batch_size
+        self.max_wait_time = max_wait_time
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._destinations: Dict[Tuple[str, int], _Destination] = {}
+        self._stopped = False
+        self._failure_handler: Optional[Callable[[str, int, List, Exception], Awaitable[None]]] = None
+        self._failures = 0  # 重试后仍发送失败的批次数，flush据此判断是否全部送达
+        self.stats = {"events": 0, "batches": 0, "failed_batches": 0, "failed_events": 0,
+                      "retries": 0, "overflowed": 0, "dropped": 0}
+
+    def configure(self, batch_size: Optional[int] = None, max_wait_time: Optional[float] = None,
+                  max_in_flight: Optional[int] = None, max_pending: Optional[int] = None,
+                  max_retries: Optional[int] = None):
+        """
+        Update the flush thresholds and limits.
+
+        Args:
+            batch_size: Maximum number of events per batch. 1 disables coalescing.
+            max_wait_time: Maximum time in seconds an event waits for a batch to fill.
+            max_in_flight: Maximum number of batches sent concurrently to all destinations.
+            max_pending: Maximum number of events waiting for one destination before its oldest are dropped.
+            max_retries: Retries of a failed batch before it is handed to the failure handler.
+        """
+        if batch_size is not None:
+            self.batch_size = max(int(batch_size), 1)
+        if max_wait_time is not None:
+            self.max_wait_time = max(float(max_wait_time), 0.0)
+        if max_in_flight is not None:
+            self._in_flight = asyncio.Semaphore(max(int(max_in_flight), 1))
+        if max_pending is not None:
+            self.max_pending = max(int(max_pending), 1)
+        if max_retries is not None:
+            self.max_retries = max(int(max_retries), 0)
+
+    def set_failure_handler(self, handler: Optional[Callable[[str, int, List, Exception], Awaitable[None]]]):
+        """
+        Set the coroutine called with ``(address, port, events, error)`` for a batch
+        that could not be delivered after all retries, e.g. to re-route its events.
+        """
+        self._failure_handler = handler
+
+    def _get_destination(self, address: str, port: int) -> _Destination:
+        key = (address, port)
+        dest = self._destinations.get(key)
+        if dest is None:
+            dest = _Destination(address=address, port=port)
+            dest.drained.set()
+            self._destinations[key] = dest
+        if dest.task is None or dest.task.done():
+            dest.task = asyncio.create_task(self._run(dest))
+        return dest
+
+    async def send(self, address: str, port: int, proto_event) -> bool:
+        """
+        Queue an event for a destination node.
+
+        Args:
+            address: Destination node address
+            port: Destination node port
+            proto_event: The event as an ``EventRequest`` message
+
+        Returns:
+            bool: True if the event was queued (or sent, when coalescing is disabled)
+        """
+        if self._stopped or self.batch_size <= 1:
+            return await self._send_one(address, port, proto_event)
+
+        dest = self._get_destination(address, port)
+        if len(dest.buffer) >= self.max_pending:
+            # 只影响积压的目标节点：丢弃其最早的事件，不让调用方等待
+            del dest.buffer[0]
+            dest.overflowed += 1
+            self.stats["overflowed"] += 1
+            if not dest.overflowing:
+                dest.overflowing = True
+                logger.warning(f"{address}:{port} has {len(dest.buffer) + 1} pending events, "
+                               f"dropping its oldest events until it catches up")
+        if not dest.buffer:
+            dest.oldest = time.monotonic()
+        dest.buffer.append(proto_event)
+        dest.drained.clear()
+        dest.has_events.set()
+        if len(dest.buffer) >= self.batch_size:
+            dest.batch_full.set()
+        return True
+
+    async def _run(self, dest: _Destination):
+        """Sender loop of one destination"""
+        try:
+            while True:
+                await dest.has_events.wait()
+
+                # 等待批次填满或最早事件的等待窗口结束
+                delay = dest.oldest + self.max_wait_time - time.monotonic()
+                if len(dest.buffer) < self.batch_size and delay > 0 and not dest.flushing and not self._stopped:
+                    dest.batch_full.clear()
+                    try:
+                        await asyncio.wait_for(dest.batch_full.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+
+                batch = dest.buffer[:self.batch_size]
+                del dest.buffer[:self.batch_size]
+                if not dest.buffer:
+                    dest.has_events.clear()
+                    dest.batch_full.clear()
+
+                if batch:
+                    await self._deliver(dest, batch)
+
+                if dest.overflowing and len(dest.buffer) < self.max_pending // 2:
+                    dest.overflowing = False
+                    logger.info(f"{dest.address}:{dest.port} caught up, {dest.overflowed} events dropped so far")
+
+                if not dest.buffer:
+                    dest.drained.set()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Event batcher for {dest.address}:{dest.port} stopped: {e}")
+            dest.drained.set()
+
+    async def _deliver(self, dest: _Destination, batch: List):
+        """Send a batch, retrying with exponential backoff, and hand it to the failure handler if it still fails"""
+        self.stats["events"] += len(batch)
+        self.stats["batches"] += 1
+        error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                dest.retries += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(min(self.retry_backoff * 2 ** (attempt - 1), self.max_retry_backoff))
+                if dest.closed:
+                    break
+            try:
+                async with self._in_flight:
+                    await self._send_batch(dest, batch)
+                return
+            except Exception as e:
+                error = e
+                logger.warning(f"Sending batch of {len(batch)} events to {dest.address}:{dest.port} failed "
+                               f"(attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+
+        self._failures += 1
+        self.stats["failed_batches"] += 1
+        self.stats["failed_events"] += len(batch)
+        dest.failed_batches += 1
+        if dest.closed:
+            return
+        logger.error(f"Giving up on batch of {len(batch)} events to {dest.address}:{dest.port}: {error}")
+        if self._failure_handler is not None:
+            try:
+                await self._failure_handler(dest.address, dest.port, batch, error)
+            except Exception as e:
+                logger.error(f"Event delivery failure handler failed: {e}")
+
+    async def _send_batch(self, dest: _Destination, batch: List) -> bool:
+        """
+        Send a batch, falling back to unary calls if the destination has no batch RPC.
+
+        Events the destination processed are removed from ``batch``, so that
+        a retry only sends the rest.
+
+        Raises:
+            Exception: If the RPC failed or the destination did not process some events
+        """
+        from onesim.distribution.grpc_impl import agent_pb2, agent_pb2_grpc, connection_manager
+
+        if dest.supports_batch:
+            try:
+                response = await connection_manager.with_stub(
+                    dest.address,
+                    dest.port,
+                    agent_pb2_grpc.AgentServiceStub,
+                    'SendEventBatch',
+                    agent_pb2.EventBatchRequest(events=batch),
+                )
+                if not response.received:
+                    # 只保留处理失败的事件重发；对方未列出失败事件时重发整批
+                    failed = set(response.failed_event_ids)
+                    if failed:
+                        delivered = len(batch)
+                        batch[:] = [event for event in batch if event.event_id in failed]
+                        dest.sent += delivered - len(batch)
+                    raise RuntimeError(f"{len(batch)} events of the batch were not processed: {response.error}")
+                dest.sent += len(batch)
+                return True
+            except Exception as e:
+                import grpc
+                if isinstance(e, grpc.aio.AioRpcError) and e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                    logger.warning(f"{dest.address}:{dest.port} does not support SendEventBatch, "
+                                   f"falling back to SendEvent")
+                    dest.supports_batch = False
+                else:
+                    raise
+
+        # 逐个发送，失败时只重发尚未送达的事件
+        from onesim.distribution.grpc_impl import agent_pb2_grpc, connection_manager
+        while batch:
+            await connection_manager.with_stub(
+                dest.address, dest.port, agent_pb2_grpc.AgentServiceStub, 'SendEvent', batch[0]
+            )
+            del batch[0]
+            dest.sent += 1
+        return True
+
+    async def _send_one(self, address: str, port: int, proto_event) -> bool:
+        from onesim.distribution.grpc_impl import agent_pb2_grpc, connection_manager
+        try:
+            response = await connection_manager.with_stub(
+                address, port, agent_pb2_grpc.AgentServiceStub, 'SendEvent', proto_event
+            )
+            return response.received
+        except Exception as e:
+            logger.error(f"Error sending event to {address}:{port}: {e}")
+            return False
+
+    def discard(self, address: str, port: int) -> int:
+        """
+        Drop the pending events of a destination and stop its sender task,
+        e.g. after the node was removed.
+
+        Returns:
+            int: Number of events dropped
+        """
+        dest = self._destinations.pop((address, port), None)
+        if dest is None:
+            return 0
+        dropped = len(dest.buffer)
+        dest.buffer.clear()
+        dest.closed = True
+        dest.drained.set()
+        if dest.task and not dest.task.done():
+            dest.task.cancel()
+        self.stats["dropped"] += dropped
+        if dropped:
+            logger.warning(f"Discarded {dropped} pending events for {address}:{port}")
+        return dropped
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Return pending, sent, dropped, overflowed, retried and failed counts per destination"""
+        return {
+            f"{dest.address}:{dest.port}": {
+                "pending": len(dest.buffer),
+                "sent": dest.sent,
+                "dropped": dest.dropped,
+                "overflowed": dest.overflowed,
+                "retries": dest.retries,
+                "failed_batches": dest.failed_batches,
+            }
+            for dest in self._destinations.values()
+        }
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send all buffered events now and wait until they are delivered.
+
+        Args:
+            timeout: Maximum time to wait in seconds, None to wait indefinitely
+
+        Returns:
+            bool: True if all destinations were drained in time and no batch failed
+            for good in the meantime
+        """
+        failures = self._failures
+        destinations = list(self._destinations.values())
+        for dest in destinations:
+            dest.flushing = True
+            dest.batch_full.set()
+        try:
+            waits = [dest.drained.wait() for dest in destinations if dest.task and not dest.task.done()]
+            if waits:
+                await asyncio.wait_for(asyncio.gather(*waits), timeout=timeout)
+            if self._failures != failures:
+                logger.warning(f"{self._failures - failures} event batches could not be delivered during flush")
+                return False
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out flushing event batches after {timeout}s")
+            return False
+        finally:
+            for dest in destinations:
+                dest.flushing = False
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush buffered events and stop all sender tasks"""
+        await self.flush(timeout=timeout)
+        self._stopped = True
+        for dest in self._destinations.values():
+            dest.closed = True
+            if dest.task and not dest.task.done():
+                dest.task.cancel()
+        self._destinations.clear()
+        logger.info(f"Event batcher stopped: {self.stats['events']} events in {self.stats['batches']} batches")
+
+
+# 全局事件批处理器实例
+event_batcher = EventBatcher()
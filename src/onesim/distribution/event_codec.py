@@ -0,0 +1,231 @@
+import inspect
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Carried in dedicated EventRequest fields, never in the payload
+HEADER_FIELDS = frozenset(["from_agent_id", "to_agent_id", "event_kind", "event_id", "timestamp"])
+
+# Marker key of an encoded numpy array: {"__nd__": [dtype, shape, buffer]}
+_ND_KEY = "__nd__"
+# Marker key of an encoded tuple: {"__tuple__": [items]}
+_TUPLE_KEY = "__tuple__"
+
+
+class EventLayout:
+    """
+    Field layout of an event class, derived from its ``__init__`` signature.
+
+    Declared fields are encoded positionally; any other attribute goes into
+    an extras map. The fingerprint identifies the layout on the wire, so both
+    nodes must have loaded the same scenario ``events.py``. Attributes of
+    slotted event classes are read from their slots.
+    """
+
+    __slots__ = ("cls", "fields", "field_set", "fingerprint", "slots")
+
+    def __init__(self, cls: type):
+        self.cls = cls
+        params = inspect.signature(cls.__init__).parameters.values()
+        self.fields: Tuple[str, ...] = tuple(
+            p.name for p in params
+            if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+            and p.name != "self" and p.name not in HEADER_FIELDS
+        )
+        self.field_set = frozenset(self.fields)
+        # 0 is reserved for events encoded without a layout
+        self.fingerprint = zlib.crc32(f"{cls.__name__}:{','.join(self.fields)}".encode("utf-8")) or 1
+        slots = []
+        for klass in cls.__mro__:
+            names = klass.__dict__.get("__slots__", ())
+            for name in ((names,) if isinstance(names, str) else names):
+                if name not in ("__dict__", "__weakref__") and name not in slots:
+                    slots.append(name)
+        self.slots: Tuple[str, ...] = tuple(slots)
+
+    def attributes(self, event) -> Dict[str, Any]:
+        """Return the attributes stored on an event, in its ``__dict__`` and its slots"""
+        attrs = getattr(event, "__dict__", None)
+        if not self.slots:
+            return attrs if attrs is not None else {}
+        attrs = dict(attrs) if attrs is not None else {}
+        for name in self.slots:
+            if hasattr(event, name):
+                attrs[name] = getattr(event, name)
+        return attrs
+
+
+def _default(obj: Any) -> Any:
+    """Encode values msgpack does not support natively, or, packing with strict types, that would change type"""
+    if isinstance(obj, tuple):
+        return {_TUPLE_KEY: list(obj)}
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, list):
+        return list(obj)
+    for base in (bool, int, float, str, bytes):
+        if isinstance(obj, base):
+            return base(obj)
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.hasobject:
+            return obj.tolist()
+        if not obj.flags.c_contiguous:
+            obj = np.ascontiguousarray(obj)
+        # The array buffer is packed directly, without an intermediate bytes copy
+        return {_ND_KEY: [obj.dtype.str, list(obj.shape), memoryview(obj).cast("B")]}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # Same fallback as the JSON encoding
+    return str(obj)
+
+
+def _object_hook(obj: Dict[Any, Any]) -> Any:
+    if len(obj) == 1:
+        if _ND_KEY in obj:
+            dtype, shape, data = obj[_ND_KEY]
+            # 复制为可写数组，与JSON路径一样可被处理函数修改
+            return np.array(np.frombuffer(data, dtype=np.dtype(dtype)).reshape(shape), copy=True)
+        if _TUPLE_KEY in obj:
+            return tuple(obj[_TUPLE_KEY])
+    return obj
+
+
+class EventCodec:
+    """
+    事件二进制编解码器，用于替代payload_json。
+
+    Events are encoded with msgpack as ``[fingerprint, values, extras]``,
+    where ``values`` follow the cached layout of the event class. numpy
+    arrays are packed from their buffer and decoded as writable copies, and
+    tuples are tagged so that they decode as tuples, not lists. The receiver
+    rebuilds an instance of the same class, or a generic ``Event`` if the
+    class is not loaded there. With ``codec="json"``, or when msgpack is not
+    installed, events keep using ``payload_json``.
+    """
+
+    def __init__(self, codec: str = "msgpack"):
+        self.codec = "json"
+        self._layouts: Dict[type, EventLayout] = {}
+        self._layouts_by_fingerprint: Dict[int, EventLayout] = {}
+        self._classes_by_kind: Dict[str, type] = {}
+        self.configure(codec)
+
+    def configure(self, codec: Optional[str] = None):
+        """
+        Select the payload encoding.
+
+        Args:
+            codec: "msgpack" or "json".
+        """
+        if codec is None:
+            return
+        if codec not in ("msgpack", "json"):
+            raise ValueError(f"Unknown event codec '{codec}', expected 'msgpack' or 'json'")
+        if codec == "msgpack" and msgpack is None:
+            logger.warning("msgpack is not installed, using JSON event payloads")
+            codec = "json"
+        self.codec = codec
+
+    @property
+    def binary(self) -> bool:
+        return self.codec == "msgpack"
+
+    def layout_for(self, cls: type) -> EventLayout:
+        """Return the cached layout of an event class"""
+        layout = self._layouts.get(cls)
+        if layout is None:
+            layout = EventLayout(cls)
+            self._layouts[cls] = layout
+            self._layouts_by_fingerprint[layout.fingerprint] = layout
+            self._classes_by_kind[cls.__name__] = cls
+        return layout
+
+    def _discover(self, event_kind: str) -> Optional[type]:
+        """Find a loaded Event subclass by name, e.g. from the scenario's events.py"""
+        from onesim.events import Event
+
+        found = None
+        pending = [Event]
+        while pending:
+            cls = pending.pop()
+            if cls.__name__ == event_kind:
+                found = cls
+            pending.extend(cls.__subclasses__())
+        if found is not None:
+            self.layout_for(found)
+        return found
+
+    def encode(self, event) -> bytes:
+        """
+        Encode the non-header attributes of an event.
+
+        Args:
+            event: The event to encode
+
+        Returns:
+            bytes: The msgpack payload
+        """
+        layout = self.layout_for(type(event))
+        attrs = layout.attributes(event)
+        fingerprint = layout.fingerprint
+        values: List[Any] = []
+        for name in layout.fields:
+            if name not in attrs:
+                # A declared field was not stored, fall back to a plain map
+                fingerprint, values = 0, []
+                break
+            values.append(attrs[name])
+
+        skip = layout.field_set if fingerprint else ()
+        extras = {k: v for k, v in attrs.items() if k not in HEADER_FIELDS and k not in skip}
+        return msgpack.packb([fingerprint, values, extras or None], default=_default, use_bin_type=True,
+                             strict_types=True)
+
+    def decode(self, data: bytes, event_kind: str) -> Tuple[Optional[type], Dict[str, Any]]:
+        """
+        Decode a payload produced by ``encode``.
+
+        Args:
+            data: The msgpack payload
+            event_kind: Kind of the encoded event
+
+        Returns:
+            Tuple[Optional[type], Dict[str, Any]]: The event class (None if it is
+            not loaded on this node) and the decoded attributes
+
+        Raises:
+            ValueError: If the payload uses a layout this node does not know
+        """
+        fingerprint, values, extras = msgpack.unpackb(data, object_hook=_object_hook, raw=False,
+                                                      strict_map_key=False)
+        if fingerprint:
+            layout = self._layouts_by_fingerprint.get(fingerprint)
+            if layout is None:
+                self._discover(event_kind)
+                layout = self._layouts_by_fingerprint.get(fingerprint)
+            if layout is None:
+                raise ValueError(f"Unknown layout for event {event_kind}; make sure all nodes load the "
+                                 f"same events.py, or set event_codec to 'json'")
+            cls = layout.cls
+            fields = dict(zip(layout.fields, values))
+        else:
+            if event_kind not in self._classes_by_kind:
+                # Also caches kinds without a class, which decode as generic events
+                self._classes_by_kind[event_kind] = self._discover(event_kind)
+            cls = self._classes_by_kind[event_kind]
+            fields = {}
+        if extras:
+            fields.update(extras)
+        return cls, fields
+
+
+# 全局事件编解码器实例
+event_codec = EventCodec()
@@ -12,11 +12,18 @@ import sys
 from pathlib import Path
 from datetime import datetime
 import weakref
+import zlib
 
 # Import ConnectionManager from the new module
 from onesim.distribution.connection_manager import connection_manager
 # Import BatchProcessor from the new module
 from onesim.distribution.batch_processor import batch_processor
+from onesim.distribution.event_batcher import event_batcher
+from onesim.distribution.stream_transport import serve_channel
+from onesim.distribution.shm_transport import shm_transport
+from onesim.distribution.stats_push import stats_aggregator
+from onesim.distribution.agent_stream import AgentChunkEncoder, AgentChunkDecoder
+from onesim.distribution.event_codec import event_codec
 
 # 获取当前目录
 current_dir = Path(__file__).parent.absolute()
@@ -66,9 +73,15 @@ service AgentService {
   
   // 发送事件
   rpc SendEvent (EventRequest) returns (EventResponse) {}
+
+  // 批量发送事件（按目标节点合并）
+  rpc SendEventBatch (EventBatchRequest) returns (EventBatchResponse) {}
   
   // 批量创建agents
   rpc CreateAgentsBatch (CreateAgentsBatchRequest) returns (CreateAgentsBatchResponse) {}
+
+  // 流式创建agents：分块压缩发送配置，worker边接收边创建并逐块回报进度
+  rpc CreateAgentsStream (stream AgentChunk) returns (stream AgentCreationProgress) {}
   
   // 发送数据存储事件
   rpc SendStorageEvent (StorageEventRequest) returns (StorageEventResponse) {}
@@ -81,6 +94,9 @@ service AgentService {
   
   // 批量发送决策记录
   rpc SendDecisionRecordBatch (DecisionRecordBatchRequest) returns (DecisionRecordBatchResponse) {}
+
+  // 在一条消息中发送存储事件和决策记录，可压缩
+  rpc SendStorageBatch (StorageBatchRequest) returns (StorageBatchResponse) {}
   
   // 获取环境数据
   rpc GetEnvData (EnvDataRequest) returns (EnvDataResponse) {}
@@ -105,6 +121,35 @@ service AgentService {
 
   // Master向Worker批量收集数据
   rpc CollectDataBatch(BatchDataRequest) returns (BatchDataResponse) {}
+
+  // Master向Worker推送Agent路由表（全量或增量）
+  rpc UpdateRoutingTable (RoutingTableUpdate) returns (RoutingTableAck) {}
+
+  // Master收集Worker上各Agent的消息量和事件处理耗时
+  rpc GetAgentLoad (AgentLoadRequest) returns (AgentLoadResponse) {}
+
+  // Master要求源Worker将Agent迁移到目标Worker
+  rpc MigrateAgent (MigrateAgentRequest) returns (MigrateAgentResponse) {}
+
+  // 源Worker将Agent状态和待处理事件发送到目标Worker
+  rpc ImportAgent (ImportAgentRequest) returns (ImportAgentResponse) {}
+
+  // Worker请求退出集群，其Agent在下一个step边界迁移到其他Worker
+  rpc DrainWorker (DrainWorkerRequest) returns (DrainWorkerResponse) {}
+
+  // Master通知Worker环境数据已被修改，Worker丢弃对应的本地副本
+  rpc InvalidateEnvData (EnvDataInvalidation) returns (EnvDataInvalidationAck) {}
+
+  // 向锁的所属节点批量获取、续约和释放租约锁
+  rpc AcquireLeases (LeaseRequest) returns (LeaseResponse) {}
+  rpc RenewLeases (LeaseRequest) returns (LeaseResponse) {}
+  rpc ReleaseLeases (LeaseRequest) returns (LeaseResponse) {}
+
+  // 同机节点间建立共享内存环形缓冲区传输
+  rpc OpenSharedMemory (ShmOpenRequest) returns (ShmOpenResponse) {}
+
+  // 双向流：在一条长连接上复用上述所有一元调用
+  rpc Channel (stream Envelope) returns (stream Envelope) {}
 }
 
 // Worker注册请求
@@ -124,11 +169,16 @@ message RegisterWorkerResponse {
 message HeartbeatRequest {
   string worker_id = 1;
   int64 timestamp = 2;
+  uint64 stats_seq = 3;                // 统计更新序号，0表示不携带统计
+  uint64 stats_base = 4;               // 本次更新所基于的序号
+  bool stats_full = 5;                 // 是否为完整统计
+  bytes stats_delta = 6;               // zlib压缩的JSON，只含变化的顶层统计项
 }
 
 // 心跳响应
 message HeartbeatResponse {
   bool acknowledged = 1;
+  bool stats_resync = 2;               // Master需要完整统计
 }
 
 // 创建Agent请求
@@ -155,6 +205,7 @@ message EventRequest {
   string payload_json = 6;  // JSON序列化的payload
   string reply_to_worker_address = 7; // For P2P direct replies
   int32 reply_to_worker_port = 8;    // For P2P direct replies
+  bytes payload = 9;  // msgpack编码的payload，非空时优先于payload_json
 }
 
 // 事件响应
@@ -162,7 +213,7 @@ message EventResponse {
   bool received = 1;
 }
 
-// 批量事件请求 (用于P2P批量发送)
+// 批量事件请求，按发送顺序处理
 message EventBatchRequest {
   repeated EventRequest events = 1;
 }
@@ -227,6 +278,21 @@ message DecisionRecordBatchResponse {
   string error = 3;
 }
 
+// 存储事件和决策记录的合并批次
+message StorageBatchRequest {
+  string node_id = 1;
+  repeated StorageEventRequest events = 2;
+  repeated DecisionRecordRequest decisions = 3;
+  bytes compressed = 4;                // zlib压缩的StorageBatchRequest（只含events和decisions），非空时代替2、3
+}
+
+// 合并批次响应
+message StorageBatchResponse {
+  bool received = 1;
+  int32 processed_count = 2;
+  string error = 3;
+}
+
 // 批量创建agents请求
 message CreateAgentsBatchRequest {
   repeated string configs_json = 1;
@@ -239,6 +305,25 @@ message CreateAgentsBatchResponse {
   repeated string agent_ids = 3;
 }
 
+// 流式创建agents的数据块，同类型共享的配置只在首次出现时随templates发送
+message AgentChunk {
+  int32 seq = 1;
+  int32 total = 2;  // 本次调用创建的agent总数
+  string compression = 3;  // zlib、zstd或none
+  bytes templates = 4;  // 新出现类型的共享配置，压缩的JSON
+  bytes agents = 5;  // 各agent独有的配置，压缩的JSON
+}
+
+// 流式创建agents的进度，每处理完一个数据块返回一次
+message AgentCreationProgress {
+  int32 seq = 1;
+  bool success = 2;
+  int32 created = 3;
+  int32 total = 4;
+  repeated string agent_ids = 5;
+  string message = 6;
+}
+
 // 环境数据请求
 message EnvDataRequest {
   string key = 1;
@@ -342,6 +427,133 @@ message BatchDataResponse {
   bool success = 1;
   string collected_data_json = 2; // JSON序列化的收集到的数据 {agent_id: value}
   string error_message = 3;       // 错误信息 (如果success为false)
+}
+
+// 流上的消息封装，请求与响应通过correlation_id关联
+message Envelope {
+  uint64 correlation_id = 1;
+  string method = 2;       // 一元RPC方法名，如 SendEventBatch
+  bytes payload = 3;       // 序列化后的请求或响应消息
+  int32 status_code = 4;   // 响应的grpc状态码，0表示成功
+  string error = 5;        // 错误详情
+}
+
+// Agent路由表更新，agent_ids[i]位于worker_addresses/worker_ports中下标为worker_index[i]的Worker
+message RoutingTableUpdate {
+  uint64 version = 1;                  // 更新后的路由表版本
+  uint64 base_version = 2;             // 增量更新所基于的版本
+  bool full = 3;                       // 是否为全量路由表
+  repeated string worker_addresses = 4;
+  repeated uint32 worker_ports = 5;
+  repeated string agent_ids = 6;
+  repeated uint32 worker_index = 7;
+  repeated string removed_agent_ids = 8;
+}
+
+// 路由表更新确认
+message RoutingTableAck {
+  bool success = 1;
+  uint64 version = 2;                  // Worker当前的路由表版本
+  string error = 3;
+}
+
+// Agent负载收集请求
+message AgentLoadRequest {
+  bool reset = 1;                      // 返回后清零统计
+}
+
+// Agent负载收集响应
+message AgentLoadResponse {
+  bool success = 1;
+  string load_json = 2;                // JSON: {"messages": {from: {to: count}}, "busy_time": {agent: seconds}}
+  string error = 3;
+}
+
+// Agent迁移请求
+message MigrateAgentRequest {
+  string agent_id = 1;
+  string target_address = 2;
+  int32 target_port = 3;
+  float drain_timeout = 4;             // 等待Agent正在处理的事件完成的最长时间（秒）
+}
+
+// Agent迁移响应
+message MigrateAgentResponse {
+  bool success = 1;
+  string error = 2;
+}
+
+// Agent导入请求
+message ImportAgentRequest {
+  string state_json = 1;               // JSON序列化的Agent配置、Profile、关系和记忆
+  repeated EventRequest pending_events = 2;  // 尚未处理的事件，按原顺序
+}
+
+// Agent导入响应
+message ImportAgentResponse {
+  bool success = 1;
+  string error = 2;
+}
+
+// Worker退出请求
+message DrainWorkerRequest {
+  string worker_id = 1;
+}
+
+// Worker退出响应
+message DrainWorkerResponse {
+  bool success = 1;
+  string error = 2;
+}
+
+// 环境数据失效通知
+message EnvDataInvalidation {
+  uint64 version = 1;                  // 通知后的环境数据版本
+  uint64 base_version = 2;             // 通知所基于的版本
+  bool all = 3;                        // 丢弃全部副本
+  repeated string keys = 4;            // 被修改的顶层key
+}
+
+// 环境数据失效确认
+message EnvDataInvalidationAck {
+  bool success = 1;
+  uint64 version = 2;                  // Worker当前的环境数据版本
+  string error = 3;
+}
+
+// 租约锁请求，lock_ids/holders/tokens按下标对应
+message LeaseRequest {
+  string node_id = 1;
+  repeated string lock_ids = 2;
+  repeated string holders = 3;
+  repeated uint64 tokens = 4;          // 续约和释放时的fencing token
+  double ttl = 5;                      // 租约时长（秒）
+  double wait = 6;                     // 获取时最多等待的秒数，0表示不等待
+}
+
+// 租约锁响应
+message LeaseResponse {
+  bool success = 1;
+  repeated bool granted = 2;           // 是否获取/续约/释放成功
+  repeated uint64 tokens = 3;          // 获取成功时的fencing token
+  string error = 4;
+}
+
+// 共享内存传输握手请求，环形缓冲区和唤醒管道由发起方创建
+message ShmOpenRequest {
+  string node_id = 1;
+  string request_ring = 2;             // 发起方写、对方读的共享内存段名
+  string response_ring = 3;            // 对方写、发起方读的共享内存段名
+  string request_wakeup = 4;           // 请求环的唤醒FIFO路径
+  string response_wakeup = 5;          // 响应环的唤醒FIFO路径
+  int32 pid = 6;                       // 发起方进程ID
+}
+
+// 共享内存传输握手响应
+message ShmOpenResponse {
+  bool success = 1;
+  int32 pid = 2;                       // 对方进程ID
+  string error = 3;
 }        """)
     
     # 创建__init__.py文件使proto成为一个包
@@ -393,6 +605,20 @@ def event_to_proto(event) -> agent_pb2.EventRequest:
         timestamp = int(event.timestamp * 1000)
     else:
         timestamp = int(time.time() * 1000)
+
+    # Binary payload with the cached layout of the event class
+    if event_codec.binary:
+        try:
+            return agent_pb2.EventRequest(
+                event_id=event_id,
+                event_kind=event.event_kind,
+                from_agent_id=event.from_agent_id,
+                to_agent_id=event.to_agent_id,
+                timestamp=timestamp,
+                payload=event_codec.encode(event)
+            )
+        except Exception as e:
+            logger.warning(f"Binary encoding of {event.event_kind} failed, using JSON: {e}")
     
     # Create payload dictionary
     payload = {}
@@ -446,6 +672,9 @@ def event_to_proto(event) -> agent_pb2.EventRequest:
 def proto_to_event(proto_event) -> Any:
     """Convert a protobuf message to an event object."""
     from onesim.events import Event, DataEvent, DataResponseEvent, DataUpdateEvent, DataUpdateResponseEvent, EndEvent
+
+    if proto_event.payload:
+        return _binary_proto_to_event(proto_event)
     
     # Parse payload from JSON
     try:
@@ -463,7 +692,7 @@ def proto_to_event(proto_event) -> Any:
     }
     
     # Determine the event type and create appropriate object
-    event_kind = proto_event.event_kind
+    event_kind = sys.intern(proto_event.event_kind)
     
     if event_kind == 'DataEvent':
         event = DataEvent(
@@ -537,6 +766,36 @@ def proto_to_event(proto_event) -> Any:
     
     return event
 
+def _binary_proto_to_event(proto_event) -> Any:
+    """Rebuild an event from a binary payload, as an instance of its own class if it is loaded."""
+    from onesim.events import Event
+
+    # 事件类型和Agent ID在大量排队事件间重复，驻留后共用一份字符串
+    event_kind = sys.intern(proto_event.event_kind)
+    from_agent_id = sys.intern(proto_event.from_agent_id)
+    to_agent_id = sys.intern(proto_event.to_agent_id)
+    cls, fields = event_codec.decode(proto_event.payload, event_kind)
+    if cls is None:
+        return Event(
+            from_agent_id=from_agent_id,
+            to_agent_id=to_agent_id,
+            event_kind=event_kind,
+            event_id=proto_event.event_id,
+            timestamp=proto_event.timestamp / 1000.0,
+            **fields
+        )
+
+    # Restore the attributes directly instead of re-running __init__; setattr also fills slots
+    event = cls.__new__(cls)
+    for name, value in fields.items():
+        setattr(event, name, value)
+    event.from_agent_id = from_agent_id
+    event.to_agent_id = to_agent_id
+    event.event_kind = event_kind
+    event.event_id = proto_event.event_id
+    event.timestamp = proto_event.timestamp / 1000.0
+    return event
+
 # Add this utility function near the top of the file, after imports
 def run_async_safely(coro):
     """
@@ -557,7 +816,54 @@ def run_async_safely(coro):
         # Don't close the loop here, as it might be used elsewhere
         pass
 
+async def _process_event_batch(request, handler) -> Tuple[int, List[str], List[str]]:
+    """Decode and handle the events of a batch in order, collecting per-event errors and the failed event IDs."""
+    processed = 0
+    errors = []
+    failed = []
+    for proto_event in request.events:
+        try:
+            await handler(proto_to_event(proto_event))
+            processed += 1
+        except Exception as e:
+            logger.error(f"Error handling event {proto_event.event_id} in batch: {e}")
+            errors.append(f"{proto_event.event_id}: {e}")
+            failed.append(proto_event.event_id)
+    return processed, errors, failed
+
 # Master服务器实现
+def _storage_event_from_proto(event_request) -> Dict[str, Any]:
+    """Rebuild the event data a worker queued for storage"""
+    event_data = {
+        'event_type': event_request.event_type,
+        'source_type': event_request.source_type,
+        'source_id': event_request.source_id,
+        'payload': json.loads(event_request.payload_json) if event_request.payload_json else {}
+    }
+    if event_request.target_type and event_request.target_id:
+        event_data['target_type'] = event_request.target_type
+        event_data['target_id'] = event_request.target_id
+    return event_data
+
+
+def _decision_from_proto(decision_request) -> Dict[str, Any]:
+    """Rebuild a decision record a worker queued for storage"""
+    decision_data = {
+        'agent_id': decision_request.agent_id,
+        'prompt': decision_request.prompt,
+        'output': decision_request.output,
+        'processing_time': decision_request.processing_time,
+        'timestamp': datetime.now().isoformat(),
+        'decision_id': str(uuid.uuid4()),
+    }
+    if decision_request.context_json:
+        try:
+            decision_data['context'] = json.loads(decision_request.context_json)
+        except json.JSONDecodeError:
+            logger.error(f"Invalid context JSON in decision record: {decision_request.context_json}")
+    return decision_data
+
+
 class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
     """Master节点的gRPC服务实现"""
     
@@ -603,6 +909,12 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
             if result is False:
                 logger.warning(f"Heartbeat from unregistered worker {worker_id}, suggesting re-registration")
                 return agent_pb2.HeartbeatResponse(acknowledged=False)
+
+            # 心跳携带的统计更新
+            if request.stats_seq:
+                applied = stats_aggregator.apply(worker_id, request.stats_seq, request.stats_base,
+                                                 request.stats_full, request.stats_delta)
+                return agent_pb2.HeartbeatResponse(acknowledged=True, stats_resync=not applied)
                 
             return agent_pb2.HeartbeatResponse(acknowledged=True)
         except Exception as e:
@@ -613,23 +925,89 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
         """从worker接收事件并转发"""
         try:
             event = proto_to_event(request)
+            await self._handle_event(event)
+            return agent_pb2.EventResponse(received=True)
             
-            # Handle data events with special routing logic
-            if event.event_kind == "DataEvent":
-                # Find the target and route accordingly
-                target_id = event.to_agent_id
-                if target_id and event.target_type == "AGENT":
-                    # For agent data requests, find the worker hosting the agent
-                    worker = self.master_node.find_worker_for_agent(target_id)
-                    if worker:
-                        # Forward to appropriate worker node
+        except Exception as e:
+            logger.error(f"Error handling event in master: {e}")
+            return agent_pb2.EventResponse(received=False)
+
+    async def SendEventBatch(self, request, context):
+        """从worker批量接收事件，按顺序处理"""
+        processed, errors, failed = await _process_event_batch(request, self._handle_event)
+        return agent_pb2.EventBatchResponse(
+            received=not errors,
+            processed_count=processed,
+            error="; ".join(errors[:5]),
+            failed_event_ids=failed
+        )
+
+    async def _handle_event(self, event):
+        """处理来自worker的单个事件"""
+        # Handle data events with special routing logic
+        if event.event_kind == "DataEvent":
+            # Find the target and route accordingly
+            target_id = event.to_agent_id
+            if target_id and event.target_type == "AGENT":
+                # For agent data requests, find the worker hosting the agent
+                worker = self.master_node.find_worker_for_agent(target_id)
+                if worker:
+                    # Forward to appropriate worker node
+                    await send_event_to_worker(
+                        worker['address'], 
+                        worker['port'], 
+                        event
+                    )
+                else:
+                    # If agent not found, create a failure response
+                    from onesim.events import DataResponseEvent
+                    response_event = DataResponseEvent(
+                        from_agent_id="ENV",
+                        to_agent_id=event.from_agent_id,
+                        request_id=event.request_id,
+                        key=event.key,
+                        data_value=None,
+                        success=False,
+                        error=f"Agent {target_id} not found in the network"
+                    )
+                    # Send back to originator
+                    origin_worker = self.master_node.find_worker_for_agent(event.from_agent_id)
+                    if origin_worker:
                         await send_event_to_worker(
-                            worker['address'], 
-                            worker['port'], 
-                            event
+                            origin_worker['address'],
+                            origin_worker['port'],
+                            response_event
                         )
-                    else:
-                        # If agent not found, create a failure response
+            
+            elif event.target_type == "ENV":
+                # For environment data requests, use the master's environment
+                if hasattr(self.master_node, 'sim_env') and self.master_node.sim_env:
+                    try:
+                        # Get data from environment
+                        data_value = await self.master_node.sim_env.get_data(event.key, event.default)
+                        
+                        # Create response
+                        from onesim.events import DataResponseEvent
+                        response_event = DataResponseEvent(
+                            from_agent_id="ENV",
+                            to_agent_id=event.from_agent_id,
+                            request_id=event.request_id,
+                            key=event.key,
+                            data_value=data_value,
+                            success=True,
+                            parent_event_id=event.event_id
+                        )
+                        
+                        # Send response back to originator
+                        origin_worker = self.master_node.find_worker_for_agent(event.from_agent_id)
+                        if origin_worker:
+                            await send_event_to_worker(
+                                origin_worker['address'],
+                                origin_worker['port'],
+                                response_event
+                            )
+                    except Exception as e:
+                        # Create failure response
                         from onesim.events import DataResponseEvent
                         response_event = DataResponseEvent(
                             from_agent_id="ENV",
@@ -638,8 +1016,10 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
                             key=event.key,
                             data_value=None,
                             success=False,
-                            error=f"Agent {target_id} not found in the network"
+                            error=str(e),
+                            parent_event_id=event.event_id
                         )
+                        
                         # Send back to originator
                         origin_worker = self.master_node.find_worker_for_agent(event.from_agent_id)
                         if origin_worker:
@@ -648,65 +1028,9 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
                                 origin_worker['port'],
                                 response_event
                             )
-                
-                elif event.target_type == "ENV":
-                    # For environment data requests, use the master's environment
-                    if hasattr(self.master_node, 'sim_env') and self.master_node.sim_env:
-                        try:
-                            # Get data from environment
-                            data_value = await self.master_node.sim_env.get_data(event.key, event.default)
-                            
-                            # Create response
-                            from onesim.events import DataResponseEvent
-                            response_event = DataResponseEvent(
-                                from_agent_id="ENV",
-                                to_agent_id=event.from_agent_id,
-                                request_id=event.request_id,
-                                key=event.key,
-                                data_value=data_value,
-                                success=True,
-                                parent_event_id=event.event_id
-                            )
-                            
-                            # Send response back to originator
-                            origin_worker = self.master_node.find_worker_for_agent(event.from_agent_id)
-                            if origin_worker:
-                                await send_event_to_worker(
-                                    origin_worker['address'],
-                                    origin_worker['port'],
-                                    response_event
-                                )
-                        except Exception as e:
-                            # Create failure response
-                            from onesim.events import DataResponseEvent
-                            response_event = DataResponseEvent(
-                                from_agent_id="ENV",
-                                to_agent_id=event.from_agent_id,
-                                request_id=event.request_id,
-                                key=event.key,
-                                data_value=None,
-                                success=False,
-                                error=str(e),
-                                parent_event_id=event.event_id
-                            )
-                            
-                            # Send back to originator
-                            origin_worker = self.master_node.find_worker_for_agent(event.from_agent_id)
-                            if origin_worker:
-                                await send_event_to_worker(
-                                    origin_worker['address'],
-                                    origin_worker['port'],
-                                    response_event
-                                )
-            
-            # Process the event through the master's event system
-            await self.master_node.event_bus.dispatch_event(event)
-            
-            return agent_pb2.EventResponse(received=True)
-            
-        except Exception as e:
-            logger.error(f"Error handling event in master: {e}")
-            return agent_pb2.EventResponse(received=False)
+        
+        # Process the event through the master's event system
+        await self.master_node.event_bus.dispatch_event(event)
         
     async def SendStorageEvent(self, request, context):
         """接收worker发送的存储事件数据"""
@@ -1041,23 +1365,7 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
             processed_count = 0
             
             for event_request in request.events:
-                event_type = event_request.event_type
-                source_type = event_request.source_type
-                source_id = event_request.source_id
-                target_type = event_request.target_type if event_request.target_type else None
-                target_id = event_request.target_id if event_request.target_id else None
-                payload = json.loads(event_request.payload_json) if event_request.payload_json else {}
-                
-                event_data = {
-                    'event_type': event_type,
-                    'source_type': source_type,
-                    'source_id': source_id,
-                    'payload': payload
-                }
-                
-                if target_type and target_id:
-                    event_data['target_type'] = target_type
-                    event_data['target_id'] = target_id
+                event_data = _storage_event_from_proto(event_request)
                 
                 # Queue the event for storage
                 if hasattr(self.master_node.sim_env, 'queue_event'):
@@ -1084,21 +1392,7 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
             processed_count = 0
             
             for decision_request in request.decisions:
-                decision_data = {
-                    'agent_id': decision_request.agent_id,
-                    'prompt': decision_request.prompt,
-                    'output': decision_request.output,
-                    'processing_time': decision_request.processing_time,
-                    'timestamp': datetime.now().isoformat(),
-                    'decision_id': str(uuid.uuid4()),
-                }
-                
-                if decision_request.context_json:
-                    try:
-                        context_data = json.loads(decision_request.context_json)
-                        decision_data['context'] = context_data
-                    except json.JSONDecodeError:
-                        logger.error(f"Invalid context JSON in batch decision record: {decision_request.context_json}")
+                decision_data = _decision_from_proto(decision_request)
                 
                 # 如果有sim_env引用，将决策记录转发给它
                 if hasattr(self.master_node, 'sim_env') and self.master_node.sim_env:
@@ -1118,6 +1412,27 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
                 error=str(e)
             )
 
+    async def SendStorageBatch(self, request, context):
+        """处理worker合并发送的存储事件和决策记录"""
+        try:
+            if request.compressed:
+                request = agent_pb2.StorageBatchRequest.FromString(zlib.decompress(request.compressed))
+            sim_env = getattr(self.master_node, 'sim_env', None)
+            if sim_env is None or not hasattr(sim_env, 'queue_event'):
+                logger.warning("Master sim_env cannot store events, dropping storage batch")
+                return agent_pb2.StorageBatchResponse(received=True, processed_count=0)
+            processed_count = 0
+            for event_request in request.events:
+                await sim_env.queue_event(_storage_event_from_proto(event_request))
+                processed_count += 1
+            for decision_request in request.decisions:
+                await sim_env.queue_decision(_decision_from_proto(decision_request))
+                processed_count += 1
+            return agent_pb2.StorageBatchResponse(received=True, processed_count=processed_count)
+        except Exception as e:
+            logger.error(f"Error processing storage batch: {e}")
+            return agent_pb2.StorageBatchResponse(received=False, processed_count=0, error=str(e))
+
     async def CollectDataBatch(self, request, context):
         """Handles a batch data collection request from the Master."""
         try:
@@ -1147,6 +1462,27 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
                 error_message=str(e)
             )
 
+    async def DrainWorker(self, request, context):
+        """处理Worker的退出请求，其Agent在下一个step边界迁出"""
+        try:
+            success, error = await self.master_node.request_drain(request.worker_id)
+            return agent_pb2.DrainWorkerResponse(success=success, error=error)
+        except Exception as e:
+            logger.error(f"Error in DrainWorker: {e}")
+            return agent_pb2.DrainWorkerResponse(success=False, error=str(e))
+
+    async def AcquireLeases(self, request, context):
+        """授予本节点拥有的锁"""
+        return await serve_lease_request('AcquireLeases', request)
+
+    async def RenewLeases(self, request, context):
+        """续约本节点授予的租约"""
+        return await serve_lease_request('RenewLeases', request)
+
+    async def ReleaseLeases(self, request, context):
+        """释放本节点授予的租约"""
+        return await serve_lease_request('ReleaseLeases', request)
+
     async def LocateAgent(self, request, context): # Added LocateAgent to MasterServicer
         """处理定位Agent请求"""
         try:
@@ -1164,6 +1500,15 @@ class MasterServicer(agent_pb2_grpc.AgentServiceServicer):
             logger.error(f"Error in LocateAgent: {e}")
             return agent_pb2.LocateAgentResponse(success=False, error_message=str(e))
 
+    async def OpenSharedMemory(self, request, context):
+        """接入同机节点创建的共享内存环形缓冲区"""
+        return await shm_transport.accept(self, request)
+
+    async def Channel(self, request_iterator, context):
+        """双向流：复用所有一元调用"""
+        async for reply in serve_channel(self, request_iterator, context):
+            yield reply
+
 # Worker服务器实现
 class WorkerServicer(agent_pb2_grpc.AgentServiceServicer):
     def __init__(self, worker_node):
@@ -1257,6 +1602,36 @@ class WorkerServicer(agent_pb2_grpc.AgentServiceServicer):
                 message=str(e)
             )
 
+    async def CreateAgentsStream(self, request_iterator, context):
+        """接收流式创建agent的请求：每收到一个数据块即创建其中的agent并回报进度"""
+        decoder = AgentChunkDecoder()
+        agent_classes = {}
+        created = 0
+        async for chunk in request_iterator:
+            try:
+                agent_configs = decoder.decode(chunk.templates, chunk.agents, chunk.compression)
+                agent_ids = await self.worker_node.create_agents_chunk(agent_configs, agent_classes)
+            except Exception as e:
+                logger.error(f"Error creating agents of chunk {chunk.seq}: {e}")
+                yield agent_pb2.AgentCreationProgress(
+                    seq=chunk.seq,
+                    success=False,
+                    created=created,
+                    total=chunk.total,
+                    message=str(e)
+                )
+                return
+            created += len(agent_ids)
+            logger.info(f"Created {created}/{chunk.total} agents")
+            yield agent_pb2.AgentCreationProgress(
+                seq=chunk.seq,
+                success=True,
+                created=created,
+                total=chunk.total,
+                agent_ids=[str(agent_id) for agent_id in agent_ids]
+            )
+        self.worker_node.agents_created.set()
+
     async def GetTokenUsage(self, request, context):
         """处理获取节点的Token使用情况请求"""
         try:
@@ -1283,9 +1658,31 @@ class WorkerServicer(agent_pb2_grpc.AgentServiceServicer):
                 error=str(e)
             )
 
-    async def SendEventBatch(self, request, context): # This is for P2P batching if enabled
-        # ... (existing code)
-        pass # Placeholder for brevity
+    async def SendEventBatch(self, request, context):
+        """接收合并发送的事件，按顺序一次性分发到本地事件总线"""
+        events = []
+        errors = []
+        failed = []
+        for proto_event in request.events:
+            try:
+                events.append(proto_to_event(proto_event))
+            except Exception as e:
+                errors.append(f"{proto_event.event_id}: {e}")
+                failed.append(proto_event.event_id)
+        try:
+            await self.worker_node.handle_events(events)
+        except Exception as e:
+            logger.error(f"Error processing event batch in WorkerServicer: {e}")
+            return agent_pb2.EventBatchResponse(received=False, processed_count=0, error=str(e),
+                                                failed_event_ids=[proto_event.event_id for proto_event in request.events])
+        if errors:
+            logger.error(f"Failed to decode {len(errors)} events in batch: {errors[:5]}")
+        return agent_pb2.EventBatchResponse(
+            received=not errors,
+            processed_count=len(events),
+            error="; ".join(errors[:5]),
+            failed_event_ids=failed
+        )
 
     async def CollectDataBatch(self, request, context):
         """Handles a batch data collection request from the Master."""
@@ -1315,8 +1712,93 @@ class WorkerServicer(agent_pb2_grpc.AgentServiceServicer):
                 error_message=str(e)
             )
 
+    async def UpdateRoutingTable(self, request, context):
+        """应用Master推送的路由表更新"""
+        try:
+            routing_table = self.worker_node.routing_table
+            success = routing_table.apply(request)
+            if success:
+                self.worker_node.retire_forwarders()
+            return agent_pb2.RoutingTableAck(
+                success=success,
+                version=routing_table.version,
+                error="" if success else "base version mismatch"
+            )
+        except Exception as e:
+            logger.error(f"Error in UpdateRoutingTable: {e}")
+            return agent_pb2.RoutingTableAck(success=False, error=str(e))
+
+    async def AcquireLeases(self, request, context):
+        """授予本节点拥有的锁"""
+        return await serve_lease_request('AcquireLeases', request)
+
+    async def RenewLeases(self, request, context):
+        """续约本节点授予的租约"""
+        return await serve_lease_request('RenewLeases', request)
+
+    async def ReleaseLeases(self, request, context):
+        """释放本节点授予的租约"""
+        return await serve_lease_request('ReleaseLeases', request)
+
+    async def InvalidateEnvData(self, request, context):
+        """丢弃Master已修改的环境数据副本"""
+        try:
+            from onesim.distribution.env_cache import env_data_replica
+            version = env_data_replica.apply(request)
+            return agent_pb2.EnvDataInvalidationAck(success=True, version=version)
+        except Exception as e:
+            logger.error(f"Error in InvalidateEnvData: {e}")
+            return agent_pb2.EnvDataInvalidationAck(success=False, error=str(e))
+
+    async def GetAgentLoad(self, request, context):
+        """返回本地Agent的消息数和处理耗时统计"""
+        try:
+            load = await self.worker_node.get_agent_load(request.reset)
+            return agent_pb2.AgentLoadResponse(success=True, load_json=json.dumps(load))
+        except Exception as e:
+            logger.error(f"Error in GetAgentLoad: {e}")
+            return agent_pb2.AgentLoadResponse(success=False, load_json="{}", error=str(e))
+
+    async def MigrateAgent(self, request, context):
+        """把本地Agent迁移到目标Worker"""
+        try:
+            success, error = await self.worker_node.migrate_agent(
+                request.agent_id, request.target_address, request.target_port,
+                request.drain_timeout or 30.0
+            )
+            return agent_pb2.MigrateAgentResponse(success=success, error=error)
+        except Exception as e:
+            logger.error(f"Error in MigrateAgent: {e}")
+            return agent_pb2.MigrateAgentResponse(success=False, error=str(e))
+
+    async def ImportAgent(self, request, context):
+        """接收从其他Worker迁入的Agent"""
+        try:
+            state = json.loads(request.state_json)
+            pending_events = [proto_to_event(proto_event) for proto_event in request.pending_events]
+            success, error = await self.worker_node.import_agent(state, pending_events)
+            return agent_pb2.ImportAgentResponse(success=success, error=error)
+        except Exception as e:
+            logger.error(f"Error in ImportAgent: {e}")
+            return agent_pb2.ImportAgentResponse(success=False, error=str(e))
+
+    async def OpenSharedMemory(self, request, context):
+        """接入同机节点创建的共享内存环形缓冲区"""
+        return await shm_transport.accept(self, request)
+
+    async def Channel(self, request_iterator, context):
+        """双向流：复用所有一元调用"""
+        async for reply in serve_channel(self, request_iterator, context):
+            yield reply
+
 # 服务器创建函数
-async def create_master_server(master_node, port):
+def _listen_target(port, listen_address=None):
+    """服务器监听地址：unix:地址监听Unix域套接字，否则监听所有网卡上的端口"""
+    if listen_address and listen_address.startswith("unix:"):
+        return listen_address
+    return f'[::]:{port}'
+
+async def create_master_server(master_node, port, listen_address=None):
     """创建并启动master服务器"""
     server = grpc.aio.server(
         maximum_concurrent_rpcs=1000,  # 增加并发RPC限制，防止队列阻塞
@@ -1342,12 +1824,12 @@ async def create_master_server(master_node, port):
         MasterServicer(master_node), server
     )
     
-    server.add_insecure_port(f'[::]:{port}')
+    server.add_insecure_port(_listen_target(port, listen_address))
     await server.start()
-    logger.info(f"Master server started on port {port}")
+    logger.info(f"Master server started on {_listen_target(port, listen_address)}")
     return server
 
-async def create_worker_server(worker_node, port):
+async def create_worker_server(worker_node, port, listen_address=None):
     """创建并启动worker服务器"""
     servicer_instance = WorkerServicer(worker_node)
     server = grpc.aio.server(
@@ -1380,9 +1862,9 @@ async def create_worker_server(worker_node, port):
     else:
         logger.warning("WorkerNode does not have set_servicer_instance method. P2P reply cache access might fail.")
 
-    server.add_insecure_port(f'[::]:{port}')
+    server.add_insecure_port(_listen_target(port, listen_address))
     await server.start()
-    logger.info(f"Worker server started on port {port}")
+    logger.info(f"Worker server started on {_listen_target(port, listen_address)}")
     return server
 
 
@@ -1478,6 +1960,43 @@ async def send_heartbeat_to_master(master_address, master_port, worker_id):
         logger.error(f"Error sending heartbeat: {e}")
         return False
 
+async def push_stats_to_master(master_address, master_port, worker_id, update):
+    """
+    随心跳推送统计更新到Master
+
+    Args:
+        master_address: Master address
+        master_port: Master port
+        worker_id: ID of this worker
+        update: Update built by ``StatsReporter.prepare``
+
+    Returns:
+        Optional[bool]: True if applied, False if the master needs complete statistics,
+        None if the heartbeat failed
+    """
+    try:
+        request = agent_pb2.HeartbeatRequest(
+            worker_id=worker_id,
+            timestamp=int(time.time() * 1000),
+            stats_seq=update["seq"],
+            stats_base=update["base"],
+            stats_full=update["full"],
+            stats_delta=update["delta"]
+        )
+        response = await connection_manager.with_stub(
+            master_address,
+            master_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'Heartbeat',
+            request
+        )
+        if not response.acknowledged:
+            return None
+        return not response.stats_resync
+    except Exception as e:
+        logger.error(f"Error pushing stats to master: {e}")
+        return None
+
 async def send_event_to_worker(worker_address, worker_port, event):
     """发送事件到worker节点"""
     try:
@@ -1516,6 +2035,14 @@ async def send_event_to_worker(worker_address, worker_port, event):
         logger.error(f"Error sending event to worker {worker_address}:{worker_port}: {e}")
         return False
 
+async def queue_event(target_address, target_port, event) -> bool:
+    """将事件加入目标节点的合并发送队列，按目标节点批量发送并保持顺序"""
+    try:
+        return await event_batcher.send(target_address, target_port, event_to_proto(event))
+    except Exception as e:
+        logger.error(f"Error queueing event for {target_address}:{target_port}: {e}")
+        return False
+
 async def send_termination_to_worker(worker_address, worker_port, event):
     """发送终止信号到worker节点"""
     try:
@@ -1629,6 +2156,63 @@ async def create_agents_batch_on_worker(worker_address, worker_port, agent_confi
         logger.error(f"Error creating agents batch on worker: {e}")
         return False
 
+async def create_agents_stream_on_worker(worker_address, worker_port, agent_configs,
+                                        chunk_size=500, compression="zlib", progress=None):
+    """
+    Create agents on a worker by streaming their configs in compressed chunks.
+
+    The worker builds the agents of each chunk as it arrives and reports
+    progress after every chunk.
+
+    Args:
+        worker_address: Address of the worker
+        worker_port: Port of the worker
+        agent_configs: Configs of the agents to create
+        chunk_size: Agents per chunk
+        compression: "zlib", "zstd" or "none"
+        progress: Optional callback receiving the number of agents created so far
+
+    Returns:
+        Optional[bool]: Whether all agents were created, None if the worker does not
+        support streamed creation
+    """
+    encoder = AgentChunkEncoder(chunk_size, compression)
+    total = len(agent_configs)
+
+    def chunks():
+        for seq, (templates, agents, _) in enumerate(encoder.encode(agent_configs), 1):
+            yield agent_pb2.AgentChunk(
+                seq=seq,
+                total=total,
+                compression=encoder.compression,
+                templates=templates,
+                agents=agents
+            )
+
+    created = 0
+    try:
+        channel = await connection_manager.get_channel(worker_address, worker_port)
+        call = agent_pb2_grpc.AgentServiceStub(channel).CreateAgentsStream(chunks())
+        async for reply in call:
+            if not reply.success:
+                logger.error(f"Worker {worker_address}:{worker_port} failed to create agents: {reply.message}")
+                return False
+            created = reply.created
+            if progress is not None:
+                progress(created)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.UNIMPLEMENTED and created == 0:
+            return None
+        logger.error(f"Error streaming agents to worker: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Error streaming agents to worker: {e}")
+        return False
+
+    logger.info(f"Streamed {total} agents to {worker_address}:{worker_port} in {encoder.stats['chunks']} chunks, "
+                f"{encoder.stats['raw_bytes']} bytes compressed to {encoder.stats['sent_bytes']}")
+    return created == total
+
 # 添加从worker发送数据到master的函数
 async def send_storage_event_to_master(master_address, master_port, event_data):
     """发送存储事件数据到Master"""
@@ -1764,6 +2348,62 @@ async def send_decision_record_batch_to_master(master_address, master_port, deci
         logger.error(f"Error sending decision record batch to master: {e}")
         return False
 
+async def send_storage_batch_to_master(master_address, master_port, node_id, event_data_list,
+                                      decision_data_list, compress_min_bytes=None):
+    """
+    在一条消息中发送存储事件和决策记录到Master
+
+    Args:
+        master_address: Master address
+        master_port: Master port
+        node_id: ID of the sending worker
+        event_data_list: Storage events
+        decision_data_list: Decision records
+        compress_min_bytes: Compress batches of at least this many bytes with zlib, None disables compression
+
+    Returns:
+        Tuple[bool, int, int]: Whether the master received the batch, its serialized size in bytes
+        and its size as sent
+    """
+    try:
+        batch = agent_pb2.StorageBatchRequest(
+            events=[agent_pb2.StorageEventRequest(
+                event_type=event_data.get('event_type', ''),
+                source_type=event_data.get('source_type', ''),
+                source_id=event_data.get('source_id', ''),
+                target_type=event_data.get('target_type', ''),
+                target_id=event_data.get('target_id', ''),
+                payload_json=json.dumps(event_data.get('payload', {}))
+            ) for event_data in event_data_list],
+            decisions=[agent_pb2.DecisionRecordRequest(
+                agent_id=decision_data.get('agent_id', ''),
+                prompt=decision_data.get('prompt', ''),
+                output=decision_data.get('output', ''),
+                processing_time=decision_data.get('processing_time', 0.0),
+                context_json=json.dumps(decision_data.get('context', {}))
+            ) for decision_data in decision_data_list]
+        )
+        data = batch.SerializeToString()
+        if compress_min_bytes is not None and len(data) >= compress_min_bytes:
+            request = agent_pb2.StorageBatchRequest(node_id=node_id, compressed=zlib.compress(data, 1))
+        else:
+            request = batch
+            request.node_id = node_id
+        response = await connection_manager.with_stub(
+            master_address,
+            master_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'SendStorageBatch',
+            request
+        )
+        if not response.received:
+            logger.warning(f"Failed to send storage batch of {len(event_data_list)} events and "
+                           f"{len(decision_data_list)} decisions: {response.error}")
+        return response.received, len(data), request.ByteSize()
+    except Exception as e:
+        logger.error(f"Error sending storage batch to master: {e}")
+        return False, 0, 0
+
 async def send_data_request(target_address, target_port, data_event):
     """
     Send data request to another node.
@@ -1835,59 +2475,43 @@ async def send_data_update(target_address, target_port, data_update_event):
         logger.error(f"Error sending data update request: {e}")
         return None
 
-async def acquire_lock(master_address: str, master_port: int, lock_id: str, node_id: str, timeout: float) -> bool:
+async def send_lease_request(address: str, port: int, method: str, request) -> Optional[Any]:
     """
-    Acquire a distributed lock through the master node.
-    
+    Send a lease request to the node that owns the locks.
+
     Args:
-        master_address: Master node address
-        master_port: Master node port
-        lock_id: Unique identifier for the lock
-        node_id: ID of the node requesting the lock
-        timeout: Lock timeout in seconds
-        
+        address: Owner node address
+        port: Owner node port
+        method: 'AcquireLeases', 'RenewLeases' or 'ReleaseLeases'
+        request: LeaseRequest message
+
     Returns:
-        bool: True if lock was acquired, False otherwise
+        Optional[LeaseResponse]: The response, or None if the owner could not be reached
     """
     try:
-        async with grpc.aio.insecure_channel(f"{master_address}:{master_port}") as channel:
-            stub = agent_pb2_grpc.AgentServiceStub(channel)
-            request = agent_pb2.AcquireLockRequest(
-                lock_id=lock_id,
-                node_id=node_id,
-                timeout=timeout
-            )
-            response = await stub.AcquireLock(request)
-            return response.success
+        response = await connection_manager.with_stub(
+            address,
+            port,
+            agent_pb2_grpc.AgentServiceStub,
+            method,
+            request
+        )
+        if not response.success:
+            logger.warning(f"{method} failed on {address}:{port}: {response.error}")
+            return None
+        return response
     except Exception as e:
-        logger.error(f"Error in acquire_lock: {e}")
-        return False
+        logger.error(f"Error in {method} to {address}:{port}: {e}")
+        return None
 
-async def release_lock(master_address: str, master_port: int, lock_id: str, node_id: str) -> bool:
-    """
-    Release a distributed lock through the master node.
-    
-    Args:
-        master_address: Master node address
-        master_port: Master node port
-        lock_id: Unique identifier for the lock
-        node_id: ID of the node releasing the lock
-        
-    Returns:
-        bool: True if lock was released, False otherwise
-    """
+async def serve_lease_request(method: str, request):
+    """Handle a lease request for locks owned by this node"""
+    from onesim.distribution.distributed_lock import lock_service
     try:
-        async with grpc.aio.insecure_channel(f"{master_address}:{master_port}") as channel:
-            stub = agent_pb2_grpc.AgentServiceStub(channel)
-            request = agent_pb2.ReleaseLockRequest(
-                lock_id=lock_id,
-                node_id=node_id
-            )
-            response = await stub.ReleaseLock(request)
-            return response.success
+        return await lock_service.handle(method, request)
     except Exception as e:
-        logger.error(f"Error in release_lock: {e}")
-        return False
+        logger.error(f"Error in {method}: {e}")
+        return agent_pb2.LeaseResponse(success=False, error=str(e))
 
 async def get_env_data_from_master(master_address: str, master_port: int, key: str, default: Any = None) -> Any:
     """
@@ -2152,55 +2776,24 @@ async def get_token_usage_from_worker(worker_address: str, worker_port: int, wor
 async def collect_token_usage_from_workers(master_node) -> Dict[str, Any]:
     """
     Collect token usage statistics from all worker nodes.
-    Uses concurrent requests for better performance.
+
+    Workers push their statistics with heartbeats, so this reads the merged
+    view kept by ``stats_aggregator``. Only workers that have not pushed yet
+    (or have pushing disabled) are asked, concurrently.
     
     Args:
         master_node: Master node instance containing worker information
         
     Returns:
-        Dict[str, Any]: Merged token usage statistics
+        Dict[str, Any]: Merged token usage statistics, see ``merge_usage_stats``
     """
-    # Initialize merged statistics
-    merged_stats = {
-        "total_prompt_tokens": 0,
-        "total_completion_tokens": 0,
-        "total_tokens": 0,
-        "request_count": 0,
-        "model_usage": {},
-        "worker_stats": {}
-    }
-    
     # First add the master node's token usage if available
     try:
-        master_stats = await master_node.get_token_usage()
-        if master_stats:
-            # Record master's statistics
-            merged_stats["worker_stats"]["master"] = master_stats
-            
-            # Add to total counts
-            merged_stats["total_prompt_tokens"] += master_stats.get("total_prompt_tokens", 0)
-            merged_stats["total_completion_tokens"] += master_stats.get("total_completion_tokens", 0)
-            merged_stats["total_tokens"] += master_stats.get("total_tokens", 0)
-            merged_stats["request_count"] += master_stats.get("request_count", 0)
-            
-            # Merge model usage
-            for model, usage in master_stats.get("model_usage", {}).items():
-                if model not in merged_stats["model_usage"]:
-                    merged_stats["model_usage"][model] = {
-                        "prompt_tokens": 0,
-                        "completion_tokens": 0,
-                        "total_tokens": 0,
-                        "request_count": 0
-                    }
-                
-                merged_stats["model_usage"][model]["prompt_tokens"] += usage.get("prompt_tokens", 0)
-                merged_stats["model_usage"][model]["completion_tokens"] += usage.get("completion_tokens", 0)
-                merged_stats["model_usage"][model]["total_tokens"] += usage.get("total_tokens", 0)
-                merged_stats["model_usage"][model]["request_count"] += usage.get("request_count", 0)
+        stats_aggregator.set("master", await master_node.get_token_usage())
     except Exception as e:
         logger.error(f"Error collecting token usage from master node: {e}")
     
-    # Concurrently get statistics from all workers
+    # Concurrently get statistics from workers that do not push them
     async def get_worker_stats(worker_id, worker_info):
         try:
             return worker_id, await get_token_usage_from_worker(
@@ -2212,10 +2805,11 @@ async def collect_token_usage_from_workers(master_node) -> Dict[str, Any]:
             logger.error(f"Error collecting token usage from worker {worker_id}: {e}")
             return worker_id, None
     
-    # Create tasks for all workers
+    # Create tasks for workers without pushed stats
     tasks = []
     for worker_id, worker_info in master_node.workers.items():
-        tasks.append(get_worker_stats(worker_id, worker_info))
+        if not stats_aggregator.is_pushing(worker_id):
+            tasks.append(get_worker_stats(worker_id, worker_info))
     
     # Execute all tasks concurrently and wait for results
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -2230,33 +2824,37 @@ async def collect_token_usage_from_workers(master_node) -> Dict[str, Any]:
             continue
             
         worker_id, worker_stats = result
-        
         if worker_stats:
-            # Record each worker's statistics
-            merged_stats["worker_stats"][worker_id] = worker_stats
-            
-            # Add to total counts
-            merged_stats["total_prompt_tokens"] += worker_stats.get("total_prompt_tokens", 0)
-            merged_stats["total_completion_tokens"] += worker_stats.get("total_completion_tokens", 0)
-            merged_stats["total_tokens"] += worker_stats.get("total_tokens", 0)
-            merged_stats["request_count"] += worker_stats.get("request_count", 0)
-            
-            # Merge model usage
-            for model, usage in worker_stats.get("model_usage", {}).items():
-                if model not in merged_stats["model_usage"]:
-                    merged_stats["model_usage"][model] = {
-                        "prompt_tokens": 0,
-                        "completion_tokens": 0,
-                        "total_tokens": 0,
-                        "request_count": 0
-                    }
-                
-                merged_stats["model_usage"][model]["prompt_tokens"] += usage.get("prompt_tokens", 0)
-                merged_stats["model_usage"][model]["completion_tokens"] += usage.get("completion_tokens", 0)
-                merged_stats["model_usage"][model]["total_tokens"] += usage.get("total_tokens", 0)
-                merged_stats["model_usage"][model]["request_count"] += usage.get("request_count", 0)
+            stats_aggregator.set(worker_id, worker_stats)
     
-    return merged_stats
+    return stats_aggregator.merged()
+
+async def request_drain_on_master(master_address: str, master_port: int, worker_id: str) -> bool:
+    """
+    Ask the master to move all agents off this worker and then stop it.
+
+    Args:
+        master_address: Master node address
+        master_port: Master node port
+        worker_id: ID of the worker leaving
+
+    Returns:
+        bool: Whether the master accepted the request
+    """
+    try:
+        response = await connection_manager.with_stub(
+            master_address,
+            master_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'DrainWorker',
+            agent_pb2.DrainWorkerRequest(worker_id=worker_id)
+        )
+        if not response.success:
+            logger.warning(f"Master refused to drain worker {worker_id}: {response.error}")
+        return response.success
+    except Exception as e:
+        logger.error(f"Error requesting drain of worker {worker_id}: {e}")
+        return False
 
 async def locate_agent_on_master(master_address: str, master_port: int, agent_id: str) -> Optional[Tuple[str, int]]:
     """
@@ -2289,6 +2887,150 @@ async def locate_agent_on_master(master_address: str, master_port: int, agent_id
         logger.error(f"Error locating agent {agent_id} via master: {e}")
         return None
 
+async def push_routing_table_to_worker(worker_address: str, worker_port: int, update) -> Tuple[bool, int]:
+    """
+    Send a routing table update to a worker.
+
+    Args:
+        worker_address: Worker node address
+        worker_port: Worker node port
+        update: RoutingTableUpdate message
+
+    Returns:
+        Tuple[bool, int]: Whether the update was applied, and the worker's table version
+        (0 if the worker could not be reached)
+    """
+    try:
+        response = await connection_manager.with_stub(
+            worker_address,
+            worker_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'UpdateRoutingTable',
+            update
+        )
+        return response.success, response.version
+    except Exception as e:
+        logger.warning(f"Error pushing routing table to worker {worker_address}:{worker_port}: {e}")
+        return False, 0
+
+async def push_env_invalidation_to_worker(worker_address: str, worker_port: int, update) -> Tuple[bool, int]:
+    """
+    Send an env data invalidation to a worker.
+
+    Args:
+        worker_address: Worker node address
+        worker_port: Worker node port
+        update: EnvDataInvalidation message
+
+    Returns:
+        Tuple[bool, int]: Whether the invalidation was applied, and the worker's env data version
+        (0 if the worker could not be reached)
+    """
+    try:
+        response = await connection_manager.with_stub(
+            worker_address,
+            worker_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'InvalidateEnvData',
+            update
+        )
+        return response.success, response.version
+    except Exception as e:
+        logger.warning(f"Error pushing env data invalidation to worker {worker_address}:{worker_port}: {e}")
+        return False, 0
+
+async def get_agent_load_from_worker(worker_address: str, worker_port: int, reset: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Fetch the per-agent message counts and handler time recorded on a worker.
+
+    Args:
+        worker_address: Worker node address
+        worker_port: Worker node port
+        reset: Whether the worker clears its counters
+
+    Returns:
+        Optional[Dict[str, Any]]: ``{"messages": ..., "busy_time": ...}``, or None on failure
+    """
+    try:
+        response = await connection_manager.with_stub(
+            worker_address,
+            worker_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'GetAgentLoad',
+            agent_pb2.AgentLoadRequest(reset=reset)
+        )
+        if response.success:
+            return json.loads(response.load_json)
+        logger.warning(f"Worker {worker_address}:{worker_port} failed to report agent load: {response.error}")
+        return None
+    except Exception as e:
+        logger.warning(f"Error getting agent load from worker {worker_address}:{worker_port}: {e}")
+        return None
+
+async def migrate_agent_on_worker(worker_address: str, worker_port: int, agent_id: str,
+                                  target_address: str, target_port: int, drain_timeout: float = 30.0) -> Tuple[bool, str]:
+    """
+    Ask a worker to move one of its agents to another worker.
+
+    Args:
+        worker_address: Address of the worker hosting the agent
+        worker_port: Port of the worker hosting the agent
+        agent_id: ID of the agent
+        target_address: Address of the target worker
+        target_port: Port of the target worker
+        drain_timeout: Seconds the source waits for the agent's running handlers
+
+    Returns:
+        Tuple[bool, str]: Whether the agent moved, and the error if not
+    """
+    try:
+        request = agent_pb2.MigrateAgentRequest(
+            agent_id=agent_id,
+            target_address=target_address,
+            target_port=target_port,
+            drain_timeout=drain_timeout
+        )
+        response = await connection_manager.with_stub(
+            worker_address,
+            worker_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'MigrateAgent',
+            request
+        )
+        return response.success, response.error
+    except Exception as e:
+        return False, str(e)
+
+async def import_agent_on_worker(worker_address: str, worker_port: int, state: Dict[str, Any],
+                                 pending_events: List[Any]) -> Tuple[bool, str]:
+    """
+    Send a migrating agent's state and queued events to its target worker.
+
+    Args:
+        worker_address: Target worker address
+        worker_port: Target worker port
+        state: The agent state from ``export_agent_state``
+        pending_events: Events queued for the agent, delivered before any later ones
+
+    Returns:
+        Tuple[bool, str]: Whether the target created the agent, and the error if not
+    """
+    try:
+        request = agent_pb2.ImportAgentRequest(
+            state_json=json.dumps(state),
+            pending_events=[event_to_proto(event) for event in pending_events]
+        )
+        response = await connection_manager.with_stub(
+            worker_address,
+            worker_port,
+            agent_pb2_grpc.AgentServiceStub,
+            'ImportAgent',
+            request
+        )
+        return response.success, response.error
+    except Exception as e:
+        return False, str(e)
+
 async def collect_data_batch_from_worker(worker_address: str, worker_port: int, agent_type: str, data_key: str, default_value: Any = None) -> Optional[Dict[str, Any]]:
     """Client function for Master to call CollectDataBatch on a Worker."""
     try:
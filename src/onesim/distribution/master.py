@@ -1,5 +1,5 @@
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 from dataclasses import dataclass, field
 import uuid
 from loguru import logger
@@ -12,6 +12,9 @@ import time
 import grpc
 from onesim.distribution.worker import WorkerNode
 from onesim.distribution.connection_manager import initialize_connection_manager
+from onesim.distribution.routing_table import build_full_update, build_delta_update
+from onesim.distribution.env_cache import env_data_publisher
+from onesim.distribution.stats_push import stats_aggregator
 
 @dataclass
 class WorkerInfo:
@@ -32,9 +35,28 @@ class MasterNode(Node):
                  config: Optional[Dict[str, Any]] = None):
         super().__init__(node_id, NodeRole.MASTER, config)
         self.listen_port = config.get("listen_port", 10051)
+        # unix:地址时监听Unix域套接字（本机多进程集群）
+        self.listen_address = config.get("listen_address")
         self._server = None
         self.workers = {}  # worker_id -> WorkerInfo
         self.agent_locations = {}  # agent_id -> worker_id
+        # 路由表 agent_id -> (worker_id, address, port)，写时复制：
+        # 写入方在worker_lock内构建新字典后整体替换，读取方无需加锁
+        self._routes: Dict[str, Tuple[str, str, int]] = {}
+        # 推送给worker的路由表版本，每次替换_routes时递增
+        self._routing_version = 0
+        self._pushed_routes: Tuple[int, Dict[str, Tuple[str, str, int]]] = (0, {})
+        self._worker_route_versions: Dict[str, int] = {}  # worker_id -> 已确认的路由表版本
+        self._route_push_task = None
+        self._route_push_requested = False
+        # worker环境数据副本的失效通知，每个worker已确认的版本
+        self._worker_env_versions: Dict[str, int] = {}
+        self._env_push_task = None
+        self._env_push_requested = False
+        # 弹性伸缩：仿真开始后注册的worker在下一个step边界分得一部分agent，
+        # 请求退出的worker在下一个step边界迁出全部agent后被移除
+        self.joining_workers: Set[str] = set()
+        self.draining_workers: Set[str] = set()
         self.expected_worker_count = config.get("expected_workers", 1)
         self.initialized = asyncio.Event()  # 标记初始化完成
         self.sim_env = None  # Reference to simulation environment for data storage
@@ -51,7 +73,7 @@ class MasterNode(Node):
 
         # Start gRPC server
         if self._grpc_module:
-            self._server = await self._grpc_module.create_master_server(self, self.listen_port)
+            self._server = await self._grpc_module.create_master_server(self, self.listen_port, self.listen_address)
             logger.info(f"Master node {self.node_id} started gRPC server on port {self.listen_port}")
 
         # 启动worker连接监视任务
@@ -108,6 +130,10 @@ class MasterNode(Node):
                     self.workers[worker_id].port = port
                     self.workers[worker_id].last_heartbeat = time.time()
                     self.workers[worker_id].status = "connected"
+                    # 重新注册的worker可能已重启，需要重新发送全量路由表
+                    self._worker_route_versions.pop(worker_id, None)
+                    self._worker_env_versions.pop(worker_id, None)
+                    self._publish_routes()
                     return True, f"Worker {worker_id} updated"
                 else:
                     worker_info=WorkerInfo(
@@ -117,6 +143,11 @@ class MasterNode(Node):
                         last_heartbeat=time.time()
                     )
                     self.workers[worker_id] = worker_info
+                    if self._routing_version:
+                        self._schedule_route_push()
+                    if self.initialized.is_set():
+                        self.joining_workers.add(worker_id)
+                        logger.info(f"Worker {worker_id} joined during the simulation, agents will move to it at the next step")
                     # logger.info(f"Worker {worker_id} registered at {address}:{port}")
                     return True, f"Worker {worker_id} registered successfully"
         except Exception as e:
@@ -135,10 +166,152 @@ class MasterNode(Node):
             target_worker.agent_count += 1
             target_worker.agent_ids.append(agent_id)
             self.agent_locations[agent_id] = target_worker.worker_id
+            routes = dict(self._routes)
+            routes[agent_id] = (target_worker.worker_id, target_worker.address, target_worker.port)
+            self._set_routes(routes)
 
             logger.info(f"Allocated agent {agent_id} to worker {target_worker.worker_id}")
             return target_worker.worker_id
 
+    async def assign_agents(self, allocations: Dict[str, str]) -> None:
+        """
+        记录一批agent的位置并发布新的路由表
+
+        Args:
+            allocations: agent_id到worker_id的映射
+        """
+        async with self.worker_lock:
+            for agent_id, worker_id in allocations.items():
+                self.agent_locations[agent_id] = worker_id
+                worker = self.workers.get(worker_id)
+                if worker and agent_id not in worker.agent_ids:
+                    worker.agent_count += 1
+                    worker.agent_ids.append(agent_id)
+            self._publish_routes()
+
+    async def move_agents(self, moves: Dict[str, str]) -> None:
+        """
+        记录一批已迁移的agent，所有变化在同一个路由表版本中发布
+
+        Args:
+            moves: agent_id到新worker_id的映射
+        """
+        async with self.worker_lock:
+            for agent_id, worker_id in moves.items():
+                old_worker = self.workers.get(self.agent_locations.get(agent_id))
+                if old_worker and agent_id in old_worker.agent_ids:
+                    old_worker.agent_ids.remove(agent_id)
+                    old_worker.agent_count -= 1
+                self.agent_locations[agent_id] = worker_id
+                worker = self.workers.get(worker_id)
+                if worker and agent_id not in worker.agent_ids:
+                    worker.agent_count += 1
+                    worker.agent_ids.append(agent_id)
+            self._publish_routes()
+
+    def _publish_routes(self) -> None:
+        """根据agent_locations和workers重建路由表并整体替换（调用方需持有worker_lock）"""
+        routes = {}
+        for agent_id, worker_id in self.agent_locations.items():
+            worker = self.workers.get(worker_id)
+            if worker:
+                routes[agent_id] = (worker_id, worker.address, worker.port)
+        self._set_routes(routes)
+
+    def _set_routes(self, routes: Dict[str, Tuple[str, str, int]]) -> None:
+        """替换路由表，递增版本并安排推送给所有worker"""
+        self._routes = routes
+        self._routing_version += 1
+        self._schedule_route_push()
+
+    def _schedule_route_push(self) -> None:
+        """安排一次路由表推送；推送进行中时合并到下一轮"""
+        self._route_push_requested = True
+        if self._grpc_module and (self._route_push_task is None or self._route_push_task.done()):
+            self._route_push_task = asyncio.create_task(self._push_routes())
+
+    async def _push_routes(self) -> None:
+        """
+        Push the current routing table to all workers until no newer version is pending.
+
+        A worker that acknowledged the previously pushed version receives only
+        the difference; any other worker, or one that rejects a delta, receives
+        the full table.
+        """
+        while self._route_push_requested and not self.shutting_down:
+            self._route_push_requested = False
+            version, routes = self._routing_version, self._routes
+            workers = [(w.worker_id, w.address, w.port) for w in self.workers.values()]
+            await asyncio.gather(*(
+                self._push_routes_to_worker(worker_id, address, port, version, routes)
+                for worker_id, address, port in workers
+            ))
+            self._pushed_routes = (version, routes)
+
+    async def _push_routes_to_worker(self, worker_id: str, address: str, port: int,
+                                     version: int, routes: Dict[str, Tuple[str, str, int]]) -> None:
+        acked = self._worker_route_versions.get(worker_id)
+        if acked == version:
+            return
+        pushed_version, pushed_routes = self._pushed_routes
+        try:
+            if acked is not None and acked == pushed_version:
+                update = build_delta_update(pushed_routes, routes, pushed_version, version)
+                success, acked = await self._grpc_module.push_routing_table_to_worker(address, port, update)
+                if success:
+                    self._worker_route_versions[worker_id] = acked
+                    return
+            update = build_full_update(routes, version)
+            success, acked = await self._grpc_module.push_routing_table_to_worker(address, port, update)
+        except Exception as e:
+            logger.error(f"Error pushing routing table to worker {worker_id}: {e}")
+            success = False
+        if success and worker_id in self.workers:
+            self._worker_route_versions[worker_id] = acked
+        else:
+            # 下次推送全量路由表，worker在此之前通过LocateAgent查询
+            self._worker_route_versions.pop(worker_id, None)
+
+    def invalidate_env_data(self, keys: Optional[List[str]] = None) -> None:
+        """
+        Tell the workers' env data replicas that keys were written.
+
+        Args:
+            keys: Written keys, None if any key may have changed
+        """
+        if not env_data_publisher.enabled:
+            return
+        env_data_publisher.invalidate(keys)
+        self._env_push_requested = True
+        if self._grpc_module and (self._env_push_task is None or self._env_push_task.done()):
+            self._env_push_task = asyncio.create_task(self._push_env_invalidations())
+
+    async def _push_env_invalidations(self) -> None:
+        """Push env data invalidations to all workers; writes made during a push go out in the next round"""
+        while self._env_push_requested and not self.shutting_down:
+            self._env_push_requested = False
+            workers = [(w.worker_id, w.address, w.port) for w in self.workers.values()]
+            await asyncio.gather(*(
+                self._push_env_to_worker(worker_id, address, port)
+                for worker_id, address, port in workers
+            ))
+
+    async def _push_env_to_worker(self, worker_id: str, address: str, port: int) -> None:
+        acked = self._worker_env_versions.get(worker_id)
+        if acked == env_data_publisher.version:
+            return
+        try:
+            update = env_data_publisher.build_update(acked)
+            success, acked = await self._grpc_module.push_env_invalidation_to_worker(address, port, update)
+        except Exception as e:
+            logger.error(f"Error pushing env data invalidation to worker {worker_id}: {e}")
+            success = False
+        if success and worker_id in self.workers:
+            self._worker_env_versions[worker_id] = acked
+        else:
+            # 下次通知worker丢弃全部副本
+            self._worker_env_versions.pop(worker_id, None)
+
     async def forward_event(self, event: Event) -> bool:
         """Forward an event to the appropriate worker(s)"""
         success = True
@@ -150,39 +323,23 @@ class MasterNode(Node):
             await self.handle_event(event)
             return success
 
-        worker_id = None
-        target_address = None
-        target_port = None
-
-        async with self.worker_lock:  # 使用异步锁
-            # Find worker hosting this agent
-            worker_id = self.agent_locations.get(to_agent_id)
-            if not worker_id:
-                logger.warning(f"Unknown agent {to_agent_id} for event {event.event_kind}")
-                # success = False # No need to set success, just return
-                return False
-
-                # Get worker info
-            worker = self.workers.get(worker_id)
-            if not worker:
-                logger.warning(f"Unknown worker {worker_id} for agent {to_agent_id}")
-                # success = False # No need to set success, just return
-                return False
-
-            # Copy worker details needed for sending before releasing the lock
-            target_address = worker.address
-            target_port = worker.port
+        # Lock-free lookup in the copy-on-write routing table
+        route = self._routes.get(to_agent_id)
+        if route is None:
+            logger.warning(f"Unknown agent {to_agent_id} for event {event.event_kind}")
+            return False
+        worker_id, target_address, target_port = route
 
-        # Lock is released. Now perform the gRPC call.
+        # Only enqueues: each worker has its own outbound queue and sender
+        # task, so a slow or dead worker does not hold up the others
         try:
             if self._grpc_module:
-                await self._grpc_module.send_event_to_worker(
+                success = await self._grpc_module.queue_event(
                     target_address, 
                     target_port, 
                     event
                 )
         except Exception as e:
-            # Use the worker_id captured while the lock was held for logging context
             logger.error(f"Error forwarding event to worker {worker_id} (destination: {target_address}:{target_port}): {e}")
             success = False
 
@@ -234,7 +391,10 @@ class MasterNode(Node):
         """
         try:
             from onesim.models.utils.token_usage import get_token_usage_stats
-            return get_token_usage_stats()
+            from onesim.utils.runtime_stats import runtime_stats
+            stats = get_token_usage_stats()
+            stats["runtime"] = runtime_stats.collect()
+            return stats
         except ImportError:
             logger.warning("Token usage module not available")
             return {
@@ -314,31 +474,94 @@ class MasterNode(Node):
 
             # 移除超时的worker
             for worker_id in workers_to_remove:
-                worker_info = self.workers.pop(worker_id)
-                logger.info(f"Removed worker {worker_id} from {worker_info.address}:{worker_info.port}")
+                self._remove_worker(worker_id)
 
-                # 更新agent位置
-                for agent_id in worker_info.agent_ids:
-                    if agent_id in self.agent_locations and self.agent_locations[agent_id] == worker_id:
-                        self.agent_locations.pop(agent_id)
-                        logger.warning(f"Agent {agent_id} is no longer available (worker {worker_id} removed)")
+            if workers_to_remove:
+                self._publish_routes()
 
         return workers_to_remove
 
+    def _remove_worker(self, worker_id: str) -> WorkerInfo:
+        """移除worker及其上agent的位置（调用方需持有worker_lock并随后发布路由表）"""
+        worker_info = self.workers.pop(worker_id)
+        self._worker_route_versions.pop(worker_id, None)
+        self._worker_env_versions.pop(worker_id, None)
+        stats_aggregator.remove(worker_id)
+        self.joining_workers.discard(worker_id)
+        self.draining_workers.discard(worker_id)
+        logger.info(f"Removed worker {worker_id} from {worker_info.address}:{worker_info.port}")
+
+        # 更新agent位置
+        for agent_id in worker_info.agent_ids:
+            if agent_id in self.agent_locations and self.agent_locations[agent_id] == worker_id:
+                self.agent_locations.pop(agent_id)
+                logger.warning(f"Agent {agent_id} is no longer available (worker {worker_id} removed)")
+
+        # 丢弃发往该worker的待发送事件
+        if self._grpc_module:
+            self._grpc_module.event_batcher.discard(worker_info.address, worker_info.port)
+        return worker_info
+
+    async def request_drain(self, worker_id: str) -> Tuple[bool, str]:
+        """
+        标记worker退出，其agent在下一个step边界迁移到其他worker
+
+        Args:
+            worker_id: 要退出的worker ID
+
+        Returns:
+            Tuple[bool, str]: (是否接受, 错误信息)
+        """
+        async with self.worker_lock:
+            if worker_id not in self.workers:
+                return False, f"Unknown worker {worker_id}"
+            remaining = set(self.workers) - self.draining_workers - {worker_id}
+            if not remaining:
+                return False, "No other worker left to take its agents"
+            self.draining_workers.add(worker_id)
+            self.joining_workers.discard(worker_id)
+        logger.info(f"Worker {worker_id} is leaving, its agents will move at the next step")
+        return True, ""
+
+    async def finish_resize(self) -> List[str]:
+        """
+        在迁移后结束本轮伸缩：移除已迁空的退出worker并通知其停止
+
+        Returns:
+            List[str]: 已移除的worker ID列表
+        """
+        async with self.worker_lock:
+            self.joining_workers.clear()
+            drained = [worker_id for worker_id in self.draining_workers
+                       if worker_id in self.workers and not self.workers[worker_id].agent_ids]
+            removed = [self._remove_worker(worker_id) for worker_id in drained]
+            if removed:
+                self._publish_routes()
+
+        if removed:
+            # 先让其他worker拿到新路由表，再停止退出的worker，期间它继续转发迁出agent的事件
+            if self._route_push_task is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._route_push_task), timeout=10)
+                except Exception as e:
+                    logger.warning(f"Routing table push not finished before stopping drained workers: {e}")
+            for worker_info in removed:
+                await self._grpc_module.send_termination_to_worker(
+                    worker_info.address, worker_info.port, "worker_drained"
+                )
+        return drained
+
     def find_worker_for_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Find the worker node hosting a specific agent"""
-        if agent_id not in self.agent_locations:
-            return None
-
-        worker_id = self.agent_locations[agent_id]
-        if worker_id not in self.workers:
+        route = self._routes.get(agent_id)
+        if route is None:
             return None
 
-        worker = self.workers[worker_id]
+        worker_id, address, port = route
         return {
-            "worker_id": worker.worker_id,
-            "address": worker.address,
-            "port": worker.port
+            "worker_id": worker_id,
+            "address": address,
+            "port": port
         }
 
         # Check if agent exists locally on master
@@ -359,6 +582,10 @@ class MasterNode(Node):
         # 取消健康检查任务
         if self._health_check_task and not self._health_check_task.done():
             self._health_check_task.cancel()
+        if self._route_push_task and not self._route_push_task.done():
+            self._route_push_task.cancel()
+        if self._env_push_task and not self._env_push_task.done():
+            self._env_push_task.cancel()
 
         # 发送终止信号给所有worker
         async with self.worker_lock:
@@ -0,0 +1,466 @@
+import asyncio
+import heapq
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from loguru import logger
+
+from onesim.distribution.partitioner import PartitionGraph
+
+
+class AgentLoadMonitor:
+    """
+    Worker上按Agent统计实际收到的消息和事件处理耗时。
+
+    Every event an agent handles is counted as a message from its sender,
+    and the handler's wall time (dominated by LLM calls) as the agent's load.
+    The master collects and resets these counters at step boundaries to
+    decide which agents to migrate. Recording is off unless rebalancing is
+    enabled.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._messages: Dict[str, Dict[str, int]] = {}
+        self._busy_time: Dict[str, float] = {}
+
+    def configure(self, enabled: Optional[bool] = None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def record(self, from_agent_id: str, to_agent_id: str, seconds: float):
+        """Record one event handled by ``to_agent_id``"""
+        if not self.enabled:
+            return
+        if from_agent_id and from_agent_id != to_agent_id:
+            counts = self._messages.get(from_agent_id)
+            if counts is None:
+                counts = self._messages[from_agent_id] = {}
+            counts[to_agent_id] = counts.get(to_agent_id, 0) + 1
+        self._busy_time[to_agent_id] = self._busy_time.get(to_agent_id, 0.0) + seconds
+
+    def snapshot(self, reset: bool = True) -> Dict[str, Any]:
+        """
+        Return the counters recorded since the last reset.
+
+        Returns:
+            Dict[str, Any]: ``{"messages": {from: {to: count}}, "busy_time": {agent: seconds}}``
+        """
+        data = {"messages": self._messages, "busy_time": self._busy_time}
+        if reset:
+            self._messages, self._busy_time = {}, {}
+        else:
+            data = {"messages": {k: dict(v) for k, v in self._messages.items()},
+                    "busy_time": dict(self._busy_time)}
+        return data
+
+
+class AgentForwarder:
+    """
+    在事件总线中代替正在迁移或已迁出的Agent。
+
+    Events for the agent are buffered while it is being moved, then sent
+    with ``send`` once the target worker hosts it, one at a time and in
+    arrival order. Broadcast events are dropped, the target worker delivers
+    its own copy.
+    """
+
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.pending: List[Any] = []
+        self.target: Optional[Tuple[str, int]] = None
+        self._send = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_event(self, event) -> None:
+        if event.to_agent_id != self.agent_id:
+            return
+        self.pending.append(event)
+        if self._send is not None and self._task is None:
+            self._task = asyncio.create_task(self._send_pending())
+
+    def start_forwarding(self, target: Tuple[str, int], send) -> None:
+        """Send the buffered events and all later ones with the coroutine function ``send``"""
+        self.target = target
+        self._send = send
+        if self.pending and self._task is None:
+            self._task = asyncio.create_task(self._send_pending())
+
+    @property
+    def task(self) -> Optional[asyncio.Task]:
+        """The task sending buffered events, None while nothing is being sent"""
+        return self._task
+
+    async def flush(self) -> None:
+        """Wait until the buffered events have been sent"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def _send_pending(self) -> None:
+        try:
+            while self.pending:
+                event = self.pending.pop(0)
+                try:
+                    await self._send(event)
+                except Exception as e:
+                    logger.error(f"Failed to forward event {event.event_id} to migrated agent {self.agent_id}: {e}")
+        finally:
+            self._task = None
+
+
+async def export_agent_state(agent, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Capture what is needed to recreate an agent on another worker.
+
+    Args:
+        agent: The agent instance
+        config: The configuration the agent was created from
+
+    Returns:
+        Dict[str, Any]: The creation config with the agent's current profile,
+        relationships and memory
+    """
+    state = dict(config)
+    state["profile_data"] = agent.profile.get_profile(include_private=True)
+    state["relationships"] = agent.relationship_manager.to_list()
+    state["memory_state"] = await agent.memory.export_state() if agent.memory else {}
+    return state
+
+
+class AgentRebalancer:
+    """
+    Master上基于实际流量的Agent重新平衡器，在step边界迁移Agent。
+
+    Message counts and handler time per agent are collected from workers
+    and accumulated with exponential decay, so older steps weigh less. Each
+    round first moves agents off workers whose load exceeds
+    ``(1 + imbalance)`` times the average, choosing the agents whose move
+    loses the least co-located traffic, then greedily moves the agents that
+    gain at least ``min_gain`` co-located messages, at most
+    ``max_migrations`` agents in total. When workers joined or are leaving,
+    the round instead fills the new workers and empties the leaving ones
+    (see ``plan_resize``), whether or not traffic rebalancing is enabled.
+    Successful moves are published in one routing table version.
+    """
+
+    def __init__(self, enabled: bool = False, interval: int = 1, max_migrations: int = 100,
+                 min_gain: float = 5.0, imbalance: float = 0.1, decay: float = 0.5,
+                 drain_timeout: float = 30.0, concurrency: int = 8):
+        self.enabled = enabled
+        self.interval = interval
+        self.max_migrations = max_migrations
+        self.min_gain = min_gain
+        self.imbalance = imbalance
+        self.decay = decay
+        self.drain_timeout = drain_timeout
+        self.concurrency = concurrency
+        self._traffic: Dict[Tuple[str, str], float] = {}
+        self._busy_time: Dict[str, float] = {}
+        self.stats = {"rounds": 0, "migrations": 0, "failed_migrations": 0}
+
+    def configure(self, enabled: Optional[bool] = None, interval: Optional[int] = None,
+                  max_migrations: Optional[int] = None, min_gain: Optional[float] = None,
+                  imbalance: Optional[float] = None):
+        """
+        Update the rebalancing settings.
+
+        Args:
+            enabled: Whether to migrate agents at step boundaries.
+            interval: Rebalance every this many steps.
+            max_migrations: Maximum agents moved per round.
+            min_gain: Minimum co-located messages an agent must gain to move for traffic.
+            imbalance: Allowed load above the average worker load.
+        """
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if interval is not None:
+            self.interval = max(int(interval), 1)
+        if max_migrations is not None:
+            self.max_migrations = max(int(max_migrations), 0)
+        if min_gain is not None:
+            self.min_gain = float(min_gain)
+        if imbalance is not None:
+            if imbalance < 0:
+                raise ValueError(f"imbalance must be non-negative, got {imbalance}")
+            self.imbalance = float(imbalance)
+
+    async def collect(self, master_node) -> None:
+        """Fetch and reset the load counters of all workers, decaying what was collected before"""
+        grpc_module = master_node._grpc_module
+        workers = list(master_node.workers.values())
+        loads = await asyncio.gather(*(
+            grpc_module.get_agent_load_from_worker(w.address, w.port) for w in workers
+        ))
+
+        self._traffic = {pair: count * self.decay for pair, count in self._traffic.items()
+                         if count * self.decay >= 0.5}
+        self._busy_time = {agent_id: t * self.decay for agent_id, t in self._busy_time.items()}
+        for load in loads:
+            if not load:
+                continue
+            for from_id, counts in load.get("messages", {}).items():
+                for to_id, count in counts.items():
+                    pair = (from_id, to_id) if from_id < to_id else (to_id, from_id)
+                    self._traffic[pair] = self._traffic.get(pair, 0.0) + count
+            for agent_id, seconds in load.get("busy_time", {}).items():
+                self._busy_time[agent_id] = self._busy_time.get(agent_id, 0.0) + seconds
+
+    def plan(self, locations: Dict[str, str], worker_ids: List[str]) -> List[Tuple[str, str, str, float]]:
+        """
+        Choose migrations from the collected traffic and load.
+
+        Args:
+            locations: agent_id到worker_id的映射
+            worker_ids: Workers that can receive agents
+
+        Returns:
+            List[Tuple[str, str, str, float]]: (agent_id, source worker, target worker, traffic gain)
+        """
+        if len(worker_ids) < 2 or not locations or not self.max_migrations:
+            return []
+        agent_ids, graph, part = self._build_graph(locations, worker_ids)
+        moves = self._greedy_moves(graph, part, len(worker_ids))
+        return [(agent_ids[v], worker_ids[s], worker_ids[t], gain) for v, s, t, gain in moves]
+
+    def plan_resize(self, locations: Dict[str, str], worker_ids: List[str], joining: Set[str],
+                    draining: Set[str]) -> List[Tuple[str, str, str, float]]:
+        """
+        Choose migrations that empty leaving workers and fill new ones.
+
+        Every agent on a draining worker moves to the remaining worker it
+        exchanges most messages with that has room. Each joining worker then
+        takes agents from workers above the average load until it reaches
+        the average, growing from the agents it already has so that agents
+        that talk to each other move together. ``max_migrations`` does not
+        apply.
+
+        Args:
+            locations: agent_id到worker_id的映射
+            worker_ids: All workers, including joining and draining ones
+            joining: Workers that registered during the simulation
+            draining: Workers that are leaving
+
+        Returns:
+            List[Tuple[str, str, str, float]]: (agent_id, source worker, target worker, traffic gain)
+        """
+        k = len(worker_ids)
+        active = [b for b, worker_id in enumerate(worker_ids) if worker_id not in draining]
+        if not locations or not active:
+            return []
+        agent_ids, graph, part = self._build_graph(locations, worker_ids)
+        xadj, adjncy, adjwgt, vwgt = graph.xadj, graph.adjncy, graph.adjwgt, graph.vwgt
+        load = np.bincount(part, weights=vwgt, minlength=k)
+        average = vwgt.sum() / len(active)
+        limit = (1 + self.imbalance) * average
+        moves: Dict[int, Tuple[int, int, float]] = {}
+
+        def connectivity(v: int) -> np.ndarray:
+            return np.bincount(part[adjncy[xadj[v]:xadj[v + 1]]], weights=adjwgt[xadj[v]:xadj[v + 1]], minlength=k)
+
+        def move(v: int, target: int, gain: float):
+            source = int(part[v])
+            load[source] -= vwgt[v]
+            load[target] += vwgt[v]
+            part[v] = target
+            moves[v] = (source, target, gain)
+
+        # 退出的Worker：每个Agent迁到有空间且通信最多的Worker，都没有空间时迁到负载最低的
+        drained = [b for b, worker_id in enumerate(worker_ids) if worker_id in draining]
+        for v in np.flatnonzero(np.isin(part, drained)).tolist():
+            conn = connectivity(v)
+            fits = [b for b in active if load[b] + vwgt[v] <= limit]
+            target = max(fits, key=lambda b: (conn[b], -load[b])) if fits else min(active, key=lambda b: load[b])
+            move(v, target, float(conn[target] - conn[part[v]]))
+
+        # 新加入的Worker：从高于平均负载的Worker取Agent，优先与已迁入Agent通信多的
+        members = {b: iter(np.flatnonzero(part == b).tolist()) for b in active}
+        exhausted = set()
+        for j in (b for b in active if worker_ids[b] in joining):
+            gain = np.zeros(len(agent_ids))
+            heap: List[Tuple[float, int]] = []
+
+            def add_neighbours(v: int):
+                for u, w in zip(adjncy[xadj[v]:xadj[v + 1]].tolist(), adjwgt[xadj[v]:xadj[v + 1]].tolist()):
+                    if part[u] != j and u not in moves:
+                        gain[u] += w
+                        heapq.heappush(heap, (-gain[u], u))
+
+            for v in np.flatnonzero(part == j).tolist():
+                add_neighbours(v)
+            while load[j] < average:
+                v = None
+                while heap:
+                    neg_gain, u = heapq.heappop(heap)
+                    # 跳过过期条目、已迁移的Agent和不高于平均负载的来源
+                    if -neg_gain == gain[u] and u not in moves and part[u] != j and load[part[u]] > average:
+                        v = u
+                        break
+                if v is None:
+                    # 没有相连的候选，从负载最高的Worker取一个Agent作为新的起点
+                    sources = [b for b in active if b != j and b not in exhausted and load[b] > average]
+                    if not sources:
+                        break
+                    source = max(sources, key=lambda b: load[b])
+                    v = next((u for u in members[source] if u not in moves and part[u] == source), None)
+                    if v is None:
+                        exhausted.add(source)
+                        continue
+                conn = connectivity(v)
+                move(v, j, float(conn[j] - conn[part[v]]))
+                add_neighbours(v)
+
+        return [(agent_ids[v], worker_ids[s], worker_ids[t], gain) for v, (s, t, gain) in moves.items()]
+
+    def _build_graph(self, locations: Dict[str, str], worker_ids: List[str]) -> Tuple[List[str], PartitionGraph, np.ndarray]:
+        """Traffic graph over the agents on ``worker_ids``, weighted by handler time, and their current workers"""
+        worker_index = {worker_id: i for i, worker_id in enumerate(worker_ids)}
+        agent_ids = [agent_id for agent_id, worker_id in locations.items() if worker_id in worker_index]
+        index_of = {agent_id: i for i, agent_id in enumerate(agent_ids)}
+
+        src, dst, weights = [], [], []
+        for (a, b), count in self._traffic.items():
+            i, j = index_of.get(a), index_of.get(b)
+            if i is not None and j is not None:
+                src.append(i)
+                dst.append(j)
+                weights.append(count)
+        busy = np.array([self._busy_time.get(agent_id, 0.0) for agent_id in agent_ids])
+        # 空闲Agent也占少量负载，没有耗时数据时退化为按数量平衡
+        node_weights = busy + max(busy.sum() / max(len(agent_ids), 1) * 0.05, 1e-3)
+        graph = PartitionGraph.from_edges(len(agent_ids), src, dst, weights, node_weights)
+        part = np.array([worker_index[locations[agent_id]] for agent_id in agent_ids], dtype=np.int64)
+        return agent_ids, graph, part
+
+    def _greedy_moves(self, graph: PartitionGraph, part: np.ndarray, k: int) -> List[Tuple[int, int, int, float]]:
+        xadj, adjncy, adjwgt, vwgt = graph.xadj, graph.adjncy, graph.adjwgt, graph.vwgt
+        load = np.bincount(part, weights=vwgt, minlength=k)
+        limit = (1 + self.imbalance) * vwgt.sum() / k
+        moves: Dict[int, Tuple[int, int, float]] = {}  # node -> (source, target, gain)
+
+        def best_target(v: int) -> Tuple[int, float]:
+            conn = np.bincount(part[adjncy[xadj[v]:xadj[v + 1]]], weights=adjwgt[xadj[v]:xadj[v + 1]], minlength=k)
+            own = conn[part[v]]
+            conn[part[v]] = -np.inf
+            conn[load + vwgt[v] > limit] = -np.inf
+            target = int(np.argmax(conn))
+            return target, float(conn[target] - own)
+
+        def move(v: int, target: int, gain: float):
+            source = int(part[v])
+            load[source] -= vwgt[v]
+            load[target] += vwgt[v]
+            part[v] = target
+            moves[v] = (source, target, gain)
+
+        # 先把过载Worker上迁出后流量损失最小的Agent移走
+        for block in np.argsort(-load).tolist():
+            if load[block] <= limit:
+                break
+            candidates = []
+            for v in np.flatnonzero(part == block).tolist():
+                target, gain = best_target(v)
+                if gain > -np.inf:
+                    candidates.append((-gain, v))
+            candidates.sort()
+            for _, v in candidates:
+                if load[block] <= limit or len(moves) >= self.max_migrations:
+                    break
+                target, gain = best_target(v)
+                if gain > -np.inf:
+                    move(v, target, gain)
+
+        # 再按增益从大到小迁移，使通信频繁的Agent位于同一Worker
+        heap = []
+        for v in graph.boundary(part).tolist():
+            if v in moves:
+                continue
+            target, gain = best_target(v)
+            if gain >= self.min_gain:
+                heap.append((-gain, v))
+        heapq.heapify(heap)
+        while heap and len(moves) < self.max_migrations:
+            neg_gain, v = heapq.heappop(heap)
+            if v in moves:
+                continue
+            target, gain = best_target(v)
+            if gain < self.min_gain:
+                continue
+            if gain < -neg_gain:
+                # 增益因其他迁移而下降，按新增益重新排队
+                heapq.heappush(heap, (-gain, v))
+                continue
+            move(v, target, gain)
+
+        return [(v, source, target, gain) for v, (source, target, gain) in moves.items()]
+
+    async def rebalance(self, master_node, step: int) -> Dict[str, Any]:
+        """
+        Run one round at the end of a step: resize if workers joined or are
+        leaving, otherwise rebalance by traffic if it is due.
+
+        Args:
+            master_node: The master node
+            step: The step that just finished
+
+        Returns:
+            Dict[str, Any]: Summary of the round, empty if it did not run
+        """
+        joining = set(master_node.joining_workers)
+        draining = set(master_node.draining_workers)
+        resize = bool(joining or draining)
+        due = self.enabled and step % self.interval == 0 and len(master_node.workers) >= 2
+        if not resize and not due:
+            return {}
+        if self.enabled:
+            await self.collect(master_node)
+
+        locations = dict(master_node.agent_locations)
+        worker_ids = list(master_node.workers.keys())
+        if resize:
+            planned = self.plan_resize(locations, worker_ids, joining, draining)
+        else:
+            planned = self.plan(locations, worker_ids)
+        moved = await self._migrate(master_node, planned)
+
+        summary = {
+            "planned": len(planned),
+            "migrated": len(moved),
+            "traffic_gain": sum(gain for (agent_id, _, _, gain) in planned if agent_id in moved),
+        }
+        if resize:
+            summary["joined_workers"] = sorted(joining)
+            summary["removed_workers"] = await master_node.finish_resize()
+        self.stats["rounds"] += 1
+        self.stats["migrations"] += len(moved)
+        self.stats["failed_migrations"] += len(planned) - len(moved)
+        logger.info(f"Rebalanced agents after step {step}: migrated {summary['migrated']}/{summary['planned']}, "
+                    f"co-located message gain {summary['traffic_gain']:.0f}")
+        return summary
+
+    async def _migrate(self, master_node, planned: List[Tuple[str, str, str, float]]) -> Dict[str, str]:
+        """Run the planned migrations concurrently and publish the successful ones"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def migrate(agent_id: str, source_id: str, target_id: str) -> bool:
+            source, target = master_node.workers.get(source_id), master_node.workers.get(target_id)
+            if source is None or target is None:
+                return False
+            async with semaphore:
+                success, error = await master_node._grpc_module.migrate_agent_on_worker(
+                    source.address, source.port, agent_id, target.address, target.port, self.drain_timeout
+                )
+            if not success:
+                logger.warning(f"Failed to migrate agent {agent_id} from {source_id} to {target_id}: {error}")
+            return success
+
+        results = await asyncio.gather(*(migrate(agent_id, s, t) for agent_id, s, t, _ in planned))
+        moved = {agent_id: t for (agent_id, _, t, _), ok in zip(planned, results) if ok}
+        if moved:
+            await master_node.move_agents(moved)
+        return moved
+
+
+# 全局Agent负载统计实例（Worker）
+agent_load_monitor = AgentLoadMonitor()
+
+# 全局Agent重新平衡器实例（Master）
+agent_rebalancer = AgentRebalancer()
@@ -35,8 +35,66 @@ class Node:
                 from onesim.distribution.connection_manager import connection_manager
                 # 确保连接管理器正确初始化（异步方式）
                 await connection_manager.initialize()
-                # 确保批处理器也被导入
+                # 配置发往Master的存储记录批处理
                 from onesim.distribution.batch_processor import batch_processor
+                batch_processor.configure(
+                    max_pending=self.config.get("storage_max_pending"),
+                    overflow=self.config.get("storage_overflow"),
+                    sample_rate=self.config.get("storage_sample_rate"),
+                    spill_dir=self.config.get("storage_spill_dir"),
+                    compression=self.config.get("storage_compression"),
+                    event_sampling=self.config.get("storage_event_sampling"),
+                    max_retries=self.config.get("storage_max_retries"),
+                    node_id=self.node_id
+                )
+                # 配置事件合并发送
+                from onesim.distribution.event_batcher import event_batcher
+                event_batcher.configure(
+                    batch_size=self.config.get("event_batch_size"),
+                    max_wait_time=self.config.get("event_batch_wait"),
+                    max_in_flight=self.config.get("event_max_in_flight"),
+                    max_pending=self.config.get("event_max_pending"),
+                    max_retries=self.config.get("event_max_retries")
+                )
+                # 配置事件编码方式
+                from onesim.distribution.event_codec import event_codec
+                event_codec.configure(self.config.get("event_codec"))
+                # 配置节点间双向流传输
+                from onesim.distribution.stream_transport import stream_transport
+                stream_transport.configure(
+                    enabled=self.config.get("stream_transport"),
+                    max_in_flight=self.config.get("stream_max_in_flight")
+                )
+                # 配置同机节点间的共享内存传输
+                from onesim.distribution.shm_transport import shm_transport
+                shm_transport.configure(
+                    enabled=self.config.get("shm_transport"),
+                    ring_size=self.config.get("shm_ring_size"),
+                    max_in_flight=self.config.get("stream_max_in_flight"),
+                    node_id=self.node_id
+                )
+                # 配置基于流量的Agent迁移：Worker统计负载，Master决定迁移
+                from onesim.distribution.migration import agent_load_monitor, agent_rebalancer
+                if self.role == NodeRole.WORKER:
+                    agent_load_monitor.configure(enabled=self.config.get("rebalance_enabled"))
+                elif self.role == NodeRole.MASTER:
+                    agent_rebalancer.configure(
+                        enabled=self.config.get("rebalance_enabled"),
+                        interval=self.config.get("rebalance_interval"),
+                        max_migrations=self.config.get("rebalance_max_migrations"),
+                        min_gain=self.config.get("rebalance_min_gain"),
+                        imbalance=self.config.get("rebalance_imbalance")
+                    )
+                # 锁服务以本节点ID标识租约持有者
+                from onesim.distribution.distributed_lock import lock_service
+                lock_service.node_id = self.node_id
+                # 配置环境数据副本：Worker本地缓存读取结果，Master推送失效通知
+                from onesim.distribution.env_cache import env_data_replica, env_data_publisher
+                max_staleness = self.config.get("env_cache_max_staleness") or 0.0
+                if self.role == NodeRole.WORKER:
+                    env_data_replica.configure(max_staleness, self.config.get("env_cache_strong_keys"))
+                elif self.role == NodeRole.MASTER:
+                    env_data_publisher.configure(enabled=max_staleness > 0)
                 logger.info(f"Initialized {self.role.value} node with gRPC support")
             except ImportError as e:
                 print(e)
@@ -56,14 +114,20 @@ class Node:
         
         if self.role != NodeRole.SINGLE and self._initialized:
             try:
-                # 清理连接管理器资源
-                from onesim.distribution.connection_manager import connection_manager
-                await connection_manager.stop()
-                
-                # 停止批处理器
+                # 停止批处理器，先发送完待发送的事件
                 if self._grpc_module:
                     from onesim.distribution.batch_processor import batch_processor
                     batch_processor.stop()
+                    from onesim.distribution.event_batcher import event_batcher
+                    await event_batcher.stop()
+                    from onesim.distribution.stream_transport import stream_transport
+                    await stream_transport.close()
+                    from onesim.distribution.shm_transport import shm_transport
+                    await shm_transport.close()
+
+                # 清理连接管理器资源
+                from onesim.distribution.connection_manager import connection_manager
+                await connection_manager.stop()
                     
                 logger.info(f"Node {self.node_id} connection resources cleaned up")
             except Exception as e:
@@ -11,6 +11,8 @@ from onesim.events import Event, DataEvent, DataResponseEvent, DataUpdateEvent,
 from onesim.events import EndEvent
 from onesim.distribution.grpc_impl import run_async_safely
 from onesim.distribution.batch_processor import batch_processor
+from onesim.distribution.env_cache import env_data_replica
+from onesim.utils.event_priority import event_priorities
 
 class ProxyEnv:
     """
@@ -31,7 +33,7 @@ class ProxyEnv:
             master_address: Address of the master node
             master_port: Port of the master node
             batch_size: Maximum number of items to batch before sending
-            flush_interval: Seconds between forced batch flushes
+            flush_interval: Seconds a queued item waits at most before its batch is sent
         """
         self.node_id = node_id
         self.master_address = master_address
@@ -39,7 +41,7 @@ class ProxyEnv:
         self.trail_id = None  # Will be set after connecting to master
         self._running = False
         self._tasks = []
-        self._queue = asyncio.Queue()
+        self._queue = event_priorities.new_queue("env")
         self._event_schema = {}
         self._data_futures: Dict[str, asyncio.Future] = {}
         self._data_update_futures: Dict[str, asyncio.Future] = {}
@@ -47,8 +49,7 @@ class ProxyEnv:
         
         # 使用全局BatchProcessor替代内部批处理实现
         # 配置BatchProcessor
-        batch_processor.batch_size = batch_size
-        batch_processor.max_wait_time = flush_interval
+        batch_processor.configure(batch_size=batch_size, max_wait_time=flush_interval)
         batch_processor.start(master_address, master_port)
         
         # Create a unique ID for this proxy environment
@@ -141,12 +142,7 @@ class ProxyEnv:
         """
         try:
             # Forward the request to the master environment
-            data_value = await grpc_impl.get_env_data_from_master(
-                self.master_address,
-                self.master_port,
-                event.key,
-                event.default
-            )
+            data_value = await self._read_env_data(event.key, event.default)
             
             # Create response event
             response = DataResponseEvent(
@@ -215,6 +211,7 @@ class ProxyEnv:
                 event.key,
                 event.value
             )
+            env_data_replica.invalidate([event.key])
             
             # Create response event
             response = DataUpdateResponseEvent(
@@ -339,24 +336,35 @@ class ProxyEnv:
         except Exception as e:
             logger.error(f"Error handling termination event: {e}")
     
-    async def get_data(self, key: str, default: Any = None) -> Any:
+    async def _read_env_data(self, key: str, default: Any = None, strong: bool = False) -> Any:
+        """Read env data from the worker's replica, or from the master on a miss"""
+        found, value = env_data_replica.lookup(key, strong)
+        if found:
+            return value
+        token = env_data_replica.begin_read(key, strong)
+        value = await grpc_impl.get_env_data_from_master(
+            self.master_address,
+            self.master_port,
+            key,
+            default
+        )
+        env_data_replica.fill(key, value, token, default)
+        return value
+
+    async def get_data(self, key: str, default: Any = None, strong: bool = False) -> Any:
         """
         Get data from the master environment.
         
         Args:
             key: The data key to retrieve
             default: Default value if data not found
+            strong: Bypass the worker's env data replica and read from the master
             
         Returns:
             The requested data or default value
         """
         try:
-            return await grpc_impl.get_env_data_from_master(
-                self.master_address,
-                self.master_port,
-                key,
-                default
-            )
+            return await self._read_env_data(key, default, strong)
         except Exception as e:
             logger.error(f"Error getting data from master: {e}")
             return default
@@ -382,6 +390,8 @@ class ProxyEnv:
         except Exception as e:
             logger.error(f"Error updating data on master: {e}")
             return False
+        finally:
+            env_data_replica.invalidate([key])
     
     async def get_agent_data(self, agent_id: str, key: str, default: Optional[Any] = None) -> Any:
         """
@@ -533,14 +543,10 @@ class ProxyEnv:
         
         Args:
             batch_size: Maximum number of items to batch before sending, or None to keep current setting
-            flush_interval: Seconds between forced batch flushes, or None to keep current setting
+            flush_interval: Seconds a queued item waits at most before its batch is sent, or None to keep current setting
         """
         # 更新全局BatchProcessor的配置
-        if batch_size is not None and batch_size > 0:
-            batch_processor.batch_size = batch_size
-        
-        if flush_interval is not None and flush_interval > 0:
-            batch_processor.max_wait_time = flush_interval
+        batch_processor.configure(batch_size=batch_size, max_wait_time=flush_interval)
             
         logger.info(f"Updated batch config for worker {self.node_id}: batch_size={batch_processor.batch_size}, flush_interval={batch_processor.max_wait_time}s")
     
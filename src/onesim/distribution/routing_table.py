@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+# agent_id -> (worker_id, address, port), as kept by the master
+Routes = Dict[str, Tuple[str, str, int]]
+
+
+def _pack(update, routes: Routes, agent_ids) -> None:
+    """Fill the worker and location arrays of an update for the given agents"""
+    worker_index: Dict[Tuple[str, int], int] = {}
+    indexes: List[int] = []
+    for agent_id in agent_ids:
+        _, address, port = routes[agent_id]
+        index = worker_index.get((address, port))
+        if index is None:
+            index = worker_index[(address, port)] = len(worker_index)
+            update.worker_addresses.append(address)
+            update.worker_ports.append(port)
+        indexes.append(index)
+    update.agent_ids.extend(agent_ids)
+    update.worker_index.extend(indexes)
+
+
+def build_full_update(routes: Routes, version: int):
+    """
+    Build a full routing table update.
+
+    The table is sent as parallel arrays: ``agent_ids[i]`` is hosted by the
+    worker at ``worker_index[i]`` in ``worker_addresses``/``worker_ports``.
+    """
+    from onesim.distribution.grpc_impl import agent_pb2
+    update = agent_pb2.RoutingTableUpdate(version=version, full=True)
+    _pack(update, routes, list(routes))
+    return update
+
+
+def build_delta_update(old_routes: Routes, new_routes: Routes, base_version: int, version: int):
+    """Build an update that turns the table at ``base_version`` into ``new_routes``"""
+    from onesim.distribution.grpc_impl import agent_pb2
+    update = agent_pb2.RoutingTableUpdate(version=version, base_version=base_version, full=False)
+    changed = [agent_id for agent_id, route in new_routes.items() if old_routes.get(agent_id) != route]
+    _pack(update, new_routes, changed)
+    update.removed_agent_ids.extend(agent_id for agent_id in old_routes if agent_id not in new_routes)
+    return update
+
+
+class RoutingTable:
+    """
+    Worker上的agent路由表副本，由master推送全量表和增量更新。
+
+    Lookups are dictionary reads with no RPC. A delta is applied only on top
+    of the version it was computed from; otherwise it is rejected and the
+    master sends the full table again.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._locations: Dict[str, Tuple[str, int]] = {}
+        self.stats = {"hits": 0, "misses": 0, "full_updates": 0, "delta_updates": 0, "rejected_updates": 0}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def apply(self, update) -> bool:
+        """
+        Apply a full or delta update from the master.
+
+        Returns:
+            bool: False if a delta does not follow the current version
+        """
+        workers = list(zip(update.worker_addresses, update.worker_ports))
+        entries = zip(update.agent_ids, (workers[i] for i in update.worker_index))
+        if update.full:
+            self._locations = dict(entries)
+            self.stats["full_updates"] += 1
+        else:
+            if update.base_version != self.version:
+                self.stats["rejected_updates"] += 1
+                logger.warning(f"Routing delta {update.base_version}->{update.version} does not follow "
+                               f"local version {self.version}, waiting for a full table")
+                return False
+            self._locations.update(entries)
+            for agent_id in update.removed_agent_ids:
+                self._locations.pop(agent_id, None)
+            self.stats["delta_updates"] += 1
+        self.version = update.version
+        logger.debug(f"Routing table at version {self.version} with {len(self._locations)} agents")
+        return True
+
+    def lookup(self, agent_id: str) -> Optional[Tuple[str, int]]:
+        """Return the (address, port) of the worker hosting an agent, counting hits and misses"""
+        location = self._locations.get(agent_id)
+        if location is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return location
+
+    def get(self, agent_id: str) -> Optional[Tuple[str, int]]:
+        """Return the (address, port) of the worker hosting an agent without counting a lookup"""
+        return self._locations.get(agent_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "max_version": self.version}
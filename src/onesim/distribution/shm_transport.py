@@ -0,0 +1,579 @@
+import asyncio
+import ipaddress
+import itertools
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Set, Tuple
+import grpc
+from loguru import logger
+from onesim.distribution.stream_transport import (
+    _NOT_DISPATCHED, _STATUS_BY_VALUE, _EnvelopeContext, _method_types, _proto_modules, _rpc_error,
+    dispatch_envelope
+)
+
+# 环形缓冲区头部：head（累计写入字节数）、tail（累计读取字节数）、closed标志、数据区容量
+_HEADER_SIZE = 64
+_HEAD, _TAIL, _CLOSED, _CAPACITY = 0, 8, 16, 24
+_U64 = struct.Struct("<Q")
+_LEN = struct.Struct("<I")
+# Record length marking that the rest of the data area is unused, the next record starts at 0
+_WRAP = 0xFFFFFFFF
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class ShmUnavailable(Exception):
+    """The destination cannot be reached over shared memory, use another transport"""
+
+
+class _SessionClosed(Exception):
+    """The session was closed while a request was waiting for its response"""
+
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+
+
+class _Ring:
+    """
+    Single-producer single-consumer ring of length-prefixed records in a
+    shared memory segment.
+
+    ``head`` and ``tail`` count the bytes ever written and read. Only the
+    producer stores ``head`` and only the consumer stores ``tail``, so no lock
+    is needed; a record's bytes are stored before the ``head`` that publishes
+    it. Records are 8-byte aligned, and one that does not fit before the end
+    of the data area starts over at its beginning.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.capacity = _U64.unpack_from(self.buf, _CAPACITY)[0]
+        # A record of at most half the capacity always fits once the ring is empty
+        self.max_record = self.capacity // 2 - _LEN.size
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, capacity: int) -> "_Ring":
+        capacity = _aligned(max(int(capacity), 4096))
+        shm = shared_memory.SharedMemory(name=f"onesim_{uuid.uuid4().hex[:16]}", create=True,
+                                         size=_HEADER_SIZE + capacity)
+        shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+        _U64.pack_into(shm.buf, _CAPACITY, capacity)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "_Ring":
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            # 共享内存段由创建方删除，避免本进程退出时resource_tracker将其删除
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def closed(self) -> bool:
+        return self.buf is None or _U64.unpack_from(self.buf, _CLOSED)[0] != 0
+
+    def write(self, data: bytes) -> bool:
+        """Append a record, False if the ring has no room for it yet"""
+        buf, capacity = self.buf, self.capacity
+        size = _aligned(_LEN.size + len(data))
+        head = _U64.unpack_from(buf, _HEAD)[0]
+        tail = _U64.unpack_from(buf, _TAIL)[0]
+        pos = head % capacity
+        pad = capacity - pos if capacity - pos < size else 0
+        if head + pad + size - tail > capacity:
+            return False
+        if pad:
+            _LEN.pack_into(buf, _HEADER_SIZE + pos, _WRAP)
+            pos = 0
+        start = _HEADER_SIZE + pos
+        _LEN.pack_into(buf, start, len(data))
+        buf[start + _LEN.size:start + _LEN.size + len(data)] = data
+        _U64.pack_into(buf, _HEAD, head + pad + size)
+        return True
+
+    def read(self, limit: Optional[int] = None) -> List[bytes]:
+        """Remove and return up to ``limit`` records"""
+        buf, capacity = self.buf, self.capacity
+        head = _U64.unpack_from(buf, _HEAD)[0]
+        tail = _U64.unpack_from(buf, _TAIL)[0]
+        records: List[bytes] = []
+        while tail < head and (limit is None or len(records) < limit):
+            pos = tail % capacity
+            length = _LEN.unpack_from(buf, _HEADER_SIZE + pos)[0]
+            if length == _WRAP:
+                tail += capacity - pos
+                continue
+            start = _HEADER_SIZE + pos + _LEN.size
+            records.append(bytes(buf[start:start + length]))
+            tail += _aligned(_LEN.size + length)
+        _U64.pack_into(buf, _TAIL, tail)
+        return records
+
+    def mark_closed(self):
+        if self.buf is not None:
+            _U64.pack_into(self.buf, _CLOSED, 1)
+
+    def release(self):
+        """Unmap the segment; the creator also removes it"""
+        if self.buf is None:
+            return
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class _Wakeup:
+    """Named pipe the producer of a ring writes a byte to after appending records"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # 读写方式打开，不必等待另一端，也不会因另一端关闭而读到EOF
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+
+    def notify(self):
+        try:
+            os.write(self.fd, b"\0")
+        except BlockingIOError:
+            # 管道已满，读方必然还会被唤醒
+            pass
+
+    def drain(self):
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _ShmSession(ABC):
+    """
+    One direction pair of rings between two processes.
+
+    Outgoing records are queued and written in one batch per event loop
+    iteration, followed by a single wakeup byte. Incoming records are read
+    when the peer's wakeup byte makes the pipe readable. The session closes
+    when the peer marks its ring closed or its process exits.
+    """
+
+    def __init__(self, outgoing: _Ring, incoming: _Ring, notify: _Wakeup, wakeup: _Wakeup, peer_pid: int):
+        self.outgoing = outgoing
+        self.incoming = incoming
+        self.notify = notify
+        self.wakeup = wakeup
+        self.peer_pid = peer_pid
+        self.closed = False
+        self._outbox: deque = deque()
+        self._flush_scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watchdog: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.wakeup.fd, self._on_wakeup)
+        self._watchdog = asyncio.create_task(self._watch())
+        # 启动前对方可能已写入记录
+        self._on_wakeup()
+
+    def send(self, data: bytes):
+        self._outbox.append(data)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if self.closed:
+            return
+        written = False
+        while self._outbox and self.outgoing.write(self._outbox[0]):
+            self._outbox.popleft()
+            written = True
+        if written:
+            self.notify.notify()
+        if self._outbox:
+            # 环形缓冲区已满，等对方读取后重试
+            self._flush_scheduled = True
+            self._loop.call_later(0.0005, self._flush)
+
+    def _on_wakeup(self):
+        if self.closed:
+            return
+        self.wakeup.drain()
+        self._receive()
+        if self.incoming.closed:
+            self.close(ConnectionError("Peer closed the shared memory session"))
+
+    @abstractmethod
+    def _receive(self):
+        """Handle the records the peer has written to the incoming ring"""
+
+    async def _watch(self):
+        while not self.closed:
+            await asyncio.sleep(1.0)
+            if not _pid_alive(self.peer_pid):
+                self.close(ConnectionError(f"Process {self.peer_pid} at the other end of the session exited"))
+
+    def _on_close(self, error: Exception):
+        pass
+
+    def close(self, error: Optional[Exception] = None):
+        """Mark the session closed for the peer and release the rings"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._loop is not None:
+            self._loop.remove_reader(self.wakeup.fd)
+        if self._watchdog is not None and self._watchdog is not asyncio.current_task():
+            self._watchdog.cancel()
+        self.outgoing.mark_closed()
+        self.notify.notify()
+        self._on_close(error or ConnectionError("Shared memory session closed"))
+        self._outbox.clear()
+        for ring in (self.outgoing, self.incoming):
+            ring.release()
+        for pipe in (self.notify, self.wakeup):
+            pipe.close()
+
+
+class _ShmClient(_ShmSession):
+    """Calling side: requests go out on one ring, responses come back on the other"""
+
+    def __init__(self, address: str, port: int, max_in_flight: int, fifo_dir: str, *args):
+        super().__init__(*args)
+        self.address = address
+        self.port = port
+        self.fifo_dir = fifo_dir
+        self._credits = asyncio.Semaphore(max_in_flight)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    def _receive(self):
+        agent_pb2, _ = _proto_modules()
+        for data in self.incoming.read():
+            envelope = agent_pb2.Envelope.FromString(data)
+            future = self._pending.pop(envelope.correlation_id, None)
+            if future is not None and not future.done():
+                future.set_result(envelope)
+
+    async def request(self, method: str, request, timeout: Optional[float] = None):
+        """Send a request and wait for its response"""
+        agent_pb2, _ = _proto_modules()
+        _, response_type = _method_types(method)
+        async with self._credits:
+            if self.closed:
+                raise _SessionClosed(ConnectionError(f"Shared memory session to {self.address}:{self.port} closed"))
+            correlation_id = next(self._ids)
+            data = agent_pb2.Envelope(
+                correlation_id=correlation_id,
+                method=method,
+                payload=request.SerializeToString()
+            ).SerializeToString()
+            if len(data) > self.outgoing.max_record:
+                raise ShmUnavailable(f"{method} request of {len(data)} bytes exceeds the ring record limit")
+            future = asyncio.get_running_loop().create_future()
+            self._pending[correlation_id] = future
+            self.send(data)
+            try:
+                envelope = await asyncio.wait_for(future, timeout=timeout)
+            finally:
+                self._pending.pop(correlation_id, None)
+
+        if envelope.status_code:
+            raise _rpc_error(_STATUS_BY_VALUE.get(envelope.status_code, grpc.StatusCode.UNKNOWN), envelope.error)
+        return response_type.FromString(envelope.payload)
+
+    def _on_close(self, error: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(_SessionClosed(error))
+        self._pending.clear()
+
+    def close(self, error: Optional[Exception] = None):
+        super().close(error)
+        shutil.rmtree(self.fifo_dir, ignore_errors=True)
+
+
+class _ShmServer(_ShmSession):
+    """Serving side: dispatches request envelopes to the servicer like a Channel stream"""
+
+    def __init__(self, servicer, max_concurrency: int, *args):
+        super().__init__(*args)
+        self.servicer = servicer
+        self.max_concurrency = max_concurrency
+        self._active = 0
+        self._handlers: Set[asyncio.Task] = set()
+
+    def _receive(self):
+        agent_pb2, _ = _proto_modules()
+        # 超过并发上限时暂不读取，请求留在环中，写满后对方停止发送
+        while self._active < self.max_concurrency:
+            records = self.incoming.read(limit=self.max_concurrency - self._active)
+            if not records:
+                break
+            for data in records:
+                self._active += 1
+                task = asyncio.create_task(self._handle(agent_pb2.Envelope.FromString(data)))
+                self._handlers.add(task)
+                task.add_done_callback(self._handlers.discard)
+
+    async def _handle(self, envelope):
+        try:
+            reply = await dispatch_envelope(self.servicer, envelope, _EnvelopeContext(peer=f"shm:{self.peer_pid}"))
+            data = reply.SerializeToString()
+            if len(data) > self.outgoing.max_record:
+                reply.Clear()
+                reply.correlation_id = envelope.correlation_id
+                reply.method = envelope.method
+                reply.status_code = grpc.StatusCode.RESOURCE_EXHAUSTED.value[0]
+                reply.error = f"{envelope.method} response of {len(data)} bytes exceeds the ring record limit"
+                data = reply.SerializeToString()
+            if not self.closed:
+                self.send(data)
+        finally:
+            saturated = self._active >= self.max_concurrency
+            self._active -= 1
+            if saturated and not self.closed:
+                self._receive()
+
+    def _on_close(self, error: Exception):
+        for task in list(self._handlers):
+            task.cancel()
+
+
+class ShmTransport:
+    """
+    同机节点间的共享内存传输，每对节点之间一对环形缓冲区（每个方向一个）。
+
+    ``ShardedConnectionManager.with_stub`` tries this transport before the
+    stream transport for destinations on the same host: Unix domain socket
+    and loopback addresses, or an address of this host. The caller creates
+    the rings and their wakeup pipes and hands their names to the
+    destination with ``OpenSharedMemory``; a destination that does not
+    implement it, or cannot attach to the segments, is remembered and served
+    with the other transports from then on. Messages are the same envelopes
+    a Channel stream carries, so events keep their compact encoding.
+    """
+
+    def __init__(self, enabled: bool = False, ring_size: int = 8 * 1024 * 1024, max_in_flight: int = 256):
+        self.enabled = enabled
+        self.ring_size = ring_size
+        self.max_in_flight = max_in_flight
+        self.node_id = ""
+        self._clients: Dict[Tuple[str, int], _ShmClient] = {}
+        self._servers: Set[_ShmServer] = set()
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        self._unsupported: Set[Tuple[str, int]] = set()
+        self._local_addresses: Optional[Set[str]] = None
+
+    def configure(self, enabled: Optional[bool] = None, ring_size: Optional[int] = None,
+                  max_in_flight: Optional[int] = None, node_id: Optional[str] = None):
+        """
+        Update the transport settings.
+
+        Args:
+            enabled: Whether to send calls to nodes on this host over shared memory.
+            ring_size: Bytes of each ring; a message may use at most half of it.
+            max_in_flight: Maximum outstanding requests per peer.
+            node_id: ID of this node, sent in the handshake.
+        """
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if ring_size is not None:
+            if ring_size < 4096:
+                raise ValueError(f"shm ring_size must be at least 4096 bytes, got {ring_size}")
+            self.ring_size = int(ring_size)
+        if max_in_flight is not None:
+            self.max_in_flight = max(int(max_in_flight), 1)
+        if node_id is not None:
+            self.node_id = node_id
+
+    def _is_local(self, address: str) -> bool:
+        """Whether an address belongs to this host"""
+        if address.startswith("unix:"):
+            return True
+        host = address.strip("[]")
+        if host == "localhost":
+            return True
+        try:
+            if ipaddress.ip_address(host).is_loopback:
+                return True
+        except ValueError:
+            pass
+        if self._local_addresses is None:
+            self._local_addresses = set()
+            try:
+                name, aliases, addresses = socket.gethostbyname_ex(socket.gethostname())
+                self._local_addresses.update([name, *aliases, *addresses])
+            except OSError:
+                pass
+        return host in self._local_addresses
+
+    def can_use(self, address: str, port: int, stub_type, func: str) -> bool:
+        """Whether a call should go over shared memory to this destination"""
+        return (self.enabled
+                and getattr(stub_type, "__name__", "") == "AgentServiceStub"
+                and func not in _NOT_DISPATCHED
+                and (address, port) not in self._unsupported
+                and self._is_local(address))
+
+    async def _open(self, address: str, port: int) -> _ShmClient:
+        from onesim.distribution.connection_manager import connection_manager
+        agent_pb2, agent_pb2_grpc = _proto_modules()
+        fifo_dir = tempfile.mkdtemp(prefix="onesim-shm-")
+        rings: List[_Ring] = []
+        pipes: List[_Wakeup] = []
+        try:
+            rings = [_Ring.create(self.ring_size), _Ring.create(self.ring_size)]
+            for name in ("request", "response"):
+                path = os.path.join(fifo_dir, name)
+                os.mkfifo(path, 0o600)
+                pipes.append(_Wakeup(path))
+            channel = await connection_manager.get_channel(address, port)
+            response = await agent_pb2_grpc.AgentServiceStub(channel).OpenSharedMemory(
+                agent_pb2.ShmOpenRequest(
+                    node_id=self.node_id,
+                    request_ring=rings[0].name,
+                    response_ring=rings[1].name,
+                    request_wakeup=pipes[0].path,
+                    response_wakeup=pipes[1].path,
+                    pid=os.getpid()
+                ),
+                timeout=10.0
+            )
+            if not response.success:
+                logger.info(f"{address}:{port} cannot use shared memory ({response.error}), using gRPC")
+                self._unsupported.add((address, port))
+                raise ShmUnavailable(response.error)
+        except BaseException as e:
+            for ring in rings:
+                ring.release()
+            for pipe in pipes:
+                pipe.close()
+            shutil.rmtree(fifo_dir, ignore_errors=True)
+            if isinstance(e, grpc.aio.AioRpcError):
+                if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                    logger.info(f"{address}:{port} does not support shared memory, using gRPC")
+                    self._unsupported.add((address, port))
+                raise ShmUnavailable(str(e))
+            raise
+        client = _ShmClient(address, port, self.max_in_flight, fifo_dir,
+                            rings[0], rings[1], pipes[0], pipes[1], response.pid)
+        client.start()
+        logger.info(f"Opened shared memory transport to {address}:{port}")
+        return client
+
+    async def _get_client(self, address: str, port: int) -> _ShmClient:
+        key = (address, port)
+        client = self._clients.get(key)
+        if client is not None and not client.closed:
+            return client
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._unsupported:
+                raise ShmUnavailable(f"{address}:{port} does not support shared memory")
+            client = self._clients.get(key)
+            if client is None or client.closed:
+                client = await self._open(address, port)
+                self._clients[key] = client
+            return client
+
+    async def call(self, address: str, port: int, func: str, request, timeout: Optional[float] = None) -> Any:
+        """
+        Call an AgentService method over shared memory.
+
+        Raises:
+            ShmUnavailable: If the call has to use another transport; it was not sent.
+            grpc.aio.AioRpcError: If the call failed remotely or the session broke.
+        """
+        try:
+            client = await self._get_client(address, port)
+            return await client.request(func, request, timeout=timeout)
+        except _SessionClosed as e:
+            raise _rpc_error(grpc.StatusCode.UNAVAILABLE, str(e.error))
+
+    async def accept(self, servicer, request):
+        """
+        Attach to the rings offered by a node on this host and serve its calls.
+
+        Args:
+            servicer: The servicer whose methods handle the calls.
+            request: The ShmOpenRequest.
+
+        Returns:
+            ShmOpenResponse: Whether the session was set up.
+        """
+        agent_pb2, _ = _proto_modules()
+        if not self.enabled:
+            return agent_pb2.ShmOpenResponse(success=False, error="Shared memory transport is disabled")
+        rings: List[_Ring] = []
+        pipes: List[_Wakeup] = []
+        try:
+            rings = [_Ring.attach(request.request_ring), _Ring.attach(request.response_ring)]
+            pipes = [_Wakeup(request.request_wakeup), _Wakeup(request.response_wakeup)]
+        except (OSError, ValueError) as e:
+            # 不在同一主机（或无权访问），由对方改用gRPC
+            for ring in rings:
+                ring.release()
+            for pipe in pipes:
+                pipe.close()
+            return agent_pb2.ShmOpenResponse(success=False, error=f"Cannot attach to shared memory: {e}")
+        server = _ShmServer(servicer, self.max_in_flight, rings[1], rings[0], pipes[1], pipes[0], request.pid)
+        self._servers = {session for session in self._servers if not session.closed}
+        self._servers.add(server)
+        server.start()
+        logger.info(f"Serving {request.node_id or request.pid} over shared memory")
+        return agent_pb2.ShmOpenResponse(success=True, pid=os.getpid())
+
+    async def close(self):
+        """Close all sessions"""
+        sessions = list(self._clients.values()) + list(self._servers)
+        self._clients.clear()
+        self._servers.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                logger.warning(f"Error closing shared memory session: {e}")
+
+
+# 全局共享内存传输实例
+shm_transport = ShmTransport()
@@ -0,0 +1,140 @@
+import json
+import zlib
+from typing import Any, Dict, Optional, Set
+from loguru import logger
+
+# 增量中列出Worker已不再上报的顶层统计项
+REMOVED_KEY = "__removed__"
+
+
+class StatsReporter:
+    """
+    Worker端统计推送：每次只发送自上次确认以来变化的顶层统计项。
+
+    Each update carries a sequence number and the sequence of the update it
+    was diffed against. Updates are snapshots of the changed sections, not
+    increments, so a resent update cannot be counted twice. Sections are
+    compared by their JSON encoding, so the acknowledged state is a copy and
+    not the live dicts the trackers keep changing. Sections that disappeared
+    are listed under ``REMOVED_KEY``. The first update and any update after
+    the master asked for a resync are complete.
+    """
+
+    def __init__(self):
+        # 顶层统计项 -> 上次确认时的JSON编码
+        self._acked: Dict[str, str] = {}
+        self._acked_seq = 0
+        self._resync = True
+
+    def prepare(self, stats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Build the update for the current statistics.
+
+        Returns:
+            Optional[Dict[str, Any]]: seq, base, full and the zlib-compressed JSON delta,
+            None if nothing changed since the last acknowledged update
+        """
+        full = self._resync
+        encoded = {key: json.dumps(value, sort_keys=True, default=str) for key, value in stats.items()}
+        if full:
+            changed, removed = encoded, []
+        else:
+            changed = {key: value for key, value in encoded.items() if self._acked.get(key) != value}
+            removed = [key for key in self._acked if key not in encoded]
+        if not changed and not removed:
+            return None
+        parts = [f"{json.dumps(key)}:{value}" for key, value in changed.items()]
+        if removed:
+            parts.append(f"{json.dumps(REMOVED_KEY)}:{json.dumps(removed)}")
+        return {
+            "seq": self._acked_seq + 1,
+            "base": self._acked_seq,
+            "full": full,
+            "delta": zlib.compress(("{" + ",".join(parts) + "}").encode("utf-8")),
+            "encoded": encoded,
+        }
+
+    def acknowledge(self, update: Dict[str, Any]) -> None:
+        """The master applied the update"""
+        self._acked = update["encoded"]
+        self._acked_seq = update["seq"]
+        self._resync = False
+
+    def resync(self) -> None:
+        """The master lost track of this worker, send everything next time"""
+        self._resync = True
+
+
+class StatsAggregator:
+    """
+    Master端统计视图：保存各节点最近一次的统计，合并结果缓存到下次变化。
+
+    Workers push their updates with heartbeats. Reading the merged view
+    costs nothing while no update arrived since the last read, and a single
+    in-memory merge otherwise; no node is called.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._seqs: Dict[str, int] = {}
+        self._merged: Optional[Dict[str, Any]] = None
+        self.stats = {"updates": 0, "resyncs": 0, "bytes": 0}
+
+    def apply(self, node_id: str, seq: int, base: int, full: bool, delta: bytes) -> bool:
+        """
+        Apply an update pushed by a worker.
+
+        Returns:
+            bool: False if the update does not follow the last applied one and the
+            worker has to send everything
+        """
+        if not full and self._seqs.get(node_id) != base:
+            self.stats["resyncs"] += 1
+            return False
+        try:
+            changed = json.loads(zlib.decompress(delta))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Invalid stats update from {node_id}: {e}")
+            self.stats["resyncs"] += 1
+            return False
+        removed = changed.pop(REMOVED_KEY, ())
+        snapshot = {} if full else dict(self._snapshots.get(node_id, {}))
+        snapshot.update(changed)
+        for key in removed:
+            snapshot.pop(key, None)
+        self._snapshots[node_id] = snapshot
+        self._seqs[node_id] = seq
+        self._merged = None
+        self.stats["updates"] += 1
+        self.stats["bytes"] += len(delta)
+        return True
+
+    def set(self, node_id: str, stats: Dict[str, Any]) -> None:
+        """Store statistics read directly, such as the master's own"""
+        if self._snapshots.get(node_id) != stats:
+            self._snapshots[node_id] = stats
+            self._merged = None
+
+    def is_pushing(self, node_id: str) -> bool:
+        """Whether the node pushes its statistics"""
+        return node_id in self._seqs
+
+    def remove(self, node_id: str) -> None:
+        """Forget a node that left"""
+        self._seqs.pop(node_id, None)
+        if self._snapshots.pop(node_id, None) is not None:
+            self._merged = None
+
+    def merged(self) -> Dict[str, Any]:
+        """Merged statistics of all nodes, see ``merge_usage_stats``"""
+        if self._merged is None:
+            from onesim.models.utils.token_usage import merge_usage_stats
+            self._merged = merge_usage_stats(self._snapshots)
+        return self._merged
+
+
+# 全局统计推送实例（worker）
+stats_reporter = StatsReporter()
+
+# 全局统计聚合实例（master）
+stats_aggregator = StatsAggregator()
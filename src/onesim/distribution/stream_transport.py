@@ -0,0 +1,346 @@
+import asyncio
+import itertools
+from typing import Any, Dict, Optional, Set, Tuple
+import grpc
+from loguru import logger
+
+# grpc状态码数值 -> StatusCode
+_STATUS_BY_VALUE = {code.value[0]: code for code in grpc.StatusCode}
+
+
+def _proto_modules():
+    from onesim.distribution.grpc_impl import agent_pb2, agent_pb2_grpc
+    return agent_pb2, agent_pb2_grpc
+
+
+def _method_types(method: str):
+    """Return the request and response message classes of an AgentService method"""
+    agent_pb2, _ = _proto_modules()
+    descriptor = agent_pb2.DESCRIPTOR.services_by_name["AgentService"].methods_by_name[method]
+    return getattr(agent_pb2, descriptor.input_type.name), getattr(agent_pb2, descriptor.output_type.name)
+
+
+def _rpc_error(code: grpc.StatusCode, details: str) -> grpc.aio.AioRpcError:
+    return grpc.aio.AioRpcError(code, grpc.aio.Metadata(), grpc.aio.Metadata(), details)
+
+
+# Streaming methods and methods that set up a transport, which cannot be called through one
+_NOT_DISPATCHED = frozenset(["Channel", "OpenSharedMemory", "CreateAgentsStream"])
+
+
+class StreamUnavailable(Exception):
+    """The destination does not serve the Channel stream, use unary RPCs instead"""
+
+
+class _StreamClosed(Exception):
+    """The stream ended while a request was waiting for its response"""
+
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+
+
+class _StreamClient:
+    """
+    One long-lived Channel stream to a destination node.
+
+    Requests are tagged with a correlation ID and written to the stream;
+    a reader task matches responses to waiting callers. At most
+    ``max_in_flight`` requests are outstanding, which bounds the memory held
+    for a slow destination and lets HTTP/2 flow control push back on callers.
+    """
+
+    def __init__(self, address: str, port: int, max_in_flight: int):
+        self.address = address
+        self.port = port
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._credits = asyncio.Semaphore(max_in_flight)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._call = None
+        self._reader: Optional[asyncio.Task] = None
+        self.closed = False
+
+    async def open(self):
+        from onesim.distribution.connection_manager import connection_manager
+        _, agent_pb2_grpc = _proto_modules()
+        channel = await connection_manager.get_channel(self.address, self.port)
+        self._call = agent_pb2_grpc.AgentServiceStub(channel).Channel(self._outgoing())
+        # 等待服务端响应头，确认对方支持Channel后再发送请求
+        try:
+            await self._call.initial_metadata()
+            if self._call.done():
+                raise _rpc_error(await self._call.code(), await self._call.details())
+        except BaseException as e:
+            self.closed = True
+            self._outbox.put_nowait(None)
+            self._call.cancel()
+            if isinstance(e, grpc.aio.AioRpcError):
+                raise _StreamClosed(e)
+            raise
+        self._reader = asyncio.create_task(self._read())
+
+    async def _outgoing(self):
+        while True:
+            envelope = await self._outbox.get()
+            if envelope is None:
+                return
+            yield envelope
+
+    async def _read(self):
+        error: Exception = ConnectionError(f"Stream to {self.address}:{self.port} closed")
+        try:
+            async for envelope in self._call:
+                future = self._pending.pop(envelope.correlation_id, None)
+                if future is not None and not future.done():
+                    future.set_result(envelope)
+        except asyncio.CancelledError:
+            pass
+        except grpc.aio.AioRpcError as e:
+            error = e
+        except Exception as e:
+            error = e
+        finally:
+            self.closed = True
+            self._outbox.put_nowait(None)
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(_StreamClosed(error))
+            self._pending.clear()
+
+    async def request(self, method: str, request, timeout: Optional[float] = None):
+        """Send a request over the stream and wait for its response"""
+        agent_pb2, _ = _proto_modules()
+        _, response_type = _method_types(method)
+        async with self._credits:
+            if self.closed:
+                raise _StreamClosed(ConnectionError(f"Stream to {self.address}:{self.port} closed"))
+            correlation_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[correlation_id] = future
+            self._outbox.put_nowait(agent_pb2.Envelope(
+                correlation_id=correlation_id,
+                method=method,
+                payload=request.SerializeToString()
+            ))
+            try:
+                envelope = await asyncio.wait_for(future, timeout=timeout)
+            finally:
+                self._pending.pop(correlation_id, None)
+
+        if envelope.status_code:
+            raise _rpc_error(_STATUS_BY_VALUE.get(envelope.status_code, grpc.StatusCode.UNKNOWN), envelope.error)
+        return response_type.FromString(envelope.payload)
+
+    async def close(self):
+        self._outbox.put_nowait(None)
+        if self._reader and not self._reader.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._reader), timeout=1.0)
+            except (asyncio.TimeoutError, Exception):
+                self._reader.cancel()
+        if self._call is not None:
+            self._call.cancel()
+
+
+class StreamTransport:
+    """
+    节点间双向流传输，每对节点之间维持一条Channel流，复用所有一元RPC。
+
+    ``ShardedConnectionManager.with_stub`` sends AgentService calls through
+    this transport when it is enabled, keeping its retry and circuit breaker
+    handling. A destination that does not implement Channel is remembered and
+    served with the original unary RPCs from then on; a broken stream is
+    reopened on the next call.
+    """
+
+    def __init__(self, enabled: bool = True, max_in_flight: int = 256):
+        self.enabled = enabled
+        self.max_in_flight = max_in_flight
+        self._clients: Dict[Tuple[str, int], _StreamClient] = {}
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        self._unsupported: Set[Tuple[str, int]] = set()
+
+    def configure(self, enabled: Optional[bool] = None, max_in_flight: Optional[int] = None):
+        """
+        Update the transport settings.
+
+        Args:
+            enabled: Whether to send calls over streams.
+            max_in_flight: Maximum outstanding requests per stream.
+        """
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if max_in_flight is not None:
+            self.max_in_flight = max(int(max_in_flight), 1)
+
+    def can_stream(self, address: str, port: int, stub_type, func: str) -> bool:
+        """Whether a call should go over the stream to this destination"""
+        return (self.enabled
+                and getattr(stub_type, "__name__", "") == "AgentServiceStub"
+                and func not in _NOT_DISPATCHED
+                and (address, port) not in self._unsupported)
+
+    async def _get_client(self, address: str, port: int) -> _StreamClient:
+        key = (address, port)
+        client = self._clients.get(key)
+        if client is not None and not client.closed:
+            return client
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._unsupported:
+                raise StreamUnavailable(f"{address}:{port} does not support streaming")
+            client = self._clients.get(key)
+            if client is None or client.closed:
+                client = _StreamClient(address, port, self.max_in_flight)
+                await client.open()
+                self._clients[key] = client
+            return client
+
+    async def call(self, address: str, port: int, func: str, request, timeout: Optional[float] = None) -> Any:
+        """
+        Call an AgentService method over the stream to a destination.
+
+        Raises:
+            StreamUnavailable: If the destination does not implement Channel.
+            grpc.aio.AioRpcError: If the call failed remotely or the stream broke.
+        """
+        try:
+            client = await self._get_client(address, port)
+            return await client.request(func, request, timeout=timeout)
+        except _StreamClosed as e:
+            error = e.error
+            if isinstance(error, grpc.aio.AioRpcError) and error.code() == grpc.StatusCode.UNIMPLEMENTED:
+                logger.warning(f"{address}:{port} does not support streaming, falling back to unary RPCs")
+                self._unsupported.add((address, port))
+                raise StreamUnavailable(str(error))
+            if isinstance(error, grpc.aio.AioRpcError):
+                raise error
+            raise _rpc_error(grpc.StatusCode.UNAVAILABLE, str(error))
+
+    async def close(self):
+        """Close all streams"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing stream to {client.address}:{client.port}: {e}")
+
+
+class _EnvelopeContext:
+    """Per-message servicer context for calls received as envelopes"""
+
+    def __init__(self, stream_context=None, peer: str = ""):
+        self._stream_context = stream_context
+        self._peer = peer
+        self.code = grpc.StatusCode.OK
+        self.details = ""
+
+    def peer(self):
+        return self._stream_context.peer() if self._stream_context is not None else self._peer
+
+    def invocation_metadata(self):
+        return self._stream_context.invocation_metadata() if self._stream_context is not None else ()
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+    async def abort(self, code, details=""):
+        self.code, self.details = code, details
+        raise _rpc_error(code, details)
+
+    def add_done_callback(self, callback):
+        pass
+
+    def time_remaining(self):
+        return None
+
+
+async def dispatch_envelope(servicer, envelope, method_context: _EnvelopeContext):
+    """
+    Call the servicer's unary method named by a request envelope.
+
+    Returns:
+        The response envelope, carrying the serialized response or the error status
+    """
+    agent_pb2, _ = _proto_modules()
+    reply = agent_pb2.Envelope(correlation_id=envelope.correlation_id, method=envelope.method)
+    try:
+        if envelope.method in _NOT_DISPATCHED:
+            raise NotImplementedError(f"{envelope.method} cannot be called over another transport")
+        request_type, _ = _method_types(envelope.method)
+        handler = getattr(servicer, envelope.method)
+        response = await handler(request_type.FromString(envelope.payload), method_context)
+        if method_context.code != grpc.StatusCode.OK:
+            reply.status_code = method_context.code.value[0]
+            reply.error = method_context.details
+        else:
+            reply.payload = response.SerializeToString()
+    except (KeyError, NotImplementedError) as e:
+        reply.status_code = grpc.StatusCode.UNIMPLEMENTED.value[0]
+        reply.error = f"Method {envelope.method} not implemented: {e}"
+    except grpc.aio.AioRpcError as e:
+        reply.status_code = e.code().value[0]
+        reply.error = e.details() or ""
+    except Exception as e:
+        logger.error(f"Error handling {envelope.method} envelope: {e}")
+        reply.status_code = grpc.StatusCode.UNKNOWN.value[0]
+        reply.error = str(e)
+    return reply
+
+
+async def serve_channel(servicer, request_iterator, context, max_concurrency: int = 256):
+    """
+    Serve a Channel stream by dispatching each request envelope to the
+    servicer's unary method of the same name.
+
+    Up to ``max_concurrency`` requests are handled at a time; beyond that
+    the stream is not read, so flow control pushes back on the sender.
+    Responses are written as they complete, tagged with the request's
+    correlation ID.
+    """
+    # 立即发送响应头，客户端据此确认流已建立
+    await context.send_initial_metadata(())
+    replies: asyncio.Queue = asyncio.Queue()
+    slots = asyncio.Semaphore(max_concurrency)
+    handlers = set()
+
+    async def handle(envelope):
+        try:
+            reply = await dispatch_envelope(servicer, envelope, _EnvelopeContext(context))
+        finally:
+            slots.release()
+        replies.put_nowait(reply)
+
+    async def pump():
+        try:
+            async for envelope in request_iterator:
+                await slots.acquire()
+                task = asyncio.create_task(handle(envelope))
+                handlers.add(task)
+                task.add_done_callback(handlers.discard)
+            if handlers:
+                await asyncio.gather(*handlers, return_exceptions=True)
+        finally:
+            replies.put_nowait(None)
+
+    reader = asyncio.create_task(pump())
+    try:
+        while True:
+            reply = await replies.get()
+            if reply is None:
+                break
+            yield reply
+    finally:
+        reader.cancel()
+        for task in list(handlers):
+            task.cancel()
+
+
+# 全局流传输实例
+stream_transport = StreamTransport()
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 import uuid
 from loguru import logger
 import importlib.util
@@ -14,9 +14,21 @@ from onesim.planning import PlanningBase
 from onesim.models.core.model_manager import ModelManager
 from onesim.distribution import grpc_impl # Assuming grpc_impl will be fixed
 from onesim.distribution.node import get_node
-from onesim.distribution.distributed_lock import  get_lock
+from onesim.distribution.distributed_lock import  get_lock, lock_service
+from onesim.distribution.routing_table import RoutingTable
+from onesim.distribution.migration import AgentForwarder, agent_load_monitor, export_agent_state
+from onesim.distribution.env_cache import env_data_replica
+from onesim.distribution.batch_processor import batch_processor
+from onesim.distribution.event_batcher import event_batcher
+from onesim.distribution.stats_push import stats_reporter
+from onesim.agent.executor import agent_executor
+from onesim.utils.runtime_stats import runtime_stats
 import time
 
+# Worker上的队列深度是计量值，合并时取最大值
+runtime_stats.register("queues", gauges=("outgoing_events", "storage"))
+
+
 class WorkerNode(Node):
     """Worker node for hosting agents in a distributed setup"""
 
@@ -39,9 +51,27 @@ class WorkerNode(Node):
         self.heartbeat_max_retries = config.get("heartbeat_max_retries", 5)
         self.heartbeat_backoff_factor = config.get("heartbeat_backoff_factor", 2.0)
         self.heartbeat_max_interval = config.get("heartbeat_max_interval", 600)
+        # 统计随心跳推送的间隔（秒），0表示由Master拉取
+        self.stats_push_interval = config.get("stats_push_interval", 1.0) or 0.0
+        self._stats_task = None
         self.agent_location_cache: Dict[str, Tuple[str, int, float]] = {} # agent_id -> (worker_addr, worker_port, timestamp)
         self.agent_location_cache_ttl = config.get("agent_location_cache_ttl", 300) # 5 minutes TTL
+        self.routing_table = RoutingTable() # 由master推送的全量路由表，未命中时才查询master
+        runtime_stats.register("routing", self.routing_table.get_stats)
+        runtime_stats.register("queues", lambda: {
+            "outgoing_events": sum(dest["pending"] for dest in event_batcher.get_stats().values()),
+            "storage": batch_processor.backlog
+        })
         self.servicer_instance = None # Will hold the WorkerServicer instance
+        self.proxy_env = None # 由main创建的ProxyEnv，迁入的Agent也使用它
+        # Agent运行任务和迁移状态
+        self._agent_configs: Dict[str, Dict[str, Any]] = {} # agent_id -> 创建配置，迁移时随状态发送
+        self._schemas: Dict[str, AgentSchema] = {} # agent_type -> 同类Agent共用的Schema
+        self._agent_tasks: Dict[str, asyncio.Task] = {}
+        self._agents_running = False
+        self._agent_finished = asyncio.Event() # 有Agent自行结束（非迁移取消）或Worker关闭时置位
+        self._forwarders: Dict[str, AgentForwarder] = {} # 迁移中或已迁出、新路由尚未生效的Agent
+        self._forward_tasks: Set[asyncio.Task] = set() # 已移除的转发器仍在发送的任务
         # Stopped signal for graceful shutdown coordination
         self.stopped_event = asyncio.Event()
 
@@ -58,14 +88,19 @@ class WorkerNode(Node):
 
         # Start gRPC server for receiving events
         if self._grpc_module:
-            self._server = await self._grpc_module.create_worker_server(self, self.listen_port)
+            self._server = await self._grpc_module.create_worker_server(self, self.listen_port, self.worker_address)
             logger.info(f"Worker server started on port {self.listen_port}")
 
             # Connect to master
             asyncio.create_task(self._connect_to_master())
 
+            # 重试后仍无法送达的事件重新查找目标Agent所在的Worker
+            event_batcher.set_failure_handler(self._redeliver_events)
+
             # Start heartbeat
             self._heartbeat_task = asyncio.create_task(self._send_heartbeat())
+            if self.stats_push_interval > 0:
+                self._stats_task = asyncio.create_task(self._push_stats())
 
     async def _connect_to_master(self):
         """Connect to the master node with retry mechanism"""
@@ -143,6 +178,31 @@ class WorkerNode(Node):
         except Exception as e:
             logger.error(f"Error sending initial heartbeat: {e}")
 
+    async def _push_stats(self):
+        """定期随心跳推送变化的统计，Master据此维护合并视图而无需逐个拉取"""
+        while True:
+            await asyncio.sleep(self.stats_push_interval)
+            if not self._registered:
+                continue
+            try:
+                update = stats_reporter.prepare(await self.get_token_usage())
+                if update is None:
+                    continue
+                applied = await self._grpc_module.push_stats_to_master(
+                    self.master_address,
+                    self.master_port,
+                    self.node_id,
+                    update
+                )
+                if applied:
+                    stats_reporter.acknowledge(update)
+                elif applied is False:
+                    stats_reporter.resync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error pushing stats: {e}")
+
     async def _send_heartbeat(self):
         """Send periodic heartbeat to master with exponential backoff on failure"""
         if not self._grpc_module:
@@ -201,7 +261,11 @@ class WorkerNode(Node):
                 await asyncio.sleep(5)
 
     async def _get_agent_location(self, agent_id: str) -> Optional[Tuple[str, int]]:
-        """Get worker location for an agent, using cache or querying master."""
+        """Get worker location for an agent, using the pushed routing table, cache or querying master."""
+        location = self.routing_table.lookup(agent_id)
+        if location is not None:
+            return location
+
         # Check cache first
         if agent_id in self.agent_location_cache:
             addr, port, ts = self.agent_location_cache[agent_id]
@@ -231,6 +295,23 @@ class WorkerNode(Node):
             logger.warning("Cannot query agent location: Worker not registered or gRPC module not available.")
             return None
 
+    async def _redeliver_events(self, address: str, port: int, proto_events: List, error: Exception):
+        """
+        Re-route events the batcher could not deliver to ``address:port``, in case their
+        agents have moved. Events whose agents are still located there are reported lost.
+        """
+        lost = 0
+        for proto_event in proto_events:
+            agent_id = proto_event.to_agent_id
+            self.agent_location_cache.pop(agent_id, None)
+            location = await self._get_agent_location(agent_id)
+            if location is None or tuple(location) == (address, port):
+                lost += 1
+                continue
+            await event_batcher.send(location[0], location[1], proto_event)
+        if lost:
+            logger.error(f"{lost} events for agents on {address}:{port} could not be delivered: {error}")
+
     async def handle_event(self, event: Event):
         """Handle an event received from the master or another worker."""
         logger.info(f"worker {self.node_id} handle_event: {event}")
@@ -247,6 +328,13 @@ class WorkerNode(Node):
         event_bus = get_event_bus()
         await event_bus.dispatch_event(event)
 
+    async def handle_events(self, events: List[Event]):
+        """Dispatch a batch of events received from another node, in order."""
+        logger.debug(f"worker {self.node_id} handle_events: {len(events)} events")
+        event_bus = get_event_bus()
+        for event in events:
+            await event_bus.dispatch_event(event)
+
     def find_worker_for_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """
         Find worker information for an agent, only returning self if agent is local.
@@ -278,7 +366,9 @@ class WorkerNode(Node):
         """
         try:
             from onesim.models.utils.token_usage import get_token_usage_stats
-            return get_token_usage_stats()
+            stats = get_token_usage_stats()
+            stats["runtime"] = runtime_stats.collect()
+            return stats
         except ImportError:
             logger.warning("Token usage module not available")
             return {
@@ -307,6 +397,40 @@ class WorkerNode(Node):
         self.agents_created.set()
         return created_agent_ids
 
+    async def create_agents_chunk(self, agent_configs: List[Dict[str, Any]],
+                                  agent_classes: Dict[str, Any]) -> List[str]:
+        """
+        Create the agents of one chunk of a streamed creation.
+
+        Yields to the event loop between agents, so heartbeats and the next
+        chunk are handled while a large population is being built.
+
+        Args:
+            agent_configs: Full configs of the agents in the chunk
+            agent_classes: Agent classes loaded by earlier chunks of the same stream, by type
+
+        Returns:
+            List[str]: IDs of the created agents
+        """
+        if not agent_configs:
+            return []
+        if self.env_path is None:
+            self._set_env_path(agent_configs[0])
+        event_bus = get_event_bus()
+        created_agent_ids = []
+        for i, config in enumerate(agent_configs):
+            agent_type = config["type"]
+            if agent_type not in agent_classes:
+                agent_classes[agent_type] = self.load_agent_module_from_file(agent_type)
+            agent_id = config["id"]
+            agent = self._build_agent(agent_classes[agent_type], config)
+            self._add_local_agent(agent_id, agent, config)
+            event_bus.register_agent(agent_id, agent)
+            created_agent_ids.append(agent_id)
+            if i % 16 == 15:
+                await asyncio.sleep(0)
+        return created_agent_ids
+
     async def handle_termination_signal(self, reason: str = "unknown") -> bool:
         """处理来自主节点的终止信号"""
         logger.info(f"Worker {self.node_id} received termination signal: {reason}")
@@ -323,6 +447,15 @@ class WorkerNode(Node):
         # 取消心跳任务
         if self._heartbeat_task and not self._heartbeat_task.done():
             self._heartbeat_task.cancel()
+        if self._stats_task and not self._stats_task.done():
+            self._stats_task.cancel()
+
+        # 结束run_agents，迁空后被停止的Worker上没有会自行结束的Agent
+        self._agent_finished.set()
+
+        # 先发送转发给已迁出Agent的事件，再由父类停止事件批处理器
+        await asyncio.gather(*(forwarder.flush() for forwarder in self._forwarders.values()),
+                             *self._forward_tasks, return_exceptions=True)
 
         # 关闭批处理器
         from onesim.distribution.batch_processor import batch_processor
@@ -341,7 +474,8 @@ class WorkerNode(Node):
 
         logger.info(f"Worker node {self.node_id} shutdown complete")
 
-    def load_memory(self, memory_config, model_config_name: str) -> MemoryStrategy:
+    def load_memory(self, memory_config, model_config_name: str,
+                    model_routes: Optional[Dict[str, str]] = None) -> MemoryStrategy:
         """Create memory strategy instance"""
         strategy_class_name = memory_config["strategy"]
         try:
@@ -349,6 +483,7 @@ class WorkerNode(Node):
             memory_module = importlib.import_module("onesim.memory")
             MemoryClass = getattr(memory_module, strategy_class_name)
             # Initialize memory instance
+            memory_config = {**memory_config, "model_routes": model_routes or {}}
             memory_instance = MemoryClass(memory_config,model_config_name)
             return memory_instance
         except ImportError as e:
@@ -397,8 +532,7 @@ class WorkerNode(Node):
 
     def create_local_agents(self, agent_configs: List[Dict]) -> None:
         """Create local agent instances with pre-configured relationships"""
-        env_name= agent_configs[0]["env"].split(os.sep)[-1]
-        self.env_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'..', "envs", env_name)
+        self._set_env_path(agent_configs[0])
         # Group configurations by agent type
         event_bus = get_event_bus()
         created_agent_ids = []
@@ -417,49 +551,257 @@ class WorkerNode(Node):
             # Create each agent instance
             for config in tqdm(configs):
                 agent_id = config["id"]
-                # Create profile instance from saved data
-                profile = AgentProfile(
-                    agent_type, 
-                    AgentSchema(config["schema"]), 
-                    profile_data=config["profile_data"]
-                )
-                profile.set_agent_profile_id(agent_id)
-                # Create relationship manager and add relationships
-                rm = RelationshipManager(profile_id=agent_id)
-                # Add pre-loaded relationships if present
-                if "relationships" in config:
-                    for relationship in config["relationships"]:
-                        rm.add_relationship(
-                            target_id=relationship["target_id"],
-                            description=relationship["description"],
-                            target_info=relationship["target_info"]
-                        )
-
-                # Create memory instance
-                memory_config = config.get("memory_config")
-                memory_instance = self.load_memory(memory_config, self.model_config_name)
-                planning_instance = self.load_planning(config["planning_config"], self.model_config_name,config["sys_prompt"])
-                # Create agent instance
-                agent = AgentClass(
-                    #name=config["name"],
-                    profile=profile,
-                    sys_prompt=config["sys_prompt"],
-                    model_config_name=self.model_config_name,
-                    memory=memory_instance,
-                    planning=planning_instance,
-                    event_bus_queue=get_event_bus().queue,
-                    relationship_manager=rm
-                )
+                agent = self._build_agent(AgentClass, config)
 
                 # Store the agent in our dictionaries
-                if agent_type not in self.agents:
-                    self.agents[agent_type] = {}
-                self.agents[agent_type][agent_id] = agent
-                self.profile_id2agent[agent_id] = agent
+                self._add_local_agent(agent_id, agent, config)
                 created_agent_ids.append(agent_id)
                 event_bus.register_agent(agent_id, agent)
         return created_agent_ids
 
+    def _set_env_path(self, config: Dict[str, Any]) -> None:
+        env_name = config["env"].split(os.sep)[-1]
+        self.env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '..', "envs", env_name)
+
+    def _build_agent(self, AgentClass, config: Dict[str, Any]):
+        """Create one agent instance from its configuration"""
+        agent_type = config["type"]
+        agent_id = config["id"]
+        # 同类Agent共用一个Schema，Schema不同时（如迁入的Agent）才新建
+        schema = self._schemas.get(agent_type)
+        if schema is None or (schema.schema is not config["schema"] and schema.schema != config["schema"]):
+            schema = self._schemas[agent_type] = AgentSchema(config["schema"])
+        # Create profile instance from saved data
+        profile = AgentProfile(
+            agent_type, 
+            schema, 
+            profile_data=config["profile_data"]
+        )
+        profile.set_agent_profile_id(agent_id)
+        # Create relationship manager and add relationships
+        rm = RelationshipManager(profile_id=agent_id)
+        # Add pre-loaded relationships if present
+        if "relationships" in config:
+            for relationship in config["relationships"]:
+                rm.add_relationship(
+                    target_id=relationship["target_id"],
+                    description=relationship["description"],
+                    target_info=relationship["target_info"]
+                )
+
+        # Create memory instance
+        memory_config = config.get("memory_config")
+        model_routes = config.get("model_routes", {})
+        memory_instance = self.load_memory(memory_config, self.model_config_name, model_routes)
+        planning_instance = self.load_planning(config["planning_config"],
+                                               model_routes.get("planning", self.model_config_name),
+                                               config["sys_prompt"])
+        # Create agent instance
+        agent = AgentClass(
+            #name=config["name"],
+            profile=profile,
+            sys_prompt=config["sys_prompt"],
+            model_config_name=self.model_config_name,
+            memory=memory_instance,
+            planning=planning_instance,
+            event_bus_queue=get_event_bus().queue,
+            relationship_manager=rm
+        )
+        agent.set_model_routes(model_routes)
+        agent.set_prompt_budget(config.get("prompt_budget"))
+        return agent
+
+    def _add_local_agent(self, agent_id: str, agent, config: Dict[str, Any]) -> None:
+        agent_type = config["type"]
+        if agent_type not in self.agents:
+            self.agents[agent_type] = {}
+        self.agents[agent_type][agent_id] = agent
+        self.profile_id2agent[agent_id] = agent
+        self._agent_configs[agent_id] = config
+
+    async def run_agents(self):
+        """
+        Run all local agents, including agents migrated here later.
+
+        Returns once any agent stops on its own, e.g. after an EndEvent, or
+        the worker shuts down. Agents cancelled to migrate them do not count.
+        """
+        self._agents_running = True
+        executor_task = None
+        if agent_executor.enabled:
+            # 共享执行池处理所有本地Agent的事件，包括之后迁入的Agent
+            executor_task = asyncio.create_task(agent_executor.run())
+            executor_task.add_done_callback(lambda t: t.cancelled() or self._agent_finished.set())
+        for agent_id, agent in list(self.profile_id2agent.items()):
+            self._start_agent(agent_id, agent)
+        try:
+            await self._agent_finished.wait()
+        finally:
+            self._agents_running = False
+            if executor_task is not None:
+                executor_task.cancel()
+            for task in self._agent_tasks.values():
+                task.cancel()
+
+    def _start_agent(self, agent_id: str, agent) -> None:
+        if agent_executor.enabled:
+            return
+        task = asyncio.create_task(agent.run())
+        self._agent_tasks[agent_id] = task
+
+        def on_done(t: asyncio.Task):
+            if self._agent_tasks.get(agent_id) is t:
+                del self._agent_tasks[agent_id]
+            if not t.cancelled():
+                self._agent_finished.set()
+
+        task.add_done_callback(on_done)
+
+    async def get_agent_load(self, reset: bool = True) -> Dict[str, Any]:
+        """Per-agent message counts and handler time recorded since the last reset"""
+        return agent_load_monitor.snapshot(reset)
+
+    async def migrate_agent(self, agent_id: str, target_address: str, target_port: int,
+                            drain_timeout: float = 30.0) -> Tuple[bool, str]:
+        """
+        Move a local agent to another worker.
+
+        The agent stops taking events, which are buffered meanwhile, and its
+        running handlers are awaited. Its profile, relationships, memory and
+        queued events are then sent to the target worker; later events for
+        it are forwarded there. If any step fails the agent resumes here.
+
+        Args:
+            agent_id: ID of the local agent
+            target_address: Address of the target worker
+            target_port: Port of the target worker
+            drain_timeout: Seconds to wait for running handlers
+
+        Returns:
+            Tuple[bool, str]: Whether the agent moved, and the error if not
+        """
+        target = (target_address, target_port)
+        agent = self.profile_id2agent.get(agent_id)
+        if agent is None:
+            forwarder = self._forwarders.get(agent_id)
+            if forwarder is not None and forwarder.target == target:
+                return True, ""  # 重试的请求，Agent已迁移
+            return False, f"Agent {agent_id} is not hosted on worker {self.node_id}"
+
+        event_bus = get_event_bus()
+        forwarder = AgentForwarder(agent_id)
+        self._forwarders[agent_id] = forwarder
+        del self.profile_id2agent[agent_id]
+        event_bus.register_agent(agent_id, forwarder)
+
+        task = self._agent_tasks.pop(agent_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        queued = []
+        try:
+            if agent_executor.enabled:
+                queued = await agent_executor.drain_agent(agent, drain_timeout)
+            elif agent._active_tasks:
+                _, running = await asyncio.wait(set(agent._active_tasks), timeout=drain_timeout)
+                if running:
+                    raise TimeoutError(f"{len(running)} handlers still running after {drain_timeout}s")
+            while agent._queue is not None and not agent._queue.empty():
+                queued.append(agent._queue.get_nowait())
+                agent._queue.task_done()
+            state = await export_agent_state(agent, self._agent_configs[agent_id])
+            success, error = await grpc_impl.import_agent_on_worker(target_address, target_port, state, queued)
+        except Exception as e:
+            success, error = False, str(e)
+
+        if not success:
+            # 迁移失败，Agent在本地恢复运行
+            self.profile_id2agent[agent_id] = agent
+            event_bus.register_agent(agent_id, agent)
+            for event in queued + forwarder.pending:
+                agent.add_event(event)
+            del self._forwarders[agent_id]
+            if self._agents_running:
+                self._start_agent(agent_id, agent)
+            return False, error
+
+        async def forward(event: Event):
+            await grpc_impl.event_batcher.send(target_address, target_port, grpc_impl.event_to_proto(event))
+
+        forwarder.start_forwarding(target, forward)
+        config = self._agent_configs.pop(agent_id)
+        self.agents.get(config["type"], {}).pop(agent_id, None)
+        logger.info(f"Agent {agent_id} migrated from worker {self.node_id} to {target_address}:{target_port}")
+        return True, ""
+
+    def retire_forwarders(self) -> None:
+        """
+        Drop the forwarders of migrated agents the routing table now locates at their target.
+
+        Called after a routing update from the master is applied. Later events
+        for these agents are routed to the target worker like any remote
+        agent's; events still being forwarded are sent before shutdown.
+        """
+        for agent_id, forwarder in list(self._forwarders.items()):
+            if forwarder.target is None or self.routing_table.get(agent_id) != forwarder.target:
+                continue
+            del self._forwarders[agent_id]
+            task = forwarder.task
+            if task is not None:
+                self._forward_tasks.add(task)
+                task.add_done_callback(self._forward_tasks.discard)
+
+    async def import_agent(self, state: Dict[str, Any], pending_events: List[Event]) -> Tuple[bool, str]:
+        """
+        Host an agent migrated from another worker.
+
+        Args:
+            state: The agent state from ``export_agent_state``
+            pending_events: Events queued for the agent on the source worker
+
+        Returns:
+            Tuple[bool, str]: Whether the agent was created, and the error if not
+        """
+        agent_id = state["id"]
+        try:
+            if self.env_path is None:
+                self._set_env_path(state)
+            AgentClass = self.load_agent_module_from_file(state["type"])
+            config = {key: value for key, value in state.items() if key != "memory_state"}
+            agent = self._build_agent(AgentClass, config)
+            if agent.memory and state.get("memory_state"):
+                await agent.memory.import_state(state["memory_state"])
+        except Exception as e:
+            logger.error(f"Failed to import agent {agent_id}: {e}")
+            return False, str(e)
+
+        if self.proxy_env:
+            agent.set_env(self.proxy_env)
+        self._add_local_agent(agent_id, agent, config)
+        self._forwarders.pop(agent_id, None)
+        for event in pending_events:
+            agent.add_event(event)
+        get_event_bus().register_agent(agent_id, agent)
+        if self._agents_running:
+            self._start_agent(agent_id, agent)
+        # 仿真中途加入的Worker由迁入的Agent开始运行
+        self.agents_created.set()
+        return True, ""
+
+    async def leave(self) -> bool:
+        """
+        Leave the cluster gracefully.
+
+        The master moves this worker's agents to the remaining workers at
+        the next step boundary, then stops this worker.
+
+        Returns:
+            bool: Whether the master accepted the request
+        """
+        logger.info(f"Worker {self.node_id} requesting to leave, draining {len(self.profile_id2agent)} agents")
+        return await grpc_impl.request_drain_on_master(self.master_address, self.master_port, self.node_id)
+
     async def route_event_to_destination(self, event: Event):
         """Intelligently routes an event: P2P, to master, or local."""
         to_agent_id = event.to_agent_id
@@ -468,15 +810,10 @@ class WorkerNode(Node):
             logger.debug(f"Routing event {event.event_id} ({event.event_kind}) to ENV (Master)")
             if self._grpc_module:
                 # Assuming event_to_proto is correctly in grpc_impl and handles all event types
-                proto_event = grpc_impl.event_to_proto(event)
-                await grpc_impl.connection_manager.with_stub(
-                    self.master_address, self.master_port, 
-                    grpc_impl.agent_pb2_grpc.AgentServiceStub, 
-                    'SendEvent', proto_event
-                )
+                await grpc_impl.queue_event(self.master_address, self.master_port, event)
             return
 
-        if to_agent_id == self.node_id or to_agent_id in self.profile_id2agent: # Local agent
+        if to_agent_id == self.node_id or to_agent_id in self.profile_id2agent or to_agent_id in self._forwarders: # Local agent
             logger.debug(f"Routing event {event.event_id} ({event.event_kind}) to local agent {to_agent_id}")
             await get_event_bus().dispatch_event(event) # Dispatch to local agent
             return
@@ -513,11 +850,7 @@ class WorkerNode(Node):
                     logger.debug(f"Added P2P reply_to for initial event {event.event_id}: {proto_event.reply_to_worker_address}:{proto_event.reply_to_worker_port} to {worker_addr}:{worker_port}")
 
             if self._grpc_module:
-                await grpc_impl.connection_manager.with_stub(
-                    worker_addr, worker_port, 
-                    grpc_impl.agent_pb2_grpc.AgentServiceStub, 
-                    'SendEvent', proto_event
-                )
+                await grpc_impl.event_batcher.send(worker_addr, worker_port, proto_event)
         else:
             # Fallback: If agent not found via P2P, could send to master, or log error.
             # For now, log an error. A more robust solution might queue or retry.
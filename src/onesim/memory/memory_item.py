@@ -1,8 +1,22 @@
 import uuid
 import time
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class MemoryItem:
+    """
+    A memory of an agent.
+
+    Attributes live in slots instead of a per-item ``__dict__``, and
+    embeddings are kept as float32 arrays, the precision the vector index
+    searches in, rather than as lists of Python floats.
+    """
+
+    __slots__ = ("agent_id", "id", "content", "timestamp", "attributes", "_embedding")
 
     def __init__(
         self,
@@ -20,6 +34,16 @@ class MemoryItem:
         self.attributes = attributes if attributes is not None else {}
         self.embedding = embedding
 
+    @property
+    def embedding(self):
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, value):
+        if value is not None and np is not None:
+            value = np.asarray(value, dtype=np.float32)
+        self._embedding = value
+
     def __repr__(self):
         return f"MemoryItem(id={self.id}, content='{self.content}', attributes={self.attributes})"
 
@@ -45,20 +69,11 @@ class MemoryItem:
         """
         从字典创建MemoryItem对象。
         """
-        embedding = data.get('embedding')
-        if isinstance(embedding, list):
-            try:
-                import numpy as np
-
-                embedding = np.array(embedding)
-            except ImportError:
-                pass
-
         return cls(
             agent_id=data['agent_id'],
             content=data['content'],
             attributes=data.get('attributes'),
-            embedding=embedding,
+            embedding=data.get('embedding'),
             item_id=uuid.UUID(data['id']),
             timestamp=data['timestamp'],
         )
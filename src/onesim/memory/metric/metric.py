@@ -1,10 +1,34 @@
 from abc import ABC, abstractmethod
+import re
 import time
 import numpy as np
 from datetime import datetime
 from onesim.models import ModelManager
 from onesim.models.core.message import Message
 from onesim.models.parsers import TagParser
+from onesim.models.utils.structured_output import acall_structured
+
+
+class ScoreTagParser(TagParser):
+    """TagParser for numeric scores that falls back to the first number in the text."""
+
+    _NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+    def parse(self, response):
+        try:
+            response = super().parse(response)
+            repaired = False
+        except ValueError:
+            # Local repair: models often drop the tags but still give the score
+            response.parsed = response.text or ""
+            repaired = True
+        match = self._NUMBER_RE.search(str(response.parsed))
+        if not match:
+            raise ValueError(f"No numeric score found in response: {response.text}")
+        response.parsed = float(match.group())
+        if repaired:
+            response.model_info["repaired"] = True
+        return response
 
 class MemoryMetric(ABC):
     def __init__(self, config):
@@ -22,8 +46,8 @@ class ImportanceMetric(MemoryMetric):
         self.llm_model = model_manager.get_model(
             model_config_name,
         )  # LLM model instance
-        self.parser = TagParser(
-            tag_begin="[SCORE]",
+        self.parser = ScoreTagParser(
+            tag_start="[SCORE]",
             content_hint="the importance score",
             tag_end="[/SCORE]"
         )
@@ -45,15 +69,19 @@ class ImportanceMetric(MemoryMetric):
             Message("user",prompt, role="user")
         )
         try:
-            response = await self.llm_model.acall(prompt)
-            res = self.parser.parse(response)
-            importance = float(res.parsed['score'])
+            res = await acall_structured(
+                self.llm_model,
+                prompt,
+                parser=self.parser,
+                call_site="importance"
+            )
+            importance = res.parsed
             # 存入缓存
             self.cache[memory_item.id] = importance
             return importance
         except Exception as e:
             # 更详细的错误处理
-            error_msg = f"Error parsing importance score: {e}\nResponse: {response if 'response' in locals() else 'No response'}"
+            error_msg = f"Error parsing importance score: {e}"
             # 默认返回中等重要性而不是崩溃
             importance = 5.0
             return importance
@@ -3,7 +3,7 @@ from typing import Dict, Any
 from loguru import logger
 import json
 from onesim.models.core.message import Message
-from onesim.models import JsonBlockParser
+from onesim.models.utils.structured_output import acall_structured
 from ..memory_item import MemoryItem
 
 class MemoryOperation(ABC):
@@ -41,6 +41,15 @@ class RemoveMemoryOperation(MemoryOperation):
             raise ValueError(f"Storage not found: {storage_name}")
         await storage.delete(memory_item)
 
+def _string_list_schema(key: str) -> Dict[str, Any]:
+    """JSON schema for an object holding a single list of strings."""
+    return {
+        "type": "object",
+        "properties": {key: {"type": "array", "items": {"type": "string"}}},
+        "required": [key]
+    }
+
+
 class ReflectMemoryOperation(MemoryOperation):
     async def execute(self, strategy, *args, **kwargs):
         short_term_storage_name = getattr(strategy, 'short_term_storage_name', 'short_term_storage')
@@ -77,10 +86,13 @@ class ReflectMemoryOperation(MemoryOperation):
         )
         
         try:
-            response = await strategy.model.acall(formatted_prompt)
-            
-            parser = JsonBlockParser()
-            res = parser.parse(response)
+            res = await acall_structured(
+                strategy.model,
+                formatted_prompt,
+                call_site="reflection",
+                response_schema=_string_list_schema("questions"),
+                validator=lambda parsed: parsed['questions']
+            )
             questions = res.parsed['questions']
             logger.info(f"Generated questions: {questions}")
         except json.JSONDecodeError as e:
@@ -132,11 +144,14 @@ class ReflectMemoryOperation(MemoryOperation):
         )
         
         try:
-            response = await strategy.model.acall(formatted_prompt)
-            
             # 解析LLM的JSON响应
-            parser = JsonBlockParser()
-            res = parser.parse(response)
+            res = await acall_structured(
+                strategy.model,
+                formatted_prompt,
+                call_site="reflection",
+                response_schema=_string_list_schema("insights"),
+                validator=lambda parsed: parsed['insights']
+            )
             insights = res.parsed['insights']
             logger.info(f"Generated insights: {insights}")
         except json.JSONDecodeError as e:
@@ -55,9 +55,9 @@ class VectorMemoryStorage(MemoryStorage):
                 self.index_dimension = len(embedding)
                 self._initialize_index()
 
-            # 添加到内存和embedding列表
+            # 添加到内存和embedding列表，与记忆项共用转换后的float32数组
             self.memory_items.append(memory_item)
-            self.embeddings.append(embedding)
+            self.embeddings.append(memory_item.embedding)
 
             # 增加待更新计数
             self.pending_updates += 1
@@ -126,7 +126,7 @@ class VectorMemoryStorage(MemoryStorage):
                     embedding_result = await self.embedding_model.acall(memory_item.content)
                     embedding = embedding_result.embedding
                     memory_item.embedding = embedding
-                    self.embeddings[idx] = embedding
+                    self.embeddings[idx] = memory_item.embedding
 
                     # 标记需要更新索引
                     self.pending_updates += 1
@@ -3,6 +3,7 @@ from typing import Dict, Any
 from ..storage import *
 from ..operation import *
 from ..metric import *
+from ..memory_item import MemoryItem
 from onesim.models import ModelManager
 from onesim.profile import AgentProfile
 from onesim.relationship import RelationshipManager
@@ -29,6 +30,9 @@ class MemoryStrategy(ABC):
         self._storage_map: Dict[str, MemoryStorage] = {}
         self._operations: Dict[str, MemoryOperation] = {}
         self._metrics: Dict[str, MemoryMetric] = {}
+        # Call sites (reflection, importance) routed to a different model
+        self.model_routes: Dict[str, str] = config.get('model_routes') or {}
+        model_config_name = self.model_routes.get('reflection', model_config_name)
         if model_config_name is not None:
             model_manager = ModelManager.get_instance()
             self.model = model_manager.get_model(
@@ -120,6 +124,9 @@ class MemoryStrategy(ABC):
         if not metric_class:
             raise ValueError(f"Unsupported metric type: {metric_type}")
 
+        if metric_class is ImportanceMetric and 'importance' in self.model_routes:
+            config = {**config, 'model_config_name': self.model_routes['importance']}
+
         return metric_class(config)
 
     def set_agent_context(self, agent_context: AgentContext):
@@ -164,6 +171,32 @@ class MemoryStrategy(ABC):
             all_memories[key] = [memory.to_dict() for memory in memories]
         return all_memories
 
+    async def export_state(self) -> Dict[str, Any]:
+        """
+        Export the contents of all storages, e.g. to move the agent to another worker
+
+        :return: JSON-serializable state accepted by import_state
+        """
+        return {"storages": await self.get_all_memory_str()}
+
+    async def import_state(self, state: Dict[str, Any]):
+        """
+        Restore memories exported by export_state into the matching storages.
+        Stored embeddings are kept, so nothing is recomputed.
+
+        :param state: State returned by export_state
+        """
+        for key, items in (state or {}).get("storages", {}).items():
+            storage = self._storage_map.get(key)
+            if storage is None or not items:
+                continue
+            memory_items = [MemoryItem.from_dict(item) for item in items]
+            if hasattr(storage, "batch_add"):
+                await storage.batch_add(memory_items)
+            else:
+                for memory_item in memory_items:
+                    await storage.add(memory_item)
+
     @abstractmethod
     async def retrieve(self, query, top_k):
         """Abstract method for retrieving memories"""
@@ -12,21 +12,31 @@ from .core.model_response import ModelResponse
 from .core.message import Message, SystemMessage, UserMessage, AssistantMessage
 from .core.model_base import ModelAdapterBase
 from .core.model_manager import ModelManager
-from .core.load_balancer import LoadBalancer, LoadBalancerStrategy, RoundRobinStrategy, RandomStrategy
+from .core.load_balancer import (
+    LoadBalancer, LoadBalancerStrategy, RoundRobinStrategy, RandomStrategy, ConsistentHashStrategy
+)
+from .core.model_router import ModelRouter, CALL_SITES
 
 # Model implementations
 from .providers.openai import OpenAIChatAdapter, OpenAIEmbeddingAdapter
 
 # Parser implementations
-from .parsers.json_parsers import ParserBase, JsonBlockParser, JsonDictParser
+from .parsers.json_parsers import ParserBase, JsonBlockParser, JsonDictParser, repair_json
 
 # Token usage utilities
 from .utils.token_usage import (
     get_token_usage_stats, reset_token_stats, 
     estimate_token_cost, export_token_usage_stats,
-    log_token_usage
+    log_token_usage, merge_usage_stats, LatencyHistogram
 )
 
+# Structured output utilities
+from .utils.structured_output import call_structured, acall_structured, call_tracked, acall_tracked
+
+# Prompt budgeting utilities
+from .utils.tokenizer import TokenizerBase, get_tokenizer, register_tokenizer
+from .utils.prompt_budget import PromptBudgeter, BudgetResult
+
 # Utility functions
 def get_model_manager() -> ModelManager:
     """
@@ -90,7 +100,7 @@ def configure_load_balancer(model_configs=None, strategy="round_robin", config_n
     Args:
         model_configs: List of model configuration names to load balance between.
                       If None, will use all available models of the specified type.
-        strategy: Load balancing strategy to use ('round_robin' or 'random').
+        strategy: Load balancing strategy to use ('round_robin', 'random' or 'consistent_hash').
         config_name: Configuration name for the load balancer.
         model_type: Type of models to balance ('chat' or 'embedding').
     """
@@ -114,13 +124,14 @@ __all__ = [
     'LoadBalancerStrategy',
     'RoundRobinStrategy',
     'RandomStrategy',
+    'ConsistentHashStrategy',
     
     # Model implementations
     'OpenAIChatAdapter',
     'OpenAIEmbeddingAdapter',
     
     # Parser implementations
-    'ParserBase', 'JsonBlockParser', 'JsonDictParser',
+    'ParserBase', 'JsonBlockParser', 'JsonDictParser', 'repair_json',
     
     # Token usage utilities
     'get_token_usage_stats',
@@ -128,6 +139,25 @@ __all__ = [
     'estimate_token_cost',
     'export_token_usage_stats',
     'log_token_usage',
+    'merge_usage_stats',
+    'LatencyHistogram',
+    
+    # Structured output utilities
+    'call_structured',
+    'acall_structured',
+    'call_tracked',
+    'acall_tracked',
+    
+    # Prompt budgeting utilities
+    'TokenizerBase',
+    'get_tokenizer',
+    'register_tokenizer',
+    'PromptBudgeter',
+    'BudgetResult',
+    
+    # Model routing
+    'ModelRouter',
+    'CALL_SITES',
     
     # Utility functions
     'get_model_manager',
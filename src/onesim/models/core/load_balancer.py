@@ -6,8 +6,10 @@ as other model adapters, but delegates actual requests to underlying models
 based on load balancing strategies.
 """
 
+import bisect
+import hashlib
 import random
-from typing import Any, Dict, List, Optional, Sequence, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from loguru import logger
 
@@ -19,12 +21,14 @@ from .message import Message
 class LoadBalancerStrategy:
     """Base class for load balancing strategies."""
     
-    def select_model(self, models: List[ModelAdapterBase]) -> ModelAdapterBase:
+    def select_model(self, models: List[ModelAdapterBase], routing_key: Optional[str] = None) -> ModelAdapterBase:
         """
         Select a model from the available models based on the strategy.
         
         Args:
             models: List of available model instances.
+            routing_key: Optional key identifying the caller (e.g. agent id).
+                Strategies that do not use affinity ignore it.
             
         Returns:
             ModelAdapterBase: The selected model instance.
@@ -38,11 +42,12 @@ class RoundRobinStrategy(LoadBalancerStrategy):
     def __init__(self):
         self.current_index = 0
     
-    def select_model(self, models: List[ModelAdapterBase]) -> ModelAdapterBase:
+    def select_model(self, models: List[ModelAdapterBase], routing_key: Optional[str] = None) -> ModelAdapterBase:
         if not models:
             raise ValueError("No models available for load balancing")
         
-        selected_model = models[self.current_index]
+        # The candidate list shrinks during failover, so wrap the index
+        selected_model = models[self.current_index % len(models)]
         self.current_index = (self.current_index + 1) % len(models)
         return selected_model
 
@@ -50,13 +55,64 @@ class RoundRobinStrategy(LoadBalancerStrategy):
 class RandomStrategy(LoadBalancerStrategy):
     """Random selection load balancing strategy."""
     
-    def select_model(self, models: List[ModelAdapterBase]) -> ModelAdapterBase:
+    def select_model(self, models: List[ModelAdapterBase], routing_key: Optional[str] = None) -> ModelAdapterBase:
         if not models:
             raise ValueError("No models available for load balancing")
         
         return random.choice(models)
 
 
+class ConsistentHashStrategy(LoadBalancerStrategy):
+    """
+    Consistent hashing load balancing strategy.
+    
+    Requests carrying the same routing key (typically the agent id) are sent
+    to the same model, so the backend's prefix (KV) cache for that agent stays
+    warm. When a model leaves the pool only the keys it owned are remapped.
+    Requests without a routing key fall back to round robin.
+    """
+    
+    def __init__(self, virtual_nodes: int = 100):
+        """
+        Initialize the strategy.
+        
+        Args:
+            virtual_nodes: Number of points each model gets on the hash ring.
+        """
+        self.virtual_nodes = virtual_nodes
+        self._rings: Dict[Tuple[str, ...], Tuple[List[int], List[ModelAdapterBase]]] = {}
+        self._fallback = RoundRobinStrategy()
+    
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+    
+    def _get_ring(self, models: List[ModelAdapterBase]) -> Tuple[List[int], List[ModelAdapterBase]]:
+        """Build (or reuse) the hash ring for a set of models."""
+        ring_id = tuple(model.config_name for model in models)
+        ring = self._rings.get(ring_id)
+        if ring is None:
+            points = sorted(
+                (self._hash(f"{model.config_name}#{i}"), index)
+                for index, model in enumerate(models)
+                for i in range(self.virtual_nodes)
+            )
+            ring = ([point for point, _ in points], [models[index] for _, index in points])
+            self._rings[ring_id] = ring
+        return ring
+    
+    def select_model(self, models: List[ModelAdapterBase], routing_key: Optional[str] = None) -> ModelAdapterBase:
+        if not models:
+            raise ValueError("No models available for load balancing")
+        
+        if routing_key is None:
+            return self._fallback.select_model(models)
+        
+        hashes, owners = self._get_ring(models)
+        index = bisect.bisect(hashes, self._hash(str(routing_key))) % len(hashes)
+        return owners[index]
+
+
 class LoadBalancer(ModelAdapterBase):
     """
     Load balancer for language models.
@@ -68,8 +124,17 @@ class LoadBalancer(ModelAdapterBase):
     Supports both synchronous and asynchronous calls:
     - For synchronous: model(...) or model.__call__(...)
     - For asynchronous: await model.acall(...)
+    
+    Structured output requests (``response_schema``) are forwarded only to
+    models that support them; other models receive the prompt alone.
+    
+    Callers may pass a ``routing_key`` (e.g. the agent id); it is consumed by
+    the load balancer and used by affinity strategies such as consistent_hash.
     """
 
+    supports_structured_output = True
+    supports_routing_key = True
+
     def __init__(
         self,
         config_name: str = "chat_load_balancer",
@@ -88,7 +153,7 @@ class LoadBalancer(ModelAdapterBase):
         Args:
             config_name: Configuration name for this load balancer.
             models: List of model instances or config names to balance between.
-            strategy: Load balancing strategy to use (round_robin, random).
+            strategy: Load balancing strategy to use (round_robin, random, consistent_hash).
             category: The category of models being balanced ('chat' or 'embedding').
             provider: Optional provider to filter models (e.g., 'openai', 'vllm').
             model_type: Alias for category, for backward compatibility.
@@ -115,6 +180,8 @@ class LoadBalancer(ModelAdapterBase):
             self._strategy = RoundRobinStrategy()
         elif strategy == "random":
             self._strategy = RandomStrategy()
+        elif strategy == "consistent_hash":
+            self._strategy = ConsistentHashStrategy()
         else:
             raise ValueError(f"Unknown load balancing strategy: {strategy}")
 
@@ -167,6 +234,9 @@ class LoadBalancer(ModelAdapterBase):
         Raises:
             Exception: If the model call fails.
         """
+        if not model.supports_structured_output:
+            kwargs.pop("response_schema", None)
+
         try:
             response = model(*args, **kwargs)
 
@@ -209,14 +279,16 @@ class LoadBalancer(ModelAdapterBase):
 
         last_error = None
         tried_models = set()
+        routing_key = kwargs.pop("routing_key", None)
+        attempts = min(self.max_retries, len(self._model_instances))
 
-        for _ in range(self.max_retries):
-            # Select a model based on the strategy
-            model = self._strategy.select_model(self._model_instances)
-
-            # Skip if we've already tried this model
-            if model.config_name in tried_models:
-                continue
+        for _ in range(attempts):
+            # Select among the models not tried yet, so that affinity
+            # strategies fail over to the next model on their ring
+            candidates = [m for m in self._model_instances if m.config_name not in tried_models]
+            if not candidates:
+                break
+            model = self._strategy.select_model(candidates, routing_key)
 
             tried_models.add(model.config_name)
 
@@ -224,11 +296,21 @@ class LoadBalancer(ModelAdapterBase):
                 return self._try_with_model(model, *args, **kwargs)
             except Exception as e:
                 last_error = e
+                self._track_backend_error(model, e, retried=len(tried_models) < attempts)
                 continue
 
         # If we get here, all models failed
         raise Exception(f"All models failed after {self.max_retries} attempts. Last error: {str(last_error)}")
 
+    def _track_backend_error(self, model: ModelAdapterBase, error: Exception, retried: bool):
+        """Report a failed backend request to the token tracker."""
+        if not self.token_tracker:
+            return
+        try:
+            self.token_tracker.track_backend_error(model.model_name, model.config_name, error, retried)
+        except Exception as e:
+            logger.error(f"Error tracking backend error: {e}")
+
     async def _try_with_model_async(self, model: ModelAdapterBase, *args, **kwargs) -> ModelResponse:
         """
         Try to process a request asynchronously with a specific model.
@@ -244,6 +326,9 @@ class LoadBalancer(ModelAdapterBase):
         Raises:
             Exception: If the model call fails.
         """
+        if not model.supports_structured_output:
+            kwargs.pop("response_schema", None)
+
         try:
             response = await model.acall(*args, **kwargs)
 
@@ -286,14 +371,16 @@ class LoadBalancer(ModelAdapterBase):
 
         last_error = None
         tried_models = set()
+        routing_key = kwargs.pop("routing_key", None)
+        attempts = min(self.max_retries, len(self._model_instances))
 
-        for _ in range(self.max_retries):
-            # Select a model based on the strategy
-            model = self._strategy.select_model(self._model_instances)
-
-            # Skip if we've already tried this model
-            if model.config_name in tried_models:
-                continue
+        for _ in range(attempts):
+            # Select among the models not tried yet, so that affinity
+            # strategies fail over to the next model on their ring
+            candidates = [m for m in self._model_instances if m.config_name not in tried_models]
+            if not candidates:
+                break
+            model = self._strategy.select_model(candidates, routing_key)
 
             tried_models.add(model.config_name)
 
@@ -301,6 +388,7 @@ class LoadBalancer(ModelAdapterBase):
                 return await self._try_with_model_async(model, *args, **kwargs)
             except Exception as e:
                 last_error = e
+                self._track_backend_error(model, e, retried=len(tried_models) < attempts)
                 continue
 
         # If we get here, all models failed
@@ -342,6 +430,20 @@ class LoadBalancer(ModelAdapterBase):
         # Use the first model for formatting
         return self._model_instances[0].format(*args)
 
+    def get_tokenizer(self):
+        """
+        Get the tokenizer of the first model in the pool.
+        
+        As with ``format``, all models in the pool are assumed to share a
+        tokenizer.
+        
+        Returns:
+            TokenizerBase: A tokenizer with cached token counts.
+        """
+        if not self._model_instances:
+            return super().get_tokenizer()
+        return self._model_instances[0].get_tokenizer()
+
     def get_info(self) -> Dict[str, Any]:
         """
         Get information about this load balancer instance.
@@ -22,6 +22,12 @@ class ModelAdapterBase(ABC):
     - For asynchronous calls: await model.acall(...)
     """
 
+    supports_structured_output: bool = False
+    """Whether the adapter accepts a ``response_schema`` argument on calls."""
+
+    supports_routing_key: bool = False
+    """Whether the adapter accepts a ``routing_key`` argument used for backend affinity."""
+
     def __init__(self, config_name: str, model_name: str = None, **kwargs):
         """
         Initialize the model adapter.
@@ -83,6 +89,66 @@ class ModelAdapterBase(ABC):
         except Exception as e:
             logger.error(f"Error tracking token usage: {e}")
             
+    def get_tokenizer(self):
+        """
+        Get the tokenizer used to count prompt tokens for this model.
+        
+        The ``tokenizer`` field of the model config selects it explicitly
+        (e.g. ``"tiktoken:cl100k_base"``); otherwise it is derived from the
+        model name.
+        
+        Returns:
+            TokenizerBase: A tokenizer with cached token counts.
+        """
+        from ..utils.tokenizer import get_tokenizer
+        return get_tokenizer(self._init_args.get("tokenizer"), self.model_name)
+
+    def structured_output_args(self, response_schema: Dict[str, Any], schema_name: str = "response") -> Dict[str, Any]:
+        """
+        Translate a JSON schema into provider-specific call arguments.
+        
+        The default implementation targets OpenAI-compatible APIs and uses
+        ``response_format`` with a ``json_schema`` payload. These APIs only
+        accept an object at the root, so other schemas produce no arguments
+        and the caller falls back to prompt-only formatting.
+        
+        Args:
+            response_schema: JSON schema the response must conform to.
+            schema_name: Name reported to the API for the schema.
+            
+        Returns:
+            Dict of extra keyword arguments for the completion request.
+        """
+        if not response_schema or response_schema.get("type") != "object":
+            return {}
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema_name,
+                    "schema": response_schema,
+                    "strict": False
+                }
+            }
+        }
+
+    def _apply_response_schema(self, call_kwargs: Dict[str, Any], response_schema: Dict[str, Any]) -> None:
+        """
+        Merge the structured-output arguments for a schema into call kwargs.
+        
+        Dict-valued arguments such as ``extra_body`` are merged rather than
+        replaced so user-supplied values are preserved.
+        
+        Args:
+            call_kwargs: The keyword arguments of the pending API call.
+            response_schema: JSON schema the response must conform to.
+        """
+        for key, value in self.structured_output_args(response_schema).items():
+            if isinstance(value, dict) and isinstance(call_kwargs.get(key), dict):
+                call_kwargs[key] = {**call_kwargs[key], **value}
+            else:
+                call_kwargs[key] = value
+
     def _add_model_info_to_response(self, response: ModelResponse) -> ModelResponse:
         """
         Add model information to a response object.
@@ -423,7 +423,7 @@ class ModelManager:
         Args:
             model_configs: List of model configuration names to load balance between.
                           If None, will use models based on model_type/model_name parameters.
-            strategy: Load balancing strategy ('round_robin' or 'random').
+            strategy: Load balancing strategy ('round_robin', 'random' or 'consistent_hash').
             config_name: Name to assign to the load balancer configuration.
             model_type: Type of models to balance ('chat', 'embedding', or specific provider).
                        Used to filter eligible models when model_configs is None.
@@ -2,8 +2,9 @@
 This module defines the ModelResponse class which encapsulates different types of model responses.
 """
 
-from typing import Any, Dict, Generator, Optional, Sequence, Tuple, Union
+from typing import Any, AsyncGenerator, Dict, Generator, Optional, Sequence, Tuple, Union
 import json
+import time
 
 class ModelResponse:
     """
@@ -13,6 +14,9 @@ class ModelResponse:
     acting as a bridge between models and agents.
     """
 
+    __slots__ = ("_text", "embedding", "raw", "parsed", "_stream", "_astream",
+                 "_is_stream_exhausted", "usage", "model_info")
+
     def __init__(
         self,
         text: str = None,
@@ -22,6 +26,7 @@ class ModelResponse:
         stream: Optional[Generator[str, None, None]] = None,
         usage: Optional[Dict[str, Any]] = None,
         model_info: Optional[Dict[str, Any]] = None,
+        astream: Optional[AsyncGenerator[str, None]] = None,
     ) -> None:
         """
         Initialize the model response.
@@ -34,12 +39,15 @@ class ModelResponse:
             stream: A generator for streaming responses.
             usage: Token usage information.
             model_info: Information about the model that generated the response.
+            astream: An async generator for streaming responses from async calls.
+                It must be consumed with ``aconsume`` before reading ``text``.
         """
         self._text = text
         self.embedding = embedding
         self.raw = raw
         self.parsed = parsed
         self._stream = stream
+        self._astream = astream
         self._is_stream_exhausted = False
         self.usage = usage or {}
         self.model_info = model_info or {}
@@ -75,6 +83,53 @@ class ModelResponse:
         else:
             return self._stream_generator_wrapper()
 
+    @property
+    def is_streaming(self) -> bool:
+        """Check if the response has a stream that has not been read yet."""
+        return self._text is None and (self._stream is not None or self._astream is not None)
+
+    def consume(self, start_time: Optional[float] = None) -> Optional[float]:
+        """
+        Read a synchronous stream to the end, so that ``text`` is complete.
+        
+        Args:
+            start_time: ``time.perf_counter()`` value when the request was sent.
+            
+        Returns:
+            Seconds from ``start_time`` to the first chunk, or None if there was
+            no stream or no start time.
+        """
+        ttft = None
+        if self._text is None and self._stream is not None:
+            for chunk in self._stream:
+                if ttft is None and start_time is not None:
+                    ttft = time.perf_counter() - start_time
+                self._text = chunk
+            self._is_stream_exhausted = True
+        return ttft
+
+    async def aconsume(self, start_time: Optional[float] = None) -> Optional[float]:
+        """
+        Read an asynchronous stream to the end, so that ``text`` is complete.
+        
+        Args:
+            start_time: ``time.perf_counter()`` value when the request was sent.
+            
+        Returns:
+            Seconds from ``start_time`` to the first chunk, or None if there was
+            no stream or no start time.
+        """
+        if self._astream is None:
+            return self.consume(start_time)
+        ttft = None
+        if self._text is None:
+            async for chunk in self._astream:
+                if ttft is None and start_time is not None:
+                    ttft = time.perf_counter() - start_time
+                self._text = chunk
+            self._is_stream_exhausted = True
+        return ttft
+
     @property
     def is_stream_exhausted(self) -> bool:
         """Check if the stream has been fully processed."""
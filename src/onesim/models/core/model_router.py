@@ -0,0 +1,166 @@
+"""
+This module provides per-call-site model routing.
+
+A routing table maps the logical origin of an LLM call (reaction, memory,
+importance, reflection, planning, profile generation) to a model config or
+load balancer name, with optional overrides per agent type. Call sites that
+are not routed fall back to the caller's default model.
+"""
+
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from .model_base import ModelAdapterBase
+
+
+CALL_SITES = (
+    "reaction",
+    "memory",
+    "importance",
+    "reflection",
+    "planning",
+    "profile_generation",
+)
+
+
+class ModelRouter:
+    """
+    Resolves model config names for call sites from a routing table.
+
+    The table has the following structure::
+
+        {
+            "routes": {"memory": "vllm-qwen-7", "importance": "vllm-qwen-7"},
+            "agent_types": {
+                "Employer": {"reaction": "openai-gpt5"}
+            }
+        }
+
+    Agent type overrides take precedence over the global routes.
+    """
+
+    def __init__(self, routing_table: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            routing_table: Routing table as described in the class docstring.
+        """
+        self.routes: Dict[str, str] = {}
+        self.agent_type_routes: Dict[str, Dict[str, str]] = {}
+        self._models: Dict[str, ModelAdapterBase] = {}
+        self.configure(routing_table or {})
+
+    def configure(self, routing_table: Dict[str, Any]):
+        """
+        Load a routing table, replacing any existing routes.
+
+        Args:
+            routing_table: Routing table with ``routes`` and ``agent_types`` keys.
+
+        Raises:
+            ValueError: If a route refers to an unknown call site.
+        """
+        routes = dict(routing_table.get("routes", {}))
+        agent_type_routes = {
+            agent_type: dict(overrides)
+            for agent_type, overrides in routing_table.get("agent_types", {}).items()
+        }
+
+        for table in [routes] + list(agent_type_routes.values()):
+            unknown = set(table) - set(CALL_SITES)
+            if unknown:
+                raise ValueError(
+                    f"Unknown call site(s) in model routing: {', '.join(sorted(unknown))}. "
+                    f"Expected one of: {', '.join(CALL_SITES)}"
+                )
+
+        self.routes = routes
+        self.agent_type_routes = agent_type_routes
+        self._models.clear()
+
+        if routes or agent_type_routes:
+            logger.info(
+                f"Configured model routing for {len(routes)} call sites "
+                f"and {len(agent_type_routes)} agent type overrides"
+            )
+
+    def resolve(self, call_site: str, agent_type: Optional[str] = None,
+                default: Optional[str] = None) -> Optional[str]:
+        """
+        Resolve the model config name for a call site.
+
+        Args:
+            call_site: Logical origin of the call.
+            agent_type: Agent type used to look up overrides.
+            default: Config name returned when the call site is not routed.
+
+        Returns:
+            str or None: The routed config name, or ``default``.
+        """
+        if agent_type is not None:
+            overrides = self.agent_type_routes.get(agent_type, {})
+            if call_site in overrides:
+                return overrides[call_site]
+        return self.routes.get(call_site, default)
+
+    def routes_for(self, agent_type: Optional[str] = None) -> Dict[str, str]:
+        """
+        Get the effective routes for an agent type.
+
+        Args:
+            agent_type: Agent type whose overrides should be applied.
+
+        Returns:
+            Dict mapping routed call sites to config names.
+        """
+        routes = dict(self.routes)
+        if agent_type is not None:
+            routes.update(self.agent_type_routes.get(agent_type, {}))
+        return routes
+
+    def get_model(self, call_site: str, agent_type: Optional[str] = None,
+                  default: Optional[str] = None) -> Optional[ModelAdapterBase]:
+        """
+        Get the model instance for a call site.
+
+        Instances are cached per config name so that all agents routed to the
+        same config share one adapter.
+
+        Args:
+            call_site: Logical origin of the call.
+            agent_type: Agent type used to look up overrides.
+            default: Config name used when the call site is not routed.
+
+        Returns:
+            ModelAdapterBase or None: The model, or None if nothing resolves.
+        """
+        config_name = self.resolve(call_site, agent_type, default)
+        if config_name is None:
+            return None
+        return get_routed_model(config_name, self._models)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the routing table to a dictionary for JSON serialization."""
+        return {
+            "routes": dict(self.routes),
+            "agent_types": {k: dict(v) for k, v in self.agent_type_routes.items()}
+        }
+
+
+def get_routed_model(config_name: str, cache: Dict[str, ModelAdapterBase]) -> ModelAdapterBase:
+    """
+    Get a model by config name, reusing instances from ``cache``.
+
+    Args:
+        config_name: Name of the model or load balancer configuration.
+        cache: Mapping of config names to already created instances.
+
+    Returns:
+        ModelAdapterBase: The model instance.
+    """
+    if config_name not in cache:
+        from .model_manager import ModelManager
+        cache[config_name] = ModelManager.get_instance().get_model(config_name)
+    return cache[config_name]
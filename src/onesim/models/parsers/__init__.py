@@ -2,8 +2,8 @@
 Parsers for model responses.
 """ 
 
-from .json_parsers import JsonDictParser, JsonBlockParser
+from .json_parsers import JsonDictParser, JsonBlockParser, repair_json
 from .code_parsers import CodeBlockParser
 from .tag_parsers import TagParser, MultiTagParser
 
-__all__ = ["JsonDictParser", "CodeBlockParser", "JsonBlockParser", "TagParser", "MultiTagParser"]
\ No newline at end of file
+__all__ = ["JsonDictParser", "CodeBlockParser", "JsonBlockParser", "TagParser", "MultiTagParser", "repair_json"]
\ No newline at end of file
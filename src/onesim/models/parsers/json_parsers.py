@@ -13,6 +13,170 @@ from ..core.model_response import ModelResponse
 from .base import ParserBase
 
 
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _extract_json_span(text: str) -> str:
+    """Return the substring from the first opening bracket to the last matching closer."""
+    starts = [idx for idx in (text.find("{"), text.find("[")) if idx != -1]
+    if not starts:
+        return text
+    start = min(starts)
+    closer = "}" if text[start] == "{" else "]"
+    end = text.rfind(closer)
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _replace_outside_strings(text: str, replacements: Dict[str, str]) -> str:
+    """Replace bare identifiers (e.g. Python literals) that appear outside of JSON strings."""
+    result = []
+    i = 0
+    in_string = False
+    quote = ""
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            result.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                result.append(text[i + 1])
+                i += 2
+                continue
+            if ch == quote:
+                in_string = False
+            i += 1
+            continue
+        if ch in ('"', "'"):
+            in_string = True
+            quote = ch
+            result.append(ch)
+            i += 1
+            continue
+        matched = False
+        for literal, replacement in replacements.items():
+            if text.startswith(literal, i):
+                before = text[i - 1] if i > 0 else ""
+                after = text[i + len(literal)] if i + len(literal) < len(text) else ""
+                if not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_"):
+                    result.append(replacement)
+                    i += len(literal)
+                    matched = True
+                    break
+        if not matched:
+            result.append(ch)
+            i += 1
+    return "".join(result)
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing bracket, leaving the contents of strings untouched."""
+    result = []
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if not rest or rest[0] in "}]":
+                continue
+        result.append(ch)
+    return "".join(result)
+
+
+def _close_unbalanced(text: str) -> str:
+    """Close strings, arrays and objects left open by a truncated response."""
+    stack = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack and stack[-1] == ch:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return _strip_trailing_commas(text.rstrip()) + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> str:
+    """
+    Apply cheap, local fixes to almost-valid JSON produced by a model.
+    
+    The repair handles the failure modes seen most often in agent responses:
+    prose or code fences around the payload, trailing commas, Python literals
+    (``True``/``False``/``None``), single-quoted strings and output truncated
+    before the closing brackets. It never calls a model, so it should always
+    be tried before re-querying.
+    
+    Args:
+        text: The raw (possibly malformed) JSON text.
+        
+    Returns:
+        The repaired JSON text, or ``text`` itself if it is already valid
+        JSON. The result is not guaranteed to be valid JSON.
+    """
+    if not text:
+        return text
+    try:
+        json.loads(text)
+        return text
+    except json.JSONDecodeError:
+        pass
+
+    repaired = text.strip()
+    if repaired.startswith("```"):
+        repaired = repaired.split("\n", 1)[1] if "\n" in repaired else repaired[3:]
+        if repaired.rstrip().endswith("```"):
+            repaired = repaired.rstrip()[:-3]
+
+    repaired = _extract_json_span(repaired)
+    repaired = _replace_outside_strings(repaired, _PYTHON_LITERALS)
+
+    # Only swap quote styles when the payload uses single quotes exclusively,
+    # otherwise apostrophes inside double-quoted strings would be corrupted.
+    if "'" in repaired and '"' not in repaired:
+        repaired = repaired.replace("'", '"')
+
+    return _close_unbalanced(repaired)
+
+
+def loads_with_repair(text: str) -> tuple:
+    """
+    Parse JSON text, falling back to :func:`repair_json` on failure.
+    
+    Args:
+        text: The JSON text to parse.
+        
+    Returns:
+        A ``(parsed, repaired)`` tuple where ``repaired`` tells whether the
+        local repair step was needed.
+        
+    Raises:
+        json.JSONDecodeError: If the text cannot be parsed even after repair.
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        return json.loads(repair_json(text)), True
+
+
 class JsonBlockParser(ParserBase):
     """
     Parser for JSON objects in code blocks.
@@ -25,7 +189,8 @@ class JsonBlockParser(ParserBase):
         self,
         tag_start: str = "```json",
         tag_end: str = "```",
-        content_hint: Optional[Any] = None
+        content_hint: Optional[Any] = None,
+        repair: bool = True
     ):
         """
         Initialize the parser.
@@ -34,9 +199,12 @@ class JsonBlockParser(ParserBase):
             tag_start: The start tag for the JSON block.
             tag_end: The end tag for the JSON block.
             content_hint: Optional hint for the expected content structure.
+            repair: Whether to run the local JSON repair step when the
+                extracted content is not valid JSON.
         """
         self.tag_start = tag_start
         self.tag_end = tag_end
+        self.repair = repair
         
         if content_hint is not None:
             if isinstance(content_hint, str):
@@ -59,6 +227,8 @@ class JsonBlockParser(ParserBase):
             
         Returns:
             An updated ModelResponse with parsed JSON in the parsed field.
+            If the local repair step was needed, ``model_info["repaired"]``
+            is set to True.
             
         Raises:
             ValueError: If JSON cannot be extracted or parsed.
@@ -69,10 +239,50 @@ class JsonBlockParser(ParserBase):
         if not text:
             raise ValueError("Response text is empty")
         
+        json_content = self._extract_block(text)
+        
+        # Parse the JSON
+        try:
+            if self.repair:
+                parsed_json, repaired = loads_with_repair(json_content)
+            else:
+                parsed_json, repaired = json.loads(json_content), False
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse JSON: {e}")
+
+        response.parsed = parsed_json
+        if repaired:
+            response.model_info["repaired"] = True
+        return response
+
+    def _extract_block(self, text: str) -> str:
+        """
+        Extract the JSON payload from the response text.
+        
+        Responses produced with structured output (``response_format`` or
+        guided decoding) contain bare JSON without a fenced block, so the
+        whole text is used when the start tag is missing but the text looks
+        like JSON. A missing end tag is tolerated when repair is enabled,
+        since that usually means the response was truncated.
+        
+        Args:
+            text: The response text.
+            
+        Returns:
+            The JSON content to parse.
+            
+        Raises:
+            ValueError: If no JSON content can be located.
+        """
         # Find the JSON block
         start_idx = text.find(self.tag_start)
         
         if start_idx == -1:
+            stripped = text.strip()
+            if stripped[:1] in ("{", "["):
+                return stripped
+            if self.repair and ("{" in stripped or "[" in stripped):
+                return _extract_json_span(stripped)
             raise ValueError(f"Start tag '{self.tag_start}' not found in response")
         
         # Find the end tag after the start tag
@@ -80,18 +290,12 @@ class JsonBlockParser(ParserBase):
         end_idx = text.find(self.tag_end, content_start)
         
         if end_idx == -1:
+            if self.repair:
+                return text[content_start:].strip()
             raise ValueError(f"End tag '{self.tag_end}' not found in response")
         
         # Extract the JSON content
-        json_content = text[content_start:end_idx].strip()
-        
-        # Parse the JSON
-        try:
-            parsed_json = json.loads(json_content)
-            response.parsed = parsed_json
-            return response
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse JSON: {e}")
+        return text[content_start:end_idx].strip()
     
     @property
     def format_instruction(self) -> str:
@@ -123,7 +327,8 @@ class JsonDictParser(JsonBlockParser):
         required_keys: Optional[List[str]] = None,
         keys_to_content: Union[str, bool, Sequence[str]] = True,
         keys_to_metadata: Union[str, bool, Sequence[str]] = False,
-        schema: Optional[BaseModel] = None
+        schema: Optional[BaseModel] = None,
+        repair: bool = True
     ):
         """
         Initialize the parser.
@@ -136,8 +341,9 @@ class JsonDictParser(JsonBlockParser):
             keys_to_content: Keys to include in content output.
             keys_to_metadata: Keys to include in metadata output.
             schema: Optional Pydantic model to validate the parsed JSON.
+            repair: Whether to run the local JSON repair step on invalid JSON.
         """
-        super().__init__(tag_start, tag_end, content_hint)
+        super().__init__(tag_start, tag_end, content_hint, repair=repair)
         
         self.required_keys = required_keys or []
         self.keys_to_content = keys_to_content
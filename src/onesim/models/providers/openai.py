@@ -24,6 +24,8 @@ class OpenAIChatAdapter(ModelAdapterBase):
     using vLLM, FastChat, etc). Supports both synchronous and asynchronous calls.
     """
 
+    supports_structured_output = True
+
     def __init__(
         self,
         config_name: str,
@@ -90,6 +92,7 @@ class OpenAIChatAdapter(ModelAdapterBase):
         self,
         messages: List[Dict],
         stream: Optional[bool] = None,
+        response_schema: Optional[Dict] = None,
         **kwargs
     ) -> ModelResponse:
         """
@@ -98,6 +101,7 @@ class OpenAIChatAdapter(ModelAdapterBase):
         Args:
             messages: List of formatted message dictionaries.
             stream: Whether to stream the response.
+            response_schema: Optional JSON schema the response must follow.
             **kwargs: Additional parameters for the API call.
             
         Returns:
@@ -122,6 +126,10 @@ class OpenAIChatAdapter(ModelAdapterBase):
         if use_stream:
             call_kwargs["stream_options"] = {"include_usage": True}
 
+        # Constrain the output to the expected schema when one is provided
+        if response_schema:
+            self._apply_response_schema(call_kwargs, response_schema)
+
         try:
             # Make the API call
             response = self.client.chat.completions.create(**call_kwargs)
@@ -180,6 +188,7 @@ class OpenAIChatAdapter(ModelAdapterBase):
         self,
         messages: List[Dict],
         stream: Optional[bool] = None,
+        response_schema: Optional[Dict] = None,
         **kwargs
     ) -> ModelResponse:
         """
@@ -188,6 +197,7 @@ class OpenAIChatAdapter(ModelAdapterBase):
         Args:
             messages: List of formatted message dictionaries.
             stream: Whether to stream the response.
+            response_schema: Optional JSON schema the response must follow.
             **kwargs: Additional parameters for the API call.
             
         Returns:
@@ -212,6 +222,10 @@ class OpenAIChatAdapter(ModelAdapterBase):
         if use_stream:
             call_kwargs["stream_options"] = {"include_usage": True}
 
+        # Constrain the output to the expected schema when one is provided
+        if response_schema:
+            self._apply_response_schema(call_kwargs, response_schema)
+
         try:
             # Use async client if available, otherwise run sync client in thread
             if self.async_client:
@@ -22,6 +22,8 @@ class VLLMChatAdapter(ModelAdapterBase):
     local model deployments or remote vLLM endpoints.
     """
 
+    supports_structured_output = True
+
     def __init__(
         self,
         config_name: str,
@@ -87,6 +89,7 @@ class VLLMChatAdapter(ModelAdapterBase):
         self,
         messages: List[Dict],
         stream: Optional[bool] = None,
+        response_schema: Optional[Dict] = None,
         **kwargs
     ) -> ModelResponse:
         """
@@ -95,6 +98,7 @@ class VLLMChatAdapter(ModelAdapterBase):
         Args:
             messages: List of formatted message dictionaries.
             stream: Whether to stream the response.
+            response_schema: Optional JSON schema the response must follow.
             **kwargs: Additional parameters for the API call.
             
         Returns:
@@ -119,6 +123,10 @@ class VLLMChatAdapter(ModelAdapterBase):
         if stream_mode:
             call_kwargs["stream_options"] = {"include_usage": True}
 
+        # Constrain the output to the expected schema when one is provided
+        if response_schema:
+            self._apply_response_schema(call_kwargs, response_schema)
+
         try:
             # Call the API
             response = self.client.chat.completions.create(**call_kwargs)
@@ -191,6 +199,7 @@ class VLLMChatAdapter(ModelAdapterBase):
         self,
         messages: List[Dict],
         stream: Optional[bool] = None,
+        response_schema: Optional[Dict] = None,
         **kwargs
     ) -> ModelResponse:
         """
@@ -199,6 +208,7 @@ class VLLMChatAdapter(ModelAdapterBase):
         Args:
             messages: List of formatted message dictionaries.
             stream: Whether to stream the response.
+            response_schema: Optional JSON schema the response must follow.
             **kwargs: Additional parameters for the API call.
             
         Returns:
@@ -223,6 +233,10 @@ class VLLMChatAdapter(ModelAdapterBase):
         if use_stream:
             call_kwargs["stream_options"] = {"include_usage": True}
 
+        # Constrain the output to the expected schema when one is provided
+        if response_schema:
+            self._apply_response_schema(call_kwargs, response_schema)
+
         try:
             # Use async client if available, otherwise run sync client in thread
             if self.async_client:
@@ -301,6 +315,24 @@ class VLLMChatAdapter(ModelAdapterBase):
             logger.error(f"Error calling vLLM API asynchronously: {str(e)}") # Changed log message
             raise
 
+    def structured_output_args(self, response_schema: Dict[str, Any], schema_name: str = "response") -> Dict[str, Any]:
+        """
+        Use vLLM guided decoding to constrain the output to a JSON schema.
+        
+        Unlike ``response_format``, ``guided_json`` accepts any root type,
+        so array schemas (e.g. bulk profile generation) are supported too.
+        
+        Args:
+            response_schema: JSON schema the response must conform to.
+            schema_name: Unused, kept for interface compatibility.
+            
+        Returns:
+            Dict of extra keyword arguments for the completion request.
+        """
+        if not response_schema:
+            return {}
+        return {"extra_body": {"guided_json": response_schema}}
+
     def list_models(self) -> List[str]:
         """
         vLLM endpoint doesn’t support /v1/models, so we just
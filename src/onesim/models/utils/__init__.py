@@ -3,5 +3,8 @@ Utility modules for model functionality.
 """
 
 from . import token_usage
+from . import structured_output
+from . import tokenizer
+from . import prompt_budget
 
-__all__ = ['token_usage'] 
\ No newline at end of file
+__all__ = ['token_usage', 'structured_output', 'tokenizer', 'prompt_budget'] 
\ No newline at end of file
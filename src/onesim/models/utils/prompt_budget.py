@@ -0,0 +1,223 @@
+"""
+Token-budgeted prompt assembly for OneSim.
+
+A prompt is split into named sections (profile, memory, relationships,
+observation, planning, ...). The budgeter counts each section with the
+model's tokenizer, applies per-section caps, and when the total exceeds the
+shared budget trims the lowest-priority sections first. List sections (memory
+items, relationships) lose whole items from the end; text sections are cut on
+a token boundary. Tokens saved per call are reported to the token tracker.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from loguru import logger
+
+from .tokenizer import TokenizerBase, get_tokenizer
+from .token_usage import get_token_tracker
+
+TRUNCATION_MARKER = " ..."
+
+# Higher priority sections are trimmed last
+DEFAULT_SECTION_PRIORITIES = {
+    "instruction": 100,
+    "observation": 80,
+    "profile": 60,
+    "relationships": 50,
+    "memory": 40,
+    "planning": 30,
+}
+
+SectionContent = Union[str, List[str]]
+Baseline = Union[Dict[str, SectionContent], Callable[[], Dict[str, SectionContent]]]
+
+
+@dataclass
+class BudgetResult:
+    """Outcome of fitting prompt sections into a token budget."""
+
+    sections: Dict[str, str]
+    tokens_before: int
+    tokens_after: int
+    truncated: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class PromptBudgeter:
+    """
+    Fits prompt sections into a shared token budget.
+
+    Configuration (e.g. from ``agent.prompt_budget`` in config.json)::
+
+        {
+            "max_tokens": 6000,
+            "sections": {
+                "profile": {"max_tokens": 1500, "priority": 60},
+                "memory": {"max_tokens": 1000, "min_tokens": 200}
+            }
+        }
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None,
+                 sections: Optional[Dict[str, Dict[str, Any]]] = None,
+                 tokenizer: Optional[TokenizerBase] = None,
+                 baseline_every: int = 0):
+        """
+        Initialize the budgeter.
+
+        Args:
+            max_tokens: Total budget shared by all sections, or None for no limit.
+            sections: Per-section ``max_tokens``, ``min_tokens`` and ``priority``.
+            tokenizer: Tokenizer used to count tokens. Defaults to the heuristic one.
+            baseline_every: Count the uncompacted baseline of one call in this many,
+                0 to never count it.
+        """
+        self.max_tokens = max_tokens
+        self.section_config = sections or {}
+        self.tokenizer = tokenizer or get_tokenizer("heuristic")
+        self.baseline_every = max(int(baseline_every or 0), 0)
+        self._calls = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], tokenizer: Optional[TokenizerBase] = None,
+                    default_max_tokens: Optional[int] = None) -> "PromptBudgeter":
+        """
+        Create a budgeter from a configuration dictionary.
+
+        Args:
+            config: Dictionary with optional ``max_tokens`` and ``sections`` keys.
+            tokenizer: Tokenizer used to count tokens.
+            default_max_tokens: Budget used when the config does not set one.
+
+        Returns:
+            PromptBudgeter: The configured budgeter.
+        """
+        config = config or {}
+        return cls(
+            max_tokens=config.get("max_tokens", default_max_tokens),
+            sections=config.get("sections"),
+            tokenizer=tokenizer,
+            baseline_every=config.get("baseline_every", 0)
+        )
+
+    def _setting(self, name: str, key: str, default: Any = None) -> Any:
+        return self.section_config.get(name, {}).get(key, default)
+
+    def _priority(self, name: str) -> int:
+        return self._setting(name, "priority", DEFAULT_SECTION_PRIORITIES.get(name, 50))
+
+    def _render(self, content: SectionContent) -> str:
+        if isinstance(content, str):
+            return content
+        return "\n".join(content)
+
+    def _count(self, content: SectionContent) -> int:
+        if isinstance(content, str):
+            return self.tokenizer.count(content)
+        # Items are counted one by one so that their counts stay cached
+        # across calls; each separating newline is counted as one token
+        return sum(self.tokenizer.count(item) for item in content) + max(len(content) - 1, 0)
+
+    def _shrink(self, content: SectionContent, max_tokens: int) -> SectionContent:
+        """Shrink a section to at most ``max_tokens`` tokens."""
+        if max_tokens <= 0:
+            return [] if isinstance(content, list) else ""
+        if isinstance(content, list):
+            # Keep whole items from the front (highest ranked) while they fit
+            items, used = [], 0
+            for item in content:
+                cost = self.tokenizer.count(item) + (1 if items else 0)
+                if used + cost > max_tokens:
+                    break
+                items.append(item)
+                used += cost
+            if items or not content:
+                return items
+            # A single oversized item is cut like text
+            return [self._shrink(content[0], max_tokens)]
+        marker_tokens = self.tokenizer.count(TRUNCATION_MARKER)
+        if max_tokens <= marker_tokens:
+            return self.tokenizer.truncate(content, max_tokens)
+        return self.tokenizer.truncate(content, max_tokens - marker_tokens) + TRUNCATION_MARKER
+
+    def fit(self, sections: Dict[str, SectionContent], call_site: Optional[str] = None,
+            baseline: Optional[Baseline] = None) -> BudgetResult:
+        """
+        Fit sections into the budget.
+
+        Args:
+            sections: Mapping of section name to text, or to a list of items
+                ordered from most to least important.
+            call_site: If given, tokens saved are reported to the token tracker
+                under this call site.
+            baseline: Uncompacted form of some sections (e.g. the indented
+                profile), or a function returning it, used only to report
+                tokens saved by compaction. It is rendered and counted only
+                for one call in ``baseline_every``; other calls report the
+                tokens saved by trimming alone.
+
+        Returns:
+            BudgetResult: Rendered sections and token accounting.
+        """
+        contents: Dict[str, SectionContent] = dict(sections)
+        sizes = {name: self._count(content) for name, content in contents.items()}
+        self._calls += 1
+        if baseline is None or not self.baseline_every or self._calls % self.baseline_every:
+            baseline = {}
+        elif callable(baseline):
+            baseline = baseline()
+        tokens_before = sum(
+            self._count(baseline[name]) if name in baseline else size
+            for name, size in sizes.items()
+        )
+        truncated = []
+
+        # Per-section caps
+        for name, content in contents.items():
+            cap = self._setting(name, "max_tokens")
+            if cap is not None and sizes[name] > cap:
+                contents[name] = self._shrink(content, cap)
+                sizes[name] = self._count(contents[name])
+                truncated.append(name)
+
+        # Shared budget: trim lowest priority sections first, down to their minimum
+        if self.max_tokens is not None:
+            overflow = sum(sizes.values()) - self.max_tokens
+            for name in sorted(contents, key=self._priority):
+                if overflow <= 0:
+                    break
+                floor = self._setting(name, "min_tokens", 0)
+                target = max(floor, sizes[name] - overflow)
+                if target >= sizes[name]:
+                    continue
+                contents[name] = self._shrink(contents[name], target)
+                new_size = self._count(contents[name])
+                overflow -= sizes[name] - new_size
+                sizes[name] = new_size
+                if name not in truncated:
+                    truncated.append(name)
+            if overflow > 0:
+                logger.warning(f"Prompt exceeds budget of {self.max_tokens} tokens by {overflow} "
+                               f"after trimming all sections to their minimum")
+
+        result = BudgetResult(
+            sections={name: self._render(content) for name, content in contents.items()},
+            tokens_before=tokens_before,
+            tokens_after=sum(sizes.values()),
+            truncated=truncated
+        )
+        if call_site is not None:
+            try:
+                get_token_tracker().track_prompt_budget(
+                    call_site=call_site,
+                    tokens_before=result.tokens_before,
+                    tokens_after=result.tokens_after,
+                    truncated=bool(result.truncated)
+                )
+            except Exception as e:
+                logger.error(f"Error tracking prompt budget stats: {e}")
+        return result
@@ -0,0 +1,255 @@
+"""
+Structured output helpers for OneSim.
+
+This module wraps model calls whose responses must be parsed as JSON. It
+requests schema-constrained decoding when the model supports it, runs the
+local JSON repair step before any re-query, and reports parse failures,
+repairs, retries and latency per call site to the token usage tracker.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from ..core.model_base import ModelAdapterBase
+from ..core.model_response import ModelResponse
+from ..parsers.base import ParserBase
+from ..parsers.json_parsers import JsonBlockParser
+from .token_usage import get_token_tracker
+
+
+def _build_call_kwargs(model: ModelAdapterBase, response_schema: Optional[Dict[str, Any]],
+                       kwargs: Dict[str, Any], routing_key: Optional[str] = None) -> Dict[str, Any]:
+    """Add the response schema and routing key to the call kwargs if the model can honour them."""
+    call_kwargs = dict(kwargs)
+    if response_schema and getattr(model, "supports_structured_output", False):
+        call_kwargs["response_schema"] = response_schema
+    if routing_key is not None and getattr(model, "supports_routing_key", False):
+        call_kwargs["routing_key"] = routing_key
+    return call_kwargs
+
+
+def _parse(parser: ParserBase, response: ModelResponse,
+           validator: Optional[Callable[[Any], None]]) -> ModelResponse:
+    """Parse a response and run the optional validator on the parsed value."""
+    res = parser.parse(response)
+    if validator is not None:
+        validator(res.parsed)
+    return res
+
+
+def _record(call_site: str, success: bool, attempts: int, repaired: bool, constrained: bool):
+    """Report the outcome of a structured call to the token tracker."""
+    try:
+        get_token_tracker().track_structured_output(
+            call_site=call_site,
+            success=success,
+            attempts=attempts,
+            repaired=repaired,
+            constrained=constrained
+        )
+    except Exception as e:
+        logger.error(f"Error tracking structured output stats: {e}")
+
+
+def _record_call(call_site: str, model: ModelAdapterBase, response: ModelResponse, latency: float,
+                 ttft: Optional[float] = None, agent_type: Optional[str] = None, action: Optional[str] = None):
+    """Report latency and token usage of a single model call to the token tracker."""
+    try:
+        tracker = get_token_tracker()
+        model_name = response.model_info.get("model_name") or getattr(model, "config_name", None) or "unknown"
+        backend = response.model_info.get("config_name") or getattr(model, "config_name", None) or model_name
+        tracker.track_call_site(
+            call_site=call_site,
+            model_name=model_name,
+            latency=latency,
+            usage=response.usage
+        )
+        tracker.track_latency(model_name=model_name, backend=backend, latency=latency, ttft=ttft)
+        if agent_type is not None and action is not None:
+            tracker.track_action(agent_type, action, model_name, latency, response.usage)
+    except Exception as e:
+        logger.error(f"Error tracking call site stats: {e}")
+
+
+def _record_error(call_site: str, error: Exception):
+    """Report a failed model call to the token tracker."""
+    try:
+        get_token_tracker().track_call_error(call_site, error)
+    except Exception as e:
+        logger.error(f"Error tracking call errors: {e}")
+
+
+def call_tracked(model: ModelAdapterBase, messages: Any, call_site: str = "default",
+                 agent_type: Optional[str] = None, action: Optional[str] = None, **kwargs) -> ModelResponse:
+    """
+    Call a model synchronously and report latency and tokens for the call site.
+
+    Streamed responses are read to the end so that the time to first token
+    and the full latency can be reported.
+
+    Args:
+        model: The model adapter (or load balancer) to call.
+        messages: Formatted messages for the model.
+        call_site: Logical origin of the call, used for reporting.
+        agent_type: Type of the calling agent, for per-action reporting.
+        action: Agent action that made the call, for per-action reporting.
+        **kwargs: Additional parameters for the model call.
+
+    Returns:
+        ModelResponse: The unparsed model response.
+    """
+    start = time.perf_counter()
+    try:
+        response = model(messages, **kwargs)
+        ttft = response.consume(start) if response.is_streaming else None
+    except Exception as e:
+        _record_error(call_site, e)
+        raise
+    _record_call(call_site, model, response, time.perf_counter() - start, ttft, agent_type, action)
+    return response
+
+
+async def acall_tracked(model: ModelAdapterBase, messages: Any, call_site: str = "default",
+                        agent_type: Optional[str] = None, action: Optional[str] = None, **kwargs) -> ModelResponse:
+    """
+    Call a model asynchronously and report latency and tokens for the call site.
+
+    Streamed responses are read to the end so that the time to first token
+    and the full latency can be reported.
+
+    Args:
+        model: The model adapter (or load balancer) to call.
+        messages: Formatted messages for the model.
+        call_site: Logical origin of the call, used for reporting.
+        agent_type: Type of the calling agent, for per-action reporting.
+        action: Agent action that made the call, for per-action reporting.
+        **kwargs: Additional parameters for the model call.
+
+    Returns:
+        ModelResponse: The unparsed model response.
+    """
+    start = time.perf_counter()
+    try:
+        response = await model.acall(messages, **kwargs)
+        ttft = await response.aconsume(start) if response.is_streaming else None
+    except Exception as e:
+        _record_error(call_site, e)
+        raise
+    _record_call(call_site, model, response, time.perf_counter() - start, ttft, agent_type, action)
+    return response
+
+
+def call_structured(
+    model: ModelAdapterBase,
+    messages: Any,
+    parser: Optional[ParserBase] = None,
+    call_site: str = "default",
+    response_schema: Optional[Dict[str, Any]] = None,
+    max_retries: int = 0,
+    validator: Optional[Callable[[Any], None]] = None,
+    routing_key: Optional[str] = None,
+    agent_type: Optional[str] = None,
+    action: Optional[str] = None,
+    **kwargs
+) -> ModelResponse:
+    """
+    Call a model synchronously and parse its response as structured data.
+
+    Args:
+        model: The model adapter (or load balancer) to call.
+        messages: Formatted messages for the model.
+        parser: Parser used to extract the structured value. Defaults to
+            a JsonBlockParser with local repair enabled.
+        call_site: Logical origin of the call, used for reporting.
+        response_schema: Optional JSON schema for constrained decoding.
+        max_retries: Number of re-queries allowed after a parse failure.
+        validator: Optional callable that raises ValueError on invalid data.
+        routing_key: Optional affinity key (e.g. the agent id) used by load
+            balancers to keep a caller on the same backend.
+        agent_type: Type of the calling agent, for per-action reporting.
+        action: Agent action that made the call, for per-action reporting.
+        **kwargs: Additional parameters for the model call.
+
+    Returns:
+        ModelResponse: The response with the ``parsed`` field populated.
+
+    Raises:
+        ValueError: If no valid response is obtained within the retry budget.
+    """
+    parser = parser or JsonBlockParser()
+    call_kwargs = _build_call_kwargs(model, response_schema, kwargs, routing_key)
+    constrained = "response_schema" in call_kwargs
+    last_error = None
+
+    for attempt in range(1, max_retries + 2):
+        response = call_tracked(model, messages, call_site, agent_type, action, **call_kwargs)
+        try:
+            res = _parse(parser, response, validator)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            last_error = e
+            logger.warning(f"[{call_site}] Attempt {attempt}/{max_retries + 1}: failed to parse response - {e}")
+            continue
+        _record(call_site, True, attempt, bool(res.model_info.get("repaired")), constrained)
+        return res
+
+    _record(call_site, False, max_retries + 1, False, constrained)
+    raise ValueError(f"[{call_site}] Failed to obtain a valid structured response: {last_error}")
+
+
+async def acall_structured(
+    model: ModelAdapterBase,
+    messages: Any,
+    parser: Optional[ParserBase] = None,
+    call_site: str = "default",
+    response_schema: Optional[Dict[str, Any]] = None,
+    max_retries: int = 0,
+    validator: Optional[Callable[[Any], None]] = None,
+    routing_key: Optional[str] = None,
+    agent_type: Optional[str] = None,
+    action: Optional[str] = None,
+    **kwargs
+) -> ModelResponse:
+    """
+    Call a model asynchronously and parse its response as structured data.
+
+    Args:
+        model: The model adapter (or load balancer) to call.
+        messages: Formatted messages for the model.
+        parser: Parser used to extract the structured value. Defaults to
+            a JsonBlockParser with local repair enabled.
+        call_site: Logical origin of the call, used for reporting.
+        response_schema: Optional JSON schema for constrained decoding.
+        max_retries: Number of re-queries allowed after a parse failure.
+        validator: Optional callable that raises ValueError on invalid data.
+        routing_key: Optional affinity key (e.g. the agent id) used by load
+            balancers to keep a caller on the same backend.
+        agent_type: Type of the calling agent, for per-action reporting.
+        action: Agent action that made the call, for per-action reporting.
+        **kwargs: Additional parameters for the model call.
+
+    Returns:
+        ModelResponse: The response with the ``parsed`` field populated.
+
+    Raises:
+        ValueError: If no valid response is obtained within the retry budget.
+    """
+    parser = parser or JsonBlockParser()
+    call_kwargs = _build_call_kwargs(model, response_schema, kwargs, routing_key)
+    constrained = "response_schema" in call_kwargs
+    last_error = None
+
+    for attempt in range(1, max_retries + 2):
+        response = await acall_tracked(model, messages, call_site, agent_type, action, **call_kwargs)
+        try:
+            res = _parse(parser, response, validator)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            last_error = e
+            logger.warning(f"[{call_site}] Attempt {attempt}/{max_retries + 1}: failed to parse response - {e}")
+            continue
+        _record(call_site, True, attempt, bool(res.model_info.get("repaired")), constrained)
+        return res
+
+    _record(call_site, False, max_retries + 1, False, constrained)
+    raise ValueError(f"[{call_site}] Failed to obtain a valid structured response: {last_error}")
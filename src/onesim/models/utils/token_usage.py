@@ -5,12 +5,114 @@ This module provides functionality for tracking token usage across different mod
 and calculating estimated costs.
 """
 
+import bisect
 import json
 import time
 from threading import Lock
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 from loguru import logger
 
+from onesim.utils.runtime_stats import runtime_stats
+
+# Upper bounds (seconds) of latency histogram buckets. The bounds are fixed so
+# that histograms from different workers can be merged bucket by bucket.
+LATENCY_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5,
+    10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram with percentile estimates.
+    
+    Percentiles are interpolated linearly inside the bucket that contains
+    them, so they are accurate to the bucket resolution.
+    """
+    
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, value: float):
+        """
+        Record a single observation.
+        
+        Args:
+            value: Observed latency in seconds
+        """
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+    
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile.
+        
+        Args:
+            q: Percentile as a fraction, e.g. 0.95
+            
+        Returns:
+            Estimated latency in seconds, 0.0 if the histogram is empty
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                upper = min(upper, self.max)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.max
+    
+    def merge(self, other: Union["LatencyHistogram", Dict[str, Any]]):
+        """
+        Add the observations of another histogram.
+        
+        Args:
+            other: A histogram, or its ``to_dict`` form (e.g. from a worker)
+        """
+        if isinstance(other, dict):
+            other = LatencyHistogram.from_dict(other)
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the histogram to a JSON-serializable dictionary with percentiles."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "total": self.total,
+            "buckets": list(self.counts)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """Rebuild a histogram from its ``to_dict`` form."""
+        hist = cls()
+        buckets = data.get("buckets") or []
+        if len(buckets) == len(hist.counts):
+            hist.counts = list(buckets)
+        hist.count = data.get("count", 0)
+        hist.total = data.get("total", 0.0)
+        hist.max = data.get("max", 0.0)
+        return hist
+
+
 class TokenUsageTracker:
     """
     Tracks token usage statistics across different model calls.
@@ -26,6 +128,16 @@ class TokenUsageTracker:
         self.total_tokens = 0
         self.model_usage = {}  # 按模型名称统计
         self.request_count = 0
+        self.structured_output_stats = {}  # Parse outcomes by call site
+        self.call_site_usage = {}  # Tokens and latency by call site
+        self.prompt_budget_stats = {}  # Prompt tokens saved by budgeting, by call site
+        self.model_latency: Dict[str, LatencyHistogram] = {}  # Latency by model name
+        self.model_ttft: Dict[str, LatencyHistogram] = {}  # Time to first token by model name
+        self.backend_stats = {}  # Latency, errors and retries by backend (model config)
+        self.action_usage = {}  # Tokens and latency by agent type and action
+        self.error_count = 0  # Model calls that failed for the caller
+        self.retry_count = 0  # Load balancer failovers and structured output re-queries
+        self.error_types = {}  # Failed calls by exception type
         self.start_time = time.time()
         
     def track(self, model_name: str, prompt_tokens: int, completion_tokens: int, total_tokens: Optional[int] = None):
@@ -64,6 +176,293 @@ class TokenUsageTracker:
         if self.request_count % 10 == 0:
             logger.debug(f"Token usage after {self.request_count} requests: {self.total_tokens} tokens")
     
+    def track_call_site(self, call_site: str, model_name: str, latency: float,
+                        usage: Optional[Dict[str, Any]] = None):
+        """
+        Track latency and token usage of a model call by its call site.
+        
+        Args:
+            call_site: Logical origin of the call (e.g. "reaction", "importance")
+            model_name: Name of the model that served the call
+            latency: Wall-clock duration of the call in seconds
+            usage: Token usage reported by the model, if any
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        total_tokens = usage.get("total_tokens") or prompt_tokens + completion_tokens
+
+        if call_site not in self.call_site_usage:
+            self.call_site_usage[call_site] = {
+                "request_count": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "total_latency": 0.0,
+                "max_latency": 0.0,
+                "error_count": 0,
+                "models": {}
+            }
+
+        stats = self.call_site_usage[call_site]
+        stats["request_count"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["total_tokens"] += total_tokens
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+
+        if model_name not in stats["models"]:
+            stats["models"][model_name] = {
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "request_count": 0
+            }
+        model_stats = stats["models"][model_name]
+        model_stats["prompt_tokens"] += prompt_tokens
+        model_stats["completion_tokens"] += completion_tokens
+        model_stats["request_count"] += 1
+
+    def _backend(self, backend: str, model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Get the stats entry of a backend, creating it if necessary."""
+        if backend not in self.backend_stats:
+            self.backend_stats[backend] = {
+                "model_name": model_name or backend,
+                "request_count": 0,
+                "error_count": 0,
+                "retry_count": 0,
+                "errors": {},
+                "latency": LatencyHistogram(),
+                "ttft": LatencyHistogram()
+            }
+        return self.backend_stats[backend]
+
+    def track_latency(self, model_name: str, backend: str, latency: float, ttft: Optional[float] = None):
+        """
+        Track the latency of a successful model call.
+        
+        Args:
+            model_name: Name of the model that served the call
+            backend: Config name of the concrete backend (e.g. one vLLM server)
+            latency: Wall-clock duration of the call in seconds
+            ttft: Time to first token in seconds, for streamed responses
+        """
+        self.model_latency.setdefault(model_name, LatencyHistogram()).record(latency)
+        stats = self._backend(backend, model_name)
+        stats["request_count"] += 1
+        stats["latency"].record(latency)
+        if ttft is not None:
+            self.model_ttft.setdefault(model_name, LatencyHistogram()).record(ttft)
+            stats["ttft"].record(ttft)
+
+    def track_backend_error(self, model_name: str, backend: str, error: Union[Exception, str],
+                            retried: bool = False):
+        """
+        Track a failed request to a single backend.
+        
+        Args:
+            model_name: Name of the model behind the backend
+            backend: Config name of the backend that failed
+            error: The exception raised, or its type name
+            retried: Whether the request was retried on another backend
+        """
+        error_type = error if isinstance(error, str) else type(error).__name__
+        stats = self._backend(backend, model_name)
+        stats["error_count"] += 1
+        stats["errors"][error_type] = stats["errors"].get(error_type, 0) + 1
+        if retried:
+            stats["retry_count"] += 1
+            self.retry_count += 1
+
+    def track_call_error(self, call_site: str, error: Union[Exception, str]):
+        """
+        Track a model call that failed for its caller, after any failover.
+        
+        Args:
+            call_site: Logical origin of the call
+            error: The exception raised, or its type name
+        """
+        error_type = error if isinstance(error, str) else type(error).__name__
+        self.error_count += 1
+        self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+        if call_site in self.call_site_usage:
+            stats = self.call_site_usage[call_site]
+            stats["error_count"] = stats.get("error_count", 0) + 1
+
+    def track_action(self, agent_type: str, action: str, model_name: str, latency: float,
+                     usage: Optional[Dict[str, Any]] = None):
+        """
+        Track latency and token usage of a model call by agent type and action.
+        
+        Args:
+            agent_type: Type of the agent that made the call
+            action: Name of the agent action (handler) that made the call
+            model_name: Name of the model that served the call
+            latency: Wall-clock duration of the call in seconds
+            usage: Token usage reported by the model, if any
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+
+        actions = self.action_usage.setdefault(agent_type, {})
+        if action not in actions:
+            actions[action] = {
+                "request_count": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "models": {},
+                "latency": LatencyHistogram()
+            }
+        stats = actions[action]
+        stats["request_count"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["total_tokens"] += usage.get("total_tokens") or prompt_tokens + completion_tokens
+        stats["latency"].record(latency)
+
+        model_stats = stats["models"].setdefault(model_name, {"prompt_tokens": 0, "completion_tokens": 0})
+        model_stats["prompt_tokens"] += prompt_tokens
+        model_stats["completion_tokens"] += completion_tokens
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Get latency and time-to-first-token histograms.
+        
+        Returns:
+            Dictionary with ``latency`` and ``ttft`` histograms by model and by
+            backend, and error and retry counts by backend
+        """
+        return {
+            "latency": {
+                "models": {k: v.to_dict() for k, v in self.model_latency.items()},
+                "backends": {k: v["latency"].to_dict() for k, v in self.backend_stats.items()}
+            },
+            "ttft": {
+                "models": {k: v.to_dict() for k, v in self.model_ttft.items()},
+                "backends": {k: v["ttft"].to_dict() for k, v in self.backend_stats.items() if v["ttft"].count}
+            },
+            "backends": {
+                k: {key: value for key, value in v.items() if key not in ("latency", "ttft")}
+                for k, v in self.backend_stats.items()
+            }
+        }
+
+    def get_action_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get token usage and latency by agent type and action.
+        
+        Returns:
+            Nested dictionary ``{agent_type: {action: stats}}``
+        """
+        return {
+            agent_type: {
+                action: {
+                    **stats,
+                    "models": {k: dict(v) for k, v in stats["models"].items()},
+                    "latency": stats["latency"].to_dict()
+                }
+                for action, stats in actions.items()
+            }
+            for agent_type, actions in self.action_usage.items()
+        }
+
+    def get_call_site_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get token usage and latency statistics by call site.
+        
+        Returns:
+            Dictionary mapping call sites to counters and average latency
+        """
+        result = {}
+        for call_site, stats in self.call_site_usage.items():
+            requests = stats["request_count"] or 1
+            result[call_site] = {
+                **stats,
+                "models": {k: dict(v) for k, v in stats["models"].items()},
+                "avg_latency": stats["total_latency"] / requests
+            }
+        return result
+
+    def track_prompt_budget(self, call_site: str, tokens_before: int, tokens_after: int,
+                            truncated: bool = False):
+        """
+        Track the effect of prompt budgeting on a single call.
+        
+        Args:
+            call_site: Logical origin of the call (e.g. "reaction")
+            tokens_before: Prompt tokens before budgeting and compaction
+            tokens_after: Prompt tokens actually sent
+            truncated: Whether any section had to be trimmed
+        """
+        if call_site not in self.prompt_budget_stats:
+            self.prompt_budget_stats[call_site] = {
+                "calls": 0,
+                "tokens_before": 0,
+                "tokens_after": 0,
+                "tokens_saved": 0,
+                "truncated_calls": 0
+            }
+
+        stats = self.prompt_budget_stats[call_site]
+        stats["calls"] += 1
+        stats["tokens_before"] += tokens_before
+        stats["tokens_after"] += tokens_after
+        stats["tokens_saved"] += tokens_before - tokens_after
+        if truncated:
+            stats["truncated_calls"] += 1
+
+    def track_structured_output(self, call_site: str, success: bool, attempts: int = 1,
+                                repaired: bool = False, constrained: bool = False):
+        """
+        Track the parse outcome of a structured (JSON) model call.
+        
+        Args:
+            call_site: Logical origin of the call (e.g. "reaction", "memory")
+            success: Whether a valid result was eventually parsed
+            attempts: Number of model calls made, including re-queries
+            repaired: Whether the local JSON repair step was needed
+            constrained: Whether the request used schema-constrained decoding
+        """
+        if call_site not in self.structured_output_stats:
+            self.structured_output_stats[call_site] = {
+                "calls": 0,
+                "failures": 0,
+                "retries": 0,
+                "repairs": 0,
+                "constrained_calls": 0
+            }
+
+        stats = self.structured_output_stats[call_site]
+        stats["calls"] += 1
+        stats["retries"] += max(attempts - 1, 0)
+        self.retry_count += max(attempts - 1, 0)
+        if not success:
+            stats["failures"] += 1
+        if repaired:
+            stats["repairs"] += 1
+        if constrained:
+            stats["constrained_calls"] += 1
+
+    def get_structured_output_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get structured output parse statistics with failure and retry rates.
+        
+        Returns:
+            Dictionary mapping call sites to counters and derived rates
+        """
+        result = {}
+        for call_site, stats in self.structured_output_stats.items():
+            calls = stats["calls"] or 1
+            result[call_site] = {
+                **stats,
+                "failure_rate": stats["failures"] / calls,
+                "retry_rate": stats["retries"] / calls,
+                "repair_rate": stats["repairs"] / calls
+            }
+        return result
+
     def get_usage_stats(self) -> Dict[str, Any]:
         """
         Get comprehensive token usage statistics.
@@ -72,12 +471,23 @@ class TokenUsageTracker:
             Dictionary containing token usage statistics
         """
         elapsed_time = time.time() - self.start_time
+        latency_stats = self.get_latency_stats()
         return {
             "total_prompt_tokens": self.total_prompt_tokens,
             "total_completion_tokens": self.total_completion_tokens,
             "total_tokens": self.total_tokens,
             "request_count": self.request_count,
             "model_usage": self.model_usage,
+            "structured_output": self.get_structured_output_stats(),
+            "call_sites": self.get_call_site_stats(),
+            "prompt_budget": {k: dict(v) for k, v in self.prompt_budget_stats.items()},
+            "latency": latency_stats["latency"],
+            "ttft": latency_stats["ttft"],
+            "backends": latency_stats["backends"],
+            "actions": self.get_action_stats(),
+            "error_count": self.error_count,
+            "retry_count": self.retry_count,
+            "error_types": dict(self.error_types),
             "elapsed_time_seconds": elapsed_time,
             "tokens_per_second": self.total_tokens / elapsed_time if elapsed_time > 0 else 0
         }
@@ -105,13 +515,8 @@ class TokenUsageTracker:
         model_costs = {}
         
         for model, usage in self.model_usage.items():
-            model_price = None
-            
             # 寻找匹配的价格配置
-            for price_model, price in price_config.items():
-                if price_model in model:
-                    model_price = price
-                    break
+            model_price = self._find_price(price_config, model)
             
             if model_price:
                 prompt_cost = usage["prompt_tokens"] * model_price["prompt"] / 1000
@@ -126,10 +531,43 @@ class TokenUsageTracker:
                 
                 cost += total_cost
         
+        call_site_costs = {
+            call_site: {"total_cost": self._models_cost(price_config, stats["models"])}
+            for call_site, stats in self.call_site_usage.items()
+        }
+        action_costs = {
+            agent_type: {
+                action: {"total_cost": self._models_cost(price_config, stats["models"])}
+                for action, stats in actions.items()
+            }
+            for agent_type, actions in self.action_usage.items()
+        }
+        
         return {
             "total_cost_usd": cost,
-            "model_costs": model_costs
+            "model_costs": model_costs,
+            "call_site_costs": call_site_costs,
+            "action_costs": action_costs
         }
+
+    @classmethod
+    def _models_cost(cls, price_config: Dict[str, Dict[str, float]], models: Dict[str, Dict[str, int]]) -> float:
+        """Compute the cost of token counts broken down by model name."""
+        total = 0.0
+        for model, usage in models.items():
+            model_price = cls._find_price(price_config, model)
+            if model_price:
+                total += usage["prompt_tokens"] * model_price["prompt"] / 1000
+                total += usage["completion_tokens"] * model_price["completion"] / 1000
+        return total
+
+    @staticmethod
+    def _find_price(price_config: Dict[str, Dict[str, float]], model: str) -> Optional[Dict[str, float]]:
+        """Find the first price entry whose key is contained in the model name."""
+        for price_model, price in price_config.items():
+            if price_model in model:
+                return price
+        return None
         
     def reset(self):
         """Reset all counters to zero."""
@@ -228,6 +666,106 @@ def export_token_usage_stats(filepath: Optional[str] = None) -> str:
     tracker = get_token_tracker()
     return tracker.export_to_file(filepath)
 
+def _add_counters(target: Dict[str, Any], source: Dict[str, Any]):
+    """Add numeric counters of ``source`` into ``target``, recursing into dicts."""
+    for key, value in source.items():
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            if key.startswith("max_"):
+                target[key] = max(target.get(key, 0), value)
+            else:
+                target[key] = target.get(key, 0) + value
+        elif isinstance(value, dict):
+            _add_counters(target.setdefault(key, {}), value)
+        elif key not in target:
+            target[key] = value
+
+
+def _merge_histograms(target: Dict[str, Dict[str, Any]], source: Dict[str, Dict[str, Any]]):
+    """Merge histograms in ``to_dict`` form, keyed by name."""
+    for name, data in source.items():
+        hist = LatencyHistogram.from_dict(target[name]) if name in target else LatencyHistogram()
+        hist.merge(data)
+        target[name] = hist.to_dict()
+
+
+def merge_usage_stats(stats_by_node: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge token usage statistics collected from several nodes.
+    
+    Counters are summed, latency histograms are merged bucket by bucket (so
+    merged percentiles are exact to the bucket resolution) and derived values
+    such as averages and rates are recomputed. The nodes' runtime statistics
+    under ``runtime`` are merged by ``runtime_stats.merge``.
+    
+    Args:
+        stats_by_node: Mapping of node id (e.g. "master", worker ids) to the
+            output of ``get_token_usage_stats`` on that node
+            
+    Returns:
+        Merged statistics, with the per-node input under ``worker_stats``
+    """
+    merged = {
+        "total_prompt_tokens": 0,
+        "total_completion_tokens": 0,
+        "total_tokens": 0,
+        "request_count": 0,
+        "error_count": 0,
+        "retry_count": 0,
+        "error_types": {},
+        "model_usage": {},
+        "call_sites": {},
+        "structured_output": {},
+        "prompt_budget": {},
+        "latency": {"models": {}, "backends": {}},
+        "ttft": {"models": {}, "backends": {}},
+        "backends": {},
+        "actions": {},
+        "runtime": {},
+        "worker_stats": {}
+    }
+
+    for node_id, stats in stats_by_node.items():
+        if not stats:
+            continue
+        merged["worker_stats"][node_id] = stats
+        for key in ("total_prompt_tokens", "total_completion_tokens", "total_tokens",
+                    "request_count", "error_count", "retry_count"):
+            merged[key] += stats.get(key, 0)
+        for key in ("error_types", "model_usage", "prompt_budget", "backends"):
+            _add_counters(merged[key], stats.get(key, {}))
+        for call_site, site_stats in stats.get("call_sites", {}).items():
+            _add_counters(merged["call_sites"].setdefault(call_site, {}),
+                          {k: v for k, v in site_stats.items() if k != "avg_latency"})
+        for call_site, parse_stats in stats.get("structured_output", {}).items():
+            _add_counters(merged["structured_output"].setdefault(call_site, {}),
+                          {k: v for k, v in parse_stats.items() if not k.endswith("_rate")})
+        for kind in ("latency", "ttft"):
+            for scope in ("models", "backends"):
+                _merge_histograms(merged[kind][scope], stats.get(kind, {}).get(scope, {}))
+        for agent_type, actions in stats.get("actions", {}).items():
+            merged_actions = merged["actions"].setdefault(agent_type, {})
+            for action, action_stats in actions.items():
+                target = merged_actions.setdefault(action, {})
+                _add_counters(target, {k: v for k, v in action_stats.items() if k != "latency"})
+                _merge_histograms(target, {"latency": action_stats.get("latency", {})})
+
+    # Recompute derived values
+    for site_stats in merged["call_sites"].values():
+        site_stats["avg_latency"] = site_stats.get("total_latency", 0.0) / (site_stats.get("request_count") or 1)
+    for parse_stats in merged["structured_output"].values():
+        calls = parse_stats.get("calls") or 1
+        parse_stats["failure_rate"] = parse_stats.get("failures", 0) / calls
+        parse_stats["retry_rate"] = parse_stats.get("retries", 0) / calls
+        parse_stats["repair_rate"] = parse_stats.get("repairs", 0) / calls
+
+    # 运行时指标（队列、锁、缓存等）由运行时统计注册表合并，计量值取最大而不是相加
+    merged["runtime"] = runtime_stats.merge(
+        {node_id: stats.get("runtime", {}) for node_id, stats in stats_by_node.items() if stats}
+    )
+    return merged
+
 def log_token_usage():
     """Log current token usage statistics."""
     stats = get_token_usage_stats()
@@ -239,6 +777,34 @@ def log_token_usage():
     for model, usage in stats['model_usage'].items():
         logger.info(f"  - {model}: {usage['total_tokens']} tokens in {usage['request_count']} requests")
     
+    # Log structured output parse outcomes per call site
+    for call_site, parse_stats in stats.get('structured_output', {}).items():
+        logger.info(f"  - {call_site}: {parse_stats['calls']} structured calls, "
+                    f"failure rate {parse_stats['failure_rate']:.2%}, "
+                    f"retry rate {parse_stats['retry_rate']:.2%}, "
+                    f"repair rate {parse_stats['repair_rate']:.2%}")
+    
+    # Log prompt tokens saved by budgeting per call site
+    for call_site, budget_stats in stats.get('prompt_budget', {}).items():
+        logger.info(f"  - [{call_site}] prompt budgeting saved {budget_stats['tokens_saved']} tokens "
+                    f"in {budget_stats['calls']} calls ({budget_stats['truncated_calls']} truncated)")
+    
+    # Log latency and tokens per call site
+    for call_site, site_stats in stats.get('call_sites', {}).items():
+        logger.info(f"  - [{call_site}] {site_stats['request_count']} requests, "
+                    f"{site_stats['total_tokens']} tokens, "
+                    f"avg latency {site_stats['avg_latency']:.2f}s")
+    
+    # Log latency percentiles per model
+    for model, hist in stats.get('latency', {}).get('models', {}).items():
+        ttft = stats.get('ttft', {}).get('models', {}).get(model)
+        ttft_str = f", ttft p50 {ttft['p50']:.2f}s" if ttft else ""
+        logger.info(f"  - [{model}] latency p50 {hist['p50']:.2f}s, p95 {hist['p95']:.2f}s, "
+                    f"p99 {hist['p99']:.2f}s{ttft_str}")
+    
+    if stats.get('error_count') or stats.get('retry_count'):
+        logger.info(f"  - {stats.get('error_count', 0)} failed calls, {stats.get('retry_count', 0)} retries")
+    
     # Estimate and log cost
     cost_estimate = estimate_token_cost()
     if cost_estimate['total_cost_usd'] > 0:
@@ -0,0 +1,253 @@
+"""
+Tokenizer utilities for OneSim.
+
+This module provides token counting and token-boundary truncation for prompt
+budgeting. Tokenizers are pluggable: ``tiktoken`` encodings, HuggingFace
+tokenizers and a dependency-free heuristic are built in, and others can be
+added with ``register_tokenizer``. Both tokenizer instances and per-text
+token counts are cached, since agents re-send the same profile and
+relationship text on every call.
+"""
+
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class TokenizerBase:
+    """Base class for tokenizers used by the prompt budgeter."""
+
+    name: str = "base"
+
+    def encode(self, text: str) -> List[int]:
+        """
+        Encode text into token ids.
+
+        Args:
+            text: Text to encode.
+
+        Returns:
+            List of token ids.
+        """
+        raise NotImplementedError("Subclasses must implement encode method")
+
+    def decode(self, tokens: List[int]) -> str:
+        """
+        Decode token ids back into text.
+
+        Args:
+            tokens: Token ids to decode.
+
+        Returns:
+            The decoded text.
+        """
+        raise NotImplementedError("Subclasses must implement decode method")
+
+    def count(self, text: str) -> int:
+        """Count the tokens in a text."""
+        return len(self.encode(text)) if text else 0
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate text to at most ``max_tokens`` tokens on a token boundary.
+
+        Args:
+            text: Text to truncate.
+            max_tokens: Maximum number of tokens to keep.
+
+        Returns:
+            The truncated text.
+        """
+        if max_tokens <= 0 or not text:
+            return ""
+        tokens = self.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.decode(tokens[:max_tokens])
+
+
+class HeuristicTokenizer(TokenizerBase):
+    """
+    Dependency-free approximation of BPE tokenization.
+
+    Splits text into words, numbers and single punctuation marks, and counts
+    long words as several tokens (about four characters per token). Each CJK
+    character counts as one token. It has no vocabulary, so only ``count``
+    and ``truncate`` are supported.
+    """
+
+    name = "heuristic"
+    _PIECE_RE = re.compile(r"[一-鿿぀-ヿ가-힯]|\s*[A-Za-z]+|\s*\d+|\s*[^\sA-Za-z\d]|\s+")
+
+    def __init__(self, chars_per_token: int = 4):
+        self.chars_per_token = chars_per_token
+
+    def _pieces(self, text: str) -> List[str]:
+        pieces = []
+        for match in self._PIECE_RE.finditer(text):
+            piece = match.group(0)
+            # Split long words into chunks of roughly one token each
+            while len(piece) > self.chars_per_token + 1:
+                pieces.append(piece[:self.chars_per_token])
+                piece = piece[self.chars_per_token:]
+            pieces.append(piece)
+        return pieces
+
+    def count(self, text: str) -> int:
+        return len(self._pieces(text)) if text else 0
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0 or not text:
+            return ""
+        pieces = self._pieces(text)
+        if len(pieces) <= max_tokens:
+            return text
+        return "".join(pieces[:max_tokens])
+
+
+class TiktokenTokenizer(TokenizerBase):
+    """Tokenizer backed by a ``tiktoken`` encoding (OpenAI models)."""
+
+    def __init__(self, encoding_name: Optional[str] = None, model_name: Optional[str] = None):
+        import tiktoken
+        if encoding_name:
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        else:
+            self._encoding = tiktoken.encoding_for_model(model_name)
+        self.name = f"tiktoken:{self._encoding.name}"
+
+    def encode(self, text: str) -> List[int]:
+        return self._encoding.encode(text, disallowed_special=())
+
+    def decode(self, tokens: List[int]) -> str:
+        return self._encoding.decode(tokens)
+
+
+class HFTokenizer(TokenizerBase):
+    """Tokenizer backed by a HuggingFace tokenizer (local models served by vLLM)."""
+
+    def __init__(self, path: str):
+        from transformers import AutoTokenizer
+        self._tokenizer = AutoTokenizer.from_pretrained(path)
+        self.name = f"hf:{path}"
+
+    def encode(self, text: str) -> List[int]:
+        return self._tokenizer.encode(text, add_special_tokens=False)
+
+    def decode(self, tokens: List[int]) -> str:
+        return self._tokenizer.decode(tokens)
+
+
+class CachedTokenizer(TokenizerBase):
+    """
+    Wraps a tokenizer with an LRU cache of token counts keyed by text.
+    """
+
+    def __init__(self, tokenizer: TokenizerBase, max_entries: int = 4096):
+        self.tokenizer = tokenizer
+        self.name = tokenizer.name
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, text: str) -> List[int]:
+        return self.tokenizer.encode(text)
+
+    def decode(self, tokens: List[int]) -> str:
+        return self.tokenizer.decode(tokens)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cached = self._counts.get(text)
+        if cached is not None:
+            self._counts.move_to_end(text)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        result = self.tokenizer.count(text)
+        self._counts[text] = result
+        if len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+        return result
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.count(text) <= max_tokens:
+            return text
+        return self.tokenizer.truncate(text, max_tokens)
+
+
+# Registry of tokenizer factories by spec prefix, e.g. "tiktoken:cl100k_base"
+_tokenizer_factories: Dict[str, Callable[[str], TokenizerBase]] = {
+    "heuristic": lambda arg: HeuristicTokenizer(),
+    "tiktoken": lambda arg: TiktokenTokenizer(encoding_name=arg),
+    "hf": lambda arg: HFTokenizer(arg),
+}
+_tokenizer_cache: Dict[str, CachedTokenizer] = {}
+_tokenizer_lock = Lock()
+
+
+def register_tokenizer(kind: str, factory: Callable[[str], TokenizerBase]):
+    """
+    Register a tokenizer factory.
+
+    Args:
+        kind: Prefix used in tokenizer specs (the part before ``:``).
+        factory: Callable receiving the part after ``:`` and returning a tokenizer.
+    """
+    _tokenizer_factories[kind] = factory
+
+
+def _default_spec(model_name: Optional[str]) -> str:
+    """Pick a tokenizer spec for a model when none is configured."""
+    if model_name:
+        if os.path.isdir(model_name):
+            return f"hf:{model_name}"
+        try:
+            import tiktoken
+            return f"tiktoken:{tiktoken.encoding_for_model(model_name).name}"
+        except (ImportError, KeyError):
+            pass
+    return "heuristic"
+
+
+def get_tokenizer(spec: Optional[str] = None, model_name: Optional[str] = None) -> TokenizerBase:
+    """
+    Get a cached tokenizer by spec, or pick one for a model.
+
+    Specs have the form ``<kind>[:<arg>]``, e.g. ``"tiktoken:cl100k_base"``,
+    ``"hf:/data/Qwen2.5-14B-Instruct"`` or ``"heuristic"``. Without a spec, local
+    model paths use their HuggingFace tokenizer, OpenAI model names use
+    tiktoken, and anything else uses the heuristic tokenizer. If the chosen
+    tokenizer cannot be loaded, the heuristic tokenizer is used instead.
+
+    Args:
+        spec: Tokenizer spec, typically the ``tokenizer`` field of a model config.
+        model_name: Model name used to pick a default tokenizer.
+
+    Returns:
+        TokenizerBase: A tokenizer with cached token counts.
+    """
+    spec = spec or _default_spec(model_name)
+    tokenizer = _tokenizer_cache.get(spec)
+    if tokenizer is not None:
+        return tokenizer
+
+    with _tokenizer_lock:
+        if spec not in _tokenizer_cache:
+            kind, _, arg = spec.partition(":")
+            factory = _tokenizer_factories.get(kind)
+            try:
+                if factory is None:
+                    raise ValueError(f"Unknown tokenizer kind '{kind}'")
+                base = factory(arg)
+            except Exception as e:
+                logger.warning(f"Failed to load tokenizer '{spec}', using heuristic tokenizer: {e}")
+                base = HeuristicTokenizer()
+            _tokenizer_cache[spec] = CachedTokenizer(base)
+        return _tokenizer_cache[spec]
@@ -1,4 +1,5 @@
 from onesim.planning.base import PlanningBase
+from onesim.models import acall_tracked
 from onesim.agent.general_agent import Message
 
 class BDIPlanning(PlanningBase):
@@ -34,5 +35,5 @@ class BDIPlanning(PlanningBase):
             Message("system", self.sys_prompt, role="system"),
             Message("user", prompt, role="user")
         )
-        response = await self.model.acall(prompt)
+        response = await acall_tracked(self.model, prompt, call_site="planning")
         return response.text
\ No newline at end of file
@@ -1,4 +1,5 @@
 from onesim.planning.base import PlanningBase
+from onesim.models import acall_tracked
 from onesim.agent.general_agent import Message
 
 class COTPlanning(PlanningBase):
@@ -26,5 +27,5 @@ class COTPlanning(PlanningBase):
             Message("system", self.sys_prompt, role="system"),
             Message("user", prompt, role="user")
         )
-        response = await self.model.acall(prompt)
+        response = await acall_tracked(self.model, prompt, call_site="planning")
         return response.text
\ No newline at end of file
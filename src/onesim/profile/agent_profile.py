@@ -6,14 +6,20 @@ import json
 import csv
 import os
 import random
+import sys
 from onesim.models.core.message import Message
-from onesim.models.parsers import JsonBlockParser
+from onesim.models.utils.structured_output import call_structured
 from .profile import AgentSchema
 from datetime import datetime
 
+MAX_PROFILE_CHARS = 4096
+
+
 class AgentProfile(ProfileBase):
     """Class that handles public and private profiles based on configuration."""
 
+    __slots__ = ()
+
     def __init__(self,agent_type:str, schema: AgentSchema =None, profile_data: Optional[Dict[str, Any]] = None):
         """
         Initialize profile either from a config file or directly from provided profile data.
@@ -23,7 +29,7 @@ class AgentProfile(ProfileBase):
         # self._public_fields = {}
         # self._private_fields = {}
         #self._public_fields['agent_type']=agent_type
-        self._public_fields['agent_type']=agent_type
+        self._public_fields['agent_type']=sys.intern(agent_type) if isinstance(agent_type, str) else agent_type
         self._load_profile_data(schema,profile_data)
 
 
@@ -47,39 +53,30 @@ class AgentProfile(ProfileBase):
         prompt = self._build_prompt()
         if model is not None and len(prompt) > 0:
             max_retries = 3
-            retry_count = 0
-            success = False
-            
-            while not success and retry_count < max_retries:
-                try:
-                    prompt = model.format(Message("user", prompt, role="user"))
-                    response = model(prompt)
-                    parser = JsonBlockParser()
-                    res = parser.parse(response)
-                    generated_profile = res.parsed
-                    
-                    # Validate the generated profile
-                    if not generated_profile or not isinstance(generated_profile, dict):
-                        logger.warning(f"Retry {retry_count+1}/{max_retries}: Generated profile is empty or not a dictionary")
-                        retry_count += 1
-                        continue
-                    
-                    # Apply the generated profile values
-                    for key, value in generated_profile.items():
-                        if key in self._public_fields:
-                            self._public_fields[key] = value
-                        elif key in self._private_fields:
-                            self._private_fields[key] = value
-                    
-                    success = True
-                    
-                except (json.JSONDecodeError, ValueError, AttributeError) as e:
-                    retry_count += 1
-                    logger.warning(f"Retry {retry_count}/{max_retries}: Failed to generate profile - {str(e)}")
-                    
-            if not success:
+
+            def validate(generated_profile):
+                if not generated_profile or not isinstance(generated_profile, dict):
+                    raise ValueError("Generated profile is empty or not a dictionary")
+
+            try:
+                res = call_structured(
+                    model,
+                    model.format(Message("user", prompt, role="user")),
+                    call_site="profile_generation",
+                    response_schema=self.schema.to_json_schema(sampling="llm"),
+                    max_retries=max_retries - 1,
+                    validator=validate
+                )
+            except ValueError:
                 logger.error(f"Failed to generate profile after {max_retries} attempts.")
                 raise ValueError("LLM failed to generate a valid profile after multiple attempts.")
+
+            # Apply the generated profile values
+            for key, value in res.parsed.items():
+                if key in self._public_fields:
+                    self._public_fields[key] = value
+                elif key in self._private_fields:
+                    self._private_fields[key] = value
                 
         # Continue with default/random sampling regardless of LLM success
         for key, settings in self.schema.schema.items():
@@ -157,29 +154,29 @@ class AgentProfile(ProfileBase):
         if model is not None:
             if len(prompt) > 0:
                 max_retries = 3
-                retry_count = 0
-                parsed_profiles = None
-                
-                while parsed_profiles is None and retry_count < max_retries:
-                    try:
-                        formatted_prompt = model.format(Message("user", prompt, role="user"))
-                        response = model(formatted_prompt)
-                        parser = JsonBlockParser()
-                        parsed_profiles = parser.parse(response)
-                        parsed_profiles = parsed_profiles.parsed
-                        
-                        # Validate the profiles
-                        if not parsed_profiles or not isinstance(parsed_profiles, list) or len(parsed_profiles) != count:
-                            logger.warning(f"Retry {retry_count+1}/{max_retries}: Expected {count} profiles, but got {len(parsed_profiles) if parsed_profiles and isinstance(parsed_profiles, list) else 'invalid data'}")
-                            parsed_profiles = None
-                            retry_count += 1
-                            continue
-                            
-                    except (json.JSONDecodeError, ValueError, AttributeError) as e:
-                        retry_count += 1
-                        logger.warning(f"Retry {retry_count}/{max_retries}: Failed to generate profiles - {str(e)}")
-                
-                if parsed_profiles is None:
+
+                def validate(profiles):
+                    if not profiles or not isinstance(profiles, list) or len(profiles) != count:
+                        raise ValueError(f"Expected {count} profiles, but got {len(profiles) if profiles and isinstance(profiles, list) else 'invalid data'}")
+
+                item_schema = schema.to_json_schema(sampling="llm")
+                response_schema = {
+                    "type": "array",
+                    "items": item_schema,
+                    "minItems": count,
+                    "maxItems": count
+                }
+                try:
+                    res = call_structured(
+                        model,
+                        model.format(Message("user", prompt, role="user")),
+                        call_site="profile_generation",
+                        response_schema=response_schema,
+                        max_retries=max_retries - 1,
+                        validator=validate
+                    )
+                    parsed_profiles = res.parsed
+                except ValueError:
                     logger.error(f"Failed to generate profiles after {max_retries} attempts. Using empty profiles.")
                     parsed_profiles = [{} for _ in range(count)]
             else:
@@ -231,8 +228,14 @@ class AgentProfile(ProfileBase):
         """Return the profile as a dictionary."""
         return {**self._public_fields, **self._private_fields} if include_private else self._public_fields
 
-    def get_profile_str(self, include_private: bool = False) -> str:
-        """Return a string representation of the profile in JSON format."""
+    def get_profile_str(self, include_private: bool = False, compact: bool = False) -> str:
+        """
+        Return a string representation of the profile in JSON format.
+
+        The indented form is capped at ``MAX_PROFILE_CHARS`` by dropping
+        trailing fields, so the result is always valid JSON. The compact form
+        has no whitespace and no cap; callers are expected to budget it.
+        """
         profile_data = self.get_profile(include_private=include_private)
         def json_serializable(obj):
             """处理无法被JSON直接序列化的对象类型"""
@@ -264,7 +267,15 @@ class AgentProfile(ProfileBase):
                     return json_serializable(data)
         
         cleaned_data = clean_data(profile_data)
-        return json.dumps(cleaned_data, ensure_ascii=False, indent=4)[:4096]
+        if compact:
+            return json.dumps(cleaned_data, ensure_ascii=False, separators=(",", ":"))
+
+        profile_str = json.dumps(cleaned_data, ensure_ascii=False, indent=4)
+        # Drop trailing fields rather than cutting the JSON mid-token
+        while len(profile_str) > MAX_PROFILE_CHARS and len(cleaned_data) > 1:
+            cleaned_data.popitem()
+            profile_str = json.dumps(cleaned_data, ensure_ascii=False, indent=4)
+        return profile_str[:MAX_PROFILE_CHARS]
 
     def update_field(self, key: str, value: Any, to_private: Optional[bool] = None):
         """Update a specific field in the profile."""
@@ -8,6 +8,9 @@ from .schema import AgentSchema
 class ProfileBase(ABC):
     """Base class for profile handling public and private fields with property access."""
 
+    # 每个Agent一个Profile，字段都在两个字典中，不需要实例__dict__
+    __slots__ = ("schema", "_public_fields", "_private_fields")
+
     _version: int = 1
 
     def __init__(self, schema: AgentSchema = None, profile_data: Dict[str, Any] = None):
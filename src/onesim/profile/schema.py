@@ -1,5 +1,15 @@
 from typing import Dict, Any, Optional
 
+_JSON_SCHEMA_TYPES = {
+    "str": "string",
+    "int": "integer",
+    "float": "number",
+    "bool": "boolean",
+    "list": "array",
+    "dict": "object",
+}
+
+
 class AgentSchema:
     """Class to represent the schema for a specific type of agent."""
     def __init__(self, schema_config: Dict[str, Any]):
@@ -26,6 +36,28 @@ class AgentSchema:
         """Return the type of a field."""
         return self.schema.get(field, {}).get("type")
     
+    def to_json_schema(self, sampling: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return a JSON schema object describing the profile fields.
+        
+        Args:
+            sampling (Optional[str]): Only include fields with this sampling
+                method (e.g. "llm"). All fields are included when None.
+        """
+        properties = {}
+        for field, settings in self.schema.items():
+            if sampling is not None and settings.get("sampling") != sampling:
+                continue
+            field_schema = {"type": _JSON_SCHEMA_TYPES.get(settings.get("type", "str"), "string")}
+            if settings.get("description"):
+                field_schema["description"] = settings["description"]
+            properties[field] = field_schema
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties.keys())
+        }
+
     def to_dict(self) -> Dict[str, Any]:
         """Return the schema as a dictionary."""
         return self.schema
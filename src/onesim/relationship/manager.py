@@ -1,24 +1,93 @@
 # relationship_manager.py
 
-from typing import Dict, List, Optional
+import json
+import sys
+import weakref
+from typing import Any, Dict, List, Optional
 from loguru import logger
 
+class TargetInfo(dict):
+    """Read-only target info, shared by all relationships pointing to the same agent"""
+
+    __slots__ = ("__weakref__",)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Relationship target info is shared and read-only, copy it with dict() to change it")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        # copy、deepcopy和pickle通过dict.__init__重建，而不是逐项__setitem__
+        return (TargetInfo, (dict(self),))
+
+
+class TargetInfoPool:
+    """
+    Relationship目标信息池：指向同一Agent的关系共用一份只读的目标信息。
+
+    Target info is usually the target's public profile, so every agent
+    related to the same target otherwise holds its own copy, one per
+    relationship once configs have gone through JSON. The pool keeps one
+    ``TargetInfo`` per target ID, replaced when different info arrives, and
+    holds it weakly: it goes away with the last relationship using it.
+    """
+
+    def __init__(self):
+        self._infos: "weakref.WeakValueDictionary[str, TargetInfo]" = weakref.WeakValueDictionary()
+
+    def share(self, target_id: str, target_info: Optional[Dict]) -> Optional[TargetInfo]:
+        if target_info is None:
+            return None
+        shared = self._infos.get(target_id)
+        if shared is not None and (shared is target_info or shared == target_info):
+            return shared
+        shared = target_info if isinstance(target_info, TargetInfo) else TargetInfo(target_info)
+        agent_type = shared.get("agent_type")
+        if isinstance(agent_type, str):
+            dict.__setitem__(shared, "agent_type", sys.intern(agent_type))
+        self._infos[target_id] = shared
+        return shared
+
+    def __len__(self) -> int:
+        return len(self._infos)
+
+
+# 全局关系目标信息池实例
+target_info_pool = TargetInfoPool()
+
+
 class Relationship:
+    __slots__ = ("source_id", "target_id", "description", "target_info")
+
     def __init__(self, source_id:str,target_id: str, description: str,target_info: Optional[Dict]=None):
         self.source_id = source_id
         self.target_id = target_id
         self.description = description
-        self.target_info = target_info
+        self.target_info = target_info_pool.share(target_id, target_info)
     def __str__(self):
         target_info_str = f"Target Info: {self.target_info}" if self.target_info else ""
         return f"Relationship(Target ID: {self.target_id}, {target_info_str}, Relationship Description: {self.description})"
 
     def __repr__(self):
         return self.__str__()
+
+    def to_compact_str(self) -> str:
+        """One-line form for prompts: target id, agent type, description and remaining target info."""
+        info = dict(self.target_info or {})
+        agent_type = info.pop("agent_type", None)
+        head = f"{self.target_id} ({agent_type})" if agent_type else self.target_id
+        line = f"- {head}: {self.description}"
+        if info:
+            line += " " + json.dumps(info, ensure_ascii=False, separators=(",", ":"), default=str)
+        return line
     
     def get_target_info(self):
         return self.target_info
 
+    @property
+    def target_agent_type(self) -> Optional[str]:
+        return (self.target_info or {}).get("agent_type")
+
 class RelationshipManager:
     def __init__(self, profile_id: str):
         self.profile_id = profile_id
@@ -47,9 +116,17 @@ class RelationshipManager:
 
     def get_all_relationships(self) -> List[Relationship]:
         return list(self.relationships.values())
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Relationships as JSON-serializable dicts, as accepted by ``add_relationship``"""
+        return [{"target_id": r.target_id, "description": r.description, "target_info": r.target_info}
+                for r in self.relationships.values()]
     
     def get_all_relationships_str(self) -> List[str]:
         return [str(rel) for rel in self.relationships.values()]
 
+    def get_all_relationships_compact_str(self) -> List[str]:
+        return [rel.to_compact_str() for rel in self.relationships.values()]
+
     def get_relationships_by_agent_types(self, agent_types: List[str]) -> List[Relationship]:
         return [rel for rel in self.relationships.values() if rel.target_agent_type in agent_types]
\ No newline at end of file
@@ -8,7 +8,7 @@ import importlib.util
 from dataclasses import asdict
 from loguru import logger
 from onesim.models.core.message import Message
-from onesim.models import ModelManager
+from onesim.models import ModelManager, ModelRouter
 from onesim.events import get_event_bus
 from onesim.profile import AgentProfile, AgentSchema
 from onesim.relationship import RelationshipManager
@@ -17,6 +17,7 @@ from onesim.planning import PlanningBase
 from tqdm import tqdm
 from onesim.distribution.node import get_node, NodeRole
 from onesim.distribution.agent_allocator import AgentAllocator
+from onesim.distribution.agent_stream import PER_AGENT_FIELDS
 from onesim.distribution.master import MasterNode
 import asyncio
 from onesim.config import SimulatorConfig, AgentConfig, AgentMemoryConfig
@@ -33,6 +34,8 @@ class AgentFactory:
         """Initialize the factory with basic settings and models"""
         model_manager = ModelManager.get_instance()
         self.model = model_manager.get_model(self.model_config_name)
+        model_routing = self.agent_config.model_routing if self.agent_config else {}
+        self.model_router = ModelRouter(model_routing)
 
         # Initialize agent storage as dictionaries
         self.all_agents = {}
@@ -47,6 +50,9 @@ class AgentFactory:
         # Initialize empty dictionaries for each agent type
         self.all_agents = {action_type: {} for action_type in actions}
         self.profile_id2agent = {}
+        # Agent classes and shared configuration per type, for rebuilding local agents
+        self.agent_classes = {}
+        self.agent_templates = {}
 
         # Load schema definitions
         self.schemas = self._load_schemas()
@@ -152,8 +158,9 @@ class AgentFactory:
                     agent_type, schema, profile_file_path, count, self.agent_index
                 )
             else:
+                profile_model = self.model_router.get_model("profile_generation", agent_type) or self.model
                 base_profiles = self.generate_profiles(
-                    agent_type, schema, self.model, count,
+                    agent_type, schema, profile_model, count,
                     profile_file_path,
                     self.agent_index
                 )
@@ -253,6 +260,8 @@ class AgentFactory:
                     "model_config_name": self.model_config_name,
                     "memory_config": memory_config,
                     "planning_config": planning_config,
+                    "model_routes": self.model_router.routes_for(agent_type),
+                    "prompt_budget": self.agent_config.prompt_budget if self.agent_config else {},
                     "relationships": agent_relationships
                 }
                 all_agent_configs.append(agent_config)
@@ -262,14 +271,6 @@ class AgentFactory:
 
     def create_local_agents(self, agent_configs: List[Dict]) -> None:
         """Create local agent instances with pre-configured relationships"""
-        # Get memory config from agent_config
-        memory_config = None
-        if self.agent_config and hasattr(self.agent_config, 'memory'):
-            memory_config = self.agent_config.memory
-        planning_config = None
-        if self.agent_config and hasattr(self.agent_config, 'planning'):
-            planning_config = self.agent_config.planning
-
         # Group configurations by agent type
         configs_by_type = {}
         for config in agent_configs:
@@ -282,55 +283,16 @@ class AgentFactory:
         for agent_type, configs in configs_by_type.items():
             # Load the agent class
             AgentClass = self.load_agent_module_from_file(agent_type)
+            self.agent_classes[agent_type] = AgentClass
+            # 同类型Agent共享的配置，用于重建休眠后唤醒的Agent
+            self.agent_templates[agent_type] = {
+                key: value for key, value in configs[0].items() if key not in PER_AGENT_FIELDS
+            }
 
             # Create each agent instance
             for config in tqdm(configs):
                 agent_id = config["id"]
-
-                # Create profile instance from saved data
-                profile = AgentProfile(
-                    agent_type, 
-                    self.schemas[agent_type], 
-                    profile_data=config["profile_data"]
-                )
-                profile.set_agent_profile_id(agent_id)
-
-                # Create relationship manager and add relationships
-                rm = RelationshipManager(profile_id=agent_id)
-
-                # Add pre-loaded relationships if present
-                if "relationships" in config:
-                    for relationship in config["relationships"]:
-                        rm.add_relationship(
-                            target_id=relationship["target_id"],
-                            description=relationship["description"],
-                            target_info=relationship["target_info"]
-                        )
-
-                # Create memory instance
-                memory_instance=None
-                if memory_config:
-                    memory_instance = self.load_memory(memory_config, self.model_config_name)
-
-                # Create planning instance if configured
-                planning_instance = None
-                if planning_config:
-                    planning_instance = self.load_planning(planning_config, 
-                                                           self.model_config_name, 
-                                                           config["sys_prompt"])
-
-                # Create agent instance
-                agent = AgentClass(
-                    # name=config["name"],
-                    profile=profile,
-                    sys_prompt=config["sys_prompt"],
-                    model_config_name=self.model_config_name,
-                    #model_config_name="chat_load_balancer",
-                    memory=memory_instance,
-                    planning=planning_instance,
-                    event_bus_queue=get_event_bus().queue,
-                    relationship_manager=rm
-                )
+                agent = self.build_agent(AgentClass, config)
 
                 # Store the agent in our dictionaries
                 if agent_type not in self.all_agents:
@@ -338,6 +300,88 @@ class AgentFactory:
                 self.all_agents[agent_type][agent_id] = agent
                 self.profile_id2agent[agent_id] = agent
 
+    def build_agent(self, AgentClass, config: Dict[str, Any]):
+        """Create one local agent instance from its configuration"""
+        agent_type = config["type"]
+        agent_id = config["id"]
+
+        # Get memory and planning config from agent_config
+        memory_config = None
+        if self.agent_config and hasattr(self.agent_config, 'memory'):
+            memory_config = self.agent_config.memory
+        planning_config = None
+        if self.agent_config and hasattr(self.agent_config, 'planning'):
+            planning_config = self.agent_config.planning
+
+        # Create profile instance from saved data
+        profile = AgentProfile(
+            agent_type, 
+            self.schemas[agent_type], 
+            profile_data=config["profile_data"]
+        )
+        profile.set_agent_profile_id(agent_id)
+
+        # Create relationship manager and add relationships
+        rm = RelationshipManager(profile_id=agent_id)
+
+        # Add pre-loaded relationships if present
+        if "relationships" in config:
+            for relationship in config["relationships"]:
+                rm.add_relationship(
+                    target_id=relationship["target_id"],
+                    description=relationship["description"],
+                    target_info=relationship["target_info"]
+                )
+
+        # Call sites routed to a different model for this agent type
+        model_routes = config.get("model_routes", {})
+
+        # Create memory instance
+        memory_instance=None
+        if memory_config:
+            memory_instance = self.load_memory(memory_config, self.model_config_name, model_routes)
+
+        # Create planning instance if configured
+        planning_instance = None
+        if planning_config:
+            planning_instance = self.load_planning(planning_config, 
+                                                   model_routes.get("planning", self.model_config_name), 
+                                                   config["sys_prompt"])
+
+        # Create agent instance
+        agent = AgentClass(
+            # name=config["name"],
+            profile=profile,
+            sys_prompt=config["sys_prompt"],
+            model_config_name=self.model_config_name,
+            #model_config_name="chat_load_balancer",
+            memory=memory_instance,
+            planning=planning_instance,
+            event_bus_queue=get_event_bus().queue,
+            relationship_manager=rm
+        )
+        agent.set_model_routes(model_routes)
+        agent.set_prompt_budget(config.get("prompt_budget"))
+        return agent
+
+    def rebuild_agent(self, agent_type: str, agent_id: str, profile_data: Dict[str, Any],
+                      relationships: List[Dict[str, Any]]):
+        """
+        Recreate a local agent from the shared configuration of its type, e.g. when it wakes from hibernation.
+
+        Args:
+            agent_type: Type of the agent
+            agent_id: ID of the agent
+            profile_data: The agent's current profile, including private fields
+            relationships: The agent's relationships, as in its creation config
+
+        Returns:
+            The new agent instance, without memories
+        """
+        config = dict(self.agent_templates[agent_type], id=agent_id, type=agent_type,
+                      profile_data=profile_data, relationships=relationships)
+        return self.build_agent(self.agent_classes[agent_type], config)
+
     async def create_distributed_agents(self, agent_configs: List[Dict]) -> None:
         """Create distributed agent instances on worker nodes"""
         node = get_node()
@@ -515,7 +559,8 @@ class AgentFactory:
 
         return None
 
-    def load_memory(self, memory_config: AgentMemoryConfig, model_config_name: str) -> MemoryStrategy:
+    def load_memory(self, memory_config: AgentMemoryConfig, model_config_name: str,
+                    model_routes: Optional[Dict[str, str]] = None) -> MemoryStrategy:
         """Create memory strategy instance"""
         if not memory_config:
             return None
@@ -538,12 +583,14 @@ class AgentFactory:
                     "metric_weights": memory_config.metric_weights,
                     "transfer_conditions": memory_config.transfer_conditions,
                     "operations": memory_config.operations,
-                    "metrics": memory_config.metrics
+                    "metrics": memory_config.metrics,
+                    "model_routes": model_routes or {}
                 }
                 memory_instance = MemoryClass(memory_config_dict, model_config_name=model_config_name)
             else:
                 # Already a dictionary
-                memory_instance = MemoryClass(memory_config, model_config_name=model_config_name)
+                memory_config_dict = {**memory_config, "model_routes": model_routes or {}}
+                memory_instance = MemoryClass(memory_config_dict, model_config_name=model_config_name)
 
             return memory_instance
         except ImportError as e:
@@ -0,0 +1,218 @@
+import asyncio
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from loguru import logger
+
+from onesim.events import get_event_bus
+from onesim.utils.event_priority import event_priorities
+from onesim.utils.runtime_stats import runtime_stats
+
+
+class ShardedQueue:
+    """
+    Drop-in for the event bus queue that spreads events over lanes.
+
+    The lane of an event is chosen by a hash of its ``to_agent_id``, so all
+    events for one receiver, and therefore those of each sender/receiver
+    pair, stay in the order they were put, within each priority class when
+    ``event_priorities`` is enabled. ``empty()`` is only true when
+    every lane is empty and no lane is still dispatching an event.
+
+    A single consumer that does not run the lanes itself, such as the
+    master's event forwarder, can take events with ``get()`` and mark them
+    done with ``task_done()``, as with ``asyncio.Queue``; lanes are served
+    in turn.
+    """
+
+    def __init__(self, shards: int):
+        if shards < 1:
+            raise ValueError(f"shards must be at least 1, got {shards}")
+        self.lanes: List[asyncio.Queue] = [event_priorities.new_queue("bus") for _ in range(shards)]
+        self.in_flight = [0] * shards
+        self.dispatched = [0] * shards
+        self.max_depth = [0] * shards
+        self._next_lane = 0
+        self._taken: Deque[int] = deque()  # get()取出但尚未task_done()的事件所在分片
+        self._put_event = asyncio.Event()
+
+    def shard_of(self, event) -> int:
+        to_agent_id = str(getattr(event, "to_agent_id", "") or "")
+        return zlib.crc32(to_agent_id.encode("utf-8")) % len(self.lanes)
+
+    def put_nowait(self, event):
+        shard = self.shard_of(event)
+        lane = self.lanes[shard]
+        lane.put_nowait(event)
+        if lane.qsize() > self.max_depth[shard]:
+            self.max_depth[shard] = lane.qsize()
+        self._put_event.set()
+
+    async def put(self, event):
+        self.put_nowait(event)
+
+    def get_nowait(self):
+        """
+        Take the next event from the first non-empty lane after the last one served.
+
+        Raises:
+            asyncio.QueueEmpty: If every lane is empty
+        """
+        for i in range(len(self.lanes)):
+            shard = (self._next_lane + i) % len(self.lanes)
+            lane = self.lanes[shard]
+            if not lane.empty():
+                event = lane.get_nowait()
+                self._next_lane = (shard + 1) % len(self.lanes)
+                self.in_flight[shard] += 1
+                self._taken.append(shard)
+                return event
+        raise asyncio.QueueEmpty
+
+    async def get(self):
+        """Wait for an event on any lane and take it"""
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self._put_event.clear()
+                await self._put_event.wait()
+
+    def task_done(self):
+        """Mark the oldest event taken with ``get()`` as processed"""
+        shard = self._taken.popleft()
+        self.in_flight[shard] -= 1
+        self.dispatched[shard] += 1
+        self.lanes[shard].task_done()
+
+    def qsize(self) -> int:
+        return sum(lane.qsize() for lane in self.lanes)
+
+    def empty(self) -> bool:
+        return not any(self.in_flight) and all(lane.empty() for lane in self.lanes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, peak depth and dispatched events, in total and per lane"""
+        return {
+            "shards": len(self.lanes),
+            "depth": self.qsize(),
+            "in_flight": sum(self.in_flight),
+            "dispatched": sum(self.dispatched),
+            "max_depth": max(self.max_depth),
+            "lanes": {
+                str(shard): {
+                    "depth": lane.qsize(),
+                    "max_depth": self.max_depth[shard],
+                    "dispatched": self.dispatched[shard],
+                }
+                for shard, lane in enumerate(self.lanes)
+            },
+        }
+
+
+class ShardedEventBus:
+    """
+    事件总线的多路分发：每个分片由独立的任务按序分发，慢的分发不再阻塞其他接收者的事件。
+
+    Wraps the global event bus and replaces its queue, which agents and the
+    scheduler put their events into, with a ``ShardedQueue``. ``run()``
+    starts one dispatcher per lane, each passing events to the bus's
+    ``dispatch_event``; everything else is delegated to the wrapped bus.
+    Events still put into the bus's original queue, e.g. by agents created
+    before sharding was enabled, are moved to their lanes.
+    """
+
+    def __init__(self, event_bus, shards: int):
+        self.event_bus = event_bus
+        self.queue = ShardedQueue(shards)
+        self._original_queue = event_bus.queue
+        event_bus.queue = self.queue
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+
+    def __getattr__(self, name):
+        return getattr(self.event_bus, name)
+
+    async def run(self):
+        """Dispatch events until cancelled"""
+        tasks = [asyncio.create_task(self._run_lane(shard)) for shard in range(len(self.queue.lanes))]
+        tasks.append(asyncio.create_task(self._drain_original_queue()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_lane(self, shard: int):
+        lane = self.queue.lanes[shard]
+        while True:
+            event = await lane.get()
+            # 取出后即计入处理中，分发完成前is_empty()不为真
+            self.queue.in_flight[shard] += 1
+            try:
+                await self._resumed.wait()
+                await self.event_bus.dispatch_event(event)
+            except Exception as e:
+                logger.error(f"Error dispatching event {getattr(event, 'event_id', '')} on lane {shard}: {e}")
+            finally:
+                self.queue.in_flight[shard] -= 1
+                self.queue.dispatched[shard] += 1
+                lane.task_done()
+
+    async def _drain_original_queue(self):
+        while True:
+            self.queue.put_nowait(await self._original_queue.get())
+
+    def is_empty(self) -> bool:
+        return self.queue.empty() and self._original_queue.empty()
+
+    async def pause(self):
+        self._resumed.clear()
+        if hasattr(self.event_bus, 'pause'):
+            await self.event_bus.pause()
+
+    async def resume(self):
+        if hasattr(self.event_bus, 'resume'):
+            await self.event_bus.resume()
+        self._resumed.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.queue.get_stats()
+
+
+# 全局分片事件总线实例，未启用分片时为None
+_sharded_event_bus: Optional[ShardedEventBus] = None
+
+
+def enable_event_bus_sharding(shards: int):
+    """
+    Dispatch the global event bus's events over ``shards`` lanes.
+
+    Call before agents are created, and after ``event_priorities`` is
+    configured: with priorities enabled the bus is wrapped even for a single
+    lane, so that its queue serves events by priority. Does nothing when
+    already enabled.
+    """
+    global _sharded_event_bus
+    if (shards > 1 or event_priorities.enabled) and _sharded_event_bus is None:
+        _sharded_event_bus = ShardedEventBus(get_event_bus(), shards)
+        logger.info(f"Event bus dispatching over {shards} lanes")
+
+
+def reset_event_bus_sharding():
+    """Forget the sharded event bus, after the global event bus it wraps was reset"""
+    global _sharded_event_bus
+    _sharded_event_bus = None
+
+
+def get_dispatching_event_bus():
+    """The sharded event bus if enabled, else the global event bus"""
+    return _sharded_event_bus if _sharded_event_bus is not None else get_event_bus()
+
+
+def get_event_bus_stats() -> Dict[str, Any]:
+    """Per-lane queue depth statistics, empty when sharding is not enabled"""
+    return _sharded_event_bus.get_stats() if _sharded_event_bus is not None else {}
+
+
+runtime_stats.register("event_bus", get_event_bus_stats, gauges=("shards", "depth", "in_flight"))
@@ -22,6 +22,10 @@ from onesim.data import (
 from onesim.distribution.node import get_node, NodeRole
 from onesim.distribution.distributed_lock import get_lock
 from onesim.config import get_component_registry
+from onesim.utils.event_priority import event_priorities
+from onesim.agent.executor import agent_executor
+from onesim.utils.runtime_stats import runtime_stats
+from onesim.agent.hibernation import agent_hibernation, HibernatedAgent
 from datetime import datetime
 # Use aiofiles for asynchronous file operations
 import aiofiles
@@ -126,7 +130,7 @@ class BasicSimEnv:
         self.current_step = 1 # Unified counter for rounds/triggers
 
         # Event handling
-        self._queue = asyncio.Queue()
+        self._queue = event_priorities.new_queue("env")
         self._event_schema = {}
         self._lock = asyncio.Lock()
 
@@ -344,7 +348,7 @@ class BasicSimEnv:
                             # Extract agent data from its current state
                             profile = agent.get_profile() if hasattr(agent, 'get_profile') else None
                             memory = await agent.get_memory() if hasattr(agent, 'get_memory') else None
-                            relationships = agent.get_all_relationships() if hasattr(agent, 'get_relationships') else None
+                            relationships = agent.get_relationships() if hasattr(agent, 'get_relationships') else None
 
                             # Additional state can contain any agent-specific data not covered by standard fields
                             additional_state = {
@@ -398,7 +402,7 @@ class BasicSimEnv:
                             # Extract agent data asynchronously if methods are async
                             profile = agent.get_profile() if hasattr(agent, 'get_profile') else None
                             memory = await agent.get_memory() if hasattr(agent, 'get_memory') else None
-                            relationships = agent.get_all_relationships() if hasattr(agent, 'get_relationships') else None
+                            relationships = agent.get_relationships() if hasattr(agent, 'get_relationships') else None
 
                             additional_state = {
                                 "current_step": step_num, 
@@ -747,6 +751,26 @@ class BasicSimEnv:
             # Mark this step as completed to prevent duplicate processing
             self.data[step_end_time_key] = current_time
 
+            # Move agents between workers by the traffic seen so far, while no events are in flight
+            node = get_node()
+            if node and node.role == NodeRole.MASTER and self.current_step < self.max_steps:
+                from onesim.distribution.migration import agent_rebalancer
+                try:
+                    rebalance = await agent_rebalancer.rebalance(node, self.current_step)
+                    if rebalance:
+                        self.data['step_data'][self.current_step]['rebalance'] = rebalance
+                except Exception as e:
+                    logger.error(f"Error rebalancing agents after step {self.current_step}: {e}")
+
+            # Spill agents idle for several steps to disk, while no events are in flight
+            if agent_hibernation.enabled and self.current_step < self.max_steps:
+                try:
+                    hibernation = await agent_hibernation.end_step()
+                    if hibernation:
+                        self.data['step_data'][self.current_step]['hibernation'] = hibernation
+                except Exception as e:
+                    logger.error(f"Error hibernating agents after step {self.current_step}: {e}")
+
             # Save round data *before* potentially stopping
             await self._save_step_data(self.current_step)
 
@@ -908,75 +932,33 @@ class BasicSimEnv:
             is_distributed = node and node.role == NodeRole.MASTER
 
             if is_distributed:
-                # Get master node token usage stats
-                from onesim.models.utils.token_usage import get_token_usage_stats
-                master_stats = get_token_usage_stats()
-
-                # Initialize merged stats with master's stats
-                merged_stats = {
-                    "total_prompt_tokens": master_stats.get("total_prompt_tokens", 0),
-                    "total_completion_tokens": master_stats.get("total_completion_tokens", 0),
-                    "total_tokens": master_stats.get("total_tokens", 0),
-                    "request_count": master_stats.get("request_count", 0),
-                    "model_usage": master_stats.get("model_usage", {}),
-                    "worker_stats": {"master": master_stats}
-                }
-
-                # Collect from all worker nodes using grpc client functions
-                master_node = node
-                for worker_id, worker_info in master_node.workers.items():
-                    try:
-                        # Import the function to get token usage from a worker
-                        from onesim.distribution.grpc_impl import get_token_usage_from_worker
-                        worker_stats = await get_token_usage_from_worker(
-                            worker_info.address,
-                            worker_info.port,
-                            worker_id
-                        )
-
-                        if worker_stats:
-                            # Record worker's statistics
-                            merged_stats["worker_stats"][worker_id] = worker_stats
-
-                            # Add to total counts
-                            merged_stats["total_prompt_tokens"] += worker_stats.get("total_prompt_tokens", 0)
-                            merged_stats["total_completion_tokens"] += worker_stats.get("total_completion_tokens", 0)
-                            merged_stats["total_tokens"] += worker_stats.get("total_tokens", 0)
-                            merged_stats["request_count"] += worker_stats.get("request_count", 0)
-
-                            # Merge model usage
-                            for model, usage in worker_stats.get("model_usage", {}).items():
-                                if model not in merged_stats["model_usage"]:
-                                    merged_stats["model_usage"][model] = {
-                                        "prompt_tokens": 0,
-                                        "completion_tokens": 0,
-                                        "total_tokens": 0,
-                                        "request_count": 0
-                                    }
-
-                                merged_stats["model_usage"][model]["prompt_tokens"] += usage.get("prompt_tokens", 0)
-                                merged_stats["model_usage"][model]["completion_tokens"] += usage.get("completion_tokens", 0)
-                                merged_stats["model_usage"][model]["total_tokens"] += usage.get("total_tokens", 0)
-                                merged_stats["model_usage"][model]["request_count"] += usage.get("request_count", 0)
-                    except Exception as e:
-                        logger.error(f"Error collecting token usage from worker {worker_id}: {e}")
-
-                # Use the merged stats
-                token_stats = merged_stats
-                logger.info(f"Collected token usage from {len(merged_stats.get('worker_stats', {}))} workers")
+                # Merge master and worker stats, including latency histograms
+                from onesim.distribution.grpc_impl import collect_token_usage_from_workers
+                token_stats = await collect_token_usage_from_workers(node)
+                logger.info(f"Collected token usage from {len(token_stats.get('worker_stats', {}))} nodes")
             else:
                 # Standard non-distributed mode
                 from onesim.models.utils.token_usage import get_token_usage_stats
                 token_stats = get_token_usage_stats()
+                token_stats["runtime"] = runtime_stats.collect()
 
-            # Add token usage to round data
+            # Add token usage, latency and error stats to round data
             self.data['step_data'][self.current_step]['token_usage'] = {
                 'total_tokens': token_stats.get('total_tokens', 0),
                 'total_prompt_tokens': token_stats.get('total_prompt_tokens', 0),
                 'total_completion_tokens': token_stats.get('total_completion_tokens', 0),
                 'request_count': token_stats.get('request_count', 0),
-                'model_usage': token_stats.get('model_usage', {})
+                'model_usage': token_stats.get('model_usage', {}),
+                'call_sites': token_stats.get('call_sites', {}),
+                'latency': token_stats.get('latency', {}),
+                'ttft': token_stats.get('ttft', {}),
+                'backends': token_stats.get('backends', {}),
+                'actions': token_stats.get('actions', {}),
+                'error_count': token_stats.get('error_count', 0),
+                'retry_count': token_stats.get('retry_count', 0)
             }
+            # 队列、锁、缓存等运行时指标与token用量分开保存
+            self.data['step_data'][self.current_step]['runtime'] = token_stats.get('runtime', {})
 
             # If distributed, also store worker-specific stats
             if is_distributed and 'worker_stats' in token_stats:
@@ -1142,6 +1124,8 @@ class BasicSimEnv:
 
             logger.info(f"Starting step {self.current_step} (Round Mode)")
             self.data[f'step_{self.current_step}_time_start'] = time.time()
+            # 环境可能在step之间直接修改self.data，worker上的副本在每个step开始时全部失效
+            self._invalidate_env_replicas(None)
 
             # Dispatch start events for all targets
             for agent_type in self.start_targets.keys():
@@ -1230,8 +1214,15 @@ class BasicSimEnv:
             # Handle nested updates if needed, e.g., key = "a.b.c"
             # This simple implementation only updates top-level keys
             self.data[key] = data
+            self._invalidate_env_replicas([key])
             return data
 
+    def _invalidate_env_replicas(self, keys: Optional[List[str]]) -> None:
+        """Notify the workers' env data replicas of a write (keys=None for any key)"""
+        node = get_node()
+        if node and node.role == NodeRole.MASTER:
+            node.invalidate_env_data(keys)
+
     def get_statistics(self) -> Dict[str, Any]:
         """Get the simulation statistics."""
         # Calculate basic statistics
@@ -1628,7 +1619,7 @@ class BasicSimEnv:
                     local_agent = agents[agent_id]
                     break
 
-        if isinstance(local_agent, GeneralAgent):
+        if isinstance(local_agent, (GeneralAgent, HibernatedAgent)):
             # Local access - properly handle async get_data method
             try:
                 # GeneralAgent's get_data is async, so we need to await it
@@ -1707,7 +1698,7 @@ class BasicSimEnv:
             try:
                 # Get distributed lock for this agent and key
                 lock_id = f"agent_data_lock_{agent_id}_{key}"
-                lock = await get_lock(lock_id)
+                lock = await get_lock(lock_id, owner_agent_id=agent_id)
 
                 # Acquire lock before updating
                 async with lock:
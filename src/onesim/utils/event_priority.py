@@ -0,0 +1,134 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple, Union
+
+from onesim.utils.runtime_stats import runtime_stats
+
+# 优先级从高到低：控制事件 > 数据响应 > 数据请求 > 其他（动作）事件
+PRIORITY_CLASSES = ("control", "data_response", "data_request", "action")
+
+_CLASS_OF_KIND = {
+    "PauseEvent": 0,
+    "ResumeEvent": 0,
+    "EndEvent": 0,
+    "DataResponseEvent": 1,
+    "DataUpdateResponseEvent": 1,
+    "DataEvent": 2,
+    "DataUpdateEvent": 2,
+}
+_ACTION = len(PRIORITY_CLASSES) - 1
+
+
+def priority_class(event) -> int:
+    """Index into ``PRIORITY_CLASSES`` of an event, by its kind"""
+    kind = getattr(event, "event_kind", None) or type(event).__name__
+    return _CLASS_OF_KIND.get(kind, _ACTION)
+
+
+class PriorityEventQueue(asyncio.Queue):
+    """
+    asyncio.Queue serving events by priority class, FIFO within a class.
+
+    Each class is worth ``aging`` seconds of waiting: the next event is the
+    class head with the earliest ``queued_at + class * aging``. An event is
+    thus overtaken only by higher-priority events that arrived less than
+    ``aging`` seconds per class later, so actions are never starved.
+    Queueing delay is recorded per class into ``stats``, which queues of the
+    same kind share.
+    """
+
+    def __init__(self, aging: float = 10.0, stats: Dict[str, Dict[str, Any]] = None):
+        self.aging = aging
+        self.stats = stats if stats is not None else _new_stats()
+        super().__init__()
+
+    def _init(self, maxsize):
+        self._queue: Tuple[Deque[Tuple[float, Any]], ...] = tuple(deque() for _ in PRIORITY_CLASSES)
+        self._size = 0
+
+    def qsize(self):
+        return self._size
+
+    def empty(self):
+        return self._size == 0
+
+    def _put(self, event):
+        self._queue[priority_class(event)].append((time.monotonic(), event))
+        self._size += 1
+
+    def _get(self):
+        first = next(index for index, lane in enumerate(self._queue) if lane)
+        chosen, deadline = first, self._queue[first][0][0] + first * self.aging
+        for index in range(first + 1, len(self._queue)):
+            lane = self._queue[index]
+            if lane and lane[0][0] + index * self.aging < deadline:
+                chosen, deadline = index, lane[0][0] + index * self.aging
+        queued_at, event = self._queue[chosen].popleft()
+        self._size -= 1
+
+        stats = self.stats[PRIORITY_CLASSES[chosen]]
+        wait = time.monotonic() - queued_at
+        stats["count"] += 1
+        stats["total_wait"] += wait
+        if wait > stats["max_wait"]:
+            stats["max_wait"] = wait
+        if chosen != first:
+            stats["aged"] += 1
+        return event
+
+
+def _new_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: {"count": 0, "total_wait": 0.0, "max_wait": 0.0, "aged": 0} for name in PRIORITY_CLASSES}
+
+
+class EventPriorities:
+    """
+    事件优先级设置：启用后事件总线、Agent和环境的事件队列按优先级出队。
+
+    Queues created by ``new_queue`` before ``configure`` enabled priorities
+    stay plain FIFO queues, so configure before agents and the environment
+    are created.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.aging = 10.0
+        # 按队列类型（bus、agents、env）分别统计各优先级的排队时间
+        self._stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def configure(self, enabled: bool = None, aging: float = None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if aging is not None:
+            if aging <= 0:
+                raise ValueError(f"Priority aging must be positive, got {aging}")
+            self.aging = float(aging)
+
+    def new_queue(self, kind: str) -> Union[asyncio.Queue, PriorityEventQueue]:
+        """A queue for events of ``kind`` ("bus", "agents" or "env")"""
+        if not self.enabled:
+            return asyncio.Queue()
+        return PriorityEventQueue(self.aging, self._stats.setdefault(kind, _new_stats()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Served events, total, average and maximum queueing delay and aged events per queue kind and class"""
+        result = {}
+        for kind, classes in self._stats.items():
+            result[kind] = {}
+            for name, stats in classes.items():
+                result[kind][name] = dict(stats, avg_wait=stats["total_wait"] / (stats["count"] or 1))
+        return result
+
+
+# 全局事件优先级实例
+event_priorities = EventPriorities()
+
+
+def _derive_event_priority(stats: Dict[str, Dict[str, Dict[str, Any]]]):
+    for classes in stats.values():
+        for class_stats in classes.values():
+            class_stats["avg_wait"] = class_stats.get("total_wait", 0.0) / (class_stats.get("count") or 1)
+
+
+runtime_stats.register("event_priority", event_priorities.get_stats, derive=_derive_event_priority)
@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+from loguru import logger
+
+StatsProvider = Callable[[], Optional[Dict[str, Any]]]
+
+
+class _Section:
+    __slots__ = ("provider", "gauges", "derive")
+
+    def __init__(self):
+        self.provider: Optional[StatsProvider] = None
+        self.gauges: Set[str] = set()
+        self.derive: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+class RuntimeStats:
+    """
+    运行时统计注册表：事件总线、队列、锁、缓存等子系统的运行指标，与token用量分开收集和合并。
+
+    Each subsystem registers a section with a provider returning its current
+    statistics, or None while it is inactive. Merging sections of several
+    nodes sums counters, but takes the maximum of gauges, the keys listed in
+    ``gauges`` and every ``max_*`` key, at any depth; ``derive`` then
+    recomputes ratios and averages on the merged section. Sections collected
+    only on workers are declared at import time of their module, so that the
+    master, which imports it too, merges them the same way.
+    """
+
+    def __init__(self):
+        self._sections: Dict[str, _Section] = {}
+
+    def register(self, name: str, provider: Optional[StatsProvider] = None, gauges: Iterable[str] = (),
+                 derive: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """
+        Declare a section, or set the provider of a declared one.
+
+        Args:
+            name: Section name, e.g. "event_bus"
+            provider: Returns the section's statistics, None to only declare how it merges
+            gauges: Keys holding current levels rather than counters
+            derive: Recomputes derived values of a merged section in place
+        """
+        section = self._sections.setdefault(name, _Section())
+        if provider is not None:
+            section.provider = provider
+        section.gauges.update(gauges)
+        if derive is not None:
+            section.derive = derive
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Current statistics of the active sections on this node"""
+        result = {}
+        for name, section in self._sections.items():
+            if section.provider is None:
+                continue
+            try:
+                stats = section.provider()
+            except Exception as e:
+                logger.error(f"Error collecting {name} runtime stats: {e}")
+                continue
+            if stats:
+                result[name] = stats
+        return result
+
+    def merge(self, stats_by_node: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Merge the runtime statistics of several nodes.
+
+        Args:
+            stats_by_node: Mapping of node id to the output of ``collect`` on that node
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Merged statistics per section
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for stats in stats_by_node.values():
+            for name, section_stats in (stats or {}).items():
+                section = self._sections.get(name)
+                _merge_values(merged.setdefault(name, {}), section_stats, section.gauges if section else set())
+        for name, section_stats in merged.items():
+            section = self._sections.get(name)
+            if section is not None and section.derive is not None:
+                section.derive(section_stats)
+        return merged
+
+
+def _merge_values(target: Dict[str, Any], source: Dict[str, Any], gauges: Set[str]):
+    """Sum counters and take the maximum of gauges of ``source`` into ``target``, recursing into dicts"""
+    for key, value in source.items():
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            if key in gauges or key.startswith("max_"):
+                target[key] = max(target.get(key, value), value)
+            else:
+                target[key] = target.get(key, 0) + value
+        elif isinstance(value, dict):
+            _merge_values(target.setdefault(key, {}), value, gauges)
+        else:
+            target[key] = value
+
+
+# 全局运行时统计实例
+runtime_stats = RuntimeStats()